@@ -4,6 +4,8 @@ LLM 提供商配置模块
 包含所有 LLM 提供商配置，包括 API 密钥和多LLM 设置。
 """
 
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -58,3 +60,415 @@ class LLMConfig(BaseSettings):
         description="Zenmux API 密钥，用于访问 Zenmux 系列模型",
         default="",
     )
+
+    # LLM HTTP 连接池配置（进程内所有 LLMClient 共享）
+    LLM_HTTP2_ENABLED: bool = Field(
+        description="LLM 供应商连接启用 HTTP/2（需安装 h2，否则回退 HTTP/1.1 keep-alive）",
+        default=True,
+    )
+
+    LLM_MAX_CONNECTIONS: int = Field(
+        description="每个 LLM 供应商的最大连接数（可在 models.yaml 中按供应商覆盖）",
+        default=100,
+        ge=1,
+    )
+
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        description="每个 LLM 供应商保持的最大空闲连接数",
+        default=20,
+        ge=0,
+    )
+
+    LLM_KEEPALIVE_EXPIRY: float = Field(
+        description="空闲连接保活时间（秒），超时后关闭",
+        default=60.0,
+        ge=0,
+    )
+
+    LLM_CONNECT_TIMEOUT: float = Field(
+        description="LLM 供应商建立连接超时时间（秒）",
+        default=10.0,
+        gt=0,
+    )
+
+    LLM_REQUEST_TIMEOUT: float = Field(
+        description="LLM 供应商请求读取超时时间（秒）",
+        default=120.0,
+        gt=0,
+    )
+
+    LLM_HTTP_WARMUP: bool = Field(
+        description="启动时预先与各 LLM 供应商建立连接，避免首个请求承担 TLS 握手延迟",
+        default=True,
+    )
+
+    # LLM 路由配置
+    LLM_ROUTING_ENABLED: bool = Field(
+        description="在等价模型路由间按实时延迟与错误率选择，并在失败时切换路由",
+        default=True,
+    )
+
+    LLM_HEDGING_ENABLED: bool = Field(
+        description="允许请求在主路由超过 p95 未返回时向次优路由发送对冲请求",
+        default=True,
+    )
+
+    LLM_HEDGE_MIN_DELAY_MS: float = Field(
+        description="对冲请求的最小等待时间（毫秒）",
+        default=300.0,
+        ge=0,
+    )
+
+    LLM_HEDGE_MIN_SAMPLES: int = Field(
+        description="路由积累到该样本数后才会计算 p95 并对冲",
+        default=20,
+        ge=1,
+    )
+
+    LLM_ROUTE_WINDOW: int = Field(
+        description="每条路由用于统计延迟与错误率的最近请求数",
+        default=200,
+        ge=10,
+    )
+
+    LLM_ROUTE_ERROR_THRESHOLD: float = Field(
+        description="路由错误率超过该值后进入冷却",
+        default=0.5,
+        gt=0,
+        le=1,
+    )
+
+    LLM_ROUTE_COOLDOWN_SECONDS: float = Field(
+        description="路由冷却时长（秒）",
+        default=30.0,
+        ge=0,
+    )
+
+    LLM_RESPONSE_CACHE_ENABLED: bool = Field(
+        description="是否启用LLM响应缓存（仅对设置了 cache_ttl 的请求生效）",
+        default=True,
+    )
+
+    LLM_RESPONSE_CACHE_TTL: int = Field(
+        description="分类/分析类调用的默认响应缓存有效期（秒）",
+        default=3600,
+        ge=0,
+    )
+
+    LLM_PROMPT_CACHE_ENABLED: bool = Field(
+        description="是否为稳定的系统提示词前缀启用供应商侧提示词缓存（Anthropic cache_control）",
+        default=True,
+    )
+
+    LLM_GOVERNOR_ENABLED: bool = Field(
+        description="是否按 models.yaml 中的 rpm/tpm/max_concurrency 对LLM调用限流",
+        default=True,
+    )
+
+    LLM_GOVERNOR_MAX_QUEUE: int = Field(
+        description="每个供应商的最大排队请求数，超过即拒绝（背压）",
+        default=200,
+        ge=1,
+    )
+
+    LLM_GOVERNOR_MAX_WAIT_SECONDS: float = Field(
+        description="单个LLM请求等待限流容量的最长时间（秒）",
+        default=30.0,
+        gt=0,
+    )
+
+    LLM_USAGE_METERING_ENABLED: bool = Field(
+        description="是否按租户/助理/节点/模型计量LLM令牌用量与成本",
+        default=True,
+    )
+
+    LLM_USAGE_FLUSH_INTERVAL_SECONDS: float = Field(
+        description="用量聚合批量写入Redis的间隔（秒）",
+        default=10.0,
+        gt=0,
+    )
+
+    LLM_USAGE_RETENTION_DAYS: int = Field(
+        description="用量小时桶在Redis中的保留天数",
+        default=90,
+        ge=1,
+    )
+
+    LLM_RETRY_MAX_ATTEMPTS: int = Field(
+        description="LLM调用遇到超时、连接错误、429或5xx时的最大尝试次数（含首次）",
+        default=3,
+        ge=1,
+    )
+
+    LLM_RETRY_BASE_DELAY_MS: float = Field(
+        description="重试退避基数（毫秒），实际等待为 [0, 基数×2^n] 内的随机值",
+        default=200.0,
+        ge=0,
+    )
+
+    LLM_RETRY_MAX_DELAY_MS: float = Field(
+        description="单次重试退避上限（毫秒）",
+        default=2000.0,
+        ge=0,
+    )
+
+    LLM_BREAKER_ENABLED: bool = Field(
+        description="是否启用按供应商的熔断器",
+        default=True,
+    )
+
+    LLM_BREAKER_FAILURE_THRESHOLD: int = Field(
+        description="供应商连续失败达到该次数后熔断",
+        default=5,
+        ge=1,
+    )
+
+    LLM_BREAKER_RESET_SECONDS: float = Field(
+        description="熔断持续时间（秒），之后放行单个探测请求",
+        default=30.0,
+        gt=0,
+    )
+
+    LLM_TURN_DEADLINE_SECONDS: float = Field(
+        description="单轮对话内全部LLM调用（含重试）的截止时间（秒），超时后各智能体走兜底逻辑",
+        default=45.0,
+        gt=0,
+    )
+
+    LLM_BATCH_ENABLED: bool = Field(
+        description="后台任务是否通过供应商批处理接口离线执行（关闭时以后台优先级并发同步调用）",
+        default=True,
+    )
+
+    LLM_BATCH_POLL_INTERVAL_SECONDS: int = Field(
+        description="批处理任务状态轮询间隔（秒）",
+        default=60,
+        ge=5,
+    )
+
+    LLM_BATCH_MAX_WAIT_HOURS: int = Field(
+        description="等待批处理任务完成的最长时间（小时），超时后按兜底内容处理",
+        default=24,
+        ge=1,
+    )
+
+    LLM_BATCH_RETENTION_HOURS: int = Field(
+        description="批处理任务及结果在Redis中的保留时间（小时）",
+        default=72,
+        ge=1,
+    )
+
+    LLM_BATCH_SYNC_CONCURRENCY: int = Field(
+        description="无批处理路由时同步执行批量请求的并发数",
+        default=4,
+        ge=1,
+    )
+
+    LLM_MOCK_MODE: bool = Field(
+        description="是否将所有LLM供应商替换为本地模拟实现（离线运行、压测与性能分析，不产生真实调用）",
+        default=False,
+    )
+
+    LLM_MOCK_SEED: int = Field(
+        description="模拟供应商的随机种子，相同种子下输出、延迟与错误序列可复现",
+        default=0,
+    )
+
+    LLM_MOCK_LATENCY_DISTRIBUTION: Literal["fixed", "uniform", "lognormal"] = Field(
+        description="模拟延迟分布：fixed 固定为p50，uniform 为0至2倍p50，lognormal 按p50/p95拟合",
+        default="lognormal",
+    )
+
+    LLM_MOCK_LATENCY_P50_MS: float = Field(
+        description="模拟调用的中位延迟（毫秒）",
+        default=400.0,
+        ge=0,
+    )
+
+    LLM_MOCK_LATENCY_P95_MS: float = Field(
+        description="模拟调用的95分位延迟（毫秒），仅lognormal分布使用",
+        default=1200.0,
+        ge=0,
+    )
+
+    LLM_MOCK_ERROR_RATE: float = Field(
+        description="模拟调用的错误率（0-1），错误以429/5xx返回，参与重试与熔断",
+        default=0.0,
+        ge=0,
+        le=1,
+    )
+
+    LLM_MOCK_TOOL_CALL_RATE: float = Field(
+        description="携带工具的请求返回工具调用的概率（0-1）",
+        default=0.5,
+        ge=0,
+        le=1,
+    )
+
+    LLM_MOCK_REPLY_TEMPLATE: str = Field(
+        description="模拟文本回复模板，{input} 替换为最后一条用户消息（前50字）",
+        default="好的，关于「{input}」我这边为您详细介绍一下~",
+    )
+
+    LLM_CASSETTE_MODE: Literal["off", "record", "replay"] = Field(
+        description="LLM流量录制/回放模式：record 录制真实请求与响应，replay 按请求哈希返回录制的响应",
+        default="off",
+    )
+
+    LLM_CASSETTE_PATH: str = Field(
+        description="录制文件路径（以 .gz 结尾时gzip压缩）",
+        default="data/cassettes/llm.jsonl.gz",
+    )
+
+    LLM_CASSETTE_LATENCY_SCALE: float = Field(
+        description="回放时对录制耗时的缩放系数，1为保持原始耗时，0为立即返回",
+        default=1.0,
+        ge=0,
+    )
+
+    LLM_CASSETTE_ON_MISS: Literal["error", "passthrough"] = Field(
+        description="回放未命中时的处理：error 抛出异常，passthrough 发起真实调用",
+        default="error",
+    )
+
+    FUSED_ANALYSIS_TENANTS: str = Field(
+        description="启用融合分析（情感与意向合并为一次结构化调用）的租户ID，逗号分隔；* 表示全部租户",
+        default="",
+    )
+
+    SALES_SPECULATION_ENABLED: bool = Field(
+        description="是否启用销售回复投机生成：分析阶段同时以上一轮提示词生成回复，提示词分支不变时直接沿用",
+        default=False,
+    )
+
+    SALES_SPECULATION_SNAPSHOT_TTL_HOURS: int = Field(
+        description="线程上一轮提示词快照的保留时长（小时）",
+        default=24,
+        ge=1,
+    )
+
+    ANALYSIS_FAST_PATH_TENANTS: str = Field(
+        description="启用分析快速路径（应答、表情、寒暄等平凡输入由本地规则直接给出情感与意向结果）的租户ID，逗号分隔；* 表示全部租户",
+        default="",
+    )
+
+    ANALYSIS_FAST_PATH_SHADOW_RATE: float = Field(
+        description="快速路径命中后仍调用LLM并比较结果的抽样比例（0-1），用于度量快速路径精度",
+        default=0.05,
+        ge=0,
+        le=1,
+    )
+
+    LLM_TOOL_CONCURRENCY: int = Field(
+        description="单次LLM响应中多个工具调用的最大并发数",
+        default=4,
+        ge=1,
+    )
+
+    LLM_TOOL_TIMEOUT_SECONDS: float = Field(
+        description="工具调用默认超时时间（秒），超时的调用以错误结果返回给LLM",
+        default=10.0,
+        gt=0,
+    )
+
+    WORKFLOW_ANALYSIS_BUDGET_RATIO: float = Field(
+        description="分析节点（情感、意向、融合分析）可使用的本轮剩余时间比例，其余留给销售节点生成回复",
+        default=0.5,
+        gt=0,
+        le=1,
+    )
+
+    WORKFLOW_DEADLINE_GRACE_SECONDS: float = Field(
+        description="单轮对话硬性上限相对截止时间的余量（秒），供超时节点返回默认结果后完成收尾",
+        default=2.0,
+        ge=0,
+    )
+
+    WORKFLOW_CHECKPOINT_ENABLED: bool = Field(
+        description="后台运行（/async）是否将LangGraph检查点保存到Redis，失败重试或进程退出后从最后一个检查点恢复",
+        default=True,
+    )
+
+    WORKFLOW_CHECKPOINT_TTL_HOURS: int = Field(
+        description="运行检查点的保留时长（小时），超过后不再恢复",
+        default=24,
+        ge=1,
+    )
+
+    WORKFLOW_RUN_MAX_RETRIES: int = Field(
+        description="后台运行失败后从检查点重试的最大次数",
+        default=2,
+        ge=0,
+    )
+
+    WORKFLOW_RUN_LEASE_SECONDS: int = Field(
+        description="后台运行租约时长（秒），运行期间定期续期，工作进程退出后过期，由其他进程按此周期扫描认领恢复",
+        default=60,
+        ge=10,
+    )
+
+    MULTIMODAL_IMAGE_CONCURRENCY: int = Field(
+        description="单条消息中多张图片并发生成描述的最大数量",
+        default=4,
+        ge=1,
+    )
+
+    IMAGE_DESCRIPTION_CACHE_TTL_HOURS: float = Field(
+        description="图片描述缓存时长（小时），按内容哈希或规范化URL索引，0 表示不缓存",
+        default=168,
+        ge=0,
+    )
+
+    IMAGE_DESCRIPTION_CACHE_TENANT_TTL_HOURS: str = Field(
+        description="按租户覆盖图片描述缓存时长（小时），格式 tenant_a:24,tenant_b:0；0 表示该租户不缓存",
+        default="",
+    )
+
+    IMAGE_PREPROCESS_ENABLED: bool = Field(
+        description="视觉模型调用前是否在本地拉取、缩放并重新编码图片，以 data URL 交给模型",
+        default=True,
+    )
+
+    IMAGE_PREPROCESS_MAX_EDGE: int = Field(
+        description="图片预处理后的最大边长（像素）",
+        default=1024,
+        ge=64,
+    )
+
+    IMAGE_PREPROCESS_JPEG_QUALITY: int = Field(
+        description="图片重新编码的JPEG质量",
+        default=85,
+        ge=1,
+        le=95,
+    )
+
+    IMAGE_PREPROCESS_MAX_BYTES: int = Field(
+        description="预处理时拉取或解码（data URL）图片的最大字节数，超过时不做预处理",
+        default=20 * 1024 * 1024,
+        ge=1,
+    )
+
+    IMAGE_PREPROCESS_FETCH_TIMEOUT_SECONDS: float = Field(
+        description="预处理时拉取单张图片的超时时间（秒）",
+        default=5.0,
+        gt=0,
+    )
+
+    IMAGE_PREPROCESS_CACHE_SIZE: int = Field(
+        description="进程内缓存的预处理图片数量（按规范化URL），0 表示不缓存",
+        default=256,
+        ge=0,
+    )
+
+    IMAGE_DEDUP_MAX_DISTANCE: int = Field(
+        description="多图调用中感知哈希汉明距离不超过该值的图片视为重复，只保留一张",
+        default=4,
+        ge=0,
+        le=64,
+    )
+
+    PROMPT_CONFIG_RELOAD_INTERVAL_SECONDS: float = Field(
+        description="情感提示词配置文件（prompt_config.json）变更检测间隔（秒），修改后自动重新加载，0 表示不热重载",
+        default=5.0,
+        ge=0,
+    )
@@ -39,6 +39,22 @@ class MilvusConfig(BaseSettings):
         default=10,
     )
 
+    MILVUS_SEARCH_COALESCE_ENABLED: bool = Field(
+        description="是否合并并发的向量搜索请求",
+        default=True,
+    )
+
+    MILVUS_SEARCH_BATCH_SIZE: PositiveInt = Field(
+        description="单次合并搜索的最大查询向量数",
+        default=16,
+    )
+
+    MILVUS_SEARCH_BATCH_WAIT_MS: float = Field(
+        description="合并搜索的最长等待时间（毫秒），即单次查询可增加的最大延迟",
+        default=5.0,
+        ge=0,
+    )
+
     @property
     def milvus_uri(self) -> str:
         """获取Milvus连接URL"""
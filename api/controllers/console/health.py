@@ -2,13 +2,16 @@
 健康检查端点
 
 GET /health - 基础健康检查
+GET /health/metrics - 进程内运行指标
 """
 
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
 from config import mas_config
+from infra.runtimes import breakers, governor
 from utils import get_component_logger, to_isoformat
+from utils.metrics import metrics
 
 logger = get_component_logger(__name__, "HealthCheck")
 
@@ -29,4 +32,22 @@ async def health_check():
             "service": mas_config.APP_NAME,
             "timestamp": to_isoformat()
         }
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/health/metrics")
+async def metrics_snapshot():
+    """
+    运行指标快照
+
+    返回当前worker进程内的计数器与耗时汇总（缓存命中、超时等）及LLM限流与熔断状态
+    """
+    return JSONResponse(
+        status_code=200,
+        content={
+            **metrics.snapshot(),
+            "llm_governor": governor.snapshot(),
+            "llm_breakers": breakers.snapshot(),
+            "timestamp": to_isoformat()
+        }
+    )
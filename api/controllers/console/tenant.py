@@ -6,16 +6,22 @@
 
 流程:
 后端系统 → POST /tenants/{tenant_id}/sync → AI服务
+后端系统 → GET /tenants/{tenant_id}/usage → 查询LLM用量
 """
 
-from fastapi import APIRouter
+from datetime import datetime, timedelta
+from typing import Optional
 
+from fastapi import APIRouter, HTTPException, Query, status
+
+from infra.runtimes import usage_meter
 from libs.types import AccountStatus
 from models import TenantModel
 from schemas import (
     BaseResponse,
     TenantSyncRequest,
     TenantUpdateRequest,
+    TenantUsageResponse,
 )
 from libs.exceptions import (
     TenantManagementException,
@@ -24,10 +30,13 @@ from libs.exceptions import (
     TenantAlreadyExistsException
 )
 from services import TenantService
-from utils import get_component_logger
+from utils import get_component_logger, get_current_datetime
 
 logger = get_component_logger(__name__, "TenantEndpoints")
 
+# 用量查询的最大时间窗口
+MAX_USAGE_WINDOW = timedelta(days=31)
+
 router = APIRouter()
 
 
@@ -128,3 +137,47 @@ async def delete_tenant(tenant_id: str):
     except Exception as e:
         logger.error(f"租户删除失败 {tenant_id}: {e}", exc_info=True)
         raise TenantSyncException(tenant_id, f"租户删除失败: {str(e)}")
+
+
+@router.get("/{tenant_id}/usage", response_model=TenantUsageResponse)
+async def get_tenant_usage(
+    tenant_id: str,
+    start: Optional[datetime] = Query(None, description="窗口起点，默认为24小时前"),
+    end: Optional[datetime] = Query(None, description="窗口终点，默认为当前时间"),
+    group_by: str = Query("node,model", description="分组维度，逗号分隔：assistant_id / node / model"),
+    granularity: str = Query("hour", pattern="^(hour|day|total)$", description="时间粒度"),
+):
+    """
+    查询租户在时间窗口内的LLM令牌用量与成本
+
+    数据按UTC小时聚合，包含已刷写与当前进程尚未刷写的用量。
+    """
+    end = end or get_current_datetime()
+    start = start or end - timedelta(hours=24)
+    if start.tzinfo is None:
+        start = start.astimezone()
+    if end.tzinfo is None:
+        end = end.astimezone()
+
+    if start > end or end - start > MAX_USAGE_WINDOW:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"查询窗口无效，起点须早于终点且跨度不超过{MAX_USAGE_WINDOW.days}天",
+        )
+
+    dimensions = [dim.strip() for dim in group_by.split(",") if dim.strip()]
+    try:
+        items = await usage_meter.query(tenant_id, start, end, group_by=dimensions, granularity=granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"查询租户用量失败 {tenant_id}: {e}", exc_info=True)
+        raise TenantManagementException
+
+    return TenantUsageResponse(
+        tenant_id=tenant_id,
+        start=start,
+        end=end,
+        granularity=granularity,
+        items=items,
+    )
@@ -8,13 +8,15 @@
 - 后台工作流执行管理
 - 状态跟踪和持久化
 - 回调处理和重试机制
+- 检查点恢复：失败重试与进程退出后的未完成运行从最后一个检查点继续
 - 错误处理和审计日志
 """
 
+import asyncio
 from uuid import UUID
 
 from config import mas_config
-from core.app import Orchestrator
+from core.app import Orchestrator, pending_runs
 from libs.types import MessageParams, ThreadStatus
 from models import Thread, WorkflowRun
 from schemas.conversation_schema import CallbackPayload, WorkflowData
@@ -22,9 +24,11 @@ from services import ThreadService
 from utils import (
     get_component_logger,
     get_current_datetime,
+    get_processing_time,
     get_processing_time_ms,
     ExternalClient
 )
+from utils.metrics import metrics
 
 
 logger = get_component_logger(__name__, "BackgroundProcessor")
@@ -80,23 +84,37 @@ class BackgroundWorkflowProcessor:
         input: MessageParams
     ):
         """在后台处理工作流"""
+        workflow = WorkflowRun(
+            workflow_id=run_id,
+            thread_id=thread.thread_id,
+            assistant_id=thread.assistant_id,
+            tenant_id=thread.tenant_id,
+            type="chat",
+            input=input
+        )
+        await self.run_workflow(orchestrator, workflow)
+
+    async def run_workflow(self, orchestrator: Orchestrator, workflow: WorkflowRun):
+        """
+        执行后台运行并发送回调
+
+        启用检查点时登记为未完成运行并持有租约：失败后以相同运行ID重试（从检查点恢复），
+        进程退出时由其他进程认领恢复；运行结束后移除登记并删除检查点。
+        """
+        run_id = workflow.workflow_id
         start_time = get_current_datetime()
         callback_url = str(mas_config.CALLBACK_URL).rstrip('/') + self.callback_endpoint
-        logger.info(f"开始后台处理工作流 - 运行: {run_id}, 线程: {thread.thread_id}")
+        resumable = orchestrator.resumable_graph is not None
+        logger.info(f"开始后台处理工作流 - 运行: {run_id}, 线程: {workflow.thread_id}")
 
+        heartbeat = None
         try:
-            # 创建工作流执行模型
-            workflow = WorkflowRun(
-                workflow_id=run_id,
-                thread_id=thread.thread_id,
-                assistant_id=thread.assistant_id,
-                tenant_id=thread.tenant_id,
-                type="chat",
-                input=input
-            )
+            if resumable:
+                await pending_runs.register(workflow)
+                heartbeat = asyncio.create_task(self._renew_lease(run_id))
 
             # 使用编排器处理消息 - 核心工作流调用
-            result = await orchestrator.dispatch(workflow)
+            result = await self._dispatch(orchestrator, workflow, resumable)
 
             # 构建工作流数据
             workflow_data = WorkflowData(
@@ -106,8 +124,8 @@ class BackgroundWorkflowProcessor:
             )
 
             # 更新线程状态
-            await ThreadService.update_thread_status(thread.thread_id, ThreadStatus.ACTIVE)
-            logger.debug(f"线程状态更新: {thread.thread_id}")
+            await ThreadService.update_thread_status(workflow.thread_id, ThreadStatus.ACTIVE)
+            logger.debug(f"线程状态更新: {workflow.thread_id}")
 
             processing_time = get_processing_time_ms(start_time)
 
@@ -115,9 +133,9 @@ class BackgroundWorkflowProcessor:
 
             payload = CallbackPayload(
                 run_id=run_id,
-                thread_id=thread.thread_id,
-                assistant_id=thread.assistant_id,
-                tenant_id=thread.tenant_id,
+                thread_id=workflow.thread_id,
+                assistant_id=workflow.assistant_id,
+                tenant_id=workflow.tenant_id,
                 status="completed",
                 data=workflow_data,
                 processing_time=processing_time,
@@ -131,18 +149,77 @@ class BackgroundWorkflowProcessor:
             logger.error(f"后台处理失败 - 运行: {run_id}: {e}", exc_info=True)
 
             # 更新线程状态为失败
-            await ThreadService.update_thread_status(thread.thread_id, ThreadStatus.FAILED)
-            logger.debug(f"线程状态更新为失败: {thread.thread_id}")
+            await ThreadService.update_thread_status(workflow.thread_id, ThreadStatus.FAILED)
+            logger.debug(f"线程状态更新为失败: {workflow.thread_id}")
 
             # 发送失败回调
             failure_payload = CallbackPayload(
                 run_id=run_id,
-                thread_id=thread.thread_id,
-                assistant_id=thread.assistant_id,
-                tenant_id=thread.tenant_id,
+                thread_id=workflow.thread_id,
+                assistant_id=workflow.assistant_id,
+                tenant_id=workflow.tenant_id,
                 status="failed",
                 error=str(e),
                 processing_time=get_processing_time_ms(start_time),
                 finished_at=get_current_datetime().isoformat()
             )
             await self.send_callback(callback_url, failure_payload)
+
+        finally:
+            if heartbeat:
+                heartbeat.cancel()
+            if resumable:
+                await self._release(orchestrator, run_id)
+
+    async def _dispatch(self, orchestrator: Orchestrator, workflow: WorkflowRun, resumable: bool):
+        """执行工作流，可恢复运行失败时从检查点重试"""
+        retries = mas_config.WORKFLOW_RUN_MAX_RETRIES if resumable else 0
+        for attempt in range(retries + 1):
+            try:
+                result = await orchestrator.dispatch(workflow, resumable=resumable)
+                if result.error_message:
+                    raise RuntimeError(result.error_message)
+                return result
+            except Exception as e:
+                if attempt >= retries:
+                    raise
+                logger.warning(f"后台运行失败，从检查点重试（第{attempt + 1}次） - 运行: {workflow.workflow_id}: {e}")
+                metrics.incr("workflow_run_retry")
+                await asyncio.sleep(2 ** attempt)
+
+    @staticmethod
+    async def _renew_lease(run_id: UUID):
+        """运行期间定期续期租约"""
+        while True:
+            await asyncio.sleep(mas_config.WORKFLOW_RUN_LEASE_SECONDS / 3)
+            try:
+                await pending_runs.renew(run_id)
+            except Exception as e:
+                logger.warning(f"续期运行租约失败 - 运行: {run_id}: {e}")
+
+    @staticmethod
+    async def _release(orchestrator: Orchestrator, run_id: UUID):
+        """运行结束后移除登记并删除检查点"""
+        try:
+            await pending_runs.complete(run_id)
+        except Exception as e:
+            logger.warning(f"移除未完成运行登记失败 - 运行: {run_id}: {e}")
+        await orchestrator.discard_checkpoints(run_id)
+
+    async def resume_runs(self, orchestrator: Orchestrator, workflows: list[WorkflowRun]):
+        """
+        恢复已认领的未完成运行
+
+        超过检查点保留时长的运行不再恢复，线程标记为失败。
+        """
+        async def resume(workflow: WorkflowRun):
+            if get_processing_time(workflow.created_at) > mas_config.WORKFLOW_CHECKPOINT_TTL_HOURS * 3600:
+                logger.warning(f"未完成运行已过期，放弃恢复 - 运行: {workflow.workflow_id}")
+                metrics.incr("workflow_resume", result="expired")
+                await ThreadService.update_thread_status(workflow.thread_id, ThreadStatus.FAILED)
+                await self._release(orchestrator, workflow.workflow_id)
+                return
+            logger.info(f"恢复未完成运行 - 运行: {workflow.workflow_id}, 线程: {workflow.thread_id}")
+            await self.run_workflow(orchestrator, workflow)
+
+        await asyncio.gather(*(resume(workflow) for workflow in workflows))
@@ -6,14 +6,18 @@
 
 端点功能:
 - 同步工作流执行（等待结果）
+- 流式工作流执行（SSE逐token返回）
 - 异步工作流执行（后台处理）
 - 运行状态查询和监控
 """
 
+import asyncio
+import json
 from typing import Annotated
 from uuid import UUID, uuid4
 
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import StreamingResponse
 
 from libs.types import ThreadStatus
 from models import WorkflowRun, TenantModel
@@ -78,7 +82,8 @@ async def create_run(
             assistant_id=request.assistant_id,
             tenant_id=thread.tenant_id,
             type="chat",
-            input=normalized_input
+            input=normalized_input,
+            sla_seconds=request.sla_seconds
         )
 
         # 使用编排器处理消息
@@ -119,6 +124,107 @@ async def create_run(
         raise HTTPException(status_code=500, detail=f"运行处理失败: {str(e)}")
 
 
+def _sse(event: str, data) -> str:
+    """格式化一条SSE消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post("/stream")
+async def create_stream_run(
+    thread_id: UUID,
+    request: MessageCreateRequest,
+    tenant: Annotated[TenantModel, Depends(validate_and_get_tenant)],
+    orchestrator: Annotated[Orchestrator, Depends(get_orchestrator)]
+):
+    """
+    创建流式运行实例 - SSE工作流端点
+
+    与 /wait 相同的工作流，以 Server-Sent Events 返回：
+    - run_started: 运行已创建
+    - node_completed: 前序节点（情感、意向分析）完成
+    - tool_call: SalesAgent 正在调用工具
+    - token: SalesAgent 回复的增量文本
+    - completed: 最终结果（与 /wait 响应结构一致，客户端以其中 response 为准）
+    - error: 运行失败
+    """
+    try:
+        # 验证工作流权限（线程、租户、助理）
+        thread = await WorkflowService.verify_workflow_permissions(
+            tenant_id=tenant.tenant_id,
+            assistant_id=request.assistant_id,
+            thread_id=thread_id,
+            use_cache=True
+        )
+
+        # 标准化输入（处理音频转录）
+        normalized_input, asr_results = await AudioService.normalize_input(request.input, str(thread.thread_id))
+    except HTTPException:
+        await ThreadService.update_thread_status(thread_id, ThreadStatus.FAILED)
+        raise
+    except Exception as e:
+        await ThreadService.update_thread_status(thread_id, ThreadStatus.FAILED)
+        logger.error(f"流式运行创建失败 - 线程: {thread_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"流式运行创建失败: {str(e)}")
+
+    start_time = get_current_datetime()
+    workflow_id = uuid4()
+
+    workflow = WorkflowRun(
+        workflow_id=workflow_id,
+        thread_id=thread.thread_id,
+        assistant_id=request.assistant_id,
+        tenant_id=thread.tenant_id,
+        type="chat",
+        input=normalized_input,
+        sla_seconds=request.sla_seconds
+    )
+
+    async def event_stream():
+        logger.info(f"开始流式运行处理 - 线程: {thread.thread_id}")
+        # 未收到完成事件（失败或客户端断开）时线程标记为失败，不停留在 BUSY
+        final_status = ThreadStatus.FAILED
+
+        try:
+            yield _sse("run_started", {"run_id": workflow_id, "thread_id": thread.thread_id})
+
+            async for event in orchestrator.dispatch_stream(workflow):
+                if event["event"] != "completed":
+                    yield _sse(event["event"], event["data"])
+                    continue
+
+                result = event["data"]
+                processing_time = get_processing_time_ms(start_time)
+                final_status = ThreadStatus.ACTIVE
+
+                response = ThreadRunResponse(
+                    run_id=workflow_id,
+                    thread_id=result.thread_id,
+                    status="completed",
+                    response=result.output,
+                    input_tokens=result.input_tokens,
+                    output_tokens=result.output_tokens,
+                    processing_time=processing_time,
+                    asr_results=asr_results,
+                    multimodal_outputs=result.multimodal_outputs if result.multimodal_outputs else None,
+                    invitation=result.business_outputs
+                )
+                logger.info(f"流式运行处理完成 - 线程: {thread.thread_id}, 执行: {workflow_id}, 耗时: {processing_time:.2f}ms")
+                yield _sse("completed", response.model_dump(mode="json"))
+
+        except Exception as e:
+            logger.error(f"流式运行处理失败 - 线程: {thread.thread_id}: {e}", exc_info=True)
+            yield _sse("error", {"run_id": workflow_id, "detail": f"运行处理失败: {str(e)}"})
+        finally:
+            # 客户端断开时生成器被关闭（GeneratorExit）或取消，屏蔽取消以确保状态写入完成
+            await asyncio.shield(ThreadService.update_thread_status(thread.thread_id, final_status))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/suggestion", response_model=ThreadRunResponse)
 async def create_suggestion(
     thread_id: UUID,
@@ -44,7 +44,7 @@ async def beautify_text(
             f"期望数量: {request.result_count}"
         )
 
-        result = await service.text_beautify(request)
+        result = await service.text_beautify(request, tenant.tenant_id)
 
         logger.info(
             f"文本美化完成 - 运行ID: {result.run_id}, "
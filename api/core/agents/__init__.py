@@ -4,6 +4,7 @@
 该包包含行业数字营销的多智能体系统的所有专业智能体:
 - 合规审查智能体 (Compliance Review Agent)
 - 情感与意图分析智能体 (Sentiment & Intent Analysis Agent)
+- 融合分析智能体 (Fused Analysis Agent)
 - 销售智能体 (Sales Agent)
 """
 
@@ -14,6 +15,8 @@ from .intent.agent import IntentAgent
 from .marketing.agent import MarketingAgent
 from .sales.agent import SalesAgent
 from .sentiment.agent import SentimentAnalysisAgent
+# 融合分析复用情感与意向智能体，需在其后导入
+from .analysis.agent import FusedAnalysisAgent, fused_analysis_enabled
 
 
 __all__ = [
@@ -22,8 +25,10 @@ __all__ = [
     "ComplianceAgent",
     "ComplianceRule",
     "ComplianceRuleManager",
+    "FusedAnalysisAgent",
     "IntentAgent",
     "MarketingAgent",
     "SalesAgent",
-    "SentimentAnalysisAgent"
+    "SentimentAnalysisAgent",
+    "fused_analysis_enabled"
 ] 
\ No newline at end of file
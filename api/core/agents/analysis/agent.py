@@ -0,0 +1,246 @@
+"""
+Fused Analysis Agent
+
+在一次结构化LLM调用中同时完成情感分析与意向分析，替代并行的 sentiment/intent 两个节点。
+
+两个独立节点各自发送一遍重叠的对话历史；融合后每轮分析阶段只有一次调用、一份输入。
+写入的状态字段（sentiment_analysis、matched_prompt、journey_stage、intent_analysis、
+business_outputs、actions）与两个独立节点完全一致，下游 SalesAgent 无需改动。
+"""
+
+from collections.abc import Mapping
+from typing import Any
+from uuid import UUID
+
+from langfuse import observe
+from pydantic import BaseModel
+
+from config import mas_config
+from core.entities import WorkflowExecutionModel
+from core.prompts.template_loader import get_prompt_template
+from infra.runtimes import CompletionsRequest, LLMResponse, RequestPriority
+from libs.types import Message, MessageParams
+from utils import extract_json_object, get_current_datetime, get_processing_time
+from utils.metrics import metrics
+from ..intent.agent import IntentAgent
+from ..sentiment.agent import SentimentAnalysisAgent
+from ..sentiment.sentiment_analyzer import LLMSentimentAnalyzer
+from .fast_path import analyze_with_fast_path, fast_path_enabled, trivial_classifier
+from .schemas import FusedAnalysisOutput
+
+FUSED_PROVIDER = "openrouter"
+FUSED_MODEL = "anthropic/claude-haiku-4.5"
+
+# 模型给出的旅程阶段提示的有效取值，与提示词矩阵的旅程阶段一致
+JOURNEY_STAGES = ("awareness", "consideration", "decision")
+
+
+def fused_analysis_enabled(tenant_id: str) -> bool:
+    """租户是否启用融合分析（由 FUSED_ANALYSIS_TENANTS 配置）"""
+    tenants = {t.strip() for t in mas_config.FUSED_ANALYSIS_TENANTS.split(",") if t.strip()}
+    return "*" in tenants or tenant_id in tenants
+
+
+class FusedAnalysisAgent(SentimentAnalysisAgent):
+    """
+    融合分析智能体
+
+    复用情感分析智能体的输入处理、记忆检索、旅程阶段判定与提示词匹配，
+    以及意向分析智能体的结果校正与业务输出生成，仅将两次LLM调用合并为一次。
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.agent_name = "fused_analysis"
+        # 仅复用结果校正与业务输出逻辑，不经由它们发起调用
+        self.intent_agent = IntentAgent()
+        self.sentiment_parser = LLMSentimentAnalyzer(FUSED_PROVIDER, FUSED_MODEL, invoke_llm_fn=None)
+
+    @observe(name="fused-analysis", as_type="generation")
+    async def process_conversation(self, state: WorkflowExecutionModel) -> dict:
+        """
+        处理对话状态中的情感与意向分析
+
+        工作流程：
+        1. 存储用户输入到记忆并处理多模态输入
+        2. 检索记忆上下文
+        3. 单次结构化调用完成情感、旅程阶段提示与三种意向分析（平凡输入走本地快速路径）
+        4. 采用有效的旅程阶段提示（否则按对话轮次判定）并匹配销售策略提示词
+        5. 合并情感与意向两部分的增量状态
+
+        Args:
+            state: 当前工作流执行状态
+
+        Returns:
+            dict: 与 sentiment、intent 两个节点合并后相同的状态增量
+        """
+        start_time = get_current_datetime()
+        self.logger.info("=== Fused Analysis Agent ===")
+
+        tenant_id = state.tenant_id
+        thread_id = str(state.thread_id)
+
+        await self._store_input(state)
+        processed_text, multimodal_context = await self._process_input(state.input, tenant_id)
+        short_term_messages, _ = await self.memory_manager.retrieve_context(
+            tenant_id=tenant_id,
+            thread_id=thread_id,
+            query_text=processed_text,
+        )
+        recent_user_messages = [msg for msg in short_term_messages if getattr(msg, "role", None) == "user"]
+
+        trivial = trivial_classifier.classify(state.input, short_term_messages) if fast_path_enabled(tenant_id) else None
+        sentiment_result, intent_result = await analyze_with_fast_path(
+            self.agent_name,
+            trivial,
+            lambda match: (match.sentiment_result(), match.intent_result()),
+            lambda: self._analyze(
+                inputs=recent_user_messages + state.input,
+                tenant_id=tenant_id,
+                thread_id=state.thread_id,
+                run_id=state.workflow_id
+            ),
+            lambda result, match: match.agrees_sentiment(result[0]) and match.agrees_intent(result[1])
+        )
+
+        journey_stage = self._journey_stage(sentiment_result.get("journey_hint"), short_term_messages)
+        matched_prompt = self._match_prompt(sentiment_result.get("score", 0.5), journey_stage)
+        self.logger.info(
+            f"融合分析结果 - sentiment: {sentiment_result.get('sentiment')}, score: {sentiment_result.get('score')}, "
+            f"journey: {journey_stage} (提示: {sentiment_result.get('journey_hint')}), "
+            f"matched_key: {matched_prompt['matched_key']}"
+        )
+
+        if sentiment_result.get("score", 0.5) > 0.5:
+            await self._inject_external_memories(matched_prompt, tenant_id, thread_id, processed_text)
+
+        update = self._build_state_update(
+            sentiment_result, matched_prompt, journey_stage, processed_text, multimodal_context
+        )
+        # 令牌已计入情感部分，意向部分不再重复累加
+        intent_update = self.intent_agent._update_state_with_intent(
+            {**intent_result, "input_tokens": 0, "output_tokens": 0},
+            recent_user_messages
+        )
+        self._merge_intent_update(update, intent_update)
+
+        self.logger.info(f"融合分析完成: 耗时{get_processing_time(start_time):.2f}s")
+        return update
+
+    def fallback_state(self, state: WorkflowExecutionModel) -> dict:
+        """超出时间预算时的默认状态：中性情感 + 兜底提示词，三种意向均未检测到"""
+        update = super().fallback_state(state)
+        self._merge_intent_update(update, self.intent_agent.fallback_state(state))
+        return update
+
+    def _journey_stage(self, hint: Any, short_term_messages: list) -> str:
+        """采用模型按对话内容判断的旅程阶段；提示缺失或无效（如快速路径、文本解析失败）时按对话轮次判定"""
+        if isinstance(hint, str) and hint.strip().lower() in JOURNEY_STAGES:
+            return hint.strip().lower()
+        return self._determine_journey_stage(short_term_messages)
+
+    @staticmethod
+    def _merge_intent_update(update: dict, intent_update: dict):
+        """将意向部分的增量状态并入情感部分（令牌不重复累加）"""
+        update["actions"] = intent_update["actions"]
+        update["intent_analysis"] = intent_update["intent_analysis"]
+        update["business_outputs"] = intent_update["business_outputs"]
+        update["values"]["agent_responses"].update(intent_update["values"]["agent_responses"])
+
+    async def _analyze(
+        self,
+        inputs: MessageParams,
+        tenant_id: str,
+        thread_id: UUID,
+        run_id: UUID
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        """
+        执行融合分析
+
+        Args:
+            inputs: 最近用户消息 + 当前用户输入
+            tenant_id: 租户ID
+            thread_id: 线程ID
+            run_id: 运行ID
+
+        Returns:
+            tuple: (情感分析结果, 意向分析结果)，格式分别与两个独立节点一致
+        """
+        try:
+            # 意向提示词在前、融合补充在后，整体作为可缓存的稳定前缀
+            system_prompt = "\n".join([
+                get_prompt_template(template_name="intent_analysis", template_file="agent_prompt.yaml"),
+                get_prompt_template(template_name="fused_analysis", template_file="agent_prompt.yaml"),
+            ])
+            request = CompletionsRequest(
+                id=run_id,
+                provider=FUSED_PROVIDER,
+                model=FUSED_MODEL,
+                messages=[Message(role="system", content=system_prompt), *inputs],
+                temperature=0.1,
+                max_tokens=1500,
+                output_model=FusedAnalysisOutput if self.llm_client.supports_structured(FUSED_PROVIDER) else None,
+                hedge=True,
+                cache_ttl=mas_config.LLM_RESPONSE_CACHE_TTL,
+                prompt_cache_prefix=1,
+                priority=RequestPriority.INTERACTIVE
+            )
+
+            response = await self.invoke_llm(request, tenant_id, thread_id)
+            return self._split_response(response)
+
+        except Exception as e:
+            self.logger.error(f"融合分析失败: {e}")
+            metrics.incr("llm_output_parse", agent=self.agent_name, result="failed")
+            return self.sentiment_analyzer._fallback_result(""), self.intent_agent._get_fallback_result(error=str(e))
+
+    def _split_response(self, response: LLMResponse) -> tuple[dict[str, Any], dict[str, Any]]:
+        """
+        将融合结果拆分为情感与意向两部分，并分别按两个独立节点的规则校正
+
+        Args:
+            response: LLM响应对象
+
+        Returns:
+            tuple: (情感分析结果, 意向分析结果)
+        """
+        if isinstance(response.content, BaseModel):
+            result = response.content.model_dump()
+            source = "structured"
+        elif isinstance(response.content, Mapping):
+            result = dict(response.content)
+            source = "structured"
+        else:
+            result = extract_json_object(str(response.content or ""))
+            source = "text"
+
+        usage = response.usage
+        if result is None:
+            self.logger.warning(f"响应中未找到JSON对象: {str(response.content)[:200]}")
+            metrics.incr("llm_output_parse", agent=self.agent_name, result="failed")
+            sentiment_result = self.sentiment_parser._fallback_parse(str(response.content or ""))
+            intent_result = self.intent_agent._get_fallback_result(response=response, error="JSON解析失败")
+        else:
+            metrics.incr("llm_output_parse", agent=self.agent_name, result=source)
+            sentiment_result = self.sentiment_parser._validate_and_normalize(result)
+            sentiment_result["journey_hint"] = result.get("journey_hint")
+            intent_result = self.intent_agent._validate_and_normalize({
+                key: result.get(key) or {}
+                for key in ("assets_intent", "appointment_intent", "audio_output_intent")
+            })
+            intent_result.update({
+                "timestamp": get_current_datetime().isoformat(),
+                "input_tokens": usage.input_tokens,
+                "output_tokens": usage.output_tokens
+            })
+
+        sentiment_result.update({
+            "tokens_used": usage.input_tokens + usage.output_tokens,
+            "total_tokens": usage.input_tokens + usage.output_tokens,
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "analyzer": type(self).__name__,
+            "llm_provider": FUSED_PROVIDER
+        })
+        return sentiment_result, intent_result
@@ -0,0 +1,265 @@
+"""
+分析阶段零LLM快速路径
+
+大量客户消息只是应答、表情或寒暄（“嗯”“好的”“👍”），情感与意向都没有分析价值。
+本地规则与词表分类器在情感/意向分析的LLM调用之前识别这类输入，
+直接给出与LLM分析相同结构的结果，省去该次调用。
+
+只处理有把握的输入：
+- 仅含文本（语音、图片等多模态输入始终交给LLM）
+- 整条输入完全匹配词表规则
+- 应答类输入（“好的”“可以”“👍”）紧跟在助手的提问之后时可能是对邀约的确认，交给LLM
+
+精度通过影子采样度量：按比例对快速路径命中的输入仍调用LLM，
+比较两者结果并记录一致率（analysis_fast_path_shadow 指标），此时使用LLM结果。
+"""
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import random
+import re
+from typing import Any, Optional, TypeVar
+
+from config import mas_config
+from libs.types import InputType, MessageParams
+from utils import get_current_datetime
+from utils.metrics import metrics
+
+T = TypeVar("T")
+
+# 判断前匹配时去除的标点与空白
+_STRIP_PATTERN = re.compile(r"[\s。，,.!！?？~～…、]+")
+# 助手上一条消息以提问结尾（应答可能是确认邀约等意向）
+_QUESTION_PATTERN = re.compile(r"([?？]|[吗呢么嘛][^\w]*)$")
+
+
+@dataclass(frozen=True)
+class TrivialRule:
+    """词表规则"""
+
+    name: str
+    # 表情规则按字符集合匹配，无正则
+    pattern: Optional[re.Pattern]
+    sentiment: str
+    score: float
+    # 应答类：助手刚提问时不处理
+    acknowledgement: bool = False
+
+
+RULES = (
+    TrivialRule("acknowledgement", re.compile(
+        r"(嗯+|恩+|哦+|噢+|喔+|好+|好的|好滴|好哒|好嘞|好吧|行+|行吧|可以|ok+|okay|收到|知道了?|明白了?|了解|是的?|对的?)"
+    ), "neutral", 0.3, acknowledgement=True),
+    TrivialRule("thanks", re.compile(r"(谢谢(你|您)?|多谢|感谢|thx|thanks|thank you)"), "positive", 0.6),
+    TrivialRule("laughter", re.compile(r"(哈+|嘿+|呵呵|嘻+|h{2,})"), "positive", 0.6),
+    TrivialRule("greeting", re.compile(
+        r"(你好|您好|hi|hello|哈喽|在吗|在不在|早+|早上好|中午好|晚上好|晚安)"
+    ), "neutral", 0.4),
+)
+
+# 表情：整条输入只由同一类表情组成时处理
+POSITIVE_EMOJI = frozenset("😀😁😄😊☺🙂😘🥰😍💕❤🌹🎉👏🙏")
+ACKNOWLEDGE_EMOJI = frozenset("👍👌🤝✌")
+NEGATIVE_EMOJI = frozenset("😢😭😞😔😡😠👎💔")
+# 表情变体选择符、零宽连接符与肤色修饰符
+_EMOJI_MODIFIERS = re.compile("[\ufe0f\u200d\U0001f3fb-\U0001f3ff]")
+
+EMOJI_ACKNOWLEDGEMENT = TrivialRule("emoji_acknowledgement", None, "positive", 0.6, acknowledgement=True)
+EMOJI_POSITIVE = TrivialRule("emoji_positive", None, "positive", 0.6)
+EMOJI_NEGATIVE = TrivialRule("emoji_negative", None, "negative", 0.6)
+
+
+@dataclass(frozen=True)
+class TrivialMatch:
+    """快速路径命中结果"""
+
+    rule: str
+    sentiment: str
+    score: float
+
+    def sentiment_result(self) -> dict[str, Any]:
+        """与 LLMSentimentAnalyzer 相同结构的情感分析结果"""
+        positive = self.sentiment == "positive"
+        negative = self.sentiment == "negative"
+        return {
+            "sentiment": self.sentiment,
+            "score": self.score,
+            "urgency": "low",
+            "confidence": 0.9,
+            "emotional_indicators": {
+                "enthusiasm": 0.6 if positive else 0.2,
+                "concern": 0.6 if negative else 0.1,
+                "satisfaction": 0.6 if positive else 0.3
+            },
+            "tokens_used": 0,
+            "total_tokens": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "analyzer": "TrivialInputClassifier",
+            "fast_path_rule": self.rule
+        }
+
+    def intent_result(self) -> dict[str, Any]:
+        """与 IntentAgent 相同结构的意向分析结果（三种意向均未检测到）"""
+        return {
+            "assets_intent": {
+                "detected": False,
+                "urgency_level": "low",
+                "asset_types": [],
+                "priority_score": 0.0,
+                "confidence": 0.9,
+                "specific_requests": [],
+                "recommendation": "no_material",
+                "summary": ""
+            },
+            "appointment_intent": {
+                "detected": False,
+                "intent_strength": 0.0,
+                "time_window": "unknown",
+                "confidence": 0.9,
+                "signals": [],
+                "recommendation": "no_appointment",
+                "extracted_entities": {},
+                "summary": ""
+            },
+            "audio_output_intent": {
+                "detected": False,
+                "confidence": 0.9,
+                "trigger_reason": "none",
+                "summary": ""
+            },
+            "timestamp": get_current_datetime().isoformat(),
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "fast_path_rule": self.rule
+        }
+
+    def agrees_sentiment(self, result: dict[str, Any]) -> bool:
+        """LLM情感分析结果与快速路径是否一致（情感倾向相同）"""
+        return result.get("sentiment") == self.sentiment
+
+    @staticmethod
+    def agrees_intent(result: dict[str, Any]) -> bool:
+        """LLM意向分析结果与快速路径是否一致（三种意向均未检测到）"""
+        return not any(
+            (result.get(key) or {}).get("detected")
+            for key in ("assets_intent", "appointment_intent", "audio_output_intent")
+        )
+
+
+def fast_path_enabled(tenant_id: str) -> bool:
+    """租户是否启用快速路径（由 ANALYSIS_FAST_PATH_TENANTS 配置）"""
+    tenants = {t.strip() for t in mas_config.ANALYSIS_FAST_PATH_TENANTS.split(",") if t.strip()}
+    return "*" in tenants or tenant_id in tenants
+
+
+def _message_text(message) -> Optional[str]:
+    """消息的文本内容；含非文本内容时返回None"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    if not content or any(item.type != InputType.TEXT for item in content):
+        return None
+    return "".join(item.content for item in content)
+
+
+class TrivialInputClassifier:
+    """基于规则与词表的平凡输入分类器"""
+
+    def classify(self, inputs: MessageParams, history: Optional[MessageParams] = None) -> Optional[TrivialMatch]:
+        """
+        识别平凡输入
+
+        参数:
+            inputs: 当轮用户输入
+            history: 短期对话历史，用于判断助手是否刚提问
+
+        返回:
+            Optional[TrivialMatch]: 有把握时返回命中结果，否则返回None
+        """
+        texts = [_message_text(message) for message in inputs or []]
+        if not texts or any(text is None for text in texts):
+            return None
+
+        text = _STRIP_PATTERN.sub("", "".join(texts)).lower()
+        if not text:
+            return None
+
+        rule = self._match_emoji(text) or self._match_rule(text)
+        if rule is None:
+            return None
+        if rule.acknowledgement and self._assistant_asked(history):
+            return None
+        return TrivialMatch(rule=rule.name, sentiment=rule.sentiment, score=rule.score)
+
+    @staticmethod
+    def _match_rule(text: str) -> Optional[TrivialRule]:
+        for rule in RULES:
+            if rule.pattern.fullmatch(text):
+                return rule
+        return None
+
+    @staticmethod
+    def _match_emoji(text: str) -> Optional[TrivialRule]:
+        chars = set(_EMOJI_MODIFIERS.sub("", text))
+        if not chars:
+            return None
+        if chars <= ACKNOWLEDGE_EMOJI:
+            return EMOJI_ACKNOWLEDGEMENT
+        if chars <= POSITIVE_EMOJI | ACKNOWLEDGE_EMOJI:
+            return EMOJI_POSITIVE
+        if chars <= NEGATIVE_EMOJI:
+            return EMOJI_NEGATIVE
+        return None
+
+    @staticmethod
+    def _assistant_asked(history: Optional[MessageParams]) -> bool:
+        """短期历史中最后一条助手消息是否以提问结尾"""
+        for message in reversed(history or []):
+            role = message.get("role") if isinstance(message, dict) else getattr(message, "role", None)
+            if role != "assistant":
+                continue
+            content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+            return isinstance(content, str) and bool(_QUESTION_PATTERN.search(content.strip()))
+        return False
+
+
+# 全局分类器
+trivial_classifier = TrivialInputClassifier()
+
+
+async def analyze_with_fast_path(
+    agent: str,
+    match: Optional[TrivialMatch],
+    fast_result: Callable[[TrivialMatch], T],
+    analyze: Callable[[], Awaitable[T]],
+    agrees: Callable[[T, TrivialMatch], bool]
+) -> T:
+    """
+    快速路径命中时直接返回本地结果，否则调用LLM分析
+
+    命中的输入按 ANALYSIS_FAST_PATH_SHADOW_RATE 抽样仍调用LLM，记录两者是否一致。
+
+    参数:
+        agent: 智能体名称（指标标签）
+        match: 分类结果，未命中为None
+        fast_result: 由命中结果构造分析结果
+        analyze: LLM分析
+        agrees: 比较LLM结果与命中结果是否一致
+
+    返回:
+        分析结果
+    """
+    if match is not None and random.random() >= mas_config.ANALYSIS_FAST_PATH_SHADOW_RATE:
+        metrics.incr("analysis_fast_path", agent=agent, rule=match.rule)
+        return fast_result(match)
+
+    result = await analyze()
+    if match is not None:
+        metrics.incr(
+            "analysis_fast_path_shadow",
+            agent=agent,
+            rule=match.rule,
+            result="agree" if agrees(result, match) else "disagree"
+        )
+    return result
@@ -0,0 +1,21 @@
+"""
+融合分析结构化输出模型
+
+在意向分析结果的顶层并入情感分析字段与旅程阶段提示，
+使情感与意向在一次结构化调用中完成。字段约束与两个独立模型保持一致。
+"""
+
+from typing import Literal
+
+from pydantic import Field
+
+from ..intent.schemas import IntentAnalysisOutput
+from ..sentiment.schemas import SentimentAnalysisOutput
+
+
+class FusedAnalysisOutput(SentimentAnalysisOutput, IntentAnalysisOutput):
+    """情感与意向融合分析结果"""
+
+    journey_hint: Literal["awareness", "consideration", "decision"] = Field(
+        description="按对话内容判断的客户旅程阶段：认知/考虑/决策"
+    )
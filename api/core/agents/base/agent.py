@@ -13,15 +13,27 @@
 """
 
 from abc import ABC, abstractmethod
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 import json
+import time
+from typing import Any, TypeAlias
 from uuid import UUID
 
+from config import mas_config
 from core.entities import WorkflowExecutionModel
 from core.memory import StorageManager
-from core.tools import get_handler
-from infra.runtimes import LLMClient, CompletionsRequest, LLMResponse, TokenUsage
+from core.tools import get_handler, get_timeout
+from infra.runtimes import LLMClient, CompletionsRequest, LLMResponse, LLMStreamChunk, TokenUsage, ToolCallData
 from libs.types import MessageParams, InputContent, AssistantMessage, ToolMessage
 from utils import get_component_logger
+from utils.metrics import metrics
+
+StreamCallback: TypeAlias = Callable[[LLMStreamChunk], Awaitable[None]]
+
+# 工具结果缓存的最大条目数（按运行ID、工具名与参数索引）
+TOOL_RESULT_CACHE_SIZE = 256
 
 
 class BaseAgent(ABC):
@@ -47,6 +59,8 @@ class BaseAgent(ABC):
         self.llm_client = LLMClient()
         self.memory_manager = StorageManager()
         self.logger = get_component_logger(__name__)
+        # 同一次运行内的工具结果（进行中的调用以Task共享）
+        self._tool_results: OrderedDict[tuple, asyncio.Task] = OrderedDict()
     
     
     @abstractmethod
@@ -65,12 +79,27 @@ class BaseAgent(ABC):
         """
         pass
 
+    def fallback_state(self, state: WorkflowExecutionModel) -> dict:
+        """
+        节点超出时间预算时的默认状态增量
+
+        子类按需覆盖，使下游节点能以默认结果继续执行。
+
+        参数:
+            state: 当前工作流执行状态模型
+
+        返回:
+            dict: 默认状态增量
+        """
+        return {"input_tokens": 0, "output_tokens": 0}
+
     async def invoke_llm(
         self,
         request: CompletionsRequest,
         tenant_id: str,
         thread_id: UUID,
-        max_iterations: int = 3
+        max_iterations: int = 3,
+        on_delta: StreamCallback | None = None
     ) -> LLMResponse:
         """
         调用 LLM 并支持工具调用
@@ -81,18 +110,22 @@ class BaseAgent(ABC):
         3. 将工具结果返回给 LLM
         4. LLM 生成最终回复
 
+        同一批工具调用并发执行（受并发上限与单工具超时约束），
+        同一次运行（request.id）内相同工具与参数的结果复用。
+
         Args:
             request: LLM 请求
             tenant_id
             thread_id
             max_iterations: 最大工具调用迭代次数（防止无限循环）
+            on_delta: 流式回调，提供时以流式方式调用LLM并逐片段回调（含工具调用增量）
 
         Returns:
             LLMResponse: 最终的 LLM 响应
         """
         if not request.tools:
             # 没有工具，直接调用 LLM
-            return await self.llm_client.completions(request)
+            return await self._complete(request, on_delta)
 
 
         # 迭代调用：LLM → 工具执行 → LLM → ...
@@ -105,7 +138,7 @@ class BaseAgent(ABC):
             self.logger.info(f"工具调用迭代 {iteration}/{max_iterations}")
 
             # 调用 LLM
-            response = await self.llm_client.completions(request)
+            response = await self._complete(request, on_delta)
 
             # 检查是否有工具调用
             if not response.tool_calls or response.finish_reason == "stop":
@@ -137,6 +170,8 @@ class BaseAgent(ABC):
 
             accumulated_tokens.input_tokens += response.usage.input_tokens
             accumulated_tokens.output_tokens += response.usage.output_tokens
+            accumulated_tokens.cached_tokens += response.usage.cached_tokens
+            accumulated_tokens.cache_write_tokens += response.usage.cache_write_tokens
             response.usage = accumulated_tokens
 
             # 将 assistant 的响应添加到消息历史（包含 tool_calls）
@@ -157,21 +192,12 @@ class BaseAgent(ABC):
             )
             request.messages.append(assistant_message)
 
-            # 执行所有工具调用
-            for tool_call in response.tool_calls:
-                handler = get_handler(tool_call.name)
-                self.logger.info(f"执行工具: {tool_call.name}, 参数: {tool_call.arguments}")
-                result = await handler(
-                    tenant_id=tenant_id,
-                    thread_id=thread_id,
-                    **tool_call.arguments
-                )
-                result = json.dumps(result, ensure_ascii=False)
-
-                # 将工具结果添加到消息历史
+            # 并发执行本批工具调用，结果按调用顺序添加到消息历史
+            results = await self._execute_tools(response.tool_calls, request.id, tenant_id, thread_id)
+            for tool_call, result in zip(response.tool_calls, results):
                 tool_message = ToolMessage(
                     role="tool",
-                    content=result,
+                    content=json.dumps(result, ensure_ascii=False, default=str),
                     tool_call_id=tool_call.id
                 )
                 request.messages.append(tool_message)
@@ -185,6 +211,109 @@ class BaseAgent(ABC):
 
         return response
 
+    async def _execute_tools(
+        self,
+        tool_calls: list[ToolCallData],
+        run_id: UUID,
+        tenant_id: str,
+        thread_id: UUID
+    ) -> list[dict[str, Any]]:
+        """
+        并发执行一批工具调用（并发数受 LLM_TOOL_CONCURRENCY 限制）
+
+        Returns:
+            list: 与 tool_calls 顺序一致的工具结果
+        """
+        semaphore = asyncio.Semaphore(mas_config.LLM_TOOL_CONCURRENCY)
+
+        async def run(tool_call: ToolCallData) -> dict[str, Any]:
+            async with semaphore:
+                return await self._execute_tool(tool_call, run_id, tenant_id, thread_id)
+
+        return list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))
+
+    async def _execute_tool(
+        self,
+        tool_call: ToolCallData,
+        run_id: UUID,
+        tenant_id: str,
+        thread_id: UUID
+    ) -> dict[str, Any]:
+        """
+        执行单个工具调用，同一次运行内相同工具与参数的结果复用
+
+        进行中的相同调用共享同一次执行；失败与超时的结果不缓存。
+        """
+        arguments = json.dumps(tool_call.arguments, ensure_ascii=False, sort_keys=True, default=str)
+        key = (run_id, tool_call.name, arguments)
+
+        task = self._tool_results.get(key)
+        if task is not None:
+            self._tool_results.move_to_end(key)
+            metrics.incr("tool_call", tool=tool_call.name, result="memoized")
+            result, _ = await asyncio.shield(task)
+            return result
+
+        task = asyncio.create_task(self._call_tool(tool_call, tenant_id, thread_id))
+        self._tool_results[key] = task
+        while len(self._tool_results) > TOOL_RESULT_CACHE_SIZE:
+            self._tool_results.popitem(last=False)
+
+        result, ok = await asyncio.shield(task)
+        if not ok:
+            self._tool_results.pop(key, None)
+        return result
+
+    async def _call_tool(self, tool_call: ToolCallData, tenant_id: str, thread_id: UUID) -> tuple[dict[str, Any], bool]:
+        """
+        调用工具处理函数，超时与异常转换为错误结果返回给LLM
+
+        Returns:
+            tuple: (工具结果, 是否成功)
+        """
+        timeout = get_timeout(tool_call.name)
+        self.logger.info(f"执行工具: {tool_call.name}, 参数: {tool_call.arguments}")
+        start = time.monotonic()
+        try:
+            handler = get_handler(tool_call.name)
+            result = await asyncio.wait_for(
+                handler(tenant_id=tenant_id, thread_id=thread_id, **tool_call.arguments),
+                timeout
+            )
+            metrics.incr("tool_call", tool=tool_call.name, result="ok")
+            return result, True
+        except TimeoutError:
+            self.logger.warning(f"工具执行超时: {tool_call.name} ({timeout}s)")
+            metrics.incr("tool_call", tool=tool_call.name, result="timeout")
+            return {"success": False, "error": f"工具执行超时（{timeout}秒）"}, False
+        except Exception as e:
+            self.logger.error(f"工具执行失败: {tool_call.name}: {e}")
+            metrics.incr("tool_call", tool=tool_call.name, result="error")
+            return {"success": False, "error": str(e)}, False
+        finally:
+            metrics.observe("tool_call_seconds", time.monotonic() - start, tool=tool_call.name)
+
+    async def _complete(self, request: CompletionsRequest, on_delta: StreamCallback | None) -> LLMResponse:
+        """
+        单次LLM调用，按需使用流式接口
+
+        流式模式下每个增量片段交给回调，返回最后片段聚合的完整响应，
+        因此调用方的工具调用循环无需区分两种模式。
+        """
+        if on_delta is None:
+            return await self.llm_client.completions(request)
+
+        response = None
+        async for chunk in self.llm_client.stream(request):
+            if chunk.content or chunk.tool_calls:
+                await on_delta(chunk)
+            if chunk.response is not None:
+                response = chunk.response
+
+        if response is None:
+            raise RuntimeError("流式响应未返回完整结果")
+        return response
+
     def _input_to_text(self, messages: MessageParams) -> str:
         """
         将输入转换为文本
@@ -2,7 +2,7 @@ from langfuse import observe
 
 from core.agents import BaseAgent
 from core.entities import WorkflowExecutionModel
-from infra.runtimes import CompletionsRequest
+from infra.runtimes import CompletionsRequest, RequestPriority
 from libs.types import (
     InputContent,
     InputType,
@@ -87,7 +87,8 @@ class ChatAgent(BaseAgent):
                 messages=llm_messages,
                 thread_id=state.thread_id,
                 temperature=1,
-                max_tokens=1000
+                max_tokens=1000,
+                priority=RequestPriority.INTERACTIVE
             )
 
             # 调用LLM生成回复
@@ -1,17 +1,21 @@
-import json
-import re
+from collections.abc import Mapping
 from typing import Any, Optional
 from uuid import UUID
 
 from langfuse import observe
+from pydantic import BaseModel
 
+from config import mas_config
 from core.agents import BaseAgent
 from core.entities import WorkflowExecutionModel
 from core.prompts.template_loader import get_prompt_template
-from infra.runtimes import CompletionsRequest, LLMResponse
+from infra.runtimes import CompletionsRequest, LLMResponse, RequestPriority
 from libs.types import Message, MessageParams
-from utils import get_current_datetime, get_component_logger, get_processing_time
+from utils import extract_json_object, get_current_datetime, get_component_logger, get_processing_time
 from utils.appointment_time_parser import parse_appointment_time
+from utils.metrics import metrics
+from ..analysis.fast_path import TrivialMatch, analyze_with_fast_path, fast_path_enabled, trivial_classifier
+from .schemas import IntentAnalysisOutput
 
 logger = get_component_logger(__name__, "IntentAgent")
 
@@ -24,7 +28,7 @@ class IntentAgent(BaseAgent):
 
     设计特点：
     - 上下文共享：短期对话历史为意向分析提供充分上下文
-    - 结构化输出：清晰的JSON格式，包含意向的完整分析
+    - 结构化输出：供应商支持时按 IntentAnalysisOutput 约束输出，否则容错解析文本中的JSON
     - 实体提取：自动提取邀约相关的实体信息
     - 业务集成：生成CRM集成所需的business_outputs
     """
@@ -65,12 +69,22 @@ class IntentAgent(BaseAgent):
             # 提取用户消息用于分析
             recent_user_messages = [msg for msg in short_term_messages if msg.role == "user"]
 
-            # 步骤2: 执行统一意向分析
-            intent_result = await self._analyze_intent(
-                inputs=recent_user_messages + state.input,
-                tenant_id=state.tenant_id,
-                thread_id=state.thread_id,
-                run_id=state.workflow_id
+            # 步骤2: 执行统一意向分析，平凡输入走本地快速路径
+            trivial = (
+                trivial_classifier.classify(state.input, short_term_messages)
+                if fast_path_enabled(state.tenant_id) else None
+            )
+            intent_result = await analyze_with_fast_path(
+                self.agent_name,
+                trivial,
+                TrivialMatch.intent_result,
+                lambda: self._analyze_intent(
+                    inputs=recent_user_messages + state.input,
+                    tenant_id=state.tenant_id,
+                    thread_id=state.thread_id,
+                    run_id=state.workflow_id
+                ),
+                lambda result, match: match.agrees_intent(result)
             )
 
             # 提取两种意向的结果
@@ -101,6 +115,18 @@ class IntentAgent(BaseAgent):
             logger.error(f"意向分析失败: {e}", exc_info=True)
             raise
 
+    def fallback_state(self, state: WorkflowExecutionModel) -> dict:
+        """
+        意向分析超出时间预算时的默认状态：三种意向均未检测到
+
+        参数:
+            state: 当前对话状态
+
+        返回:
+            dict: 与正常分析结构相同的增量状态
+        """
+        return self._update_state_with_intent(self._get_fallback_result(error="timeout"), [])
+
     async def _analyze_intent(
         self,
         inputs: MessageParams,
@@ -131,13 +157,19 @@ class IntentAgent(BaseAgent):
                 *inputs
             ]
 
+            provider = "openrouter"
             request = CompletionsRequest(
                 id=run_id,
-                provider="openrouter",
+                provider=provider,
                 model="anthropic/claude-haiku-4.5",
                 messages=messages,
                 temperature=0.1,
-                max_tokens=1200
+                max_tokens=1200,
+                output_model=IntentAnalysisOutput if self.llm_client.supports_structured(provider) else None,
+                hedge=True,
+                cache_ttl=mas_config.LLM_RESPONSE_CACHE_TTL,
+                prompt_cache_prefix=1,
+                priority=RequestPriority.INTERACTIVE
             )
 
             # 调用LLM
@@ -163,6 +195,8 @@ class IntentAgent(BaseAgent):
         """
         解析LLM响应
 
+        结构化调用的响应已是 IntentAnalysisOutput；文本响应则容错提取其中的JSON对象。
+
         Args:
             response: LLM响应对象
 
@@ -170,32 +204,26 @@ class IntentAgent(BaseAgent):
             dict: 解析后的统一意向结果
         """
         try:
-            # 提取响应内容
-            content = response.content.strip() if isinstance(response.content, str) else str(response.content).strip()
-
-            # 提取JSON部分（支持markdown代码块格式）
-            json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-            if json_match:
-                json_content = json_match.group(1)
+            if isinstance(response.content, BaseModel):
+                result = response.content.model_dump()
+                source = "structured"
+            elif isinstance(response.content, Mapping):
+                result = dict(response.content)
+                source = "structured"
             else:
-                # 尝试直接查找JSON对象
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                json_content = json_match.group(0) if json_match else content
+                result = extract_json_object(str(response.content or ""))
+                source = "text"
 
-            # 解析JSON
-            result = json.loads(json_content)
+            if result is None:
+                logger.warning(f"响应中未找到JSON对象: {str(response.content)[:200]}")
+                metrics.incr("llm_output_parse", agent=self.agent_name, result="failed")
+                return self._get_fallback_result(response=response, error="JSON解析失败")
 
-            # 验证和规范化两种意向
-            result = self._validate_and_normalize(result)
+            metrics.incr("llm_output_parse", agent=self.agent_name, result=source)
 
-            return result
+            # 验证和规范化三种意向
+            return self._validate_and_normalize(result)
 
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON解析失败: {e}")
-            return self._get_fallback_result(
-                response=response,
-                error=f"JSON解析失败: {str(e)}"
-            )
         except Exception as e:
             logger.error(f"响应解析失败: {e}")
             return self._get_fallback_result(
@@ -214,7 +242,7 @@ class IntentAgent(BaseAgent):
             dict: 验证后的结果
         """
         # 验证素材意向
-        asset = result.get("assets_intent", {})
+        asset = result.setdefault("assets_intent", {})
 
         # 验证urgency_level
         valid_urgency = ["high", "medium", "low"]
@@ -237,7 +265,7 @@ class IntentAgent(BaseAgent):
         asset.setdefault("summary", "")
 
         # 验证邀约意向
-        appointment = result.get("appointment_intent", {})
+        appointment = result.setdefault("appointment_intent", {})
 
         # 验证time_window
         valid_windows = ["immediate", "this_week", "this_month", "unknown"]
@@ -260,7 +288,7 @@ class IntentAgent(BaseAgent):
         appointment.setdefault("summary", "")
 
         # 验证音频输出意向
-        audio_output = result.get("audio_output_intent", {})
+        audio_output = result.setdefault("audio_output_intent", {})
 
         # 验证trigger_reason
         valid_triggers = ["user_sent_audio", "explicit_request", "context_preference", "none"]
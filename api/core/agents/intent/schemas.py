@@ -0,0 +1,87 @@
+"""
+意向分析结构化输出模型
+
+作为 completions_structured 的 output_model，约束LLM按固定结构返回三种意向。
+字段均为必填，以兼容严格模式的JSON Schema；json_object 模式下校验失败时供应商返回原始字典，
+缺失字段、数值范围与枚举兜底在 IntentAgent 中校正。
+"""
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class AssetType(BaseModel):
+    """单个素材需求"""
+
+    type: str = Field(description="素材类型，如 product_images、price_list、store_info")
+    category: Literal["visual", "information", "proof", "service"] = Field(description="素材大类")
+    description: str = Field(description="需求描述")
+    priority: float = Field(description="优先级 0.0-1.0")
+    specifics: list[str] = Field(description="具体素材")
+
+
+class AssetsIntent(BaseModel):
+    """素材发送意向"""
+
+    detected: bool = Field(description="是否检测到素材需求")
+    urgency_level: Literal["high", "medium", "low"] = Field(description="紧急程度")
+    asset_types: list[AssetType] = Field(description="素材需求列表")
+    priority_score: float = Field(description="优先级评分 0.0-1.0")
+    confidence: float = Field(description="置信度 0.0-1.0")
+    specific_requests: list[str] = Field(description="用户的具体请求")
+    recommendation: Literal["send_immediately", "send_soon", "wait_for_confirmation", "no_material"] = Field(
+        description="发送建议"
+    )
+    summary: str = Field(description="分析摘要")
+
+
+class EntityConfidence(BaseModel):
+    """各实体的置信度"""
+
+    service: Optional[float] = Field(description="服务项目置信度")
+    name: Optional[float] = Field(description="姓名置信度")
+    phone: Optional[float] = Field(description="电话置信度")
+    time_expression: Optional[float] = Field(description="时间表达式置信度")
+
+
+class ExtractedEntities(BaseModel):
+    """邀约实体（仅提取用户明确陈述的内容，未提及为null）"""
+
+    service: Optional[str] = Field(description="服务项目名称")
+    name: Optional[str] = Field(description="客户姓名")
+    phone: Optional[str] = Field(description="联系电话（11位手机号）")
+    time_expression: Optional[str] = Field(description="时间表达式，如“明天”“下周三”")
+    entity_confidence: EntityConfidence = Field(description="各实体的置信度")
+
+
+class AppointmentIntent(BaseModel):
+    """邀约到店意向"""
+
+    detected: bool = Field(description="是否检测到邀约意向")
+    intent_strength: float = Field(description="意向强度 0.0-1.0")
+    time_window: Literal["immediate", "this_week", "this_month", "unknown"] = Field(description="到店时间窗口")
+    confidence: float = Field(description="置信度 0.0-1.0")
+    signals: list[str] = Field(description="意向信号")
+    recommendation: Literal["suggest_appointment", "wait_signal", "no_appointment"] = Field(description="邀约建议")
+    extracted_entities: ExtractedEntities = Field(description="提取的实体")
+    summary: str = Field(description="分析摘要")
+
+
+class AudioOutputIntent(BaseModel):
+    """音频输出意向"""
+
+    detected: bool = Field(description="是否检测到音频输出意向")
+    confidence: float = Field(description="置信度 0.0-1.0")
+    trigger_reason: Literal["user_sent_audio", "explicit_request", "context_preference", "none"] = Field(
+        description="触发原因"
+    )
+    summary: str = Field(description="分析摘要")
+
+
+class IntentAnalysisOutput(BaseModel):
+    """统一意向分析结果"""
+
+    assets_intent: AssetsIntent = Field(description="素材发送意向")
+    appointment_intent: AppointmentIntent = Field(description="邀约到店意向")
+    audio_output_intent: AudioOutputIntent = Field(description="音频输出意向")
@@ -9,16 +9,26 @@ Sales Agent
 - 获取并整合助理人设信息
 - 生成符合人设和策略的个性化回复
 - 自动管理助手回复的存储
+- 可选的投机生成：与分析阶段重叠生成回复，提示词分支不变时直接沿用
+
+用户输入由分析节点（情感/融合分析）写入短期记忆，本节点不重复写入。
 """
 
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Optional
 from uuid import UUID
 
+from langgraph.config import get_config, get_stream_writer
+
+from config import mas_config
 from core.agents import BaseAgent
+from core.agents.base.agent import StreamCallback
 from core.entities import WorkflowExecutionModel
 from core.prompts.template_loader import get_prompt_template
 from core.tools import get_tools_schema, long_term_memory_tool, store_episodic_memory_tool
-from infra.runtimes import CompletionsRequest
-from libs.types import AccountStatus, Message, MessageParams
+from infra.runtimes import CompletionsRequest, LLMStreamChunk, RequestPriority, ToolCallData, usage_scope
+from libs.types import AccountStatus, AgentNodeType, Message, MessageParams
 from libs.exceptions import AssistantInactiveException
 from services import AssistantService, ThreadService
 from utils import (
@@ -27,9 +37,20 @@ from utils import (
     get_current_datetime,
     get_processing_time
 )
+from utils.metrics import metrics
+from .speculation import Speculation, SpeculativeStream, speculation_key, speculation_store
 
 logger = get_component_logger(__name__, "Sales Agent")
 
+# 投机结果无人认领（销售节点未执行）时的保留时间（秒）
+SPECULATION_ORPHAN_TTL = 300
+
+# 投机请求中推迟到确认命中后执行的写入类工具
+DEFERRED_TOOLS = frozenset({store_episodic_memory_tool.name})
+
+# 当前投机生成的推迟写入列表（仅在投机任务内设置）
+_deferred_writes: ContextVar[Optional[list[ToolCallData]]] = ContextVar("sales_deferred_writes", default=None)
+
 
 class SalesAgent(BaseAgent):
     """
@@ -42,6 +63,8 @@ class SalesAgent(BaseAgent):
     def __init__(self):
         super().__init__()
         self.agent_name = "sales_agent"
+        # 进行中的投机生成，按工作流执行ID索引
+        self._speculations: dict[UUID, Speculation] = {}
 
     async def process_conversation(self, state: WorkflowExecutionModel) -> dict:
         """
@@ -49,7 +72,7 @@ class SalesAgent(BaseAgent):
 
         工作流程：
         1. 获取 SentimentAgent 确定的策略提示词
-        2. 检索记忆上下文（长期+短期）
+        2. 检索记忆上下文（长期+短期，本轮输入已由分析节点写入）
         3. 构建包含上下文的 LLM 提示词
         4. 生成回复
         5. 存储回复并更新状态
@@ -65,22 +88,24 @@ class SalesAgent(BaseAgent):
         try:
             logger.info("=== Sales Agent 开始处理 ===")
 
-            await self.memory_manager.store_messages(
-                state.tenant_id,
-                state.thread_id,
-                messages=state.input,
-            )
+            # 投机命中时直接沿用，否则按本轮分析结果生成
+            speculative = await self._resolve_speculation(state)
+            if speculative is not None:
+                sales_response, token_info = speculative
+            else:
+                messages = await self.build_system_prompt(state)
+
+                # 生成个性化回复（基于匹配的提示词 + 人设 + 记忆 + 时间 + 意向）
+                sales_response, token_info = await self._generate_final_response(
+                    state.tenant_id,
+                    state.thread_id,
+                    state.workflow_id,
+                    messages,
+                    state.matched_prompt,
+                )
 
-            messages = await self.build_system_prompt(state)
-
-            # 生成个性化回复（基于匹配的提示词 + 人设 + 记忆 + 时间 + 意向）
-            sales_response, token_info = await self._generate_final_response(
-                state.tenant_id,
-                state.thread_id,
-                state.workflow_id,
-                messages,
-                state.matched_prompt,
-            )
+            if mas_config.SALES_SPECULATION_ENABLED:
+                await speculation_store.save(state.thread_id, state.matched_prompt, state.intent_analysis)
 
             # 存储助手回复到记忆
             try:
@@ -98,7 +123,8 @@ class SalesAgent(BaseAgent):
             token_usage = {
                 "input_tokens": token_info.get("input_tokens", 0),
                 "output_tokens": token_info.get("output_tokens", 0),
-                "total_tokens": token_info.get("total_tokens", 0)
+                "total_tokens": token_info.get("total_tokens", 0),
+                "cached_tokens": token_info.get("cached_tokens", 0)
             }
 
             agent_data = {
@@ -128,6 +154,32 @@ class SalesAgent(BaseAgent):
             raise e
 
 
+    def fallback_state(self, state: WorkflowExecutionModel) -> dict:
+        """
+        超出时间预算时的默认状态：按匹配提示词的语气返回兜底回复
+
+        Args:
+            state: 当前工作流执行状态
+
+        Returns:
+            dict: 状态更新增量，包含兜底回复
+        """
+        sales_response = self._get_fallback_response(state.matched_prompt)
+        agent_data = {
+            "agent_id": self.agent_name,
+            "agent_type": "chat",
+            "sales_response": sales_response,
+            "response": sales_response,
+            "timestamp": get_current_datetime(),
+            "error": "timeout"
+        }
+        return {
+            "output": sales_response,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "values": {"agent_responses": {self.agent_name: agent_data}}
+        }
+
     async def _generate_final_response(
         self,
         tenant_id: str,
@@ -150,38 +202,181 @@ class SalesAgent(BaseAgent):
             tuple: (回复内容, token信息)
         """
         try:
-            # 4. 创建 LLM 请求
-            request = CompletionsRequest(
-                id=run_id,
-                provider="openrouter",
-                model="anthropic/claude-haiku-4.5",
-                temperature=0.6,
-                messages=messages,
-                tools=get_tools_schema([long_term_memory_tool, store_episodic_memory_tool]),
-                tool_choice="auto"
+            response_content, token_info = await self._generate(
+                tenant_id,
+                thread_id,
+                run_id,
+                messages,
+                tools=[long_term_memory_tool, store_episodic_memory_tool],
+                on_delta=self._get_stream_callback()
             )
+            if response_content:
+                return response_content, token_info
+            return self._get_fallback_response(matched_prompt), {}
+
+        except Exception as e:
+            logger.error(f"回复生成失败: {e}")
+            return self._get_fallback_response(matched_prompt), {"tokens_used": 0, "error": str(e)}
 
-            # 5. 【关键】使用 invoke_llm 支持工具调用
-            llm_response = await self.invoke_llm(
-                request=request,
-                tenant_id=tenant_id,
-                thread_id=thread_id
+    async def _generate(
+        self,
+        tenant_id: str,
+        thread_id: UUID,
+        run_id: UUID,
+        messages: MessageParams,
+        tools: list,
+        on_delta: StreamCallback | None = None
+    ) -> tuple[Optional[str], dict]:
+        """
+        调用LLM生成回复，异常向上抛出
+
+        Returns:
+            tuple: (回复内容，无内容时为None, token信息)
+        """
+        # 4. 创建 LLM 请求
+        request = CompletionsRequest(
+            id=run_id,
+            provider="openrouter",
+            model="anthropic/claude-haiku-4.5",
+            temperature=0.6,
+            messages=messages,
+            tools=get_tools_schema(tools),
+            tool_choice="auto",
+            hedge=True,
+            prompt_cache_prefix=self._stable_prefix_length(messages),
+            priority=RequestPriority.INTERACTIVE
+        )
+
+        # 5. 【关键】使用 invoke_llm 支持工具调用（流式运行时逐token推送）
+        llm_response = await self.invoke_llm(
+            request=request,
+            tenant_id=tenant_id,
+            thread_id=thread_id,
+            on_delta=on_delta
+        )
+
+        # 6. 提取 token 信息
+        token_info = self._extract_token_info(llm_response)
+
+        # 7. 返回响应
+        if not llm_response.content:
+            return None, token_info
+        response_content = str(llm_response.content).strip()
+        logger.debug(f"LLM 回复预览: {response_content[:100]}...")
+        return response_content, token_info
+
+    def speculate(self, state: WorkflowExecutionModel):
+        """
+        以线程上一轮的提示词快照启动投机生成（同一次执行只启动一次）
+
+        由分析节点在开始时调用，需在工作流节点上下文中执行以获取流式写入器。
+
+        Args:
+            state: 当前工作流执行状态
+        """
+        if not mas_config.SALES_SPECULATION_ENABLED or state.workflow_id in self._speculations:
+            return
+
+        on_delta = self._get_stream_callback()
+        speculation = Speculation(stream=SpeculativeStream(on_delta) if on_delta else None)
+        speculation.task = asyncio.create_task(self._run_speculation(state, speculation))
+        self._speculations[state.workflow_id] = speculation
+
+        # 销售节点未执行时（如工作流异常中止）延时清理，避免泄漏
+        loop = asyncio.get_running_loop()
+        speculation.task.add_done_callback(
+            lambda _: loop.call_later(SPECULATION_ORPHAN_TTL, self._speculations.pop, state.workflow_id, None)
+        )
+
+    async def _run_speculation(self, state: WorkflowExecutionModel, speculation: Speculation) -> Optional[tuple[str, dict]]:
+        """
+        投机生成：加载上一轮快照，按快照构建提示词并生成回复
+
+        写入类工具调用只记录到 speculation.deferred_writes，确认命中后才执行，
+        避免未命中时已产生写入副作用。本轮输入由分析节点写入记忆，此处不写入。
+        """
+        try:
+            speculation.snapshot = await speculation_store.get(state.thread_id)
+        finally:
+            speculation.loaded.set()
+        if speculation.snapshot is None:
+            return None
+
+        _deferred_writes.set(speculation.deferred_writes)
+        with usage_scope(tenant_id=state.tenant_id, assistant_id=state.assistant_id, node=AgentNodeType.SALES):
+            speculative_state = state.model_copy(update={
+                "matched_prompt": speculation.snapshot["matched_prompt"],
+                "intent_analysis": speculation.snapshot["intent_analysis"],
+            })
+            messages = await self.build_system_prompt(speculative_state)
+            response_content, token_info = await self._generate(
+                state.tenant_id,
+                state.thread_id,
+                state.workflow_id,
+                messages,
+                tools=[long_term_memory_tool, store_episodic_memory_tool],
+                on_delta=speculation.stream
             )
+        return (response_content, token_info) if response_content else None
 
-            # 6. 提取 token 信息
-            token_info = self._extract_token_info(llm_response)
+    async def _resolve_speculation(self, state: WorkflowExecutionModel) -> Optional[tuple[str, dict]]:
+        """
+        按本轮分析结果确认投机生成
 
-            # 7. 返回响应
-            if llm_response.content:
-                response_content = str(llm_response.content).strip()
-                logger.debug(f"LLM 回复预览: {response_content[:100]}...")
-                return response_content, token_info
-            else:
-                return self._get_fallback_response(matched_prompt), {}
+        matched_key 与意向标志一致时沿用投机结果并执行推迟的写入，否则取消投机。
 
+        Returns:
+            Optional[tuple]: 命中时返回 (回复内容, token信息)，否则返回None
+        """
+        speculation = self._speculations.pop(state.workflow_id, None)
+        if speculation is None:
+            return None
+
+        await speculation.loaded.wait()
+        if speculation.snapshot is None:
+            metrics.incr("sales_speculation", result="cold")
+            return None
+
+        snapshot = speculation.snapshot
+        if speculation_key(snapshot["matched_prompt"], snapshot["intent_analysis"]) != speculation_key(
+            state.matched_prompt, state.intent_analysis
+        ):
+            speculation.task.cancel()
+            metrics.incr("sales_speculation", result="miss")
+            logger.info(
+                f"投机未命中: {snapshot['matched_prompt'].get('matched_key')} -> {state.matched_prompt.get('matched_key')}"
+            )
+            return None
+
+        # 命中后先推送已缓冲的片段，剩余片段直接推送
+        if speculation.stream:
+            await speculation.stream.release()
+        try:
+            result = await speculation.task
         except Exception as e:
-            logger.error(f"回复生成失败: {e}")
-            return self._get_fallback_response(matched_prompt), {"tokens_used": 0, "error": str(e)}
+            logger.warning(f"投机生成失败，重新生成: {e}")
+            result = None
+        if result is None:
+            metrics.incr("sales_speculation", result="error")
+            return None
+
+        metrics.incr("sales_speculation", result="hit")
+        logger.info(f"投机命中: matched_key={state.matched_prompt.get('matched_key')}")
+
+        # 确认命中后执行投机期间推迟的写入
+        if speculation.deferred_writes:
+            await self._execute_tools(speculation.deferred_writes, state.workflow_id, state.tenant_id, state.thread_id)
+        return result
+
+    async def _call_tool(self, tool_call: ToolCallData, tenant_id: str, thread_id: UUID) -> tuple[dict[str, Any], bool]:
+        """
+        投机任务内的写入类工具调用只记录不执行，返回占位结果（不缓存）；其余调用正常执行
+        """
+        deferred = _deferred_writes.get()
+        if deferred is not None and tool_call.name in DEFERRED_TOOLS:
+            deferred.append(tool_call)
+            return {"success": True, "message": "已记录，将在回复确认后保存"}, False
+        return await super()._call_tool(tool_call, tenant_id, thread_id)
 
     async def build_system_prompt(self, state: WorkflowExecutionModel) -> MessageParams:
         """
@@ -191,7 +386,7 @@ class SalesAgent(BaseAgent):
             state: 当前工作流执行状态
 
         Returns:
-            MessageParams: 消息列表
+            MessageParams: 消息列表，依次为人设前缀（可能缺省）、当轮策略system消息与短期记忆
         """
         base_system_prompt = state.matched_prompt.get("system_prompt", "你是一个人。")
         tone = state.matched_prompt.get("tone", "专业、友好")
@@ -230,6 +425,7 @@ class SalesAgent(BaseAgent):
             logger.info(f"已获取助理人设信息: {role_prompt_content[:100] if role_prompt_content else 'None'}...")
 
             # 获取客户线程信息
+            thread_context_content = None
             thread = await ThreadService.get_thread(state.thread_id)
             if thread:
                 thread_context_content = get_prompt_template(
@@ -258,6 +454,14 @@ class SalesAgent(BaseAgent):
             query_text=user_text,
         )
 
+        # 人设与客户上下文在同一线程内跨轮次不变，放在最前作为可缓存前缀
+        persona_prompt = get_prompt_template(
+            template_name="sales_persona",
+            template_file="agent_prompt.yaml",
+            role_prompt=role_prompt_content,
+            thread_context=thread_context_content
+        )
+
         system_prompt = get_prompt_template(
             template_name="sales",
             template_file="agent_prompt.yaml",
@@ -265,18 +469,64 @@ class SalesAgent(BaseAgent):
             tone=tone,
             strategy=strategy,
             role_prompt=role_prompt_content,
-            thread_context=thread_context_content,
             appointment_intent=appointment_intent,
             audio_output_intent=audio_output_intent,
             summaries=long_term_memories,
             current_time=get_chinese_time()
         )
 
+        messages = [Message(role="system", content=persona_prompt)] if persona_prompt and persona_prompt.strip() else []
         return [
+            *messages,
             Message(role="system", content=system_prompt),
-            *short_term_messages
+            *self._with_current_input(short_term_messages, state.input)
         ]
 
+    @staticmethod
+    def _with_current_input(short_term_messages: MessageParams, current_input: Optional[MessageParams]) -> MessageParams:
+        """
+        保证短期记忆以本轮输入结尾
+
+        投机生成与分析节点并发执行，检索时分析节点可能尚未写入本轮输入，此时补在末尾。
+        """
+        current = [message for message in current_input or [] if message.role != "system"]
+        if not current or list(short_term_messages[-len(current):]) == current:
+            return short_term_messages
+        return [*short_term_messages, *current]
+
+    @staticmethod
+    def _stable_prefix_length(messages: MessageParams) -> int:
+        """稳定前缀长度：开头连续的system消息中，除最后一条当轮策略外的部分"""
+        leading = 0
+        for message in messages:
+            if message.role != "system":
+                break
+            leading += 1
+        return max(leading - 1, 0)
+
+    def _get_stream_callback(self) -> StreamCallback | None:
+        """
+        获取token流式回调
+
+        仅当工作流以流式模式运行（configurable.stream_tokens）时，
+        将回复增量写入LangGraph自定义流，否则返回None走普通调用。
+        """
+        try:
+            if not get_config().get("configurable", {}).get("stream_tokens"):
+                return None
+            writer = get_stream_writer()
+        except RuntimeError:
+            return None
+
+        async def on_delta(chunk: LLMStreamChunk):
+            if chunk.content:
+                writer({"event": "token", "node": self.agent_name, "data": chunk.content})
+            for tool_call in chunk.tool_calls or []:
+                if tool_call.name:
+                    writer({"event": "tool_call", "node": self.agent_name, "data": {"name": tool_call.name}})
+
+        return on_delta
+
     def _extract_token_info(self, llm_response) -> dict:
         """提取 token 使用信息"""
         try:
@@ -287,7 +537,8 @@ class SalesAgent(BaseAgent):
             return {
                 "input_tokens": input_tokens,
                 "output_tokens": output_tokens,
-                "total_tokens": total_tokens
+                "total_tokens": total_tokens,
+                "cached_tokens": llm_response.usage.cached_tokens
             }
         except Exception as e:
             logger.warning(f"Token 信息提取失败: {e}")
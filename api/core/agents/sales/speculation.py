@@ -0,0 +1,128 @@
+"""
+销售回复投机生成
+
+多数轮次的提示词匹配结果与上一轮相同。投机模式下，分析节点开始时即以线程上一轮的
+匹配提示词与意向标志启动回复生成，与情感/意向分析重叠执行；销售节点拿到本轮分析结果后，
+若 matched_key 与意向标志一致则沿用投机结果，否则取消投机并按本轮结果重新生成。
+
+投机期间的流式片段先缓冲，确认命中后再推送，未命中时丢弃。
+投机请求中的写入类工具调用只记录不执行，确认命中后再执行，未命中时丢弃。
+
+Redis数据布局:
+    sales_speculation:{thread_id}  (String, 上一轮快照JSON: matched_prompt + 意向)
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import json
+from typing import Any, Optional
+from uuid import UUID
+
+from config import mas_config
+from core.agents.base.agent import StreamCallback
+from infra.cache import get_redis_client
+from infra.runtimes import LLMStreamChunk, ToolCallData
+from utils import get_component_logger
+
+logger = get_component_logger(__name__, "SalesSpeculation")
+
+KEY_PREFIX = "sales_speculation"
+
+
+def speculation_key(matched_prompt: dict, intent_analysis: dict) -> tuple:
+    """
+    决定销售提示词分支的键：匹配的提示词 + 邀约/音频意向标志
+
+    两轮的键相同时，销售提示词仅在意向细节（信号、时间表达式等）上有差异。
+    """
+    appointment = intent_analysis.get("appointment_intent") or {}
+    audio_output = intent_analysis.get("audio_output_intent") or {}
+    return (
+        matched_prompt.get("matched_key"),
+        bool(appointment.get("detected")),
+        appointment.get("recommendation"),
+        bool(audio_output.get("detected")),
+    )
+
+
+class SpeculativeStream:
+    """缓冲投机生成的流式片段，确认命中后按序推送并切换为直通"""
+
+    def __init__(self, on_delta: StreamCallback):
+        self.on_delta = on_delta
+        self.buffer: list[LLMStreamChunk] = []
+        self.released = False
+
+    async def __call__(self, chunk: LLMStreamChunk):
+        if self.released:
+            await self.on_delta(chunk)
+        else:
+            self.buffer.append(chunk)
+
+    async def release(self):
+        """推送已缓冲的片段，之后的片段直接推送"""
+        while self.buffer:
+            await self.on_delta(self.buffer.pop(0))
+        self.released = True
+
+
+@dataclass
+class Speculation:
+    """一次投机生成"""
+
+    task: Optional[asyncio.Task] = None
+    stream: Optional[SpeculativeStream] = None
+    # 投机所用的上一轮快照，无快照（新线程或已过期）时为None
+    snapshot: Optional[dict[str, Any]] = None
+    loaded: asyncio.Event = field(default_factory=asyncio.Event)
+    # 推迟到确认命中后执行的写入类工具调用
+    deferred_writes: list[ToolCallData] = field(default_factory=list)
+
+
+class SpeculationStore:
+    """线程上一轮提示词快照的Redis存储"""
+
+    def __init__(self):
+        self._redis = None
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await get_redis_client()
+        return self._redis
+
+    @staticmethod
+    def _key(thread_id: UUID) -> str:
+        return f"{KEY_PREFIX}:{thread_id}"
+
+    async def get(self, thread_id: UUID) -> Optional[dict[str, Any]]:
+        """读取上一轮快照，不存在或读取失败时返回None"""
+        try:
+            redis_client = await self._client()
+            data = await redis_client.get(self._key(thread_id))
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.warning(f"读取投机快照失败: {e}")
+            return None
+
+    async def save(self, thread_id: UUID, matched_prompt: dict, intent_analysis: dict):
+        """保存本轮快照，供下一轮投机使用"""
+        snapshot = {
+            "matched_prompt": matched_prompt,
+            "intent_analysis": {
+                key: intent_analysis.get(key) or {}
+                for key in ("appointment_intent", "audio_output_intent")
+            },
+        }
+        try:
+            redis_client = await self._client()
+            await redis_client.set(
+                self._key(thread_id),
+                json.dumps(snapshot, ensure_ascii=False, default=str),
+                ex=mas_config.SALES_SPECULATION_SNAPSHOT_TTL_HOURS * 3600
+            )
+        except Exception as e:
+            logger.warning(f"保存投机快照失败: {e}")
+
+
+# 全局快照存储
+speculation_store = SpeculationStore()
@@ -11,12 +11,15 @@ Sentiment Analysis Agent
 - 状态管理与记忆更新
 """
 
+import asyncio
+
 from langfuse import observe
 
 from core.agents import BaseAgent
 from core.entities import WorkflowExecutionModel
 from libs.types import MessageParams, MemoryType
 from utils import get_current_datetime
+from ..analysis.fast_path import TrivialMatch, analyze_with_fast_path, fast_path_enabled, trivial_classifier
 from .multimodal_input_processor import MultimodalInputProcessor
 from .prompt_matcher import PromptMatcher
 from .sentiment_analyzer import SentimentAnalyzer
@@ -40,14 +43,17 @@ class SentimentAnalysisAgent(BaseAgent):
 
         self.agent_name = "sentiment_analysis"
         self.prompt_matcher = PromptMatcher()
+        self._input_writes: set[asyncio.Task] = set()
 
         # 初始化核心组件
         self.input_processor = MultimodalInputProcessor(tenant_id=getattr(self, 'tenant_id', None))
 
+        # 情感分析不使用工具，直接调用客户端（通过属性访问，兼容调试包装器替换 llm_client）
         self.sentiment_analyzer = SentimentAnalyzer(
             llm_provider="openrouter",
             llm_model="openai/gpt-5-mini",
-            invoke_llm_fn=self.invoke_llm
+            invoke_llm_fn=lambda request: self.llm_client.completions(request),
+            structured_output=self.llm_client.supports_structured("openrouter")
         )
 
     @observe(name="sentiment-analysis", as_type="generation")
@@ -56,7 +62,7 @@ class SentimentAnalysisAgent(BaseAgent):
         处理对话状态中的情感分析流程
         
         工作流程：
-        1. 处理多模态输入并存储到记忆
+        1. 存储用户输入到记忆并处理多模态输入
         2. 检索相关记忆上下文
         3. 执行基于历史的情感分析
         4. 判定客户旅程阶段
@@ -79,19 +85,13 @@ class SentimentAnalysisAgent(BaseAgent):
 
             self.logger.debug(f"input内容: {str(customer_input)[:100]}...")
 
-            # 步骤1: 处理多模态输入 (优先处理，将图片转为文字)
-            processed_text, multimodal_context = await self._process_input(customer_input)
+            # 步骤1: 存储用户输入到记忆（最先执行，节点超时降级时输入也已写入）
+            await self._store_input(state)
+
+            # 步骤2: 处理多模态输入 (将图片转为文字)
+            processed_text, multimodal_context = await self._process_input(customer_input, tenant_id)
             self.logger.info(f"多模态输入处理完成 - 输入消息条数: {len(processed_text)}, context类型: {multimodal_context.get('type')}")
 
-            # 步骤2: 存储用户输入到记忆 (存储处理后的文字描述，确保记忆包含图片语义)
-            # 注意：这里我们将处理后的 processed_text 存入记忆，而不是原始的 customer_input
-            # 这样后续检索时，图片内容就是可被搜索和理解的文本形式
-            await self.memory_manager.store_messages(
-                tenant_id=tenant_id,
-                thread_id=thread_id,
-                messages=customer_input,
-            )
-            
             # 步骤3: 检索记忆上下文 (使用处理后的文本进行检索)
             short_term_messages, long_term_memories = await self.memory_manager.retrieve_context(
                 tenant_id=tenant_id,
@@ -106,8 +106,15 @@ class SentimentAnalysisAgent(BaseAgent):
             
             self.logger.info(f"记忆检索完成 - 短期消息数: {len(memory_context['short_term'])}, 长期摘要数: {len(memory_context['long_term'])}")
 
-            # 步骤4: 执行情感分析（结合短期消息历史）
-            sentiment_result = await self._analyze_sentiment_with_history(processed_text, multimodal_context, memory_context['short_term'])
+            # 步骤4: 执行情感分析（结合短期消息历史），平凡输入走本地快速路径
+            trivial = trivial_classifier.classify(customer_input, short_term_messages) if fast_path_enabled(tenant_id) else None
+            sentiment_result = await analyze_with_fast_path(
+                self.agent_name,
+                trivial,
+                TrivialMatch.sentiment_result,
+                lambda: self._analyze_sentiment_with_history(processed_text, multimodal_context, memory_context['short_term']),
+                lambda result, match: match.agrees_sentiment(result)
+            )
             self.logger.info(f"情感分析结果 - sentiment: {sentiment_result.get('sentiment')}, score: {sentiment_result.get('score')}, urgency: {sentiment_result.get('urgency')}")
             self.logger.info(f"情感分析token统计 - tokens_used: {sentiment_result.get('tokens_used', 0)}")
             self.logger.info(f"情感分析上下文 - 使用历史消息数: {len(memory_context['short_term'])}")
@@ -123,83 +130,13 @@ class SentimentAnalysisAgent(BaseAgent):
 
             # 步骤6.5: 注入外部活动记忆 (如朋友圈互动)
             # 仅在情感积极（> 0.5）时注入，增强互动性
-            sentiment_score = sentiment_result.get('score', 0.5)
-            if sentiment_score > 0.5:
-                try:
-                    external_memories = await self.memory_manager.get_external_context(
-                        tenant_id=tenant_id,
-                        thread_id=thread_id,
-                        query_text=processed_text,
-                        limit=3, # 最近3条
-                        memory_types=[MemoryType.MOMENTS_INTERACTION] # 未来可添加 MemoryType.OFFLINE_REPORT 等
-                    )
-                    
-                    if external_memories:
-                        self.logger.info(f"发现 {len(external_memories)} 条外部活动记忆，注入上下文")
-                        
-                        # 格式化外部记忆
-                        memory_texts = []
-                        for mem in external_memories:
-                             # 简单处理时间
-                            created_at = mem.get('created_at', '')[:10] 
-                            content = mem.get('content', '')
-                            memory_texts.append(f"- [{created_at}] {content}")
-                        
-                        external_context_str = "\n".join(memory_texts)
-                        
-                        # 注入到 matched_prompt 的 system_prompt 中
-                        # SalesAgent 会直接使用这个 system_prompt
-                        additional_prompt = f"\n【用户近期动态（可适当寒暄提及）】\n{external_context_str}\n"
-                        matched_prompt["system_prompt"] += additional_prompt
-                        
-                except Exception as e:
-                    self.logger.warning(f"获取外部记忆失败，跳过注入: {e}")
-
+            if sentiment_result.get('score', 0.5) > 0.5:
+                await self._inject_external_memories(matched_prompt, tenant_id, thread_id, processed_text)
 
             # 步骤7: 更新对话状态 - 使用Reducer模式返回增量更新
-            
-            # 使用TokenManager创建标准化的Agent响应数据
-            current_time = get_current_datetime()
-            
-            # 更新token信息，使用sentiment_result中的实际数据
-            token_info = {
-                "input_tokens": sentiment_result.get("input_tokens", 0),
-                "output_tokens": sentiment_result.get("output_tokens", 0),
-                "total_tokens": sentiment_result.get("total_tokens", sentiment_result.get("tokens_used", 0))
-            }
-
-            agent_data = {
-                "agent_id": self.agent_name,
-                "agent_type": "analytics",
-                "sentiment_analysis": sentiment_result,
-                "matched_prompt": matched_prompt,
-                "journey_stage": journey_stage,
-                "processed_input": processed_text,
-                "timestamp": current_time,
-                "token_usage": token_info,
-                "tokens_used": token_info["total_tokens"]
-            }
-            
-            # 构造 sentiment_analysis 更新对象
-            sentiment_analysis_update = {
-                **sentiment_result,
-                "journey_stage": journey_stage,
-                "processed_input": processed_text,
-                "multimodal_context": multimodal_context,
-                "agent_name": self.agent_name,
-                "token_usage": token_info,
-                "tokens_used": token_info["total_tokens"]
-            }
-            
-            # 构造返回的增量状态
-            return {
-                "sentiment_analysis": sentiment_analysis_update,
-                "matched_prompt": matched_prompt,
-                "journey_stage": journey_stage,
-                "input_tokens": token_info["input_tokens"],
-                "output_tokens": token_info["output_tokens"],
-                "values": {"agent_responses": {self.agent_name: agent_data}}
-            }
+            return self._build_state_update(
+                sentiment_result, matched_prompt, journey_stage, processed_text, multimodal_context
+            )
 
             # self.logger.info(f"情感分析完成: 耗时{processing_time:.2f}s, 情感={sentiment_result.get('sentiment')}, 旅程={journey_stage}")
             # self.logger.info("=== Sentiment Agent 处理完成 ===")
@@ -211,6 +148,137 @@ class SentimentAnalysisAgent(BaseAgent):
             self.logger.error(f"失败时的输入: {str(input_content)[:100]}")
             raise e
 
+    async def _store_input(self, state: WorkflowExecutionModel):
+        """
+        存储本轮用户输入到短期记忆
+
+        写入在独立任务中执行：节点超出时间预算被取消时写入仍会完成，
+        降级结果（fallback_state）因此无需再次写入。
+        """
+        task = asyncio.create_task(self.memory_manager.store_messages(
+            tenant_id=state.tenant_id,
+            thread_id=str(state.thread_id),
+            messages=state.input,
+        ))
+        self._input_writes.add(task)
+        task.add_done_callback(self._input_writes.discard)
+        await asyncio.shield(task)
+
+    def fallback_state(self, state: WorkflowExecutionModel) -> dict:
+        """
+        情感分析超出时间预算时的默认状态：中性情感 + 兜底提示词
+
+        Args:
+            state: 当前工作流执行状态
+
+        Returns:
+            dict: 与正常分析结构相同的增量状态
+        """
+        sentiment_result = self.sentiment_analyzer._fallback_result("")
+        sentiment_result["error"] = "timeout"
+        journey_stage = "awareness"
+        return self._build_state_update(
+            sentiment_result,
+            self.prompt_matcher.get_fallback_prompt(journey_stage),
+            journey_stage,
+            processed_text="",
+            multimodal_context={}
+        )
+
+    async def _inject_external_memories(
+        self,
+        matched_prompt: dict,
+        tenant_id: str,
+        thread_id: str,
+        processed_text: str
+    ):
+        """
+        将外部活动记忆（如朋友圈互动）注入匹配提示词的 system_prompt
+
+        SalesAgent 会直接使用这个 system_prompt；获取失败时跳过注入。
+        """
+        try:
+            external_memories = await self.memory_manager.get_external_context(
+                tenant_id=tenant_id,
+                thread_id=thread_id,
+                query_text=processed_text,
+                limit=3, # 最近3条
+                memory_types=[MemoryType.MOMENTS_INTERACTION] # 未来可添加 MemoryType.OFFLINE_REPORT 等
+            )
+
+            if external_memories:
+                self.logger.info(f"发现 {len(external_memories)} 条外部活动记忆，注入上下文")
+
+                # 格式化外部记忆
+                memory_texts = []
+                for mem in external_memories:
+                    # 简单处理时间
+                    created_at = mem.get('created_at', '')[:10]
+                    content = mem.get('content', '')
+                    memory_texts.append(f"- [{created_at}] {content}")
+
+                external_context_str = "\n".join(memory_texts)
+                additional_prompt = f"\n【用户近期动态（可适当寒暄提及）】\n{external_context_str}\n"
+                matched_prompt["system_prompt"] += additional_prompt
+
+        except Exception as e:
+            self.logger.warning(f"获取外部记忆失败，跳过注入: {e}")
+
+    def _build_state_update(
+        self,
+        sentiment_result: dict,
+        matched_prompt: dict,
+        journey_stage: str,
+        processed_text: str,
+        multimodal_context: dict
+    ) -> dict:
+        """
+        构造情感分析的增量状态（由 LangGraph 的 Reducer 合并）
+
+        Returns:
+            dict: 包含 sentiment_analysis, matched_prompt, journey_stage 与token统计
+        """
+        current_time = get_current_datetime()
+
+        # 更新token信息，使用sentiment_result中的实际数据
+        token_info = {
+            "input_tokens": sentiment_result.get("input_tokens", 0),
+            "output_tokens": sentiment_result.get("output_tokens", 0),
+            "total_tokens": sentiment_result.get("total_tokens", sentiment_result.get("tokens_used", 0))
+        }
+
+        agent_data = {
+            "agent_id": self.agent_name,
+            "agent_type": "analytics",
+            "sentiment_analysis": sentiment_result,
+            "matched_prompt": matched_prompt,
+            "journey_stage": journey_stage,
+            "processed_input": processed_text,
+            "timestamp": current_time,
+            "token_usage": token_info,
+            "tokens_used": token_info["total_tokens"]
+        }
+
+        # 构造 sentiment_analysis 更新对象
+        sentiment_analysis_update = {
+            **sentiment_result,
+            "journey_stage": journey_stage,
+            "processed_input": processed_text,
+            "multimodal_context": multimodal_context,
+            "agent_name": self.agent_name,
+            "token_usage": token_info,
+            "tokens_used": token_info["total_tokens"]
+        }
+
+        return {
+            "sentiment_analysis": sentiment_analysis_update,
+            "matched_prompt": matched_prompt,
+            "journey_stage": journey_stage,
+            "input_tokens": token_info["input_tokens"],
+            "output_tokens": token_info["output_tokens"],
+            "values": {"agent_responses": {self.agent_name: agent_data}}
+        }
+
     def _determine_journey_stage(self, short_term_messages: list) -> str:
         """
         判断客户旅程阶段
@@ -281,10 +349,10 @@ class SentimentAnalysisAgent(BaseAgent):
                 "sentiment_score": sentiment_score
             }
 
-    async def _process_input(self, customer_input: MessageParams) -> tuple[str, dict]:
+    async def _process_input(self, customer_input: MessageParams, tenant_id: str) -> tuple[str, dict]:
         """处理多模态输入消息列表"""
         try:
-            return await self.input_processor.process_input(customer_input)
+            return await self.input_processor.process_input(customer_input, tenant_id)
         except Exception as e:
             self.logger.error(f"输入处理失败: {e}")
             raise
@@ -0,0 +1,146 @@
+"""
+图片描述缓存
+
+同一商品图、截图常在多轮对话、多个线程中重复发送。图片描述按租户缓存，重复图片只调用一次LLM：
+- data URL 按解码后内容的SHA-256索引
+- http(s) URL 按规范化URL索引（协议与主机小写、去除片段与签名类查询参数、其余参数排序）
+
+缓存时长按租户配置（IMAGE_DESCRIPTION_CACHE_TENANT_TTL_HOURS），为0的租户不缓存。
+同一进程内相同图片的并发描述共享一次调用。
+
+Redis数据布局:
+    image_description:{tenant_id}:{digest}  (String, 图片描述文本)
+"""
+
+import asyncio
+import binascii
+from collections.abc import Awaitable, Callable
+import hashlib
+from typing import Optional
+
+from config import mas_config
+from infra.cache import get_redis_client
+from utils import get_component_logger
+from utils.image_preprocessor import decode_data_url, normalize_image_url
+from utils.metrics import metrics
+
+logger = get_component_logger(__name__, "ImageDescriptionCache")
+
+KEY_PREFIX = "image_description"
+
+
+def image_digest(url: str) -> str:
+    """
+    图片的缓存摘要：data URL 取内容哈希，其余取规范化URL哈希
+
+    参数:
+        url: 图片URL或data URL
+
+    返回:
+        str: SHA-256十六进制摘要
+    """
+    if url.startswith("data:"):
+        try:
+            data = decode_data_url(url)
+        except (binascii.Error, ValueError):
+            data = url.partition(",")[2].encode()
+        return hashlib.sha256(data).hexdigest()
+    return hashlib.sha256(normalize_image_url(url).encode()).hexdigest()
+
+
+def image_cache_ttl(tenant_id: Optional[str]) -> int:
+    """
+    租户的图片描述缓存时长（秒），0 表示不缓存
+
+    租户单独配置取自 IMAGE_DESCRIPTION_CACHE_TENANT_TTL_HOURS（"tenant_a:24,tenant_b:0"），
+    未配置的租户使用 IMAGE_DESCRIPTION_CACHE_TTL_HOURS。
+    """
+    hours = mas_config.IMAGE_DESCRIPTION_CACHE_TTL_HOURS
+    for entry in mas_config.IMAGE_DESCRIPTION_CACHE_TENANT_TTL_HOURS.split(","):
+        tenant, _, value = entry.strip().partition(":")
+        if tenant and tenant == tenant_id:
+            try:
+                hours = float(value)
+            except ValueError:
+                logger.warning(f"租户图片缓存时长配置无效: {entry}")
+            break
+    return max(int(hours * 3600), 0)
+
+
+class ImageDescriptionCache:
+    """基于Redis的图片描述缓存"""
+
+    def __init__(self):
+        self._redis = None
+        # 进行中的描述调用，按 (租户, 摘要) 共享
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await get_redis_client()
+        return self._redis
+
+    @staticmethod
+    def _key(tenant_id: str, digest: str) -> str:
+        return f"{KEY_PREFIX}:{tenant_id}:{digest}"
+
+    async def describe(
+        self,
+        tenant_id: Optional[str],
+        url: str,
+        describe: Callable[[], Awaitable[str]]
+    ) -> str:
+        """
+        获取图片描述：命中缓存直接返回，否则调用 describe 生成并写入缓存
+
+        参数:
+            tenant_id: 租户ID，为空时不缓存
+            url: 图片URL或data URL
+            describe: 生成描述的LLM调用，失败时抛出异常（失败结果不缓存）
+
+        返回:
+            str: 图片描述
+        """
+        ttl = image_cache_ttl(tenant_id) if tenant_id else 0
+        if ttl <= 0:
+            return await describe()
+
+        key = self._key(tenant_id, image_digest(url))
+        cached = await self._get(key)
+        if cached is not None:
+            metrics.incr("image_description_cache", result="hit")
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.incr("image_description_cache", result="shared")
+            return await asyncio.shield(task)
+
+        metrics.incr("image_description_cache", result="miss")
+        task = asyncio.create_task(self._describe_and_store(key, ttl, describe))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _describe_and_store(self, key: str, ttl: int, describe: Callable[[], Awaitable[str]]) -> str:
+        description = await describe()
+        if description:
+            try:
+                redis_client = await self._client()
+                await redis_client.set(key, description.encode(), ex=ttl)
+            except Exception as e:
+                logger.warning(f"图片描述缓存写入失败: {e}")
+        return description
+
+    async def _get(self, key: str) -> Optional[str]:
+        try:
+            redis_client = await self._client()
+            data = await redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"图片描述缓存读取失败: {e}")
+            return None
+        return data.decode() if data else None
+
+
+# 全局缓存
+image_description_cache = ImageDescriptionCache()
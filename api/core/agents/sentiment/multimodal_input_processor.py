@@ -8,16 +8,22 @@
 - 支持 Sequence[InputContent] 多模态输入
 - 直接利用LLM原生多模态能力
 - 将多模态内容转换为纯文字
+- 图片描述按租户缓存，多张图片并发处理
+- 图片缩放压缩后再交给视觉模型
 - 提供简洁的处理结果
 """
 
+import asyncio
 from collections.abc import Sequence
-from typing import Any
+from typing import Any, Optional
 from uuid import uuid4
 
+from config import mas_config
 from libs.types import InputContentParams, InputContent, InputType, Message, MessageParams
-from infra.runtimes import LLMClient, CompletionsRequest
+from infra.runtimes import LLMClient, CompletionsRequest, RequestPriority
 from utils import get_component_logger
+from utils.image_preprocessor import image_preprocessor
+from .image_description_cache import image_description_cache
 
 logger = get_component_logger(__name__)
 
@@ -33,12 +39,17 @@ class MultimodalInputProcessor():
         self.tenant_id = tenant_id
         self.llm_client = LLMClient()
 
-    async def process_input(self, customer_input: MessageParams) -> tuple[str, dict[str, Any]]:
+    async def process_input(
+        self,
+        customer_input: MessageParams,
+        tenant_id: Optional[str] = None
+    ) -> tuple[str, dict[str, Any]]:
         """
         处理多模态输入消息列表
 
         参数:
             customer_input: 消息列表 (MessageParams)
+            tenant_id: 租户ID（决定图片描述缓存的范围与时长）
 
         返回:
             tuple[str, dict[str, Any]]: (处理后的纯文字, 多模态上下文)
@@ -69,7 +80,7 @@ class MultimodalInputProcessor():
                 total_items += 1
             else:
                 # Sequence[InputContent]
-                text, context = await self._extract_text_from_multimodal(content)
+                text, context = await self._extract_text_from_multimodal(content, tenant_id or self.tenant_id)
                 combined_texts.append(text)
                 all_modalities.update(context.get("modalities", []))
                 total_items += context.get("item_count", 0)
@@ -80,15 +91,21 @@ class MultimodalInputProcessor():
             "item_count": total_items
         }
 
-    async def _extract_text_from_multimodal(self, input_sequence: Sequence[InputContent]) -> tuple[str, dict[str, Any]]:
+    async def _extract_text_from_multimodal(
+        self,
+        input_sequence: Sequence[InputContent],
+        tenant_id: Optional[str] = None
+    ) -> tuple[str, dict[str, Any]]:
         """
         从多模态输入序列中提取文字
 
-        使用LLM直接理解多模态内容并转换为文字描述
+        图片逐张由LLM转换为文字描述（按租户缓存，相同图片只描述一次），
+        多张图片并发处理（并发数受 MULTIMODAL_IMAGE_CONCURRENCY 限制），
+        描述按原顺序与文本内容拼接。
         """
         try:
-            # 构建用于LLM处理的消息
-            llm_messages = []
+            parts: list[str] = []
+            images: dict[int, str] = {}
             modalities = set()
 
             for item in input_sequence:
@@ -103,40 +120,37 @@ class MultimodalInputProcessor():
                 modalities.add(content_type)
 
                 if content_type == InputType.TEXT:
-                    llm_messages.append({"type": "text", "text": content})
+                    parts.append(content)
                 elif content_type == InputType.IMAGE:
-                    llm_messages.append({
-                        "type": "image_url",
-                        "image_url": {"url": content}
-                    })
+                    images[len(parts)] = content
+                    parts.append("")
                 elif content_type == InputType.AUDIO:
                     # 对于音频，我们先提供占位符，后续可以集成Whisper
-                    llm_messages.append({
-                        "type": "text",
-                        "text": f"[音频内容: {content}]"
-                    })
+                    parts.append(f"[音频内容: {content}]")
                 else:
                     # 其他类型转为文本描述
-                    llm_messages.append({
-                        "type": "text",
-                        "text": f"[{content_type}类型内容: {content}]"
-                    })
-
-            # 如果包含多模态内容，使用LLM提取文字
-            if len(modalities) > 1 or InputType.IMAGE in modalities:
-                extracted_text = await self._llm_extract_text(llm_messages)
-            else:
-                # 如果只是纯文本，直接拼接
-                extracted_text = " ".join(
-                    msg["text"] for msg in llm_messages
-                    if msg["type"] == "text"
-                )
+                    parts.append(f"[{content_type}类型内容: {content}]")
+
+            if images:
+                semaphore = asyncio.Semaphore(mas_config.MULTIMODAL_IMAGE_CONCURRENCY)
+
+                async def describe(url: str) -> str:
+                    async with semaphore:
+                        return await self._describe_image(url, tenant_id)
+
+                # 同一条消息中的重复图片只描述一次
+                urls = list(dict.fromkeys(images.values()))
+                descriptions = dict(zip(urls, await asyncio.gather(*(describe(url) for url in urls))))
+                for index, url in images.items():
+                    parts[index] = f"[图片: {descriptions[url]}]"
+
+            extracted_text = " ".join(part for part in parts if part)
 
             context = {
                 "type": "multimodal",
                 "modalities": list(modalities),
                 "item_count": len(input_sequence),
-                "processing_method": "llm_extraction"
+                "processing_method": "llm_extraction" if images else "text_concat"
             }
 
             return extracted_text or "无有效内容", context
@@ -152,72 +166,51 @@ class MultimodalInputProcessor():
                 "error": str(e)
             }
 
-    async def _llm_extract_text(self, messages: list[dict[str, Any]]) -> str:
+    async def _describe_image(self, url: str, tenant_id: Optional[str]) -> str:
         """
-        使用LLM提取多模态内容的文字描述
-
-        使用LLM直接理解多模态内容并转换为文字描述
+        获取单张图片的文字描述（经由图片描述缓存），失败时返回图片占位说明
         """
         try:
-            # 1. 转换回 InputContent 列表
-            content_list = []
-            for msg in messages:
-                if msg["type"] == "text":
-                    content_list.append(InputContent(type=InputType.TEXT, content=msg["text"]))
-                elif msg["type"] == "image_url":
-                    # 确保提取 URL 字符串
-                    url_data = msg["image_url"]
-                    url = url_data["url"] if isinstance(url_data, dict) else url_data
-                    content_list.append(InputContent(type=InputType.IMAGE, content=url))
-            
-            if not content_list:
-                return ""
-
-            # 2. 构建系统提示词
-            system_prompt = (
-                "你是一个专业的视觉分析助手。请详细描述用户发送的内容。"
-                "如果是图片，请描述图片中的主体、场景、细节以及可能包含的情感或文字信息。"
-                "如果是文本，请保持原意。"
-                "如果是图文混合，请综合理解并生成连贯的描述。"
-                "输出应为纯文本段落，不要包含Markdown格式或其他无关内容。"
-            )
-
-            # 3. 构建 LLM 请求消息
-            llm_messages = [
+            return await image_description_cache.describe(tenant_id, url, lambda: self._llm_describe_image(url))
+        except Exception as e:
+            logger.error(f"LLM图片描述失败: {e}", exc_info=True)
+            return url
+
+    async def _llm_describe_image(self, url: str) -> str:
+        """
+        使用LLM生成单张图片的文字描述（图片先经本地缩放压缩）
+
+        失败或无内容时抛出异常，避免缓存无效描述。
+        """
+        image = await image_preprocessor.prepare(url)
+        system_prompt = (
+            "你是一个专业的视觉分析助手。请详细描述用户发送的图片，"
+            "包括图片中的主体、场景、细节以及可能包含的情感或文字信息。"
+            "输出应为纯文本段落，不要包含Markdown格式或其他无关内容。"
+        )
+
+        request = CompletionsRequest(
+            id=uuid4(),
+            model="openai/gpt-4o",  # 使用支持视觉的模型
+            provider="openrouter",
+            temperature=0.5,
+            messages=[
                 Message(role="system", content=system_prompt),
-                Message(role="user", content=content_list)
-            ]
-
-            # 4. 发送请求
-            request = CompletionsRequest(
-                id=uuid4(),
-                model="openai/gpt-4o",  # 使用支持视觉的模型
-                provider="openrouter",
-                temperature=0.5,
-                messages=llm_messages
-            )
-
-            logger.info(f"调用多模态LLM进行图片分析: {len(content_list)}个内容项")
-            response = await self.llm_client.completions(request)
-            
-            # 5. 处理响应
-            content = response.content
-            result_text = content.get("content", "") if isinstance(content, dict) else str(content)
-            
-            logger.info(f"图片分析完成，描述长度: {len(result_text)}")
-            return result_text
+                Message(role="user", content=[InputContent(type=InputType.IMAGE, content=image.url)])
+            ],
+            priority=RequestPriority.INTERACTIVE
+        )
 
-        except Exception as e:
-            logger.error(f"LLM提取多模态文字失败: {e}", exc_info=True)
-            # 降级处理：简单拼接
-            text_parts = []
-            for msg in messages:
-                if msg["type"] == "text":
-                    text_parts.append(msg["text"])
-                elif msg["type"] == "image_url":
-                    url = msg["image_url"]["url"]
-                    text_parts.append(f"[图片: {url}]")
-            return " ".join(text_parts)
+        logger.info("调用多模态LLM进行图片分析")
+        response = await self.llm_client.completions(request)
+
+        content = response.content
+        result_text = (content.get("content", "") if isinstance(content, dict) else str(content or "")).strip()
+        if not result_text:
+            raise ValueError("图片描述为空")
+
+        logger.info(f"图片分析完成，描述长度: {len(result_text)}")
+        return result_text
 
     def _extract_fallback_text(self, input_sequence: Sequence[InputContent]) -> str:
         """降级文本提取"""
@@ -1,11 +1,68 @@
 """
 极简提示词匹配器 - 纯数据驱动，零逻辑
+
+配置加载时预编译：情感分数边界编译为有序数组（二分查找），
+提示词矩阵编译为以 (情感维度, 旅程阶段) 为键的扁平表。
+配置文件按修改时间检测变更，重新编译后整体替换，运行中调整提示词无需重启。
 """
 
+from bisect import bisect_right
+from dataclasses import dataclass
 import json
+import os
 from pathlib import Path
+import time
 from typing import Any, Optional
 
+from config import mas_config
+from utils import get_component_logger
+from utils.metrics import metrics
+
+logger = get_component_logger(__name__, "PromptMatcher")
+
+
+@dataclass(frozen=True)
+class CompiledPromptConfig:
+    """预编译的提示词配置（不可变，热重载时整体替换）"""
+    raw: dict[str, Any]
+    lower_bounds: tuple[float, ...]  # 各情感维度区间下界（升序）
+    upper_bounds: tuple[float, ...]  # 对应区间上界（不含）
+    levels: tuple[str, ...]  # 对应情感维度
+    matrix: dict[tuple[str, str], dict[str, Any]]  # (情感维度, 旅程阶段) -> 提示词配置
+    fallback: dict[str, Any]
+    mtime: float
+
+    @classmethod
+    def compile(cls, raw: dict[str, Any], mtime: float) -> "CompiledPromptConfig":
+        """编译配置，结构不完整时抛出 ValueError"""
+        try:
+            ranges = sorted(
+                (float(config["range"][0]), float(config["range"][1]), level)
+                for level, config in raw["dimensions"]["sentiment"].items()
+            )
+            # 键格式为 "{情感维度}_{旅程阶段}"
+            matrix = {}
+            for key, prompt_config in raw["prompt_matrix"].items():
+                sentiment_level, _, journey_stage = key.partition("_")
+                for level in (r[2] for r in ranges):
+                    if key.startswith(f"{level}_"):
+                        sentiment_level, journey_stage = level, key[len(level) + 1:]
+                        break
+                matrix[(sentiment_level, journey_stage)] = prompt_config
+            fallback = raw["fallback_prompt"]
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"提示词配置结构错误: {e!r}")
+
+        return cls(
+            raw=raw,
+            lower_bounds=tuple(r[0] for r in ranges),
+            upper_bounds=tuple(r[1] for r in ranges),
+            levels=tuple(r[2] for r in ranges),
+            matrix=matrix,
+            fallback=fallback,
+            mtime=mtime
+        )
+
 
 class PromptMatcher:
     """
@@ -15,7 +72,7 @@ class PromptMatcher:
     1. 根据情感分数映射到维度（low/medium/high）
     2. 结合旅程阶段构建查找键
     3. 从配置文件中查表返回对应提示词
-    4. 支持配置热重载
+    4. 支持配置热重载（按修改时间检测，间隔 PROMPT_CONFIG_RELOAD_INTERVAL_SECONDS）
     """
 
     def __init__(self, config_path: Optional[str] = None):
@@ -24,32 +81,68 @@ class PromptMatcher:
             config_path = Path(__file__).parent / "prompt_config.json"
 
         self.config_path = config_path
-        self._load_config()
+        self._compiled = self._load_config()
+        self._next_check = time.monotonic() + mas_config.PROMPT_CONFIG_RELOAD_INTERVAL_SECONDS
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """当前生效的原始配置"""
+        return self._compiled.raw
 
-    def _load_config(self) -> None:
-        """加载配置文件"""
+    def _load_config(self) -> CompiledPromptConfig:
+        """加载并编译配置文件"""
         try:
+            mtime = os.stat(self.config_path).st_mtime
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
+                raw = json.load(f)
         except FileNotFoundError:
             raise FileNotFoundError(f"提示词配置文件未找到: {self.config_path}")
         except json.JSONDecodeError as e:
             raise ValueError(f"提示词配置文件格式错误: {e}")
+        return CompiledPromptConfig.compile(raw, mtime)
+
+    def _reload_if_changed(self) -> CompiledPromptConfig:
+        """
+        配置文件修改时间变化时重新加载
+
+        新配置编译成功后整体替换；加载失败时保留当前配置，下次检测时重试。
+        """
+        compiled = self._compiled
+        interval = mas_config.PROMPT_CONFIG_RELOAD_INTERVAL_SECONDS
+        now = time.monotonic()
+        if interval <= 0 or now < self._next_check:
+            return compiled
+        self._next_check = now + interval
 
-    def _map_sentiment_level(self, score: float) -> str:
+        try:
+            if os.stat(self.config_path).st_mtime == compiled.mtime:
+                return compiled
+            reloaded = self._load_config()
+        except (OSError, ValueError) as e:
+            logger.warning(f"提示词配置重新加载失败，继续使用当前配置: {e}")
+            metrics.incr("prompt_config_reload", result="failed")
+            return compiled
+
+        self._compiled = reloaded
+        metrics.incr("prompt_config_reload", result="success")
+        logger.info(f"提示词配置已重新加载: {self.config_path}")
+        return reloaded
+
+    @staticmethod
+    def _map_sentiment_level(score: float, compiled: CompiledPromptConfig) -> str:
         """
-        情感分数 → 维度映射
+        情感分数 → 维度映射（按区间下界二分查找）
 
         Args:
             score: 0.0-1.0 的情感分数
+            compiled: 预编译配置
 
         Returns:
             "low" | "medium" | "high"
         """
-        for level, config in self.config["dimensions"]["sentiment"].items():
-            min_score, max_score = config["range"]
-            if min_score <= score < max_score:
-                return level
+        index = bisect_right(compiled.lower_bounds, score) - 1
+        if index >= 0 and score < compiled.upper_bounds[index]:
+            return compiled.levels[index]
 
         # 处理边界情况（score = 1.0）
         if score == 1.0:
@@ -80,23 +173,41 @@ class PromptMatcher:
             - journey_stage: 旅程阶段
             - sentiment_score: 原始情感分数
         """
-        # 1. 映射情感维度
-        sentiment_level = self._map_sentiment_level(sentiment_score)
+        # 同一次查表始终使用同一份配置
+        compiled = self._reload_if_changed()
 
-        # 2. 构建查找键
-        key = f"{sentiment_level}_{journey_stage}"
+        # 1. 映射情感维度
+        sentiment_level = self._map_sentiment_level(sentiment_score, compiled)
 
-        # 3. 查表获取提示词配置
-        prompt_config = self.config["prompt_matrix"].get(
-            key,
-            self.config["fallback_prompt"]  # 兜底配置
+        # 2. 查表获取提示词配置
+        prompt_config = compiled.matrix.get(
+            (sentiment_level, journey_stage),
+            compiled.fallback  # 兜底配置
         )
 
-        # 4. 返回增强的结果
+        # 3. 返回增强的结果
         return {
             **prompt_config,
-            "matched_key": key,
+            "matched_key": f"{sentiment_level}_{journey_stage}",
             "sentiment_level": sentiment_level,
             "journey_stage": journey_stage,
             "sentiment_score": sentiment_score
         }
+
+    def get_fallback_prompt(self, journey_stage: str = "awareness") -> dict[str, Any]:
+        """
+        兜底提示词（情感分析未完成时使用）
+
+        Args:
+            journey_stage: 旅程阶段
+
+        Returns:
+            与 get_prompt 结构相同的兜底提示词配置，matched_key 为 "fallback"
+        """
+        return {
+            **self._reload_if_changed().fallback,
+            "matched_key": "fallback",
+            "sentiment_level": "medium",
+            "journey_stage": journey_stage,
+            "sentiment_score": 0.5
+        }
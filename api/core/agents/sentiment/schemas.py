@@ -0,0 +1,29 @@
+"""
+情感分析结构化输出模型
+
+作为 completions_structured 的 output_model，约束LLM按固定结构返回情感分析结果。
+字段均为必填，以兼容严格模式的JSON Schema；json_object 模式下校验失败时供应商返回原始字典，
+缺失字段与数值范围在 LLMSentimentAnalyzer 中校正。
+"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class EmotionalIndicators(BaseModel):
+    """具体情感指标"""
+
+    enthusiasm: float = Field(description="热情程度 0.0-1.0")
+    concern: float = Field(description="担忧程度 0.0-1.0")
+    satisfaction: float = Field(description="满意程度 0.0-1.0")
+
+
+class SentimentAnalysisOutput(BaseModel):
+    """情感分析结果"""
+
+    sentiment: Literal["positive", "negative", "neutral"] = Field(description="整体情感倾向")
+    score: float = Field(description="情感强度 0.0-1.0，越接近1情感越强烈")
+    urgency: Literal["high", "medium", "low"] = Field(description="紧急程度")
+    confidence: float = Field(description="分析置信度 0.0-1.0")
+    emotional_indicators: EmotionalIndicators = Field(description="具体情感指标")
@@ -13,12 +13,18 @@
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
 from typing import Any, Union
 from uuid import uuid4
 
-from infra.runtimes import CompletionsRequest
+from pydantic import BaseModel
+
+from config import mas_config
+from infra.runtimes import CompletionsRequest, RequestPriority
 from libs.types import Message
-from utils import get_component_logger
+from utils import extract_json_object, get_component_logger
+from utils.metrics import metrics
+from .schemas import SentimentAnalysisOutput
 
 logger = get_component_logger(__name__)
 
@@ -33,12 +39,17 @@ class SentimentAnalysisStrategy(ABC):
 
 
 class LLMSentimentAnalyzer(SentimentAnalysisStrategy):
-    """基于LLM的情感分析器"""
+    """
+    基于LLM的情感分析器
 
-    def __init__(self, llm_provider: str, llm_model: str, invoke_llm_fn):
+    供应商支持结构化输出时按 SentimentAnalysisOutput 约束输出，否则容错解析文本中的JSON。
+    """
+
+    def __init__(self, llm_provider: str, llm_model: str, invoke_llm_fn, structured_output: bool = False):
         self.llm_provider = llm_provider
         self.llm_model = llm_model
         self.invoke_llm = invoke_llm_fn
+        self.structured_output = structured_output
 
     async def analyze(self, text: str, context: dict[str, Any] = None) -> dict[str, Any]:
         """使用LLM分析情感"""
@@ -57,7 +68,9 @@ class LLMSentimentAnalyzer(SentimentAnalysisStrategy):
         try:
             prompt = self._build_analysis_prompt(text, context or {})
 
+            # 固定的分析指令在前，便于命中供应商侧提示词缓存
             messages = [
+                Message(role="system", content=self._build_system_prompt()),
                 Message(role="user", content=prompt)
             ]
             request = CompletionsRequest(
@@ -65,15 +78,15 @@ class LLMSentimentAnalyzer(SentimentAnalysisStrategy):
                 provider=self.llm_provider,
                 model=self.llm_model,
                 temperature=0.1,
-                messages=messages
+                messages=messages,
+                output_model=SentimentAnalysisOutput if self.structured_output else None,
+                hedge=True,
+                cache_ttl=mas_config.LLM_RESPONSE_CACHE_TTL,
+                prompt_cache_prefix=1,
+                priority=RequestPriority.INTERACTIVE
             )
 
             llm_response = await self.invoke_llm(request)
-            raw_response = (
-                llm_response.content
-                if isinstance(llm_response.content, str)
-                else str(llm_response.content)
-            )
 
             # 提取 token 信息
             try:
@@ -89,7 +102,7 @@ class LLMSentimentAnalyzer(SentimentAnalysisStrategy):
                 total_tokens = 0
 
             # 解析并验证结果
-            result = self._parse_llm_response(raw_response)
+            result = self._parse_llm_response(llm_response.content)
             validated_result = self._validate_and_normalize(result)
 
             # 添加标准化的token信息
@@ -113,28 +126,22 @@ class LLMSentimentAnalyzer(SentimentAnalysisStrategy):
                 "error": str(e)
             }
 
-    def _build_analysis_prompt(self, text: str, context: dict[str, Any]) -> str:
-        """构建分析提示词"""
-        context_info = self._extract_context_info(context)
-
-        prompt = f"""请分析以下客户输入的情感状态：
-
-客户输入：{text}
-
-{context_info}
+    def _build_system_prompt(self) -> str:
+        """构建分析指令（与输入无关，作为可缓存的稳定前缀）"""
+        return """你是客户情感分析专家，请分析客户输入的情感状态。
 
 请返回JSON格式的分析结果：
-{{
+{
     "sentiment": "positive|negative|neutral",
     "score": 0.0-1.0,
     "urgency": "high|medium|low",
     "confidence": 0.0-1.0,
-    "emotional_indicators": {{
+    "emotional_indicators": {
         "enthusiasm": 0.0-1.0,
         "concern": 0.0-1.0,
         "satisfaction": 0.0-1.0
-    }}
-}}
+    }
+}
 
 判断标准：
 - sentiment: 整体情感倾向（积极/消极/中性）
@@ -145,7 +152,15 @@ class LLMSentimentAnalyzer(SentimentAnalysisStrategy):
 
 请基于文本内容和上下文信息进行综合判断。"""
 
-        return prompt
+    def _build_analysis_prompt(self, text: str, context: dict[str, Any]) -> str:
+        """构建分析输入"""
+        context_info = self._extract_context_info(context)
+
+        return f"""请分析以下客户输入的情感状态：
+
+客户输入：{text}
+
+{context_info}"""
 
     def _extract_context_info(self, context: dict[str, Any]) -> str:
         """从多模态上下文中提取有用信息"""
@@ -167,23 +182,24 @@ class LLMSentimentAnalyzer(SentimentAnalysisStrategy):
 
         return "\n上下文信息：\n" + "\n".join(context_parts) if context_parts else ""
 
-    def _parse_llm_response(self, raw_response: str) -> dict[str, Any]:
-        """解析LLM响应"""
-        try:
-            import json
-            return json.loads(raw_response)
-        except json.JSONDecodeError:
-            # 尝试从文本中提取JSON
-            import re
-            json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
-            if json_match:
-                try:
-                    return json.loads(json_match.group())
-                except json.JSONDecodeError:
-                    pass
-
-            # 降级处理
-            return self._fallback_parse(raw_response)
+    def _parse_llm_response(self, content: Any) -> dict[str, Any]:
+        """解析LLM响应：结构化结果直接转换，文本容错提取JSON，均失败时按关键词降级"""
+        if isinstance(content, BaseModel):
+            metrics.incr("llm_output_parse", agent="sentiment_analysis", result="structured")
+            return content.model_dump()
+        if isinstance(content, Mapping):
+            metrics.incr("llm_output_parse", agent="sentiment_analysis", result="structured")
+            return dict(content)
+
+        raw_response = str(content or "")
+        result = extract_json_object(raw_response)
+        if result is not None:
+            metrics.incr("llm_output_parse", agent="sentiment_analysis", result="text")
+            return result
+
+        # 降级处理
+        metrics.incr("llm_output_parse", agent="sentiment_analysis", result="failed")
+        return self._fallback_parse(raw_response)
 
     def _fallback_parse(self, text: str) -> dict[str, Any]:
         """降级解析方法"""
@@ -262,13 +278,13 @@ class SentimentAnalyzer():
     协调不同的分析策略，提供统一的情感分析接口。
     """
 
-    def __init__(self, llm_provider: str, llm_model: str, invoke_llm_fn):
+    def __init__(self, llm_provider: str, llm_model: str, invoke_llm_fn, structured_output: bool = False):
         self.llm_provider = llm_provider
         self.llm_model = llm_model
 
         # 初始化分析策略
         self.strategies: list[SentimentAnalysisStrategy] = [
-            LLMSentimentAnalyzer(llm_provider, llm_model, invoke_llm_fn)
+            LLMSentimentAnalyzer(llm_provider, llm_model, invoke_llm_fn, structured_output)
         ]
 
         logger.info(f"情感分析llm: {llm_provider}/{llm_model}")
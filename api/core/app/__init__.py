@@ -7,16 +7,24 @@ LangGraph工作流核心模块
 - Orchestrator: 多智能体编排器
 - WorkflowBuilder: LangGraph工作流构建器
 - StateManager: 对话状态管理器
+- RedisCheckpointSaver: 后台运行的Redis检查点存储
 """
 
 # LangGraph工作流核心组件导入
 from .orchestrator import Orchestrator
 from .workflow_builder import WorkflowBuilder
 from .state_manager import StateManager
+from .checkpointer import RedisCheckpointSaver, PendingRunStore, checkpoint_saver, pending_runs
 
 __all__ = [
     # LangGraph工作流组件
     "Orchestrator",
     "WorkflowBuilder",
-    "StateManager"
+    "StateManager",
+
+    # 可恢复运行
+    "RedisCheckpointSaver",
+    "PendingRunStore",
+    "checkpoint_saver",
+    "pending_runs"
 ]
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""
+可恢复运行
+
+后台运行（/async）的工作流以运行ID为 LangGraph 线程ID，将每个节点完成后的检查点
+与节点写入保存到Redis。进程中途退出或运行失败后，以相同运行ID重新执行时从最后一个检查点恢复，
+已完成节点的LLM结果不再重新计算。
+
+检查点与未完成运行的登记都设置过期时间，运行结束（回调发送后）时主动删除。
+
+Redis数据布局:
+    workflow_checkpoint:{thread_id}:{ns}                 (ZSet, 检查点ID索引，同分值按字典序即时间序)
+    workflow_checkpoint:{thread_id}:{ns}:{checkpoint_id} (Hash, checkpoint / metadata / parent)
+    workflow_checkpoint_writes:{thread_id}:{ns}:{checkpoint_id} (Hash, {task_id}:{idx} -> 节点写入)
+    workflow_pending_runs                                (Hash, run_id -> WorkflowRun JSON)
+    workflow_run_lease:{run_id}                          (String, 执行中运行的租约，值为工作进程ID)
+"""
+
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+from config import mas_config
+from infra.cache import get_redis_client
+from models import WorkflowRun
+from utils import get_component_logger
+
+logger = get_component_logger(__name__, "WorkflowCheckpoint")
+
+CHECKPOINT_PREFIX = "workflow_checkpoint"
+WRITES_PREFIX = "workflow_checkpoint_writes"
+PENDING_RUNS_KEY = "workflow_pending_runs"
+LEASE_PREFIX = "workflow_run_lease"
+
+# 当前工作进程标识（租约持有者）
+WORKER_ID = uuid4().hex
+
+
+class RedisCheckpointSaver(BaseCheckpointSaver):
+    """基于Redis的 LangGraph 检查点存储（仅异步接口）"""
+
+    def __init__(self):
+        super().__init__()
+        self._redis = None
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await get_redis_client()
+        return self._redis
+
+    @staticmethod
+    def _ttl() -> int:
+        return mas_config.WORKFLOW_CHECKPOINT_TTL_HOURS * 3600
+
+    @staticmethod
+    def _index_key(thread_id: str, checkpoint_ns: str) -> str:
+        return f"{CHECKPOINT_PREFIX}:{thread_id}:{checkpoint_ns}"
+
+    @staticmethod
+    def _checkpoint_key(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{CHECKPOINT_PREFIX}:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    @staticmethod
+    def _writes_key(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{WRITES_PREFIX}:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    def _dump(self, obj: Any) -> bytes:
+        """序列化为 "{类型}:{数据}" 字节串"""
+        type_, data = self.serde.dumps_typed(obj)
+        return type_.encode() + b":" + data
+
+    def _load(self, raw: bytes) -> Any:
+        type_, _, data = raw.partition(b":")
+        return self.serde.loads_typed((type_.decode(), data))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """读取指定检查点，未指定检查点ID时读取最新检查点"""
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        redis_client = await self._client()
+
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id is None:
+            latest = await redis_client.zrange(self._index_key(thread_id, checkpoint_ns), -1, -1)
+            if not latest:
+                return None
+            checkpoint_id = latest[0].decode()
+
+        return await self._load_tuple(thread_id, checkpoint_ns, checkpoint_id)
+
+    async def _load_tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[CheckpointTuple]:
+        redis_client = await self._client()
+        record = await redis_client.hgetall(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+        if not record:
+            return None
+
+        writes = await redis_client.hgetall(self._writes_key(thread_id, checkpoint_ns, checkpoint_id))
+        pending_writes = []
+        for field in sorted(writes, key=lambda f: (f.rpartition(b":")[0], int(f.rpartition(b":")[2]))):
+            task_id, channel, value = self._load(writes[field])
+            pending_writes.append((task_id, channel, value))
+
+        parent_id = record.get(b"parent", b"").decode()
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=self._load(record[b"checkpoint"]),
+            metadata=self._load(record[b"metadata"]),
+            parent_config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": parent_id,
+            }} if parent_id else None,
+            pending_writes=pending_writes,
+        )
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """按时间倒序列出线程的检查点（需指定 thread_id）"""
+        if config is None:
+            return
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        before_id = get_checkpoint_id(before) if before else None
+
+        redis_client = await self._client()
+        checkpoint_ids = await redis_client.zrange(self._index_key(thread_id, checkpoint_ns), 0, -1)
+        for raw_id in reversed(checkpoint_ids):
+            checkpoint_id = raw_id.decode()
+            if before_id is not None and checkpoint_id >= before_id:
+                continue
+            checkpoint_tuple = await self._load_tuple(thread_id, checkpoint_ns, checkpoint_id)
+            if checkpoint_tuple is None:
+                continue
+            if filter and any(checkpoint_tuple.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield checkpoint_tuple
+            if limit is not None:
+                limit -= 1
+                if limit <= 0:
+                    return
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """保存检查点"""
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = checkpoint["id"]
+        index_key = self._index_key(thread_id, checkpoint_ns)
+        checkpoint_key = self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)
+
+        redis_client = await self._client()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(checkpoint_key, mapping={
+                "checkpoint": self._dump(checkpoint),
+                "metadata": self._dump(metadata),
+                "parent": configurable.get("checkpoint_id") or "",
+            })
+            pipe.expire(checkpoint_key, self._ttl())
+            pipe.zadd(index_key, {checkpoint_id: 0})
+            pipe.expire(index_key, self._ttl())
+            await pipe.execute()
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }}
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """保存节点写入（并行节点中已完成节点的结果，恢复时无需重新执行）"""
+        configurable = config["configurable"]
+        writes_key = self._writes_key(
+            str(configurable["thread_id"]),
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"]
+        )
+
+        redis_client = await self._client()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                field = f"{task_id}:{write_idx}"
+                data = self._dump((task_id, channel, value))
+                # 普通写入只保存一次，特殊写入（错误、中断等）以最新为准
+                if write_idx >= 0:
+                    pipe.hsetnx(writes_key, field, data)
+                else:
+                    pipe.hset(writes_key, field, data)
+            pipe.expire(writes_key, self._ttl())
+            await pipe.execute()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """删除线程（运行）的全部检查点与节点写入"""
+        redis_client = await self._client()
+        keys = [
+            key
+            for prefix in (CHECKPOINT_PREFIX, WRITES_PREFIX)
+            async for key in redis_client.scan_iter(match=f"{prefix}:{thread_id}:*", count=100)
+        ]
+        if keys:
+            await redis_client.delete(*keys)
+
+
+class PendingRunStore:
+    """
+    未完成后台运行的登记
+
+    运行期间以租约标记执行中，租约由心跳续期；工作进程退出后租约过期，
+    其他进程启动时认领并从检查点恢复。
+    """
+
+    def __init__(self):
+        self._redis = None
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await get_redis_client()
+        return self._redis
+
+    @staticmethod
+    def _lease_key(run_id: UUID) -> str:
+        return f"{LEASE_PREFIX}:{run_id}"
+
+    async def register(self, workflow: WorkflowRun):
+        """登记运行并取得租约"""
+        redis_client = await self._client()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(PENDING_RUNS_KEY, str(workflow.workflow_id), workflow.model_dump_json())
+            pipe.set(self._lease_key(workflow.workflow_id), WORKER_ID, ex=mas_config.WORKFLOW_RUN_LEASE_SECONDS)
+            await pipe.execute()
+
+    async def renew(self, run_id: UUID):
+        """续期租约"""
+        redis_client = await self._client()
+        await redis_client.set(self._lease_key(run_id), WORKER_ID, ex=mas_config.WORKFLOW_RUN_LEASE_SECONDS)
+
+    async def complete(self, run_id: UUID):
+        """运行结束（成功或最终失败），移除登记与租约"""
+        redis_client = await self._client()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hdel(PENDING_RUNS_KEY, str(run_id))
+            pipe.delete(self._lease_key(run_id))
+            await pipe.execute()
+
+    async def claim_orphaned(self) -> list[WorkflowRun]:
+        """
+        认领租约已过期的运行
+
+        Returns:
+            list[WorkflowRun]: 由当前进程认领、需要恢复执行的运行
+        """
+        redis_client = await self._client()
+        claimed = []
+        for run_id, data in (await redis_client.hgetall(PENDING_RUNS_KEY)).items():
+            acquired = await redis_client.set(
+                self._lease_key(run_id.decode()), WORKER_ID, nx=True, ex=mas_config.WORKFLOW_RUN_LEASE_SECONDS
+            )
+            if not acquired:
+                continue
+            try:
+                claimed.append(WorkflowRun.model_validate_json(data))
+            except Exception as e:
+                logger.warning(f"未完成运行登记无法解析，移除: {run_id.decode()}: {e}")
+                await redis_client.hdel(PENDING_RUNS_KEY, run_id)
+        return claimed
+
+
+# 全局存储
+checkpoint_saver = RedisCheckpointSaver()
+pending_runs = PendingRunStore()
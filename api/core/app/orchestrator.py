@@ -12,12 +12,17 @@
 - 多模态输出生成（TTS等）
 """
 
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import suppress
 from uuid import UUID
 
 from langfuse import observe, get_client
 
+from config import mas_config
 from core.entities import WorkflowExecutionModel
 from core.tools import generate_audio_output
+from infra.runtimes import deadline_scope
 from libs.types import OutputType
 from models import WorkflowRun
 from utils import (
@@ -26,16 +31,21 @@ from utils import (
     get_processing_time,
     flush_traces
 )
+from utils.metrics import metrics
 from ..graphs import (
     ChatWorkflow,
     TestWorkflow,
     # TriggerEngagementWorkflow
 )
+from .checkpointer import checkpoint_saver
 from .state_manager import StateManager
 from .workflow_builder import WorkflowBuilder
 
 logger = get_component_logger(__name__)
 
+# 流式事件队列的结束标记
+_STREAM_END = object()
+
 
 class Orchestrator:
     """
@@ -60,9 +70,14 @@ class Orchestrator:
         # 构建工作流图
         self.workflow_builder = WorkflowBuilder(ChatWorkflow)
         self.graph = self.workflow_builder.build_graph()
+        # 后台运行使用带检查点的工作流图，中断后可从最后一个检查点恢复
+        self.resumable_graph = (
+            self.workflow_builder.build_graph(checkpointer=checkpoint_saver)
+            if mas_config.WORKFLOW_CHECKPOINT_ENABLED else None
+        )
 
     @observe(name="multi-agent-conversation", as_type="span")
-    async def dispatch(self, workflow: WorkflowRun) -> WorkflowExecutionModel:
+    async def dispatch(self, workflow: WorkflowRun, resumable: bool = False) -> WorkflowExecutionModel:
         """
         处理客户对话的主入口函数
 
@@ -71,6 +86,7 @@ class Orchestrator:
 
         参数:
             workflow: 工作流运行
+            resumable: 是否保存检查点；以相同运行ID重新执行时从最后一个检查点恢复
 
         返回:
             WorkflowExecutionModel: 处理完成的工作流执行结果
@@ -90,59 +106,225 @@ class Orchestrator:
             # 构建初始工作流状态
             initial_state = self.state_manager.create_initial_state(workflow)
 
-            # 执行工作流
-            result = await self.graph.ainvoke(initial_state)
-            elapsed_time = get_processing_time(start_time)
-
-            logger.info(
-                f"对话处理完成 - 耗时: {elapsed_time:.2f}s, "
-                f"状态: {'成功' if not result.get('exception_count') else '失败'}"
-            )
-
-            # 更新Langfuse追踪信息
-            langfuse_trace = get_client()
-            # 检测是否为多模态输入
-            is_multimodal = not isinstance(workflow.input, str)
-            multimodal_count = len(workflow.input) if is_multimodal else 0
-
-            langfuse_trace.update_current_trace(
-                name=f"conversation-{workflow.workflow_id}",
-                user_id=workflow.tenant_id,
-                input={
-                    "customer_input": workflow.input if isinstance(workflow.input, str) else f"[多模态内容: {multimodal_count}项]",
-                    "tenant_id": workflow.tenant_id,
-                    "is_multimodal": is_multimodal
-                },
-                output={
-                    "final_response": result.get("final_response"),
-                    "agents_executed": list(result.get("values", {}).keys()),
-                    "processing_complete": result.get("processing_complete", False)
-                },
-                metadata={
-                    "tenant_id": workflow.tenant_id,
-                    "workflow_type": "multi_agent_conversation",
-                    "processing_time": elapsed_time,
-                    "multimodal_count": multimodal_count
-                },
-                tags=["multi-agent", "conversation"]
-            )
-
-            # 强制发送追踪数据到Langfuse
-            flush_traces()
-
-            # 构建执行结果模型（元数据 + 会话结果）
-            execution_result = WorkflowExecutionModel(**result)
-
-            # 添加多模态输出
-            execution_result = await self._enrich_output(execution_result, workflow.assistant_id)
-
-            return execution_result
+            # 执行工作流（本轮全部LLM调用共享截止时间，超出预算的节点以默认结果继续）
+            sla = self._turn_sla(workflow)
+            try:
+                with deadline_scope(sla):
+                    async with asyncio.timeout(sla + mas_config.WORKFLOW_DEADLINE_GRACE_SECONDS):
+                        result = await self._invoke(workflow, initial_state, resumable)
+            except TimeoutError:
+                result = self._deadline_exceeded(initial_state, sla)
+
+            return await self._finalize(workflow, result, start_time)
 
         except Exception as e:
             logger.error(f"对话处理失败: {e}", exc_info=True)
             # 返回统一错误状态
             raise
 
+    async def _invoke(self, workflow: WorkflowRun, initial_state: WorkflowExecutionModel, resumable: bool) -> dict:
+        """
+        执行工作流图
+
+        可恢复运行以运行ID为检查点线程：存在未完成的检查点时从中断处继续（已完成节点不再执行），
+        已完成的运行直接返回最终状态。
+
+        参数:
+            workflow: 工作流运行
+            initial_state: 初始状态
+            resumable: 是否使用带检查点的工作流图
+
+        返回:
+            dict: 工作流最终状态
+        """
+        if not resumable or self.resumable_graph is None:
+            return await self.graph.ainvoke(initial_state)
+
+        config = {"configurable": {"thread_id": str(workflow.workflow_id)}}
+        snapshot = await self.resumable_graph.aget_state(config)
+        if not snapshot.values:
+            return await self.resumable_graph.ainvoke(initial_state, config)
+
+        if not snapshot.next:
+            logger.info(f"运行已完成，使用检查点中的最终状态 - 执行: {workflow.workflow_id}")
+            metrics.incr("workflow_resume", result="completed")
+            return snapshot.values
+
+        logger.info(f"从检查点恢复运行 - 执行: {workflow.workflow_id}, 待执行节点: {list(snapshot.next)}")
+        metrics.incr("workflow_resume", result="resumed")
+        return await self.resumable_graph.ainvoke(None, config)
+
+    async def discard_checkpoints(self, run_id: UUID):
+        """删除运行的检查点（运行结束后调用，失败时等待过期）"""
+        if self.resumable_graph is None:
+            return
+        try:
+            await checkpoint_saver.adelete_thread(str(run_id))
+        except Exception as e:
+            logger.warning(f"删除运行检查点失败 - 执行: {run_id}: {e}")
+
+    @staticmethod
+    def _turn_sla(workflow: WorkflowRun) -> float:
+        """本轮延迟预算：请求指定的 sla_seconds，未指定时使用 LLM_TURN_DEADLINE_SECONDS"""
+        return workflow.sla_seconds or mas_config.LLM_TURN_DEADLINE_SECONDS
+
+    def _deadline_exceeded(self, initial_state: WorkflowExecutionModel, sla: float) -> dict:
+        """
+        本轮超出硬性上限时的最终状态
+
+        节点预算通常已让工作流在截止时间前以默认结果完成；
+        仅当节点未能及时响应取消时触发，返回统一错误状态。
+        """
+        logger.error(f"对话处理超出硬性上限 - 预算: {sla}s, 执行: {initial_state.workflow_id}")
+        metrics.incr("workflow_deadline_exceeded")
+        return self.state_manager.create_error_state(initial_state).model_dump()
+
+    async def _finalize(self, workflow: WorkflowRun, result: dict, start_time) -> WorkflowExecutionModel:
+        """
+        记录追踪信息并构建最终执行结果
+
+        参数:
+            workflow: 工作流运行
+            result: 工作流最终状态
+            start_time: 开始时间
+
+        返回:
+            WorkflowExecutionModel: 处理完成的工作流执行结果
+        """
+        elapsed_time = get_processing_time(start_time)
+
+        logger.info(
+            f"对话处理完成 - 耗时: {elapsed_time:.2f}s, "
+            f"状态: {'成功' if not result.get('exception_count') else '失败'}"
+        )
+
+        # 更新Langfuse追踪信息
+        langfuse_trace = get_client()
+        # 检测是否为多模态输入
+        is_multimodal = not isinstance(workflow.input, str)
+        multimodal_count = len(workflow.input) if is_multimodal else 0
+
+        langfuse_trace.update_current_trace(
+            name=f"conversation-{workflow.workflow_id}",
+            user_id=workflow.tenant_id,
+            input={
+                "customer_input": workflow.input if isinstance(workflow.input, str) else f"[多模态内容: {multimodal_count}项]",
+                "tenant_id": workflow.tenant_id,
+                "is_multimodal": is_multimodal
+            },
+            output={
+                "final_response": result.get("final_response"),
+                "agents_executed": list((result.get("values") or {}).keys()),
+                "processing_complete": result.get("processing_complete", False)
+            },
+            metadata={
+                "tenant_id": workflow.tenant_id,
+                "workflow_type": "multi_agent_conversation",
+                "processing_time": elapsed_time,
+                "multimodal_count": multimodal_count
+            },
+            tags=["multi-agent", "conversation"]
+        )
+
+        # 强制发送追踪数据到Langfuse
+        flush_traces()
+
+        # 构建执行结果模型（元数据 + 会话结果）
+        execution_result = WorkflowExecutionModel(**result)
+
+        # 添加多模态输出
+        execution_result = await self._enrich_output(execution_result, workflow.assistant_id)
+
+        return execution_result
+
+    async def dispatch_stream(self, workflow: WorkflowRun) -> AsyncIterator[dict]:
+        """
+        流式处理客户对话
+
+        以流式模式执行工作流：前序节点（情感、意向）完成时产出进度事件，
+        SalesAgent生成回复时逐token产出，最后产出完整执行结果。
+
+        参数:
+            workflow: 工作流运行
+
+        返回:
+            AsyncIterator[dict]: 事件字典，包含 event 与 data 字段；
+                最后一个事件为 {"event": "completed", "data": WorkflowExecutionModel}
+        """
+        logger.info(
+            f"开始流式处理对话 - 租户: {workflow.tenant_id}, "
+            f"助手: {workflow.assistant_id}"
+        )
+        start_time = get_current_datetime()
+
+        try:
+            initial_state = self.state_manager.create_initial_state(workflow)
+
+            # 超时与截止时间作用域均限定在生产者任务内，不跨越本生成器的 yield
+            queue: asyncio.Queue = asyncio.Queue()
+            producer = asyncio.create_task(self._produce_stream(workflow, initial_state, queue))
+            try:
+                while (event := await queue.get()) is not _STREAM_END:
+                    yield event
+                result = await producer
+            finally:
+                # 消费方提前关闭（客户端断开）时取消仍在执行的工作流
+                if not producer.done():
+                    producer.cancel()
+                    with suppress(asyncio.CancelledError):
+                        await producer
+
+            yield {
+                "event": "completed",
+                "data": await self._finalize(workflow, result, start_time)
+            }
+
+        except Exception as e:
+            logger.error(f"流式对话处理失败: {e}", exc_info=True)
+            raise
+
+    async def _produce_stream(
+        self,
+        workflow: WorkflowRun,
+        initial_state: WorkflowExecutionModel,
+        queue: asyncio.Queue
+    ) -> dict:
+        """
+        在独立任务中以流式模式执行工作流，事件写入队列
+
+        结束（含异常）时写入 _STREAM_END，消费方随后从任务结果取得最终状态。
+
+        参数:
+            workflow: 工作流运行
+            initial_state: 初始状态
+            queue: 事件队列
+
+        返回:
+            dict: 工作流最终状态
+        """
+        result = None
+        sla = self._turn_sla(workflow)
+        try:
+            with deadline_scope(sla):
+                async with asyncio.timeout(sla + mas_config.WORKFLOW_DEADLINE_GRACE_SECONDS):
+                    async for mode, chunk in self.graph.astream(
+                        initial_state,
+                        config={"configurable": {"stream_tokens": True}},
+                        stream_mode=["updates", "custom", "values"]
+                    ):
+                        if mode == "custom":
+                            queue.put_nowait(chunk)
+                        elif mode == "updates":
+                            for node_name in chunk or {}:
+                                queue.put_nowait({"event": "node_completed", "data": {"node": node_name}})
+                        else:
+                            result = chunk
+        except TimeoutError:
+            result = self._deadline_exceeded(initial_state, sla)
+        finally:
+            queue.put_nowait(_STREAM_END)
+        return result
+
     async def _enrich_output(
         self,
         result: WorkflowExecutionModel,
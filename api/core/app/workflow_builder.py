@@ -11,6 +11,9 @@
 - 工作流状态管理
 """
 
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph
 
 from utils import get_component_logger
@@ -43,12 +46,16 @@ class WorkflowBuilder:
         self.agents = create_agents_set()
         self.workflow = workflow(self.agents)
     
-    def build_graph(self) -> StateGraph:
+    def build_graph(self, checkpointer: Optional[BaseCheckpointSaver] = None) -> StateGraph:
         """
         构建LangGraph工作流图
         
         创建包含所有智能体节点和路由逻辑的状态图。
         定义标准的聊天对话流程。
+
+        参数:
+            checkpointer: 检查点存储，设置后每个节点完成时保存检查点，
+                以相同 thread_id 重新执行时从最后一个检查点恢复
         
         返回:
             StateGraph: 配置完成的LangGraph状态图
@@ -66,7 +73,7 @@ class WorkflowBuilder:
         self.workflow.set_entry_exit_points(graph)
         
         # 编译工作流图
-        compiled_graph = graph.compile()
+        compiled_graph = graph.compile(checkpointer=checkpointer)
         
         return compiled_graph
     
\ No newline at end of file
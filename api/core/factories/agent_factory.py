@@ -13,6 +13,7 @@
 from core.agents import (
     BaseAgent,
     ChatAgent,
+    FusedAnalysisAgent,
     IntentAgent,
     SalesAgent,
     SentimentAnalysisAgent,
@@ -30,6 +31,7 @@ AGENT_NODE_MAPPING = {
     AgentNodeType.SENTIMENT: SentimentAnalysisAgent,
     AgentNodeType.SALES: SalesAgent,
     AgentNodeType.INTENT: IntentAgent,
+    AgentNodeType.ANALYSIS: FusedAnalysisAgent,
     # AgentNodeType.TRIGGER_INACTIVE: TriggerInactiveAgent,
     # AgentNodeType.TRIGGER_ENGAGEMENT: TriggerEngagementAgent,
     AgentNodeType.CHAT: ChatAgent,
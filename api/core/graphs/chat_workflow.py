@@ -1,13 +1,17 @@
+import asyncio
 import os
+from typing import Optional
 
 from langgraph.graph import StateGraph, START, END
 
 from config import mas_config
-from core.agents import BaseAgent
+from core.agents import BaseAgent, fused_analysis_enabled
 from core.entities import WorkflowExecutionModel
+from infra.runtimes import deadline_scope, remaining_time, resolve_deadline, usage_scope
 from libs.types import AgentNodeType
 from utils import get_component_logger
 from utils.llm_debug_wrapper import LLMDebugWrapper
+from utils.metrics import metrics
 from .base_workflow import BaseWorkflow
 
 logger = get_component_logger(__name__)
@@ -15,6 +19,9 @@ logger = get_component_logger(__name__)
 # 并行执行配置开关
 ENABLE_PARALLEL_EXECUTION = os.getenv("ENABLE_PARALLEL_EXECUTION", "true").lower() == "true"
 
+# 分析阶段节点，开始时触发销售回复的投机生成
+ANALYSIS_NODES = (AgentNodeType.SENTIMENT, AgentNodeType.INTENT, AgentNodeType.ANALYSIS)
+
 
 class ChatWorkflow(BaseWorkflow):
     """
@@ -34,6 +41,9 @@ class ChatWorkflow(BaseWorkflow):
     工作流程（顺序模式）：
     START → sentiment → intent → sales → END
 
+    工作流程（融合分析，按租户启用）：
+    START → analysis → sales → END
+
     特性：
     - 记忆管理已下沉到各智能体内部
     - 智能体节点处理与错误恢复
@@ -41,6 +51,9 @@ class ChatWorkflow(BaseWorkflow):
     - 并行处理优化（基于Reducer机制）
     - 状态汇合机制
     - 可配置执行模式（并行/顺序）
+    - 按租户选择融合分析：情感与意向合并为一次LLM调用，写入相同的状态字段
+    - 可选的销售回复投机生成：与分析阶段重叠执行，由销售节点确认或重新生成
+    - 节点时间预算：由本轮截止时间推导，超出预算的节点以默认结果继续（如兜底提示词）
     """
 
     def __init__(self, agents: dict[AgentNodeType, BaseAgent]):
@@ -96,29 +109,54 @@ class ChatWorkflow(BaseWorkflow):
             graph: 要定义边的状态图
         """
         if self.enable_parallel:
-            # 并行执行模式：START同时触发两个并行节点
-            parallel_nodes = [
-                AgentNodeType.SENTIMENT,
-                AgentNodeType.INTENT
-            ]
-
-            # START → 并行节点组（同时执行）
-            for node in parallel_nodes:
-                graph.add_edge(START, node)
-
-            # 并行节点 → Sales节点
-            for node in parallel_nodes:
+            # 并行执行模式：START按租户路由到并行节点组或融合分析节点
+            graph.add_conditional_edges(
+                START,
+                self._route_analysis,
+                [AgentNodeType.SENTIMENT, AgentNodeType.INTENT, AgentNodeType.ANALYSIS]
+            )
+
+            # 分析节点 → Sales节点
+            for node in ANALYSIS_NODES:
                 graph.add_edge(node, AgentNodeType.SALES)
 
             # 销售节点 → END
             graph.add_edge(AgentNodeType.SALES, END)
 
-            logger.debug("并行执行架构边定义完成 - START → [sentiment, intent] → sales → END")
+            logger.debug("并行执行架构边定义完成 - START → [sentiment, intent] | analysis → sales → END")
         else:
             # 顺序执行模式
+            graph.add_conditional_edges(
+                START,
+                self._route_analysis,
+                [AgentNodeType.SENTIMENT, AgentNodeType.ANALYSIS]
+            )
             graph.add_edge(AgentNodeType.SENTIMENT, AgentNodeType.INTENT)
             graph.add_edge(AgentNodeType.INTENT, AgentNodeType.SALES)
-            logger.debug("顺序执行架构边定义完成 - sentiment → intent → sales")
+            graph.add_edge(AgentNodeType.ANALYSIS, AgentNodeType.SALES)
+            logger.debug("顺序执行架构边定义完成 - sentiment → intent | analysis → sales")
+
+    def _route_analysis(self, state: WorkflowExecutionModel) -> list[AgentNodeType]:
+        """
+        按租户选择分析阶段的节点
+
+        启用融合分析的租户只运行融合分析节点；其余租户在并行模式下同时运行
+        sentiment 与 intent，顺序模式下从 sentiment 开始。
+
+        参数:
+            state: 当前对话状态
+
+        返回:
+            list[AgentNodeType]: 分析阶段的起始节点
+        """
+        if fused_analysis_enabled(state.tenant_id):
+            metrics.incr("analysis_mode", mode="fused")
+            return [AgentNodeType.ANALYSIS]
+
+        metrics.incr("analysis_mode", mode="split")
+        if self.enable_parallel:
+            return [AgentNodeType.SENTIMENT, AgentNodeType.INTENT]
+        return [AgentNodeType.SENTIMENT]
 
     def set_entry_exit_points(self, graph: StateGraph):
         """
@@ -126,16 +164,15 @@ class ChatWorkflow(BaseWorkflow):
 
         根据配置设置不同的入口出口点：
         - 并行模式：已在_define_edges中通过START/END设置
-        - 顺序模式：使用传统的set_entry_point/set_finish_point
+        - 顺序模式：入口由START的按租户路由决定，使用set_finish_point设置出口
 
         参数:
             graph: 要设置入口出口的状态图
         """
         if not self.enable_parallel:
-            # 顺序模式需要显式设置入口出口点
-            graph.set_entry_point(AgentNodeType.SENTIMENT)
+            # 顺序模式需要显式设置出口点
             graph.set_finish_point(AgentNodeType.SALES)
-            logger.debug("顺序执行架构入口出口点设置完成 - sentiment → sales")
+            logger.debug("顺序执行架构出口点设置完成 - sales")
         else:
             # 并行模式的入口出口点已在_define_edges中通过START/END设置
             logger.debug("并行执行架构入口出口点已通过START/END设置")
@@ -162,8 +199,11 @@ class ChatWorkflow(BaseWorkflow):
             logger.error(f"Agent未找到: {node_name}")
             raise ValueError(f"Agent未找到: '{node_name}'")
 
+        budget = self._node_budget(node_name)
         try:
-            result_state = await agent.process_conversation(state)
+            # 节点内的LLM调用与非LLM操作（记忆、缓存）都受节点预算约束
+            with deadline_scope(budget):
+                result_state = await asyncio.wait_for(agent.process_conversation(state), budget)
 
             if not isinstance(result_state, dict):
                 logger.warning(f"Agent {node_name} 返回非字典结果: {type(result_state)}")
@@ -174,13 +214,43 @@ class ChatWorkflow(BaseWorkflow):
             # 直接返回agent的结果，LangGraph的Reducer会自动处理合并
             return result_state
 
+        except TimeoutError:
+            logger.warning(f"节点 {node_name} 超出时间预算（{budget or 0:.2f}s），使用默认结果继续")
+            metrics.incr("workflow_node_timeout", node=node_name)
+            return agent.fallback_state(state)
+
         except Exception as e:
             logger.error(f"节点 {node_name} 处理错误: {e}", exc_info=True)
             # 即使出错也返回token字段，避免阻塞其他并行节点
             return {"input_tokens": 0, "output_tokens": 0}
 
+    @staticmethod
+    def _node_budget(node_name: AgentNodeType) -> Optional[float]:
+        """
+        由本轮剩余时间推导节点的时间预算
+
+        分析节点只能使用剩余时间的 WORKFLOW_ANALYSIS_BUDGET_RATIO，为销售节点留出生成时间；
+        销售节点可使用全部剩余时间。
+
+        参数:
+            node_name: 节点名称
+
+        返回:
+            Optional[float]: 时间预算（秒），未设置本轮截止时间时为None
+        """
+        remaining = remaining_time(resolve_deadline())
+        if remaining is None:
+            return None
+        if node_name in ANALYSIS_NODES:
+            remaining *= mas_config.WORKFLOW_ANALYSIS_BUDGET_RATIO
+        return max(remaining, 0.0)
+
     def _create_agent_node(self, node_name: AgentNodeType):
         """创建Agent节点的通用方法"""
         async def agent_node(state: WorkflowExecutionModel) -> dict:
-            return await self._process_agent_node(state, node_name)
+            if node_name in ANALYSIS_NODES and (sales_agent := self.agents.get(AgentNodeType.SALES)):
+                sales_agent.speculate(state)
+            # 节点内的LLM调用按租户/助理/节点计量
+            with usage_scope(tenant_id=state.tenant_id, assistant_id=state.assistant_id, node=node_name):
+                return await self._process_agent_node(state, node_name)
         return agent_node
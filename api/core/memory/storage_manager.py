@@ -191,7 +191,7 @@ class StorageManager:
                 f"{msg.role}: {self.extract_text(msg.content)}"
                 for msg in recent_messages
             ])
-            summary_content = await self.summarization_service.generate_summary(text_block)
+            summary_content = await self.summarization_service.generate_summary(text_block, tenant_id=tenant_id)
             if not summary_content:
                 return False
 
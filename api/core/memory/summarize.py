@@ -4,7 +4,9 @@
 负责调用 LLM 对对话窗口进行摘要压缩。
 """
 
-from infra.runtimes import LLMClient, CompletionsRequest
+from typing import Optional
+
+from infra.runtimes import LLMClient, CompletionsRequest, RequestPriority, usage_scope
 from libs.types import Message
 from utils import get_component_logger
 
@@ -26,12 +28,13 @@ class SummarizationService:
         self.llm_client = LLMClient()
         self.max_length = max_length
 
-    async def generate_summary(self, text_block: str) -> str:
+    async def generate_summary(self, text_block: str, tenant_id: Optional[str] = None) -> str:
         """
         生成对话摘要
 
         Args:
-            prompt: 包含对话内容的提示词
+            text_block: 对话内容
+            tenant_id: 租户ID（用量计量标签）
 
         Returns:
             str: 生成的摘要内容
@@ -52,11 +55,13 @@ class SummarizationService:
                 provider="openrouter",
                 messages=[Message(role="user", content=prompt)],
                 max_tokens=1000,
-                temperature=0.3  # 使用较低的temperature保证摘要一致性
+                temperature=0.3,  # 使用较低的temperature保证摘要一致性
+                priority=RequestPriority.BACKGROUND
             )
 
             # 调用LLM生成摘要
-            response = await self.llm_client.completions(request)
+            with usage_scope(tenant_id=tenant_id, node="summarization"):
+                response = await self.llm_client.completions(request)
 
             return response.content
 
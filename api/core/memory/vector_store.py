@@ -8,6 +8,8 @@ from dataclasses import dataclass
 
 from pymilvus import MilvusClient
 
+from config import mas_config
+from infra.ops import get_search_coalescer
 from libs.factory import infra_registry
 from utils import get_component_logger
 
@@ -185,15 +187,24 @@ class VectorStore:
         try:
             collection_name = self.get_collection_name(tenant_id)
 
-            # 使用MilvusClient搜索
-            results = self.client.search(
+            search_kwargs = dict(
                 collection_name=collection_name,
-                data=[query_embedding],
                 limit=top_k,
                 filter=f'tenant_id == "{tenant_id}"',
                 output_fields=["id", "content", "metadata", "created_at", "memory_type"],
             )
 
+            if mas_config.MILVUS_SEARCH_COALESCE_ENABLED:
+                # 与其他并发请求合并为一次多向量搜索
+                hits = await get_search_coalescer(self.client).search(
+                    query_embedding=query_embedding,
+                    **search_kwargs
+                )
+                results = [hits]
+            else:
+                # 使用MilvusClient搜索
+                results = self.client.search(data=[query_embedding], **search_kwargs)
+
             # 转换为记忆格式
             memory_results = []
             for hits in results:
@@ -0,0 +1,43 @@
+"""
+Per-tenant catalog version used to invalidate derived caches
+"""
+
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from utils import get_component_logger
+
+logger = get_component_logger(__name__)
+
+
+def _version_key(tenant_id: str) -> str:
+    return f"catalog_version:{tenant_id}"
+
+
+async def get_catalog_version(redis_client: Optional[Redis], tenant_id: str) -> int:
+    """Current catalog version of a tenant (0 if never indexed or Redis unavailable)"""
+    if redis_client is None:
+        return 0
+    try:
+        value = await redis_client.get(_version_key(tenant_id))
+        return int(value) if value else 0
+    except Exception as e:
+        logger.warning(f"Catalog version read failed (tenant={tenant_id}): {e}")
+        return 0
+
+
+async def bump_catalog_version(redis_client: Optional[Redis], tenant_id: str) -> Optional[int]:
+    """
+    Advance the tenant catalog version after its product index changed.
+
+    Cache keys embed the version, so stale entries are simply never read
+    again and expire on their own TTL.
+    """
+    if redis_client is None:
+        return None
+    try:
+        return await redis_client.incr(_version_key(tenant_id))
+    except Exception as e:
+        logger.warning(f"Catalog version bump failed (tenant={tenant_id}): {e}")
+        return None
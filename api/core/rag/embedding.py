@@ -7,6 +7,8 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
 from infra.cache import get_redis_client
+from utils.metrics import metrics
+from .query_normalizer import get_query_normalizer
 
 
 @dataclass
@@ -23,15 +25,19 @@ class EmbeddingGenerator:
         self.cache_ttl = cache_ttl
         # LLM client disabled for simplified MVP
         self.llm_client = None
-        self.redis_client = get_redis_client()
+        self.redis_client = None
+        self.normalizer = get_query_normalizer()
     
-    async def generate(self, text: str) -> EmbeddingResult:
-        """Generate embedding with caching"""
-        cache_key = f"emb:{hashlib.md5(text.encode()).hexdigest()}"
+    async def generate(self, text: str, tenant_id: Optional[str] = None) -> EmbeddingResult:
+        """Generate embedding of the raw text, cached on its canonical form"""
+        canonical = self.normalizer.normalize(text, tenant_id)
+        cache_key = f"emb:{self.model}:{hashlib.md5(canonical.encode()).hexdigest()}"
         
         # Try cache first
         if cached := await self._get_cached(cache_key):
+            metrics.incr("rag_cache_requests", cache="embedding", result="hit")
             return EmbeddingResult(embedding=cached, cache_hit=True)
+        metrics.incr("rag_cache_requests", cache="embedding", result="miss")
         
         # Generate new embedding
         response = await self.llm_client.embeddings.create(
@@ -67,6 +73,8 @@ class EmbeddingGenerator:
     async def _get_cached(self, key: str) -> Optional[List[float]]:
         """Get cached embedding"""
         try:
+            if self.redis_client is None:
+                self.redis_client = await get_redis_client()
             data = await self.redis_client.get(key)
             return eval(data) if data else None
         except:
@@ -75,6 +83,8 @@ class EmbeddingGenerator:
     async def _cache_embedding(self, key: str, embedding: List[float]):
         """Cache embedding"""
         try:
+            if self.redis_client is None:
+                self.redis_client = await get_redis_client()
             await self.redis_client.setex(key, self.cache_ttl, str(embedding))
         except:
             pass  # Continue without caching
\ No newline at end of file
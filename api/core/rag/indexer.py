@@ -5,8 +5,10 @@ Simple product indexing with batch support
 from typing import Dict, List, Any
 from dataclasses import dataclass
 
+from .catalog import bump_catalog_version
 from .embedding import EmbeddingGenerator
 from .vector_db import MilvusDB
+from infra.cache import get_redis_client
 
 
 @dataclass
@@ -24,6 +26,7 @@ class ProductIndexer:
         self.batch_size = batch_size
         self.embedding_gen = EmbeddingGenerator()
         self.vector_db = MilvusDB()
+        self.redis_client = None
     
     async def index_products(
         self, 
@@ -42,6 +45,9 @@ class ProductIndexer:
             stats.failed += batch_stats.failed
             stats.skipped += batch_stats.skipped
         
+        if stats.success:
+            await self._catalog_changed(tenant_id)
+        
         return stats
     
     async def index_single_product(
@@ -56,11 +62,14 @@ class ProductIndexer:
             embed_result = await self.embedding_gen.generate(text)
             
             # Insert to vector DB
-            return await self.vector_db.insert_products(
+            success = await self.vector_db.insert_products(
                 tenant_id=tenant_id,
                 products=[product],
                 embeddings=[embed_result.embedding]
             )
+            if success:
+                await self._catalog_changed(tenant_id)
+            return success
         except:
             return False
     
@@ -112,8 +121,20 @@ class ProductIndexer:
     
     async def delete_product(self, tenant_id: str, product_id: str) -> bool:
         """Delete a product from index"""
-        return await self.vector_db.delete_product(tenant_id, product_id)
+        success = await self.vector_db.delete_product(tenant_id, product_id)
+        if success:
+            await self._catalog_changed(tenant_id)
+        return success
     
     async def get_index_stats(self, tenant_id: str) -> Dict[str, Any]:
         """Get indexing statistics"""
-        return await self.vector_db.get_stats(tenant_id)
\ No newline at end of file
+        return await self.vector_db.get_stats(tenant_id)
+    
+    async def _catalog_changed(self, tenant_id: str):
+        """Invalidate caches derived from this tenant's index"""
+        try:
+            if self.redis_client is None:
+                self.redis_client = await get_redis_client()
+        except Exception:
+            return
+        await bump_catalog_version(self.redis_client, tenant_id)
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Query canonicalization for embedding and search cache keys
+"""
+
+from functools import lru_cache
+from pathlib import Path
+import re
+import unicodedata
+from typing import Dict, Optional
+
+from utils import get_component_logger, load_yaml_file
+
+logger = get_component_logger(__name__)
+
+SYNONYMS_PATH = Path(__file__).parent.parent.parent / "data" / "query_synonyms.yaml"
+
+# Punctuation, symbols and whitespace all fold into a single space
+_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+# Spaces next to a CJK character carry no meaning and are dropped
+_CJK = "\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_CJK_SPACE_RE = re.compile(rf" (?=[{_CJK}])|(?<=[{_CJK}]) ")
+
+# Rewriting can glue text across a dropped space into a new term; passes repeat until stable
+_MAX_PASSES = 3
+
+
+class QueryNormalizer:
+    """NFKC + case/whitespace/punctuation folding + optional tenant synonyms"""
+
+    def __init__(self, synonyms: Optional[Dict[str, Dict[str, str]]] = None):
+        """
+        Args:
+            synonyms: {"default": {term: canonical}, "<tenant_id>": {...}}
+        """
+        self._patterns: Dict[str, tuple] = {}
+        default = (synonyms or {}).get("default") or {}
+
+        for scope, mapping in (synonyms or {}).items():
+            merged = {**default, **(mapping or {})} if scope != "default" else default
+            self._patterns[scope] = self._compile(merged)
+
+    def _fold(self, text: str) -> str:
+        text = unicodedata.normalize("NFKC", text).casefold()
+        return _CJK_SPACE_RE.sub("", _SEPARATOR_RE.sub(" ", text).strip())
+
+    def _compile(self, mapping: Dict[str, str]) -> tuple:
+        """
+        Build one alternation regex, longest terms first
+
+        Canonical values are added as identity entries so that a canonical term
+        containing an alias (敏感肌肤 ⊃ 敏感肌) is matched whole and left alone.
+        """
+        table = {self._fold(k): self._fold(v) for k, v in mapping.items() if k and v}
+        for canonical in list(table.values()):
+            table.setdefault(canonical, canonical)
+        if not table:
+            return None, {}
+        terms = sorted(table, key=len, reverse=True)
+        return re.compile("|".join(self._term_pattern(t) for t in terms)), table
+
+    @staticmethod
+    def _term_pattern(term: str) -> str:
+        """Latin terms match whole words only; CJK terms match as substrings"""
+        escaped = re.escape(term)
+        if term.isascii():
+            return rf"(?<![a-z0-9]){escaped}(?![a-z0-9])"
+        return escaped
+
+    @staticmethod
+    def _rewrite(text: str, pattern: re.Pattern, table: Dict[str, str]) -> str:
+        """Single left-to-right, longest-match-first pass"""
+        return pattern.sub(lambda match: table[match.group(0)], text)
+
+    def normalize(self, text: str, tenant_id: Optional[str] = None) -> str:
+        """Canonical form used for cache keying and embedding input"""
+        folded = self._fold(text or "")
+
+        pattern, table = self._patterns.get(tenant_id) or self._patterns.get("default") or (None, {})
+        if pattern is None:
+            return folded
+
+        for _ in range(_MAX_PASSES):
+            rewritten = _CJK_SPACE_RE.sub("", self._rewrite(folded, pattern, table))
+            if rewritten == folded:
+                break
+            folded = rewritten
+        return folded
+
+
+@lru_cache(maxsize=1)
+def get_query_normalizer() -> QueryNormalizer:
+    """Shared normalizer loaded with the synonym dictionary"""
+    synonyms = None
+    try:
+        synonyms = load_yaml_file(SYNONYMS_PATH)
+    except (FileNotFoundError, ValueError) as e:
+        logger.warning(f"Query synonyms not loaded: {e}")
+    return QueryNormalizer(synonyms)
@@ -2,13 +2,17 @@
 Clean recommendation engine with multiple strategies
 """
 
-from typing import Dict, List, Any
-from dataclasses import dataclass
+import hashlib
+import json
+from typing import Dict, List, Any, Optional
+from dataclasses import asdict, dataclass
 from enum import Enum
 
+from .catalog import get_catalog_version
 from .search import ProductSearch, SearchQuery
 from .vector_db import MilvusDB
 from infra.cache import get_redis_client
+from utils.metrics import metrics
 
 
 class RecommendationType(Enum):
@@ -39,11 +43,12 @@ class Recommendation:
 class ProductRecommender:
     """Fast, multi-strategy product recommender"""
     
-    def __init__(self, tenant_id: str = None):
+    def __init__(self, tenant_id: str = None, segment_cache_ttl: int = 1800):
         self.tenant_id = tenant_id
         self.search = ProductSearch()
         self.vector_db = MilvusDB()
-        self.redis_client = get_redis_client()
+        self.redis_client = None
+        self.segment_cache_ttl = segment_cache_ttl
         
         # Strategy weights
         self.strategy_weights = {
@@ -60,6 +65,7 @@ class ProductRecommender:
         try:
             # 在MVP中简化初始化
             await self.search.initialize()
+            self.redis_client = await get_redis_client()
             self._initialized = True
             return True
         except Exception as e:
@@ -127,20 +133,27 @@ class ProductRecommender:
         if not profile:
             return []
         
+        # Customers in the same profile segment share one cached result set,
+        # scoped to the tenant's current catalog version; the query and filters
+        # are built from the same normalized segment as the cache key
+        segment = self._profile_segment(profile, request.tenant_id)
+        catalog_version = await get_catalog_version(self.redis_client, request.tenant_id)
+        cache_key = self._segment_cache_key(request, segment, catalog_version)
+        if (cached := await self._get_cached_recommendations(cache_key)) is not None:
+            metrics.incr("rag_cache_requests", cache="segment", result="hit")
+            return cached
+        metrics.incr("rag_cache_requests", cache="segment", result="miss")
+        
         # Build personalized query from profile
         query_parts = []
         
         # Add preferences
-        if skin_type := profile.get("skin_type"):
+        if skin_type := segment["skin_type"]:
             query_parts.append(f"suitable for {skin_type} skin")
         
-        if concerns := profile.get("skin_concerns"):
-            if isinstance(concerns, list):
-                query_parts.extend(concerns)
-            else:
-                query_parts.append(str(concerns))
+        query_parts.extend(segment["skin_concerns"])
         
-        if age_group := profile.get("age_group"):
+        if age_group := segment["age_group"]:
             query_parts.append(f"for {age_group}")
         
         if not query_parts:
@@ -150,12 +163,12 @@ class ProductRecommender:
             text=" ".join(query_parts),
             tenant_id=request.tenant_id,
             top_k=request.max_results,
-            filters=self._build_profile_filters(profile)
+            filters=self._build_profile_filters(segment)
         )
         
         response = await self.search.search(query)
         
-        return [
+        recommendations = [
             Recommendation(
                 product_id=r.product_id,
                 product_data=r.product_data,
@@ -164,6 +177,9 @@ class ProductRecommender:
             )
             for r in response.results
         ]
+        await self._cache_recommendations(cache_key, recommendations)
+        
+        return recommendations
     
     async def _trending_products(self, request: RecommendationRequest) -> List[Recommendation]:
         """Get trending/popular products"""
@@ -171,6 +187,8 @@ class ProductRecommender:
         cache_key = f"trending:{request.tenant_id}"
         
         try:
+            if self.redis_client is None:
+                self.redis_client = await get_redis_client()
             cached = await self.redis_client.get(cache_key)
             if cached:
                 trending_ids = eval(cached)
@@ -250,15 +268,61 @@ class ProductRecommender:
         
         return unique_recs
     
-    def _build_profile_filters(self, profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Build search filters from customer profile"""
+    def _build_profile_filters(self, segment: Dict[str, Any]) -> Dict[str, Any]:
+        """Build search filters from a normalized profile segment"""
         filters = {}
         
-        if skin_type := profile.get("skin_type"):
+        if skin_type := segment["skin_type"]:
             filters["skin_type_suitability"] = skin_type
         
-        if price_range := profile.get("price_range"):
-            if isinstance(price_range, dict):
-                filters["price"] = price_range
+        if price_range := segment["price_range"]:
+            filters["price"] = price_range
         
-        return filters if filters else None
\ No newline at end of file
+        return filters if filters else None
+    
+    def _profile_segment(self, profile: Dict[str, Any], tenant_id: str) -> Dict[str, Any]:
+        """Reduce a profile to the fields that shape the personalized query"""
+        normalize = self.search.normalizer.normalize
+        
+        concerns = profile.get("skin_concerns") or []
+        if not isinstance(concerns, list):
+            concerns = [concerns]
+        
+        price_range = profile.get("price_range")
+        return {
+            "skin_type": normalize(str(profile.get("skin_type") or ""), tenant_id),
+            "skin_concerns": sorted({normalize(str(c), tenant_id) for c in concerns if c}),
+            "age_group": normalize(str(profile.get("age_group") or ""), tenant_id),
+            "price_range": price_range if isinstance(price_range, dict) else None,
+        }
+    
+    def _segment_cache_key(
+        self,
+        request: RecommendationRequest,
+        segment: Dict[str, Any],
+        catalog_version: int
+    ) -> str:
+        """Cache key for a tenant's profile segment at a catalog version"""
+        digest = hashlib.md5(
+            json.dumps(segment, sort_keys=True, ensure_ascii=False).encode()
+        ).hexdigest()
+        return f"rec:personalized:{request.tenant_id}:v{catalog_version}:{digest}:{request.max_results}"
+    
+    async def _get_cached_recommendations(self, cache_key: str) -> Optional[List[Recommendation]]:
+        """Get cached segment recommendations"""
+        try:
+            data = await self.redis_client.get(cache_key)
+            return [Recommendation(**r) for r in json.loads(data)] if data else None
+        except:
+            return None
+    
+    async def _cache_recommendations(self, cache_key: str, recommendations: List[Recommendation]):
+        """Cache segment recommendations"""
+        try:
+            await self.redis_client.setex(
+                cache_key,
+                self.segment_cache_ttl,
+                json.dumps([asdict(r) for r in recommendations], ensure_ascii=False, default=str)
+            )
+        except:
+            pass  # Continue without caching
@@ -6,8 +6,12 @@ import hashlib
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
+from .catalog import get_catalog_version
 from .embedding import EmbeddingGenerator
+from .query_normalizer import get_query_normalizer
+from .vector_db import MilvusDB, SearchResult
 from infra.cache import get_redis_client
+from utils.metrics import metrics
 
 
 @dataclass
@@ -34,6 +38,7 @@ class ProductSearch:
         self.vector_db = MilvusDB()
         self.redis_client = None
         self.cache_ttl = cache_ttl
+        self.normalizer = get_query_normalizer()
         self._initialized = False
     
     async def initialize(self):
@@ -50,16 +55,19 @@ class ProductSearch:
     async def search(self, query: SearchQuery) -> SearchResponse:
         """Main search interface"""
         # Check result cache
-        cache_key = self._get_cache_key(query)
+        catalog_version = await get_catalog_version(self.redis_client, query.tenant_id)
+        cache_key = self._get_cache_key(query, catalog_version)
         if cached := await self._get_cached_results(cache_key):
+            metrics.incr("rag_cache_requests", cache="search", result="hit")
             return SearchResponse(
-                results=cached["results"],
+                results=[SearchResult(**r) for r in cached["results"]],
                 query_embedding=cached["embedding"],
                 cache_hit=True
             )
+        metrics.incr("rag_cache_requests", cache="search", result="miss")
         
         # Generate embedding
-        embed_result = await self.embedding_gen.generate(query.text)
+        embed_result = await self.embedding_gen.generate(query.text, query.tenant_id)
         
         # Search vector database
         results = await self.vector_db.search_similar(
@@ -71,7 +79,7 @@ class ProductSearch:
         
         # Apply additional filters
         if query.filters:
-            results = self._apply_filters(results, query.filters)
+            results = self._apply_filters(results, query.filters, query.tenant_id)
         
         # Cache results
         await self._cache_results(cache_key, results, embed_result.embedding)
@@ -107,9 +115,10 @@ class ProductSearch:
     def _apply_filters(
         self, 
         results: List[SearchResult], 
-        filters: Dict[str, Any]
+        filters: Dict[str, Any],
+        tenant_id: Optional[str] = None
     ) -> List[SearchResult]:
-        """Apply post-search filters"""
+        """Apply post-search filters (string values compare in normalized form)"""
         filtered = []
         
         for result in results:
@@ -134,6 +143,10 @@ class ProductSearch:
                     if "max" in value and product_value > value["max"]:
                         keep = False
                         break
+                elif isinstance(value, str) and isinstance(product_value, str):
+                    if self.normalizer.normalize(product_value, tenant_id) != self.normalizer.normalize(value, tenant_id):
+                        keep = False
+                        break
                 else:
                     if product_value != value:
                         keep = False
@@ -144,11 +157,12 @@ class ProductSearch:
         
         return filtered
     
-    def _get_cache_key(self, query: SearchQuery) -> str:
+    def _get_cache_key(self, query: SearchQuery, catalog_version: int = 0) -> str:
         """Generate cache key for query"""
         key_parts = [
-            query.text,
+            self.normalizer.normalize(query.text, query.tenant_id),
             query.tenant_id,
+            str(catalog_version),
             str(query.top_k),
             str(query.min_score),
             str(sorted(query.filters.items()) if query.filters else "")
@@ -0,0 +1,165 @@
+"""
+Milvus product vector storage with coalesced search
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from pymilvus import MilvusClient
+
+from config import mas_config
+from infra.ops import get_search_coalescer
+from libs.factory import infra_registry
+from utils import get_component_logger
+
+logger = get_component_logger(__name__)
+
+
+@dataclass
+class SearchResult:
+    product_id: str
+    score: float
+    product_data: Dict[str, Any]
+
+
+class MilvusDB:
+    """Per-tenant product collections on the shared Milvus client"""
+
+    OUTPUT_FIELDS = ["id", "product_data"]
+
+    def __init__(self, embedding_dim: int = 3072, client: Optional[MilvusClient] = None):
+        self.embedding_dim = embedding_dim
+        self._client = client
+
+    @property
+    def client(self) -> MilvusClient:
+        """Centralized Milvus client"""
+        if self._client is None:
+            clients = infra_registry.get_cached_clients()
+            if clients is None or clients.milvus is None:
+                raise RuntimeError("Milvus客户端未初始化，请先调用infra_registry.create_clients()")
+            self._client = clients.milvus
+        return self._client
+
+    @staticmethod
+    def get_collection_name(tenant_id: str) -> str:
+        return f"products_{tenant_id}"
+
+    async def ensure_collection(self, tenant_id: str) -> bool:
+        """Create tenant collection if missing"""
+        collection_name = self.get_collection_name(tenant_id)
+        try:
+            if not await asyncio.to_thread(self.client.has_collection, collection_name):
+                await asyncio.to_thread(
+                    self.client.create_collection,
+                    collection_name=collection_name,
+                    dimension=self.embedding_dim,
+                    metric_type=mas_config.MILVUS_METRIC_TYPE,
+                    id_type="string",
+                    max_length=128,
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Product collection init failed ({collection_name}): {e}")
+            return False
+
+    async def insert_products(
+        self,
+        tenant_id: str,
+        products: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ) -> bool:
+        """Upsert products with their embeddings"""
+        if len(products) != len(embeddings):
+            return False
+        if not await self.ensure_collection(tenant_id):
+            return False
+
+        data = [
+            {"id": str(product["id"]), "vector": embedding, "product_data": product}
+            for product, embedding in zip(products, embeddings)
+        ]
+        try:
+            await asyncio.to_thread(
+                self.client.upsert,
+                collection_name=self.get_collection_name(tenant_id),
+                data=data
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Product insert failed (tenant={tenant_id}): {e}")
+            return False
+
+    async def search_similar(
+        self,
+        tenant_id: str,
+        query_embedding: List[float],
+        top_k: int = 10,
+        score_threshold: float = 0.0
+    ) -> List[SearchResult]:
+        """Vector search, coalesced with concurrent queries on the same collection"""
+        collection_name = self.get_collection_name(tenant_id)
+        try:
+            if mas_config.MILVUS_SEARCH_COALESCE_ENABLED:
+                hits = await get_search_coalescer(self.client).search(
+                    collection_name=collection_name,
+                    query_embedding=query_embedding,
+                    limit=top_k,
+                    output_fields=self.OUTPUT_FIELDS
+                )
+            else:
+                results = await asyncio.to_thread(
+                    self.client.search,
+                    collection_name=collection_name,
+                    data=[query_embedding],
+                    limit=top_k,
+                    output_fields=self.OUTPUT_FIELDS
+                )
+                hits = results[0] if results else []
+        except Exception as e:
+            logger.error(f"Product search failed (tenant={tenant_id}): {e}")
+            return []
+
+        results = []
+        for hit in hits:
+            score = float(hit.get("distance", hit.get("score", 0.0)))
+            if score < score_threshold:
+                continue
+            entity = hit.get("entity", {})
+            results.append(SearchResult(
+                product_id=str(hit.get("id", "")),
+                score=score,
+                product_data=entity.get("product_data") or {}
+            ))
+        return results
+
+    async def delete_product(self, tenant_id: str, product_id: str) -> bool:
+        """Delete a single product"""
+        try:
+            await asyncio.to_thread(
+                self.client.delete,
+                collection_name=self.get_collection_name(tenant_id),
+                ids=[str(product_id)]
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Product delete failed ({tenant_id}/{product_id}): {e}")
+            return False
+
+    async def get_stats(self, tenant_id: str) -> Dict[str, Any]:
+        """Collection statistics"""
+        collection_name = self.get_collection_name(tenant_id)
+        try:
+            stats = await asyncio.to_thread(
+                self.client.get_collection_stats,
+                collection_name=collection_name
+            )
+            return {
+                "collection_name": collection_name,
+                "tenant_id": tenant_id,
+                "total_entities": stats.get("row_count", 0),
+            }
+        except Exception as e:
+            logger.error(f"Product stats failed ({collection_name}): {e}")
+            return {}
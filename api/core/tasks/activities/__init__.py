@@ -6,6 +6,7 @@ Temporal 活动注册
 
 from collections.abc import Callable
 
+from .batch_activities import submit_llm_batch, poll_llm_batch, collect_llm_batch
 from .callback_activities import send_callback_message
 from .generate_message_activity import invoke_task_llm
 from .monitoring_activities import check_thread_activity_status
@@ -38,6 +39,9 @@ def get_all_activities() -> list[Callable]:
 
         # LLM 活动
         invoke_task_llm,
+        submit_llm_batch,
+        poll_llm_batch,
+        collect_llm_batch,
 
         # 消息发送与校验活动
         send_callback_message
@@ -48,6 +52,9 @@ __all__ = [
     "get_all_activities",
     "send_callback_message",
     "invoke_task_llm",
+    "submit_llm_batch",
+    "poll_llm_batch",
+    "collect_llm_batch",
     "check_thread_activity_status",
     "check_preservation_needed",
     "evaluate_conversation_quality",
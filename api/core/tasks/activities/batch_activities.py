@@ -0,0 +1,90 @@
+"""
+LLM 离线批处理活动
+
+后台任务（如批量唤醒消息）通过以下活动离线生成内容：
+submit_llm_batch 提交任务 → poll_llm_batch 轮询状态 → collect_llm_batch 收取结果。
+任务状态保存在Redis中，各活动可由不同Worker执行。
+"""
+
+from typing import Optional
+from uuid import uuid4
+
+from temporalio import activity
+
+from infra.runtimes import (
+    LLMClient,
+    CompletionsRequest,
+    RequestPriority,
+    usage_scope
+)
+from libs.types import MessageParams
+from utils import get_component_logger
+
+logger = get_component_logger(__name__)
+
+
+@activity.defn
+async def submit_llm_batch(
+    model: str,
+    provider: str,
+    temperature: float,
+    max_tokens: int,
+    items: dict[str, MessageParams],
+    tags: Optional[dict[str, dict[str, str]]] = None
+) -> str:
+    """
+    提交LLM批处理任务活动
+
+    Args:
+        items: 自定义ID（如线程ID）到消息列表的映射
+        tags: 自定义ID到计量标签（tenant_id、assistant_id）的映射，用量按各条目的租户与助手记录
+
+    Returns:
+        str: 批处理任务ID
+    """
+    llm_client = LLMClient()
+    requests = {
+        custom_id: CompletionsRequest(
+            id=uuid4(),
+            model=model,
+            provider=provider,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=messages,
+            priority=RequestPriority.BACKGROUND
+        )
+        for custom_id, messages in items.items()
+    }
+    with usage_scope(node="task"):
+        job = await llm_client.submit_batch(requests, tags=tags)
+    return job.id
+
+
+@activity.defn
+async def poll_llm_batch(job_id: str) -> str:
+    """
+    轮询LLM批处理任务状态活动
+
+    Returns:
+        str: 任务状态（BatchStatus）
+    """
+    job = await LLMClient().poll_batch(job_id)
+    return job.status.value
+
+
+@activity.defn
+async def collect_llm_batch(job_id: str) -> dict[str, str]:
+    """
+    收取LLM批处理结果活动
+
+    Returns:
+        dict[str, str]: 自定义ID到生成内容的映射，仅包含成功的请求，
+            缺失的条目由工作流使用兜底内容
+    """
+    results = await LLMClient().batch_results(job_id)
+    logger.info(f"收取批处理结果: job={job_id}, 成功 {len(results)} 条")
+    return {
+        custom_id: response.content
+        for custom_id, response in results.items()
+        if response.content
+    }
@@ -4,7 +4,8 @@ LLM 调用活动
 封装与大模型交互的活动函数，用于生成各类自动化消息内容。
 """
 
-from uuid import uuid4
+from typing import Optional
+from uuid import UUID, uuid4
 
 from temporalio import activity
 
@@ -12,9 +13,12 @@ from infra.runtimes import (
     LLMClient,
     LLMResponse,
     CompletionsRequest,
-    TokenUsage
+    RequestPriority,
+    TokenUsage,
+    usage_scope
 )
 from libs.types import MessageParams
+from services import ThreadService
 from utils import get_component_logger
 
 logger = get_component_logger(__name__)
@@ -27,15 +31,25 @@ async def invoke_task_llm(
     temperature: float,
     max_tokens: int,
     messages: MessageParams,
-    fallback_prompt: str
+    fallback_prompt: str,
+    thread_id: Optional[UUID] = None,
+    tenant_id: Optional[str] = None,
+    assistant_id: Optional[str] = None
 ) -> LLMResponse:
     """
     调用任务LLM活动
 
+    Args:
+        thread_id: 所属线程，未传入租户时据此查询租户与助手
+        tenant_id: 租户ID（用量计量标签）
+        assistant_id: 助手ID（用量计量标签）
+
     Returns:
         LLMResponse: LLM 响应对象（包含生成的内容）
     """
     req_id = uuid4()
+    if tenant_id is None and thread_id is not None:
+        tenant_id, assistant_id = await _thread_owner(thread_id)
     try:
         llm_client = LLMClient()
         request = CompletionsRequest(
@@ -44,9 +58,11 @@ async def invoke_task_llm(
             provider=provider,
             temperature=temperature,
             max_tokens=max_tokens,
-            messages=messages
+            messages=messages,
+            priority=RequestPriority.BACKGROUND
         )
-        return await llm_client.completions(request)
+        with usage_scope(tenant_id=tenant_id, assistant_id=assistant_id, node="task"):
+            return await llm_client.completions(request)
     except Exception as e:
         logger.error(f"生成自动消息失败: {e}", exc_info=True)
         return LLMResponse(
@@ -58,4 +74,16 @@ async def invoke_task_llm(
                 input_tokens=0,
                 output_tokens=0
             )
-        )
\ No newline at end of file
+        )
+
+
+async def _thread_owner(thread_id: UUID) -> tuple[Optional[str], Optional[str]]:
+    """查询线程所属的租户与助手，失败时返回空值（用量记为 unknown）"""
+    try:
+        thread = await ThreadService.get_thread(thread_id)
+    except Exception as e:
+        logger.warning(f"查询线程归属失败: thread_id={thread_id}, {e}")
+        return None, None
+    if thread is None:
+        return None, None
+    return thread.tenant_id, str(thread.assistant_id) if thread.assistant_id else None
@@ -177,7 +177,7 @@ async def preserve_conversation_to_elasticsearch(
         ])
 
         logger.info(f"生成对话摘要: thread_id={thread_id}, messages={len(messages)}")
-        summary_content = await summarization_service.generate_summary(text_block)
+        summary_content = await summarization_service.generate_summary(text_block, tenant_id=tenant_id)
 
         if not summary_content:
             logger.error(f"摘要生成失败: thread_id={thread_id}")
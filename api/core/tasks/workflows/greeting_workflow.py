@@ -94,7 +94,8 @@ class GreetingWorkflow:
                     temperature,
                     max_tokens,
                     context,
-                    fallback_prompt
+                    fallback_prompt,
+                    thread_id
                 ],
                 start_to_close_timeout=timedelta(seconds=60),
                 retry_policy=self.retry_policy
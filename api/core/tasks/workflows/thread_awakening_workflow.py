@@ -11,8 +11,11 @@ from temporalio.common import RetryPolicy
 
 # 安全导入活动和配置
 with workflow.unsafe.imports_passed_through():
+    from config import mas_config
     from core.tasks.activities import (
-        invoke_task_llm,
+        submit_llm_batch,
+        poll_llm_batch,
+        collect_llm_batch,
         scan_inactive_threads,
         send_callback_message,
         prepare_awakening_context,
@@ -48,8 +51,10 @@ class ThreadAwakeningWorkflow:
 
         流程:
         1. 扫描一个批次的不活跃线程
-        2. 对每个线程：准备上下文 → 生成消息 → 发送消息
-        3. 返回处理统计
+        2. 对每个线程准备上下文
+        3. 通过LLM批处理接口离线生成全部唤醒消息
+        4. 对每个线程：发送消息 → 更新唤醒计数
+        5. 返回处理统计
 
         Returns:
             dict: 处理统计信息
@@ -88,7 +93,8 @@ class ThreadAwakeningWorkflow:
         max_tokens = 1024
         fallback_prompt = "最近怎么样？"
 
-        # Step 2: 处理每个线程
+        # Step 2: 为每个线程准备唤醒上下文
+        pending = {}
         for thread_data in threads:
             try:
                 thread_id = thread_data.thread_id
@@ -112,7 +118,7 @@ class ThreadAwakeningWorkflow:
                     stats["skipped"] += 1
                     continue
 
-                # Step 3: 准备唤醒上下文（会验证助手状态）
+                # 准备唤醒上下文（会验证助手状态）
                 workflow.logger.info(f"准备唤醒上下文: thread_id={thread_id}")
                 context = await workflow.execute_activity(
                     prepare_awakening_context,
@@ -120,33 +126,55 @@ class ThreadAwakeningWorkflow:
                     start_to_close_timeout=timedelta(seconds=30),
                     retry_policy=self.retry_policy
                 )
+                pending[str(thread_id)] = (thread_data, context)
 
-                # Step 4: 生成唤醒消息
-                workflow.logger.info(f"生成唤醒消息: thread_id={thread_id}")
-                response = await workflow.execute_activity(
-                    invoke_task_llm,
-                    args=[
-                        model,
-                        provider,
-                        temperature,
-                        max_tokens,
-                        context,
-                        fallback_prompt
-                    ],
-                    start_to_close_timeout=timedelta(seconds=60),
-                    retry_policy=self.retry_policy
+            except Exception as e:
+                stats["failed"] += 1
+                workflow.logger.error(
+                    f"✗ 准备唤醒上下文异常: thread_id={thread_data.thread_id}, "
+                    f"error={type(e).__name__}: {str(e)}"
                 )
 
-                workflow.logger.info(f"消息生成完成: thread_id={thread_id}")
+        if not pending:
+            return {
+                "status": "completed",
+                "stats": stats
+            }
+
+        # Step 3: 离线批量生成唤醒消息（无批处理路由时以后台优先级同步生成）
+        contents = await self._generate_batch(
+            model,
+            provider,
+            temperature,
+            max_tokens,
+            {custom_id: context for custom_id, (_, context) in pending.items()},
+            {
+                custom_id: {"tenant_id": thread_data.tenant_id, "assistant_id": str(thread_data.assistant_id)}
+                for custom_id, (thread_data, _) in pending.items()
+            }
+        )
+
+        # Step 4: 逐个发送唤醒消息
+        for custom_id, (thread_data, _) in pending.items():
+            try:
+                thread_id = thread_data.thread_id
+                content = contents.get(custom_id) or fallback_prompt
+
+                # 批处理可能耗时较长，发送前重新检查免打扰时段
+                if is_dnd_active():
+                    workflow.logger.info(
+                        f"当前在免打扰时段，跳过线程: thread_id={thread_id}"
+                    )
+                    stats["skipped"] += 1
+                    continue
 
-                # Step 5: 发送唤醒消息
                 workflow.logger.info(f"发送唤醒消息: thread_id={thread_id}")
                 send_result = await workflow.execute_activity(
                     send_callback_message,
                     args=[
                         thread_data.assistant_id,
                         thread_id,
-                        response.content,
+                        content,
                         MessageType.AWAKENING,
                         "/chat/ai/hook/event"
                     ],
@@ -154,7 +182,7 @@ class ThreadAwakeningWorkflow:
                     retry_policy=self.retry_policy
                 )
 
-                # Step 6: 更新线程唤醒计数
+                # 更新线程唤醒计数
                 if send_result.get("success"):
                     workflow.logger.info(f"更新线程唤醒计数: thread_id={thread_id}")
                     update_result = await workflow.execute_activity(
@@ -162,7 +190,7 @@ class ThreadAwakeningWorkflow:
                         args=[
                             thread_data.tenant_id,
                             thread_id,
-                            response.content
+                            content
                         ],
                         start_to_close_timeout=timedelta(seconds=30),
                         retry_policy=self.retry_policy
@@ -207,3 +235,59 @@ class ThreadAwakeningWorkflow:
             "status": "completed",
             "stats": stats
         }
+
+    async def _generate_batch(
+        self,
+        model: str,
+        provider: str,
+        temperature: float,
+        max_tokens: int,
+        items: dict,
+        tags: dict
+    ) -> dict[str, str]:
+        """
+        提交批处理任务并等待结果
+
+        Args:
+            items: 线程ID到唤醒上下文的映射
+            tags: 线程ID到计量标签（租户、助手）的映射
+
+        Returns:
+            dict[str, str]: 线程ID到生成内容的映射；提交失败、超时或单条失败的线程不在其中
+        """
+        try:
+            job_id = await workflow.execute_activity(
+                submit_llm_batch,
+                args=[model, provider, temperature, max_tokens, items, tags],
+                # 无批处理路由时在活动内同步生成全部消息
+                start_to_close_timeout=timedelta(minutes=30),
+                retry_policy=self.retry_policy
+            )
+            workflow.logger.info(f"批处理任务已提交: job={job_id}, 线程数={len(items)}")
+
+            poll_interval = timedelta(seconds=mas_config.LLM_BATCH_POLL_INTERVAL_SECONDS)
+            deadline = workflow.now() + timedelta(hours=mas_config.LLM_BATCH_MAX_WAIT_HOURS)
+            while True:
+                status = await workflow.execute_activity(
+                    poll_llm_batch,
+                    job_id,
+                    start_to_close_timeout=timedelta(minutes=5),
+                    retry_policy=self.retry_policy
+                )
+                if status != "in_progress":
+                    break
+                if workflow.now() >= deadline:
+                    workflow.logger.warning(f"批处理任务等待超时: job={job_id}")
+                    return {}
+                await workflow.sleep(poll_interval)
+
+            workflow.logger.info(f"批处理任务结束: job={job_id}, status={status}")
+            return await workflow.execute_activity(
+                collect_llm_batch,
+                job_id,
+                start_to_close_timeout=timedelta(seconds=60),
+                retry_policy=self.retry_policy
+            )
+        except Exception as e:
+            workflow.logger.error(f"✗ 批量生成唤醒消息失败，使用兜底内容: {type(e).__name__}: {str(e)}")
+            return {}
@@ -6,6 +6,7 @@ from .store_episodic import store_episodic_memory
 # 工具注册表和辅助函数
 from .tool_registry import (
     get_handler,
+    get_timeout,
     get_tools_schema,
     long_term_memory_tool,
     store_episodic_memory_tool
@@ -19,6 +20,7 @@ __all__ = [
 
     # 工具注册表
     "get_handler",
+    "get_timeout",
     "get_tools_schema",
 
     # 工具定义
@@ -7,6 +7,7 @@
 from collections.abc import Callable
 from typing import Any
 
+from config import mas_config
 from utils import get_component_logger
 from .entities import ToolArgument, ToolDefinition
 from .search_context import search_conversation_context
@@ -73,6 +74,13 @@ TOOL_HANDLERS: dict[str, Callable] = {
 }
 
 
+# 单次工具调用超时（秒），未列出的工具使用 LLM_TOOL_TIMEOUT_SECONDS
+TOOL_TIMEOUTS: dict[str, float] = {
+    "long_term_memory_retrieve": 5.0,
+    "store_episodic_memory": 10.0,
+}
+
+
 def get_handler(tool_name: str) -> Callable:
     """获取指定工具名称的处理函数。
 
@@ -91,6 +99,18 @@ def get_handler(tool_name: str) -> Callable:
     return TOOL_HANDLERS[tool_name]
 
 
+def get_timeout(tool_name: str) -> float:
+    """获取指定工具的调用超时时间。
+
+    Args:
+        tool_name: 工具名称。
+
+    Returns:
+        超时时间（秒），未单独配置时返回全局默认值。
+    """
+    return TOOL_TIMEOUTS.get(tool_name, mas_config.LLM_TOOL_TIMEOUT_SECONDS)
+
+
 def get_tools_schema(tools: list[ToolDefinition]) -> list[dict[str, Any]]:
     """将工具定义列表转换为 OpenAI API 格式的 schema。
 
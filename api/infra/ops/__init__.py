@@ -3,6 +3,7 @@ Operations Module - 基础设施客户端连接
 """
 from .es_client import get_es_client, close_es_client, verify_es_connection, create_memory_index
 from .milvus_client import get_milvus_connection, close_milvus_connection, verify_milvus_connection
+from .milvus_coalescer import MilvusSearchCoalescer, get_search_coalescer
 from .temporal_client import get_temporal_client, verify_temporal_connection
 
 __all__ = [
@@ -13,6 +14,8 @@ __all__ = [
     'get_milvus_connection',
     'close_milvus_connection',
     'verify_milvus_connection',
+    'MilvusSearchCoalescer',
+    'get_search_coalescer',
     'get_temporal_client',
     'verify_temporal_connection',
 ]
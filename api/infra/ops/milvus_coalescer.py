@@ -0,0 +1,176 @@
+"""
+Milvus搜索合并器
+
+将并发协程对同一集合的单向量搜索在短时间窗口内合并为一次多向量搜索，
+再把结果按顺序分发回各调用方，提升向量层吞吐。
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from pymilvus import MilvusClient
+
+from config import mas_config
+from utils import get_component_logger
+
+logger = get_component_logger(__name__)
+
+# (collection_name, limit, filter, output_fields) 相同的查询才能合并
+BatchKey = tuple[str, int, str, tuple[str, ...]]
+
+
+@dataclass
+class _PendingBatch:
+    """等待发送的查询批次"""
+    vectors: list[list[float]] = field(default_factory=list)
+    futures: list[asyncio.Future] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+@dataclass
+class CoalescerStats:
+    """合并器统计信息"""
+    queries: int = 0
+    batches: int = 0
+
+    @property
+    def avg_batch_size(self) -> float:
+        return self.queries / self.batches if self.batches else 0.0
+
+
+class MilvusSearchCoalescer:
+    """
+    Milvus搜索合并器
+
+    收集同一集合、同一搜索参数的查询向量，直到批次满或等待窗口到期，
+    然后发出一次 `client.search(data=[...])` 调用。单个查询的额外延迟
+    不超过 `max_wait_ms`。
+    """
+
+    def __init__(
+        self,
+        client: MilvusClient,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        初始化搜索合并器
+
+        Args:
+            client: Milvus客户端
+            max_batch_size: 单次搜索的最大向量数
+            max_wait_ms: 批次最长等待时间（毫秒）
+        """
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stats = CoalescerStats()
+        self._pending: dict[BatchKey, _PendingBatch] = {}
+        self._inflight: set[asyncio.Task] = set()
+
+    async def search(
+        self,
+        collection_name: str,
+        query_embedding: list[float],
+        limit: int,
+        filter: str = "",
+        output_fields: Optional[list[str]] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        提交单向量搜索，返回该向量对应的命中列表
+
+        Args:
+            collection_name: 集合名称
+            query_embedding: 查询向量
+            limit: 返回top-k
+            filter: 标量过滤表达式
+            output_fields: 返回字段
+
+        Returns:
+            list[dict]: 该查询的命中结果
+        """
+        key: BatchKey = (collection_name, limit, filter, tuple(output_fields or ()))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch()
+            self._pending[key] = batch
+            batch.timer = loop.call_later(self.max_wait_ms / 1000, self._flush, key)
+
+        batch.vectors.append(query_embedding)
+        batch.futures.append(future)
+
+        if len(batch.vectors) >= self.max_batch_size:
+            self._flush(key)
+
+        return await future
+
+    def _flush(self, key: BatchKey):
+        """将待发送批次交给后台任务执行"""
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._execute(key, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _execute(self, key: BatchKey, batch: _PendingBatch):
+        """执行多向量搜索并将结果分发到各future"""
+        collection_name, limit, filter_expr, output_fields = key
+        self.stats.queries += len(batch.vectors)
+        self.stats.batches += 1
+
+        try:
+            # MilvusClient为同步客户端，放入线程池避免阻塞事件循环
+            results = await asyncio.to_thread(
+                self.client.search,
+                collection_name=collection_name,
+                data=batch.vectors,
+                limit=limit,
+                filter=filter_expr,
+                output_fields=list(output_fields) or None,
+            )
+        except Exception as e:
+            logger.error(f"合并搜索失败 ({collection_name}, batch={len(batch.vectors)}): {e}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.debug(f"合并搜索完成: {collection_name}, batch={len(batch.vectors)}")
+        for idx, future in enumerate(batch.futures):
+            if future.done():
+                continue
+            future.set_result(list(results[idx]) if idx < len(results) else [])
+
+
+_search_coalescer: Optional[MilvusSearchCoalescer] = None
+
+
+def get_search_coalescer(client: MilvusClient) -> MilvusSearchCoalescer:
+    """
+    获取进程级共享的搜索合并器
+
+    合并只在同一个合并器实例内发生，因此所有向量层共用一个实例。
+    若Milvus客户端被重建，则随之重建合并器。
+
+    Args:
+        client: 当前Milvus客户端
+
+    Returns:
+        MilvusSearchCoalescer: 共享合并器
+    """
+    global _search_coalescer
+
+    if _search_coalescer is None or _search_coalescer.client is not client:
+        _search_coalescer = MilvusSearchCoalescer(
+            client,
+            max_batch_size=mas_config.MILVUS_SEARCH_BATCH_SIZE,
+            max_wait_ms=mas_config.MILVUS_SEARCH_BATCH_WAIT_MS,
+        )
+    return _search_coalescer
@@ -7,19 +7,39 @@ LLM运行时模块
 核心组件:
 - client.py: 统一LLM客户端
 - config.py: 配置加载器
-- routing.py: 简单路由器
+- registry.py: 进程级供应商注册表（共享连接池）
+- routing.py: 延迟感知路由器
+- response_cache.py: 确定性请求的响应缓存
+- governor.py: 按供应商/模型的RPM、TPM与并发限流
+- metering.py: 按租户/助理/节点/模型的用量计量
+- resilience.py: 熔断器、截止时间与重试策略
+- batch.py: 离线批处理任务存储
+- cassette.py: LLM流量录制与回放
 - providers/: 供应商实现
 - entities/: 数据模型
 """
 
-from .client import LLMClient
+from .client import LLMClient, config as llm_config, breakers, governor
 from .config import LLMConfig
-from .routing import SimpleRouter
+from .registry import ProviderRegistry, provider_registry
+from .routing import LatencyRouter, Route
+from .response_cache import ResponseCache, response_cache
+from .governor import Governor
+from .metering import UsageMeter, usage_meter, usage_scope
+from .resilience import CircuitBreakers, RetryPolicy, deadline_scope, remaining_time, resolve_deadline
+from .batch import BatchStore, batch_store
+from .cassette import Cassette, CassetteMissError, cassette, scrub_pii
 from .providers import OpenAIProvider, AnthropicProvider, BaseProvider
 from .entities import (
     LLMRequest,
     LLMResponse,
+    LLMStreamChunk,
+    ToolCallData,
+    ToolCallDelta,
     ProviderType,
+    RequestPriority,
+    BatchJob,
+    BatchStatus,
     CompletionsRequest,
     ResponseMessageRequest,
     TokenUsage
@@ -30,12 +50,41 @@ __all__ = [
     "ResponseMessageRequest",
     "LLMClient",
     "LLMConfig",
-    "SimpleRouter",
+    "llm_config",
+    "ProviderRegistry",
+    "provider_registry",
+    "LatencyRouter",
+    "Route",
+    "ResponseCache",
+    "response_cache",
+    "Governor",
+    "governor",
+    "UsageMeter",
+    "usage_meter",
+    "usage_scope",
+    "CircuitBreakers",
+    "RetryPolicy",
+    "breakers",
+    "deadline_scope",
+    "remaining_time",
+    "resolve_deadline",
+    "BatchStore",
+    "batch_store",
+    "Cassette",
+    "CassetteMissError",
+    "cassette",
+    "scrub_pii",
     "OpenAIProvider",
     "AnthropicProvider",
     "BaseProvider",
     "LLMRequest",
     "LLMResponse",
+    "LLMStreamChunk",
+    "ToolCallData",
+    "ToolCallDelta",
     "ProviderType",
+    "RequestPriority",
     "TokenUsage",
+    "BatchJob",
+    "BatchStatus",
 ]
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+LLM离线批处理任务存储
+
+记录批处理任务状态与回收的结果，供提交任务与收取结果的Temporal活动
+（可能运行在不同Worker上）共享。
+
+Redis数据布局:
+    llm_batch:{job_id}          (String, BatchJob JSON)
+    llm_batch:{job_id}:results  (Hash, custom_id -> LLMResponse JSON)
+"""
+
+from dataclasses import asdict
+import json
+from typing import Optional
+
+from config import mas_config
+from infra.cache import get_redis_client
+from utils import get_component_logger
+from .entities import BatchJob, BatchMode, BatchStatus, LLMResponse, TokenUsage
+
+logger = get_component_logger(__name__, "BatchStore")
+
+KEY_PREFIX = "llm_batch"
+
+
+def job_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:{job_id}"
+
+
+def results_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:{job_id}:results"
+
+
+def _dump_response(response: LLMResponse) -> str:
+    return json.dumps({
+        "content": response.content,
+        "provider": response.provider,
+        "model": response.model,
+        "usage": asdict(response.usage),
+        "cost": response.cost,
+        "finish_reason": response.finish_reason,
+    }, ensure_ascii=False)
+
+
+def _load_response(data: str) -> LLMResponse:
+    cached = json.loads(data)
+    return LLMResponse(
+        id=None,
+        content=cached["content"],
+        provider=cached["provider"],
+        model=cached["model"],
+        usage=TokenUsage(**cached["usage"]),
+        cost=cached["cost"],
+        finish_reason=cached.get("finish_reason"),
+    )
+
+
+class BatchStore:
+    """基于Redis的批处理任务存储"""
+
+    def __init__(self):
+        self._redis = None
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await get_redis_client()
+        return self._redis
+
+    @property
+    def ttl(self) -> int:
+        return mas_config.LLM_BATCH_RETENTION_HOURS * 3600
+
+    async def save(self, job: BatchJob):
+        """写入任务状态"""
+        redis_client = await self._client()
+        await redis_client.set(job_key(job.id), json.dumps(asdict(job), ensure_ascii=False), ex=self.ttl)
+
+    async def get(self, job_id: str) -> Optional[BatchJob]:
+        """读取任务状态，不存在或已过期时返回None"""
+        redis_client = await self._client()
+        data = await redis_client.get(job_key(job_id))
+        if not data:
+            return None
+
+        job = BatchJob(**json.loads(data))
+        job.mode = BatchMode(job.mode)
+        job.status = BatchStatus(job.status)
+        return job
+
+    async def save_results(self, job_id: str, results: dict[str, LLMResponse]):
+        """写入任务结果"""
+        if not results:
+            return
+        redis_client = await self._client()
+        key = results_key(job_id)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={custom_id: _dump_response(response) for custom_id, response in results.items()})
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def get_results(self, job_id: str) -> dict[str, LLMResponse]:
+        """读取任务结果（custom_id -> 响应），仅包含成功的请求"""
+        redis_client = await self._client()
+        data = await redis_client.hgetall(results_key(job_id))
+        results = {}
+        for custom_id, value in data.items():
+            if isinstance(custom_id, bytes):
+                custom_id = custom_id.decode()
+            try:
+                results[custom_id] = _load_response(value)
+            except Exception as e:
+                logger.warning(f"批处理结果数据无效，忽略: job={job_id}, custom_id={custom_id}, {e}")
+        return results
+
+
+batch_store = BatchStore()
@@ -0,0 +1,313 @@
+"""
+LLM流量录制与回放
+
+作为LLMClient的中间件，录制模式下将真实的请求/响应对（脱敏后）追加到录制文件，
+回放模式下按规范化请求哈希返回录制的响应，并按原始耗时（可缩放）等待，
+用于在本地以真实提示词与工具调用序列对工作流做基准测试，不产生真实调用。
+
+请求哈希基于脱敏后的规范化请求计算，回放时对实时请求做同样的脱敏，
+因此脱敏函数必须是确定性的。同一哈希录制了多条交互时按录制顺序轮流返回。
+
+文件格式: JSON Lines（路径以 .gz 结尾时gzip压缩），每行一条交互:
+    {"hash": 请求摘要, "request": 脱敏后的请求, "response": 响应,
+     "latency_ms": 总耗时, "ttft_ms": 流式首片段耗时}
+"""
+
+import asyncio
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import asdict
+import gzip
+import json
+from pathlib import Path
+import re
+import time
+from typing import Any, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from config import mas_config
+from utils import get_component_logger
+from utils.metrics import metrics
+from .entities import CompletionsRequest, LLMResponse, LLMStreamChunk, TokenUsage, ToolCallData, ToolCallDelta
+from .response_cache import canonical_request, request_hash
+
+logger = get_component_logger(__name__, "Cassette")
+
+Scrubber = Callable[[str], str]
+
+# 回放流式响应时每个片段的字符数
+STREAM_CHUNK_CHARS = 8
+
+_PII_PATTERNS = (
+    (re.compile(r"(?<!\d)\d{17}[\dXx](?!\d)"), "<ID_CARD>"),
+    (re.compile(r"(?<!\d)1[3-9]\d{9}(?!\d)"), "<PHONE>"),
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+", re.ASCII), "<EMAIL>"),
+)
+
+
+def scrub_pii(text: str) -> str:
+    """默认脱敏：身份证号、手机号与邮箱替换为占位符"""
+    for pattern, placeholder in _PII_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+class CassetteMissError(LookupError):
+    """回放模式下未找到录制的响应"""
+
+
+class Cassette:
+    """LLM请求录制/回放中间件"""
+
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = OFF,
+        latency_scale: float = 1.0,
+        on_miss: str = "error",
+        scrubbers: Optional[list[Scrubber]] = None
+    ):
+        """
+        初始化录制文件
+
+        参数:
+            path: 录制文件路径
+            mode: off / record / replay
+            latency_scale: 回放耗时缩放系数，0表示不等待
+            on_miss: 回放未命中时的处理，error 抛出异常，passthrough 发起真实调用
+            scrubbers: 脱敏函数列表，默认仅 scrub_pii
+        """
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.on_miss = on_miss
+        self.scrubbers: list[Scrubber] = list(scrubbers) if scrubbers is not None else [scrub_pii]
+
+        self._entries: Optional[dict[str, list[dict[str, Any]]]] = None
+        self._cursor: dict[str, int] = defaultdict(int)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in (self.RECORD, self.REPLAY)
+
+    def add_scrubber(self, scrubber: Scrubber):
+        """追加脱敏函数（如按租户定制的客户姓名替换）"""
+        self.scrubbers.append(scrubber)
+
+    def _scrub(self, value: Any) -> Any:
+        if isinstance(value, str):
+            for scrubber in self.scrubbers:
+                value = scrubber(value)
+            return value
+        if isinstance(value, dict):
+            return {k: self._scrub(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._scrub(v) for v in value]
+        return value
+
+    def request_key(self, request: CompletionsRequest) -> tuple[str, dict[str, Any]]:
+        """
+        计算请求哈希
+
+        返回:
+            tuple: (哈希, 脱敏后的规范化请求)
+        """
+        payload = self._scrub(canonical_request(request))
+        return request_hash(payload), payload
+
+    def _open(self, mode: str):
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, f"{mode}t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def load(self) -> dict[str, list[dict[str, Any]]]:
+        """读取录制文件，按请求哈希索引"""
+        entries: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        if self.path.exists():
+            with self._open("r") as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        entries[entry["hash"]].append(entry)
+                    except (json.JSONDecodeError, KeyError) as e:
+                        logger.warning(f"录制文件第{line_no}行无效，忽略: {e}")
+        logger.info(f"录制文件已加载: {self.path}, {sum(map(len, entries.values()))} 条交互")
+        self._entries = entries
+        self._cursor.clear()
+        return entries
+
+    def record(self, request: CompletionsRequest, response: LLMResponse, latency: float, ttft: Optional[float] = None):
+        """追加一条交互"""
+        digest, payload = self.request_key(request)
+        if payload["output_model"]:
+            payload["output_model"] = payload["output_model"]["name"]
+
+        content = response.content
+        if isinstance(content, BaseModel):
+            content = content.model_dump(mode="json")
+        entry = {
+            "hash": digest,
+            "request": payload,
+            "response": self._scrub({
+                "content": content,
+                "provider": response.provider,
+                "model": response.model,
+                "usage": asdict(response.usage),
+                "cost": response.cost,
+                "tool_calls": [asdict(tc) for tc in response.tool_calls] if response.tool_calls else None,
+                "finish_reason": response.finish_reason,
+            }),
+            "latency_ms": round(latency * 1000, 1),
+        }
+        if ttft is not None:
+            entry["ttft_ms"] = round(ttft * 1000, 1)
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._open("a") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            metrics.incr("llm_cassette", result="recorded")
+        except OSError as e:
+            logger.warning(f"录制写入失败: {e}")
+
+    def lookup(self, request: CompletionsRequest) -> Optional[dict[str, Any]]:
+        """查找录制的交互，同一哈希的多条交互按顺序轮流返回"""
+        if self._entries is None:
+            self.load()
+        digest, _ = self.request_key(request)
+        entries = self._entries.get(digest)
+        if not entries:
+            metrics.incr("llm_cassette", result="miss")
+            return None
+
+        entry = entries[self._cursor[digest] % len(entries)]
+        self._cursor[digest] += 1
+        metrics.incr("llm_cassette", result="hit")
+        return entry
+
+    @staticmethod
+    def _response(request: CompletionsRequest, entry: dict[str, Any]) -> LLMResponse:
+        data = entry["response"]
+        content = data["content"]
+        if request.output_model and isinstance(content, dict):
+            # 录制时字段缺失的回复以原始JSON返回，回放保持一致
+            try:
+                content = request.output_model.model_validate(content)
+            except ValidationError:
+                pass
+        return LLMResponse(
+            id=request.id,
+            content=content,
+            provider=data["provider"],
+            model=data["model"],
+            usage=TokenUsage(**data["usage"]),
+            cost=data.get("cost", 0.0),
+            tool_calls=[ToolCallData(**tc) for tc in data["tool_calls"]] if data.get("tool_calls") else None,
+            finish_reason=data.get("finish_reason"),
+        )
+
+    def _miss(self, request: CompletionsRequest):
+        if self.on_miss != "passthrough":
+            raise CassetteMissError(f"录制文件中没有匹配的请求: {request.provider}/{request.model}")
+
+    async def completions(
+        self,
+        request: CompletionsRequest,
+        call: Callable[[], Awaitable[LLMResponse]]
+    ) -> LLMResponse:
+        """
+        录制或回放一次调用
+
+        参数:
+            request: LLM请求
+            call: 发起真实调用的协程函数
+
+        返回:
+            LLMResponse: 录制的或真实的响应
+        """
+        if self.mode == self.REPLAY:
+            entry = self.lookup(request)
+            if entry is not None:
+                await asyncio.sleep(entry["latency_ms"] / 1000 * self.latency_scale)
+                return self._response(request, entry)
+            self._miss(request)
+
+        start = time.monotonic()
+        response = await call()
+        if self.mode == self.RECORD:
+            self.record(request, response, time.monotonic() - start)
+        return response
+
+    async def stream(
+        self,
+        request: CompletionsRequest,
+        call: Callable[[], AsyncIterator[LLMStreamChunk]]
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        录制或回放一次流式调用
+
+        回放时首片段按录制的首片段耗时到达，其余片段均匀分布在剩余时间内。
+
+        参数:
+            request: LLM请求
+            call: 返回真实响应片段的函数
+
+        返回:
+            AsyncIterator[LLMStreamChunk]: 响应片段，最后一个片段携带完整响应
+        """
+        if self.mode == self.REPLAY:
+            entry = self.lookup(request)
+            if entry is not None:
+                async for chunk in self._replay_stream(request, entry):
+                    yield chunk
+                return
+            self._miss(request)
+
+        start = time.monotonic()
+        ttft = None
+        async for chunk in call():
+            if ttft is None:
+                ttft = time.monotonic() - start
+            if chunk.response and self.mode == self.RECORD:
+                self.record(request, chunk.response, time.monotonic() - start, ttft)
+            yield chunk
+
+    async def _replay_stream(self, request: CompletionsRequest, entry: dict[str, Any]) -> AsyncIterator[LLMStreamChunk]:
+        response = self._response(request, entry)
+        latency = entry["latency_ms"] / 1000 * self.latency_scale
+        ttft = entry.get("ttft_ms", entry["latency_ms"]) / 1000 * self.latency_scale
+
+        await asyncio.sleep(ttft)
+        content = response.content if isinstance(response.content, str) else ""
+        parts = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        interval = max(latency - ttft, 0) / max(len(parts), 1)
+        for index, part in enumerate(parts):
+            if index:
+                await asyncio.sleep(interval)
+            yield LLMStreamChunk(id=request.id, content=part)
+
+        for index, tool_call in enumerate(response.tool_calls or []):
+            yield LLMStreamChunk(id=request.id, tool_calls=[ToolCallDelta(
+                index=index,
+                id=tool_call.id,
+                name=tool_call.name,
+                arguments=json.dumps(tool_call.arguments, ensure_ascii=False)
+            )])
+
+        yield LLMStreamChunk(id=request.id, finish_reason=response.finish_reason, response=response)
+
+
+# 全局录制/回放中间件，由配置决定模式
+cassette = Cassette(
+    mas_config.LLM_CASSETTE_PATH,
+    mode=mas_config.LLM_CASSETTE_MODE,
+    latency_scale=mas_config.LLM_CASSETTE_LATENCY_SCALE,
+    on_miss=mas_config.LLM_CASSETTE_ON_MISS,
+)
@@ -1,20 +1,77 @@
 """
 LLM客户端
 
-统一的LLM客户端，支持多供应商智能路由和简单故障转移。
-专为快速启动设计，无复杂功能。
+统一的LLM客户端，支持等价模型间的延迟感知路由、故障切换与对冲请求，
+按供应商熔断，并在调用方截止时间内对瞬时故障重试。
+后台任务可通过批处理接口离线提交请求，不占用实时对话的限流额度。
 """
 
-from .providers import OpenAIProvider, AnthropicProvider, BaseProvider
-from .entities import LLMResponse, ProviderType, CompletionsRequest, ResponseMessageRequest
-# from infra.runtimes.routing import SimpleRouter
+import asyncio
+from collections.abc import AsyncIterator, Mapping
+from dataclasses import replace
+import time
+from typing import Any, Optional
+from uuid import uuid4
+
+from config import mas_config
+from libs.exceptions import LLMCircuitOpenException, LLMDeadlineExceededException
+from .providers import OpenAIProvider, BaseProvider
+from .entities import (
+    BatchJob,
+    BatchMode,
+    BatchStatus,
+    LLMResponse,
+    LLMStreamChunk,
+    CompletionsRequest,
+    RequestPriority,
+    ResponseMessageRequest
+)
+from .routing import LatencyRouter, Route
+from .governor import Governor, estimate_tokens
 from .config import LLMConfig
+from .registry import provider_registry
+from .response_cache import response_cache
+from .metering import current_usage_tags, usage_meter, usage_scope
+from .batch import batch_store
+from .cassette import cassette
+from .resilience import CircuitBreakers, RetryPolicy, is_provider_failure, remaining_time, resolve_deadline
 from utils import get_component_logger
+from utils.metrics import metrics
 
 
 config = LLMConfig()
 logger = get_component_logger(__name__, "LLMClient")
 
+# 路由统计在进程内所有LLMClient间共享
+router = LatencyRouter(
+    config.route_groups,
+    window=mas_config.LLM_ROUTE_WINDOW,
+    error_threshold=mas_config.LLM_ROUTE_ERROR_THRESHOLD,
+    cooldown_seconds=mas_config.LLM_ROUTE_COOLDOWN_SECONDS,
+    min_samples=mas_config.LLM_HEDGE_MIN_SAMPLES,
+    hedge_min_delay_ms=mas_config.LLM_HEDGE_MIN_DELAY_MS,
+)
+
+# 限流预算在进程内所有LLMClient间共享
+governor = Governor(
+    config.providers if mas_config.LLM_GOVERNOR_ENABLED else [],
+    max_queue=mas_config.LLM_GOVERNOR_MAX_QUEUE,
+    max_wait_seconds=mas_config.LLM_GOVERNOR_MAX_WAIT_SECONDS,
+)
+
+# 熔断状态在进程内所有LLMClient间共享
+breakers = CircuitBreakers(
+    failure_threshold=mas_config.LLM_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=mas_config.LLM_BREAKER_RESET_SECONDS,
+    enabled=mas_config.LLM_BREAKER_ENABLED,
+)
+
+retry_policy = RetryPolicy(
+    max_attempts=mas_config.LLM_RETRY_MAX_ATTEMPTS,
+    base_delay=mas_config.LLM_RETRY_BASE_DELAY_MS / 1000,
+    max_delay=mas_config.LLM_RETRY_MAX_DELAY_MS / 1000,
+)
+
 
 class LLMClient:
     """统一LLM客户端"""
@@ -22,56 +79,203 @@ class LLMClient:
     def __init__(self):
         """
         初始化LLM客户端
-        
-        参数:
-            config: LLM配置对象
+
+        供应商实例及其HTTP连接池由进程级注册表统一持有，
+        多个LLMClient实例之间共享，创建客户端不会新建连接。
         """
         self.config = config
-        self.active_providers: dict[str, BaseProvider] = {}
-        # self.router = SimpleRouter(config.routing_config)
-        self._dispatch()
-
-    def _dispatch(self):
-        """初始化已启用的供应商"""
-        for provider in self.config.providers:
-            if provider.enabled:
-                if provider.type == ProviderType.OPENAI:
-                    self.active_providers[provider.id] = OpenAIProvider(provider)
-                elif provider.type == ProviderType.ANTHROPIC:
-                    self.active_providers[provider.id] = AnthropicProvider(provider)
-                elif provider.type == ProviderType.GEMINI:
-                    pass
+        self.active_providers: dict[str, BaseProvider] = provider_registry.get_providers(config.providers)
+        self.router = router
+        self.governor = governor
+        self.breakers = breakers
+        self.retry_policy = retry_policy
+
+    def supports_structured(self, provider_id: str) -> bool:
+        """供应商是否支持结构化输出（output_model），调用方据此选择结构化调用或文本解析"""
+        provider = self.active_providers.get(provider_id.lower())
+        return provider is not None and provider.supports_structured
+
+    def _candidates(self, request: CompletionsRequest) -> list[Route]:
+        """
+        获取请求的候选路由
+
+        未启用路由时只返回请求指定的路由；否则返回等价路由中
+        具备所需能力（工具调用、结构化输出）的可用路由，最优在前。
+        """
+        requested = Route(request.provider.lower(), request.model)
+        if not mas_config.LLM_ROUTING_ENABLED:
+            return [requested]
+
+        def capable(route: Route) -> bool:
+            if route == requested:
+                return True
+            provider = self.active_providers[route.provider]
+            if request.tools and not provider.supports_tools:
+                return False
+            if request.output_model and not provider.supports_structured:
+                return False
+            return True
+
+        routes = self.router.candidates(requested.provider, requested.model, self.active_providers)
+        return [route for route in routes if capable(route)]
+
+    async def _call_route(self, route: Route, request: CompletionsRequest) -> LLMResponse:
+        """在指定路由上发送请求（供应商熔断时立即失败，由路由器切换等价路由）"""
+        if (route.provider, route.model) != (request.provider, request.model):
+            request = replace(request, provider=route.provider, model=route.model)
+
+        provider = self.active_providers[route.provider]
+
+        async def send() -> LLMResponse:
+            async with self.governor.acquire(route, estimate_tokens(request), request.priority) as permit:
+                if request.output_model:
+                    response = await provider.completions_structured(request)
                 else:
-                    raise Exception(f"不支持的供应商类型: {provider.type}")
+                    response = await provider.completions(request)
+                permit.settle(response.usage.input_tokens + response.usage.output_tokens)
+            return response
+
+        return await self.breakers.call(route.provider, route.model, send)
 
     async def completions(self, request: CompletionsRequest) -> LLMResponse:
         """
         主要聊天接口，支持显式和智能路由
 
+        启用录制/回放时经由 cassette 中间件录制真实调用或返回录制的响应。
+
         参数:
             request: LLM请求对象
 
         返回:
             LLMResponse: LLM响应对象
         """
+        if cassette.enabled:
+            return await cassette.completions(request, lambda: self._completions(request))
+        return await self._completions(request)
+
+    async def _completions(self, request: CompletionsRequest) -> LLMResponse:
+        """发送请求：缓存 → 路由/对冲 → 重试，并记录用量"""
         provider_id = request.provider.lower()
 
         # 检查供应商是否可用
         if provider_id not in self.active_providers:
             raise Exception(f"指定的供应商不可用: {request.provider}")
 
-        provider = self.active_providers[provider_id]
+        # 启用缓存的请求先查缓存（按请求指定的供应商/模型计算键）
+        use_cache = response_cache.enabled_for(request)
+        if use_cache:
+            cached = await response_cache.get(request)
+            if cached is not None:
+                return cached
 
-        # 发送请求
+        # 按延迟选择路由发送请求，失败时切换等价路由；整体失败时在截止时间内重试
         try:
-            if request.output_model:
-                return await provider.completions_structured(request)
-            else:
-                return await provider.completions(request)
+            response = await self.retry_policy.run(
+                lambda: self.router.execute(
+                    self._candidates(request),
+                    lambda route: self._call_route(route, request),
+                    hedge=request.hedge and mas_config.LLM_HEDGING_ENABLED
+                ),
+                deadline=resolve_deadline(request.timeout),
+                label=f"{provider_id}/{request.model}"
+            )
         except Exception as e:
             logger.error(f"供应商 {provider_id} 调用失败: {str(e)}")
             raise
 
+        if mas_config.LLM_USAGE_METERING_ENABLED:
+            usage_meter.record(response)
+
+        usage = response.usage
+        metrics.incr("llm_input_tokens", usage.input_tokens, provider=response.provider, model=response.model)
+        if usage.cached_tokens:
+            metrics.incr("llm_prompt_cache_tokens", usage.cached_tokens, provider=response.provider, model=response.model)
+
+        if use_cache:
+            await response_cache.set(request, response)
+        return response
+
+    def stream(self, request: CompletionsRequest) -> AsyncIterator[LLMStreamChunk]:
+        """
+        流式聊天接口
+
+        逐片段返回文本与工具调用增量，最后一个片段的 response 字段
+        携带聚合后的完整响应（与 completions 返回值一致）。
+        启用录制/回放时经由 cassette 中间件。
+
+        参数:
+            request: LLM请求对象（不支持 output_model）
+
+        返回:
+            AsyncIterator[LLMStreamChunk]: 响应片段
+        """
+        if cassette.enabled:
+            return cassette.stream(request, lambda: self._stream(request))
+        return self._stream(request)
+
+    async def _stream(self, request: CompletionsRequest) -> AsyncIterator[LLMStreamChunk]:
+        """在当前最优路由上发送流式请求"""
+        provider_id = request.provider.lower()
+
+        # 检查供应商是否可用
+        if provider_id not in self.active_providers:
+            raise Exception(f"指定的供应商不可用: {request.provider}")
+
+        if request.output_model:
+            raise Exception("结构化输出不支持流式调用")
+
+        # 流式请求只选择当前最优的未熔断路由，不做对冲；已输出片段后无法重试
+        candidates = self._candidates(request)
+        route = next(
+            (candidate for candidate in candidates if not self.breakers.enabled or self.breakers.get(candidate.provider).allow()),
+            None
+        )
+        if route is None:
+            raise LLMCircuitOpenException(candidates[0].provider, candidates[0].model)
+        if (route.provider, route.model) != (request.provider, request.model):
+            request = replace(request, provider=route.provider, model=route.model)
+        provider = self.active_providers[route.provider]
+        breaker = self.breakers.get(route.provider) if self.breakers.enabled else None
+        deadline = resolve_deadline(request.timeout)
+
+        ok: bool | None = None
+        try:
+            async with self.governor.acquire(route, estimate_tokens(request), request.priority) as permit:
+                chunks = provider.stream(request)
+                try:
+                    while True:
+                        remaining = remaining_time(deadline)
+                        if remaining is not None and remaining <= 0:
+                            raise LLMDeadlineExceededException(f"{route.provider}/{route.model}")
+                        try:
+                            async with asyncio.timeout(remaining):
+                                chunk = await anext(chunks)
+                        except StopAsyncIteration:
+                            break
+                        except TimeoutError as e:
+                            raise LLMDeadlineExceededException(f"{route.provider}/{route.model}") from e
+
+                        if chunk.response:
+                            permit.settle(chunk.response.usage.input_tokens + chunk.response.usage.output_tokens)
+                            if mas_config.LLM_USAGE_METERING_ENABLED:
+                                usage_meter.record(chunk.response)
+                        yield chunk
+                finally:
+                    await chunks.aclose()
+            ok = True
+        except Exception as e:
+            ok = False if is_provider_failure(e) else None
+            logger.error(f"供应商 {provider_id} 流式调用失败: {str(e)}")
+            raise
+        finally:
+            if breaker:
+                if ok:
+                    breaker.record_success()
+                elif ok is False:
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+
     async def responses(self, request: ResponseMessageRequest) -> LLMResponse:
         """
         使用OpenAI Responses API处理单轮对话请求
@@ -98,11 +302,184 @@ class LLMClient:
         if not isinstance(provider, OpenAIProvider):
             raise Exception(f"不支持的供应商: {request.provider}")
 
-        try:
+        async def send() -> LLMResponse:
             if request.output_model:
                 return await provider.responses_structured(request)
-            else:
-                return await provider.responses(request)
+            return await provider.responses(request)
+
+        try:
+            response = await self.retry_policy.run(
+                lambda: self.breakers.call(provider_id, request.model, send),
+                deadline=resolve_deadline(request.timeout),
+                label=f"{provider_id}/{request.model}"
+            )
         except Exception as e:
             logger.error(f"供应商 {provider_id} 调用失败: {str(e)}")
             raise
+
+        if mas_config.LLM_USAGE_METERING_ENABLED:
+            usage_meter.record(response)
+        return response
+
+
+    def _batch_route(self, request: CompletionsRequest) -> Optional[Route]:
+        """
+        选择支持批处理接口的路由
+
+        优先请求指定的路由，其次为等价路由；含工具调用或结构化输出的请求不走批处理。
+        """
+        if not mas_config.LLM_BATCH_ENABLED or request.tools or request.output_model:
+            return None
+
+        requested = Route(request.provider.lower(), request.model)
+        routes = [requested]
+        if mas_config.LLM_ROUTING_ENABLED:
+            routes += self.router.candidates(requested.provider, requested.model, self.active_providers)
+        return next(
+            (route for route in routes if route.provider in self.active_providers and self.active_providers[route.provider].supports_batch),
+            None
+        )
+
+    async def submit_batch(
+        self,
+        requests: Mapping[str, CompletionsRequest],
+        tags: Optional[Mapping[str, Mapping[str, Any]]] = None
+    ) -> BatchJob:
+        """
+        离线提交一批请求
+
+        有支持批处理的路由时提交到供应商批处理接口（异步完成，按半价计费，
+        不经过限流器）；否则以后台优先级并发同步调用，返回时任务即已完成。
+        任务状态与结果保存在Redis中，可在其他进程中轮询与收取。
+
+        参数:
+            requests: custom_id 到请求的映射，所有请求须使用同一供应商与模型
+            tags: custom_id 到请求级计量标签的映射（如各线程的 tenant_id / assistant_id），
+                与当前上下文的标签合并，请求级优先
+
+        返回:
+            BatchJob: 批处理任务
+        """
+        if not requests:
+            raise ValueError("批处理请求不能为空")
+        first = next(iter(requests.values()))
+        if any((r.provider, r.model) != (first.provider, first.model) for r in requests.values()):
+            raise ValueError("批处理请求须使用同一供应商与模型")
+        if first.provider.lower() not in self.active_providers:
+            raise Exception(f"指定的供应商不可用: {first.provider}")
+
+        job = BatchJob(
+            id=uuid4().hex,
+            provider=first.provider.lower(),
+            model=first.model,
+            mode=BatchMode.SYNC,
+            custom_ids=list(requests),
+            tags=dict(current_usage_tags()),
+            item_tags={
+                custom_id: {key: str(value) for key, value in item.items() if value is not None}
+                for custom_id, item in (tags or {}).items()
+            },
+            created_at=time.time()
+        )
+
+        route = self._batch_route(first)
+        if route is not None:
+            provider = self.active_providers[route.provider]
+            routed = {
+                custom_id: replace(request, provider=route.provider, model=route.model)
+                for custom_id, request in requests.items()
+            }
+            try:
+                job.provider_batch_id = await self.retry_policy.run(
+                    lambda: provider.submit_batch(routed),
+                    label=f"{route.provider}/{route.model}"
+                )
+                job.mode = BatchMode.PROVIDER
+                job.provider, job.model = route.provider, route.model
+            except Exception as e:
+                logger.warning(f"批处理提交失败，改为同步执行: {route.provider}/{route.model}, {e}")
+
+        if job.mode == BatchMode.SYNC:
+            await self._run_sync_batch(job, requests)
+
+        metrics.incr("llm_batch_requests", len(requests), provider=job.provider, mode=job.mode)
+        await batch_store.save(job)
+        logger.info(f"批处理任务已提交: {job.id} ({job.mode}, {job.provider}/{job.model}, {len(requests)}条)")
+        return job
+
+    async def _run_sync_batch(self, job: BatchJob, requests: Mapping[str, CompletionsRequest]):
+        """无批处理路由时以后台优先级并发执行，结果直接写入存储"""
+        semaphore = asyncio.Semaphore(mas_config.LLM_BATCH_SYNC_CONCURRENCY)
+        results: dict[str, LLMResponse] = {}
+
+        async def run(custom_id: str, request: CompletionsRequest):
+            async with semaphore:
+                try:
+                    with usage_scope(**job.item_tags.get(custom_id, {})):
+                        results[custom_id] = await self.completions(replace(request, priority=RequestPriority.BACKGROUND))
+                except Exception as e:
+                    job.errors[custom_id] = str(e)
+
+        await asyncio.gather(*[run(custom_id, request) for custom_id, request in requests.items()])
+        await batch_store.save_results(job.id, results)
+        job.status = BatchStatus.COMPLETED if results or not requests else BatchStatus.FAILED
+        job.completed_at = time.time()
+
+    async def poll_batch(self, job_id: str) -> BatchJob:
+        """
+        刷新批处理任务状态
+
+        供应商任务结束时回收结果写入存储，并按提交时的计量标签记录用量。
+
+        参数:
+            job_id: 批处理任务ID
+
+        返回:
+            BatchJob: 最新的任务状态
+        """
+        job = await batch_store.get(job_id)
+        if job is None:
+            raise ValueError(f"批处理任务不存在或已过期: {job_id}")
+        if job.status.terminal:
+            return job
+
+        provider = self.active_providers[job.provider]
+        status = await self.retry_policy.run(
+            lambda: provider.batch_status(job.provider_batch_id),
+            label=f"{job.provider}/{job.model}"
+        )
+        if not status.terminal:
+            return job
+
+        if status in (BatchStatus.COMPLETED, BatchStatus.EXPIRED):
+            results = await self.retry_policy.run(
+                lambda: provider.batch_results(job.provider_batch_id),
+                label=f"{job.provider}/{job.model}"
+            )
+            for custom_id in job.custom_ids:
+                if custom_id not in results:
+                    job.errors[custom_id] = "批处理请求失败或未完成"
+            if mas_config.LLM_USAGE_METERING_ENABLED:
+                for custom_id, response in results.items():
+                    usage_meter.record(response, tags={**job.tags, **job.item_tags.get(custom_id, {})})
+            await batch_store.save_results(job.id, results)
+
+        job.status = status
+        job.completed_at = time.time()
+        await batch_store.save(job)
+
+        metrics.incr("llm_batch_jobs", provider=job.provider, status=job.status)
+        logger.info(f"批处理任务结束: {job.id} ({job.status}), 失败 {len(job.errors)}/{len(job.custom_ids)} 条")
+        return job
+
+    async def batch_results(self, job_id: str) -> dict[str, LLMResponse]:
+        """
+        获取批处理任务结果
+
+        参数:
+            job_id: 批处理任务ID
+
+        返回:
+            dict[str, LLMResponse]: custom_id 到响应的映射，仅包含成功的请求
+        """
+        return await batch_store.get_results(job_id)
@@ -7,6 +7,7 @@ LLM配置加载器
 from pathlib import Path
 
 from infra.runtimes.entities import Provider, Model, ProviderType, ModelType
+from infra.runtimes.routing import Route
 from utils.yaml_loader import load_yaml_file
 from config import mas_config
 
@@ -17,9 +18,12 @@ class LLMConfig:
         """初始化配置加载器"""
         project_root = Path(__file__).parent.parent.parent
         config_path = project_root / "data" / "models.yaml"
+        routes_path = project_root / "data" / "model_routes.yaml"
         
         self.config_path = str(config_path)
+        self.routes_path = str(routes_path)
         self.providers = self.load_providers()
+        self.route_groups = self.load_route_groups()
 
     def load_providers(self) -> list[Provider]:
         """
@@ -41,9 +45,15 @@ class LLMConfig:
         
         for provider_config in yaml_content:
             provider = provider_config['id']
+
+            # Mock模式下所有供应商替换为本地模拟实现，模型与路由配置保持不变
+            if mas_config.LLM_MOCK_MODE:
+                provider_config = {**provider_config, 'type': ProviderType.MOCK}
             
-            # 检查是否有对应的API密钥
+            # 检查是否有对应的API密钥（Mock供应商无需密钥）
             api_key = api_keys.get(provider)
+            if provider_config['type'] == ProviderType.MOCK:
+                api_key = api_key or "mock"
             
             if not api_key:
                 print(f"No API key found for provider: {provider}")
@@ -59,7 +69,10 @@ class LLMConfig:
                             provider=provider,
                             name=model_config['name'],
                             type=ModelType(model_config['type']),
-                            enabled=model_config['enabled']
+                            enabled=model_config['enabled'],
+                            rpm=model_config.get('rpm'),
+                            tpm=model_config.get('tpm'),
+                            max_concurrency=model_config.get('max_concurrency')
                         )
                         models.append(model)
                     except KeyError as e:
@@ -76,9 +89,13 @@ class LLMConfig:
                     type=ProviderType(provider_config['type']),
                     name=provider_config['name'],
                     api_key=api_key,
-                    base_url=provider_config['base_url'],
+                    base_url=provider_config.get('base_url'),
                     models=models,
-                    enabled=provider_config['enabled']
+                    enabled=provider_config['enabled'],
+                    max_connections=provider_config.get('max_connections'),
+                    rpm=provider_config.get('rpm'),
+                    tpm=provider_config.get('tpm'),
+                    max_concurrency=provider_config.get('max_concurrency')
                 )
                 
                 providers.append(provider)
@@ -90,3 +107,24 @@ class LLMConfig:
                 continue
         
         return providers
+
+    def load_route_groups(self) -> list[list[Route]]:
+        """
+        从YAML文件加载等价模型路由组
+
+        返回:
+            list[list[Route]]: 路由组列表，文件不存在时为空
+        """
+        if not Path(self.routes_path).exists():
+            return []
+
+        groups = []
+        for group_config in load_yaml_file(self.routes_path) or []:
+            try:
+                groups.append([
+                    Route(provider=route['provider'], model=route['model'])
+                    for route in group_config['routes']
+                ])
+            except KeyError as e:
+                print(f"跳过路由组配置 {group_config.get('name')}: 缺少字段 {e}")
+        return groups
@@ -1,12 +1,16 @@
 from .llm import (
     LLMRequest,
     LLMResponse,
+    RequestPriority,
     ResponseMessageRequest,
     CompletionsRequest,
     TokenUsage,
-    ToolCallData
+    ToolCallData,
+    ToolCallDelta,
+    LLMStreamChunk
 )
 from .providers import Provider, ProviderType
+from .batch import BatchJob, BatchMode, BatchStatus
 from .models import Model, ModelType
 
 __all__ = [
@@ -14,10 +18,16 @@ __all__ = [
     "ResponseMessageRequest",
     "LLMRequest",
     "LLMResponse",
+    "RequestPriority",
     "ToolCallData",
+    "ToolCallDelta",
+    "LLMStreamChunk",
     "Provider",
     "ProviderType",
     "Model",
     "ModelType",
-    "TokenUsage"
+    "TokenUsage",
+    "BatchJob",
+    "BatchMode",
+    "BatchStatus"
 ]
@@ -0,0 +1,39 @@
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Optional
+
+
+class BatchStatus(StrEnum):
+    """离线批处理任务状态"""
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    EXPIRED = "expired"                    # 超过供应商处理时限，已完成部分的结果仍可获取
+    CANCELLED = "cancelled"
+
+    @property
+    def terminal(self) -> bool:
+        return self != BatchStatus.IN_PROGRESS
+
+
+class BatchMode(StrEnum):
+    """批处理执行方式"""
+    PROVIDER = "provider"                  # 供应商批处理接口（异步，半价）
+    SYNC = "sync"                          # 无批处理路由时以后台优先级并发同步调用
+
+
+@dataclass
+class BatchJob:
+    """离线批处理任务"""
+    id: str
+    provider: str
+    model: str
+    mode: BatchMode
+    custom_ids: list[str]
+    status: BatchStatus = BatchStatus.IN_PROGRESS
+    provider_batch_id: Optional[str] = None
+    tags: dict[str, str] = field(default_factory=dict)   # 提交时的计量标签，结果回收时计入用量
+    item_tags: dict[str, dict[str, str]] = field(default_factory=dict)  # custom_id -> 请求级计量标签（覆盖 tags）
+    errors: dict[str, str] = field(default_factory=dict)  # custom_id -> 失败原因
+    created_at: float = 0.0
+    completed_at: Optional[float] = None
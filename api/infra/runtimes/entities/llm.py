@@ -1,5 +1,6 @@
 from collections.abc import Mapping
 from dataclasses import dataclass
+from enum import IntEnum
 from typing import Any, Literal, Type
 from uuid import UUID
 
@@ -10,8 +11,17 @@ from libs.types import MessageParams
 
 @dataclass
 class TokenUsage:
-    input_tokens: int
+    input_tokens: int                      # 输入令牌总数（含缓存命中与写入部分）
     output_tokens: int
+    cached_tokens: int = 0                 # 命中供应商提示词缓存的输入令牌数
+    cache_write_tokens: int = 0            # 写入供应商提示词缓存的输入令牌数
+
+
+class RequestPriority(IntEnum):
+    """请求优先级，数值越小越先获得限流容量"""
+    INTERACTIVE = 0                        # 实时对话
+    NORMAL = 1
+    BACKGROUND = 2                         # 唤醒、分析、批处理等后台任务
 
 
 @dataclass
@@ -24,6 +34,12 @@ class LLMRequest:
     stream: bool = False
     thread_id: UUID | None = None          # TODO: Look for other usage of this field, see if can be deleted.
     output_model: Type[BaseModel] | None = None
+    hedge: bool = False                    # 允许在主路由超过p95时向等价路由发送对冲请求
+    cache_ttl: int | None = None           # 响应缓存有效期（秒），None表示不缓存
+    cache_bypass: bool = False             # 跳过缓存读取（仍会刷新缓存）
+    prompt_cache_prefix: int = 0           # 开头N条system消息为跨轮次稳定的前缀，标记供应商侧提示词缓存
+    priority: RequestPriority = RequestPriority.NORMAL
+    timeout: float | None = None           # 本次调用（含重试）的时间预算（秒），与上下文截止时间取较早者
 
 
 @dataclass(kw_only=True)
@@ -57,3 +73,28 @@ class LLMResponse:
     cost: float = 0.0
     tool_calls: list[ToolCallData] | None = None
     finish_reason: str | None = None
+    cache_hit: bool = False
+
+
+@dataclass
+class ToolCallDelta:
+    """流式响应中的工具调用增量（参数JSON按片段到达）"""
+    index: int
+    id: str | None = None
+    name: str | None = None
+    arguments: str = ""
+
+
+@dataclass
+class LLMStreamChunk:
+    """
+    流式响应片段
+
+    content 为文本增量，tool_calls 为工具调用增量。
+    最后一个片段的 response 携带聚合后的完整 LLMResponse（含用量与解析后的工具调用）。
+    """
+    id: UUID | None
+    content: str = ""
+    tool_calls: list[ToolCallDelta] | None = None
+    finish_reason: str | None = None
+    response: LLMResponse | None = None
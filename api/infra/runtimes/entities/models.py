@@ -17,4 +17,7 @@ class Model:
     provider: str
     name: str
     type: Optional[ModelType]
-    enabled: bool = True
\ No newline at end of file
+    enabled: bool = True
+    rpm: Optional[int] = None              # 每分钟请求数上限
+    tpm: Optional[int] = None              # 每分钟令牌数上限
+    max_concurrency: Optional[int] = None  # 并发请求上限
\ No newline at end of file
@@ -8,6 +8,7 @@ class ProviderType(StrEnum):
     OPENAI = "openai"
     ANTHROPIC = "anthropic"
     GEMINI = "gemini"
+    MOCK = "mock"                          # 本地模拟供应商，无需API密钥
 
 
 @dataclass
@@ -19,3 +20,7 @@ class Provider:
     base_url: Optional[str] = None
     models: list[Model] = None
     enabled: bool = True
+    max_connections: Optional[int] = None
+    rpm: Optional[int] = None              # 供应商级每分钟请求数上限
+    tpm: Optional[int] = None              # 供应商级每分钟令牌数上限
+    max_concurrency: Optional[int] = None  # 供应商级并发请求上限
@@ -0,0 +1,312 @@
+"""
+LLM调用限流器
+
+按供应商与模型执行 models.yaml 中配置的RPM/TPM预算与并发上限：
+- 容量不足的请求按优先级排队，实时对话优先获得容量
+- 排队过长或等待超时时抛出 LLMCapacityExceededException 作为背压信号
+- 请求完成后按实际令牌用量校正TPM令牌桶
+
+未配置限额的供应商/模型不受限流影响。
+"""
+
+import asyncio
+import bisect
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import itertools
+import math
+import time
+from typing import Any, Optional
+
+from libs.exceptions import LLMCapacityExceededException
+from utils import get_component_logger
+from utils.metrics import metrics
+from .entities import CompletionsRequest, Provider, RequestPriority
+from .routing import Route
+
+logger = get_component_logger(__name__, "LLMGovernor")
+
+# 未指定max_tokens时按此预估输出令牌数
+DEFAULT_OUTPUT_TOKENS = 1000
+
+
+def estimate_tokens(request: CompletionsRequest) -> int:
+    """
+    粗略预估请求令牌数（输入按每2字符1个令牌折算，中英文混合的折中值）
+
+    预估值仅用于排队放行，请求完成后会按实际用量校正。
+    """
+    chars = sum(len(str(message.content)) for message in request.messages if message.content)
+    return chars // 2 + (request.max_tokens or DEFAULT_OUTPUT_TOKENS)
+
+
+class TokenBucket:
+    """按分钟预算匀速补充的令牌桶"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """取出amount个令牌需等待的秒数；超过桶容量的请求在桶满时放行"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= amount
+
+    def adjust(self, delta: float):
+        """按实际用量校正（delta为实际与预估之差，可为负）"""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class Limiter:
+    """单个限流范围（供应商或供应商下的模型）"""
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None, max_concurrency: Optional[int] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        """放行所需等待秒数；并发已满时为inf（等待其他请求释放）"""
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return math.inf
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def acquire(self, tokens: int):
+        self.in_flight += 1
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+
+    def release(self):
+        self.in_flight -= 1
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    route: Route = field(compare=False)
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class Permit:
+    """已获得的调用许可"""
+    route: Route
+    estimated_tokens: int
+    limiters: list[Limiter]
+    settled: bool = False
+
+    def settle(self, actual_tokens: int):
+        """按实际令牌用量校正TPM预算（仅首次调用生效）"""
+        if self.settled:
+            return
+        self.settled = True
+        for limiter in self.limiters:
+            if limiter.tokens:
+                limiter.tokens.adjust(actual_tokens - self.estimated_tokens)
+
+
+class Governor:
+    """
+    LLM调用限流器
+
+    每个供应商维护一个按 (优先级, 到达顺序) 排序的等待队列。放行时按顺序检查：
+    若队首受供应商级预算限制，则后续请求一律等待，避免低优先级抢占共享容量；
+    若仅受模型级预算限制，则同模型的后续请求等待，其他模型的请求可继续放行。
+    """
+
+    def __init__(self, providers: list[Provider], max_queue: int = 100, max_wait_seconds: float = 30.0):
+        """
+        初始化限流器
+
+        参数:
+            providers: 供应商配置（含模型级限额）
+            max_queue: 每个供应商的最大排队请求数，超过即拒绝
+            max_wait_seconds: 单个请求的最长排队时间
+        """
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+
+        self._limiters: dict[tuple[str, Optional[str]], Limiter] = {}
+        for provider in providers:
+            if provider.rpm or provider.tpm or provider.max_concurrency:
+                self._limiters[(provider.id, None)] = Limiter(provider.rpm, provider.tpm, provider.max_concurrency)
+            for model in provider.models or []:
+                if model.rpm or model.tpm or model.max_concurrency:
+                    self._limiters[(provider.id, model.id)] = Limiter(model.rpm, model.tpm, model.max_concurrency)
+
+        self._queues: dict[str, list[_Waiter]] = defaultdict(list)
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._seq = itertools.count()
+
+    def _scopes(self, route: Route) -> tuple[Optional[Limiter], Optional[Limiter]]:
+        return self._limiters.get((route.provider, None)), self._limiters.get((route.provider, route.model))
+
+    def queue_depth(self, provider: str) -> int:
+        """供应商当前排队请求数"""
+        return len(self._queues.get(provider, []))
+
+    def pressure(self, provider: str) -> float:
+        """背压程度（排队数 / 队列上限），调用方可据此推迟后台任务"""
+        return self.queue_depth(provider) / self.max_queue if self.max_queue else 0.0
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        route: Route,
+        estimated_tokens: int,
+        priority: RequestPriority = RequestPriority.NORMAL,
+    ) -> AsyncIterator[Permit]:
+        """
+        获取调用许可
+
+        参数:
+            route: 调用路由
+            estimated_tokens: 预估令牌数（输入+输出）
+            priority: 请求优先级
+
+        返回:
+            Permit: 调用许可，请求完成后应调用 settle 校正实际用量
+
+        异常:
+            LLMCapacityExceededException: 排队已满或等待超时
+        """
+        permit = await self._acquire(route, estimated_tokens, priority)
+        try:
+            yield permit
+        finally:
+            for limiter in permit.limiters:
+                limiter.release()
+            if permit.limiters:
+                self._drain(route.provider)
+
+    async def _acquire(self, route: Route, tokens: int, priority: RequestPriority) -> Permit:
+        limiters = [limiter for limiter in self._scopes(route) if limiter]
+        if not limiters:
+            return Permit(route, tokens, [])
+
+        queue = self._queues[route.provider]
+        if len(queue) >= self.max_queue:
+            logger.warning(f"{route.provider} 排队请求已达上限 {self.max_queue}，拒绝 {route.model} 请求")
+            metrics.incr("llm_governor_rejections", provider=route.provider, model=route.model, reason="queue_full")
+            raise LLMCapacityExceededException(route.provider, route.model, "排队已满")
+
+        waiter = _Waiter(int(priority), next(self._seq), route, tokens, asyncio.get_running_loop().create_future())
+        bisect.insort(queue, waiter)
+        self._drain(route.provider)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait({waiter.future}, timeout=self.max_wait_seconds)
+        except BaseException:
+            # 调用方被取消：若已获得许可则立即归还
+            self._abandon(waiter, limiters)
+            raise
+
+        if not waiter.future.done():
+            self._abandon(waiter, limiters)
+            metrics.incr("llm_governor_rejections", provider=route.provider, model=route.model, reason="timeout")
+            raise LLMCapacityExceededException(route.provider, route.model, "等待超时")
+
+        waited_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("llm_governor_wait_ms", waited_ms, provider=route.provider, priority=priority.name.lower())
+        return Permit(route, tokens, limiters)
+
+    def _abandon(self, waiter: _Waiter, limiters: list[Limiter]):
+        """移除放弃的等待者；已放行的归还并发名额"""
+        if waiter.future.done() and not waiter.future.cancelled():
+            for limiter in limiters:
+                limiter.release()
+            self._drain(waiter.route.provider)
+            return
+
+        waiter.future.cancel()
+        queue = self._queues[waiter.route.provider]
+        if waiter in queue:
+            queue.remove(waiter)
+
+    def _drain(self, provider: str):
+        """按优先级放行容量允许的等待请求，并为剩余请求安排下一次检查"""
+        timer = self._timers.pop(provider, None)
+        if timer:
+            timer.cancel()
+
+        queue = self._queues[provider]
+        now = time.monotonic()
+        remaining: list[_Waiter] = []
+        provider_blocked = False
+        blocked_models: set[str] = set()
+        next_check = math.inf
+
+        for waiter in queue:
+            if waiter.future.done():
+                continue
+            if provider_blocked or waiter.route.model in blocked_models:
+                remaining.append(waiter)
+                continue
+
+            provider_limiter, model_limiter = self._scopes(waiter.route)
+            provider_wait = provider_limiter.wait_time(waiter.tokens, now) if provider_limiter else 0.0
+            model_wait = model_limiter.wait_time(waiter.tokens, now) if model_limiter else 0.0
+
+            if provider_wait == 0 and model_wait == 0:
+                for limiter in (provider_limiter, model_limiter):
+                    if limiter:
+                        limiter.acquire(waiter.tokens)
+                waiter.future.set_result(None)
+                continue
+
+            remaining.append(waiter)
+            next_check = min(next_check, max(provider_wait, model_wait))
+            if provider_wait > 0:
+                provider_blocked = True
+            else:
+                blocked_models.add(waiter.route.model)
+
+        self._queues[provider] = remaining
+        if remaining and next_check < math.inf:
+            loop = asyncio.get_running_loop()
+            self._timers[provider] = loop.call_later(next_check, self._drain, provider)
+
+    def snapshot(self) -> dict[str, Any]:
+        """导出各限流范围的状态"""
+        now = time.monotonic()
+
+        def remaining(bucket: Optional[TokenBucket]) -> Optional[int]:
+            if bucket is None:
+                return None
+            bucket.wait_time(0, now)
+            return int(bucket.tokens)
+
+        return {
+            f"{provider}/{model or '*'}": {
+                "in_flight": limiter.in_flight,
+                "requests_remaining": remaining(limiter.requests),
+                "tokens_remaining": remaining(limiter.tokens),
+                "queued": self.queue_depth(provider),
+            }
+            for (provider, model), limiter in self._limiters.items()
+        }
@@ -0,0 +1,287 @@
+"""
+LLM用量计量
+
+为每次LLM调用的令牌用量与成本打上 租户/助理/节点/模型 标签，在进程内按小时聚合，
+由后台任务定期批量写入Redis，热路径上不产生逐次写入。
+
+标签通过上下文变量传递：工作流节点、后台任务在调用LLM前用 usage_scope 声明标签，
+LLMClient 记录用量时自动读取。
+
+Redis数据布局:
+    llm_usage:{tenant_id}:{YYYYMMDDHH}  (Hash, UTC小时桶)
+        {assistant_id}|{node}|{model}|{metric} -> 累计值
+"""
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from config import mas_config
+from infra.cache import get_redis_client
+from utils import get_component_logger
+from .entities import LLMResponse
+
+logger = get_component_logger(__name__, "UsageMeter")
+
+KEY_PREFIX = "llm_usage"
+BUCKET_FORMAT = "%Y%m%d%H"
+UNKNOWN = "unknown"
+
+USAGE_METRICS = ("requests", "input_tokens", "output_tokens", "cached_tokens", "cost")
+USAGE_DIMENSIONS = ("assistant_id", "node", "model")
+GRANULARITIES = ("hour", "day", "total")
+
+_usage_tags: ContextVar[dict[str, str]] = ContextVar("llm_usage_tags", default={})
+
+
+@contextmanager
+def usage_scope(**tags) -> Iterator[None]:
+    """
+    在当前上下文中附加计量标签
+
+    嵌套使用时标签合并，内层优先；值为None的标签被忽略。
+
+    使用方式:
+        with usage_scope(tenant_id=tenant_id, assistant_id=assistant_id, node="sales"):
+            await llm_client.completions(request)
+    """
+    merged = {**_usage_tags.get(), **{k: str(v) for k, v in tags.items() if v is not None}}
+    token = _usage_tags.set(merged)
+    try:
+        yield
+    finally:
+        _usage_tags.reset(token)
+
+
+def current_usage_tags() -> dict[str, str]:
+    """当前上下文的计量标签"""
+    return _usage_tags.get()
+
+
+@dataclass(frozen=True)
+class UsageKey:
+    """聚合键：标签 + UTC小时桶"""
+    tenant_id: str
+    assistant_id: str
+    node: str
+    model: str
+    bucket: str
+
+
+def _new_entry() -> dict[str, float]:
+    return dict.fromkeys(USAGE_METRICS, 0)
+
+
+class UsageMeter:
+    """进程内用量聚合器，定期批量刷写到Redis"""
+
+    def __init__(self, flush_interval: float = 10.0, retention_days: int = 90, max_pending: int = 5000):
+        """
+        初始化计量器
+
+        参数:
+            flush_interval: 后台刷写间隔（秒）
+            retention_days: Redis中小时桶的保留天数
+            max_pending: 待刷写的聚合键数量上限，超过时立即触发刷写
+        """
+        self.flush_interval = flush_interval
+        self.retention_seconds = retention_days * 86400
+        self.max_pending = max_pending
+
+        self._pending: dict[UsageKey, dict[str, float]] = defaultdict(_new_entry)
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self._redis = None
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await get_redis_client()
+        return self._redis
+
+    def record(self, response: LLMResponse, tags: Optional[dict[str, str]] = None):
+        """
+        记录一次LLM调用的用量（仅内存累加）
+
+        参数:
+            response: LLM响应
+            tags: 计量标签，默认取当前上下文
+        """
+        tags = tags if tags is not None else current_usage_tags()
+        key = UsageKey(
+            tenant_id=tags.get("tenant_id", UNKNOWN),
+            assistant_id=tags.get("assistant_id", UNKNOWN),
+            node=tags.get("node", UNKNOWN),
+            model=response.model or UNKNOWN,
+            bucket=datetime.now(timezone.utc).strftime(BUCKET_FORMAT),
+        )
+        entry = self._pending[key]
+        entry["requests"] += 1
+        entry["input_tokens"] += response.usage.input_tokens
+        entry["output_tokens"] += response.usage.output_tokens
+        entry["cached_tokens"] += response.usage.cached_tokens
+        entry["cost"] += response.cost or 0.0
+
+        if len(self._pending) >= self.max_pending and (self._flushing is None or self._flushing.done()):
+            try:
+                self._flushing = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                pass
+
+    async def flush(self) -> int:
+        """
+        将已聚合的用量批量写入Redis
+
+        写入失败时数据合并回内存，等待下一次刷写。
+
+        返回:
+            int: 写入的聚合键数量
+        """
+        pending, self._pending = self._pending, defaultdict(_new_entry)
+        if not pending:
+            return 0
+
+        try:
+            redis_client = await self._client()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key, values in pending.items():
+                    redis_key = f"{KEY_PREFIX}:{key.tenant_id}:{key.bucket}"
+                    field_prefix = f"{key.assistant_id}|{key.node}|{key.model}"
+                    for metric, value in values.items():
+                        if not value:
+                            continue
+                        if metric == "cost":
+                            pipe.hincrbyfloat(redis_key, f"{field_prefix}|{metric}", value)
+                        else:
+                            pipe.hincrby(redis_key, f"{field_prefix}|{metric}", int(value))
+                    pipe.expire(redis_key, self.retention_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"用量刷写失败，{len(pending)} 条聚合保留至下次刷写: {e}")
+            for key, values in pending.items():
+                entry = self._pending[key]
+                for metric, value in values.items():
+                    entry[metric] += value
+            return 0
+
+        logger.debug(f"已刷写 {len(pending)} 条用量聚合")
+        return len(pending)
+
+    def start(self):
+        """启动后台定期刷写任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def aclose(self):
+        """停止后台任务并刷写剩余用量"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def query(
+        self,
+        tenant_id: str,
+        start: datetime,
+        end: datetime,
+        group_by: Sequence[str] = ("node", "model"),
+        granularity: str = "hour",
+    ) -> list[dict[str, Any]]:
+        """
+        查询租户在时间窗口内的用量
+
+        结果包含已刷写到Redis的数据与当前进程尚未刷写的数据。
+
+        参数:
+            tenant_id: 租户ID
+            start: 起始时间（含）
+            end: 结束时间（含）
+            group_by: 分组维度，取自 assistant_id / node / model
+            granularity: 时间粒度，hour / day / total
+
+        返回:
+            list[dict]: 每组一行，包含 period、分组维度与各项用量
+        """
+        invalid = [dim for dim in group_by if dim not in USAGE_DIMENSIONS]
+        if invalid:
+            raise ValueError(f"不支持的分组维度: {invalid}")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"不支持的时间粒度: {granularity}")
+
+        buckets = self._hour_buckets(start, end)
+        rows: dict[tuple, dict[str, Any]] = {}
+
+        def accumulate(bucket: str, assistant_id: str, node: str, model: str, metric: str, value: float):
+            if metric not in USAGE_METRICS:
+                return
+            dims = {"assistant_id": assistant_id, "node": node, "model": model}
+            period = self._period(bucket, granularity)
+            group = (period, *(dims[dim] for dim in group_by))
+            row = rows.get(group)
+            if row is None:
+                row = rows[group] = {"period": period, **{dim: dims[dim] for dim in group_by}, **_new_entry()}
+            row[metric] += value
+
+        redis_client = await self._client()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for bucket in buckets:
+                pipe.hgetall(f"{KEY_PREFIX}:{tenant_id}:{bucket}")
+            results = await pipe.execute()
+
+        for bucket, data in zip(buckets, results):
+            for field, value in (data or {}).items():
+                field = field.decode() if isinstance(field, bytes) else field
+                parts = field.rsplit("|", 3)
+                if len(parts) != 4:
+                    continue
+                accumulate(bucket, *parts, float(value))
+
+        bucket_set = set(buckets)
+        for key, values in self._pending.items():
+            if key.tenant_id == tenant_id and key.bucket in bucket_set:
+                for metric, value in values.items():
+                    accumulate(key.bucket, key.assistant_id, key.node, key.model, metric, value)
+
+        result = sorted(rows.values(), key=lambda row: (row["period"] or "", -row["input_tokens"] - row["output_tokens"]))
+        for row in result:
+            for metric in USAGE_METRICS:
+                row[metric] = round(row[metric], 6) if metric == "cost" else int(row[metric])
+        return result
+
+    @staticmethod
+    def _hour_buckets(start: datetime, end: datetime) -> list[str]:
+        """窗口内的全部UTC小时桶"""
+        start = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        end = end.astimezone(timezone.utc)
+        buckets = []
+        current = start
+        while current <= end:
+            buckets.append(current.strftime(BUCKET_FORMAT))
+            current += timedelta(hours=1)
+        return buckets
+
+    @staticmethod
+    def _period(bucket: str, granularity: str) -> Optional[str]:
+        """小时桶归入的统计周期（ISO格式，UTC）"""
+        if granularity == "total":
+            return None
+        hour = datetime.strptime(bucket, BUCKET_FORMAT).replace(tzinfo=timezone.utc)
+        if granularity == "day":
+            hour = hour.replace(hour=0)
+        return hour.isoformat()
+
+
+# 全局计量器实例
+usage_meter = UsageMeter(
+    flush_interval=mas_config.LLM_USAGE_FLUSH_INTERVAL_SECONDS,
+    retention_days=mas_config.LLM_USAGE_RETENTION_DAYS,
+)
@@ -2,10 +2,12 @@ from .base import BaseProvider
 from .openai import OpenAIProvider
 from .anthropic import AnthropicProvider
 from .gemini import GeminiProvider
+from .mock import MockProvider
 
 __all__ = [
     "BaseProvider",
     "OpenAIProvider",
     "AnthropicProvider",
-    "GeminiProvider"
+    "GeminiProvider",
+    "MockProvider"
 ]
\ No newline at end of file
@@ -5,29 +5,38 @@ Anthropic供应商实现
 支持Claude-3.5-Sonnet、Claude-3.5-Haiku等模型。
 """
 
+from collections.abc import AsyncIterator, Mapping
 from typing import Any
 
 import anthropic
-from anthropic.types import MessageParam
+import httpx
+from anthropic import NOT_GIVEN, NotGiven
+from anthropic.types import MessageParam, TextBlockParam
 
 from infra.runtimes.providers import BaseProvider
-from infra.runtimes.entities import CompletionsRequest, LLMResponse, Provider, TokenUsage
+from infra.runtimes.entities import BatchStatus, CompletionsRequest, LLMResponse, LLMStreamChunk, Provider, TokenUsage
+from .base import BATCH_COST_FACTOR
 
 
 class AnthropicProvider(BaseProvider):
     """Anthropic供应商实现类"""
-    
-    def __init__(self, provider: Provider):
+
+    supports_batch = True
+
+    def __init__(self, provider: Provider, http_client: httpx.AsyncClient | None = None):
         """
         初始化Anthropic供应商
         
         参数:
             config: Anthropic配置
+            http_client: 共享的HTTP连接池，为空时由SDK自行创建
         """
         super().__init__(provider)
         self.client = anthropic.AsyncAnthropic(
             api_key=provider.api_key,
-            base_url=provider.base_url
+            base_url=provider.base_url,
+            http_client=http_client,
+            max_retries=0  # 重试由LLMClient按截止时间统一控制
         )
 
     def _format_message_content(self, content) -> Any:
@@ -49,12 +58,17 @@ class AnthropicProvider(BaseProvider):
             if item.type == "text":
                 formatted.append({"type": "text", "text": item.content})
             elif item.type == "input_image":
-                formatted.append({
-                    "type": "image",
-                    "source": {"type": "url", "url": item.content}
-                })
+                formatted.append({"type": "image", "source": self._image_source(item.content)})
         return formatted
 
+    @staticmethod
+    def _image_source(url: str) -> dict[str, str]:
+        """图片来源：data URL 转为 base64 来源，其余为 URL 来源"""
+        if url.startswith("data:"):
+            header, _, data = url.partition(",")
+            return {"type": "base64", "media_type": header[5:].split(";")[0], "data": data}
+        return {"type": "url", "url": url}
+
     async def completions(self, request: CompletionsRequest) -> LLMResponse:
         """
         发送聊天请求到Anthropic
@@ -66,33 +80,166 @@ class AnthropicProvider(BaseProvider):
             LLMResponse: Anthropic响应
         """
         # 构建包含历史记录的对话上下文并处理多模态内容
-        messages: list[MessageParam] = []
-        for message in request.messages:
-            if message.content:
-                message.content = self._format_message_content(message.content)
-            messages.append(message)
-
-        response = await self.client.messages.create(
-            model=request.model or "claude-3-5-sonnet-20241022",
-            messages=messages,
-            max_tokens=request.max_tokens or 4000,
-            temperature=request.temperature
-        )
+        response = await self.client.messages.create(**self._message_params(request))
 
         llm_response = LLMResponse(
             id=request.id,
             content=response.content[0].text,
             provider=request.provider,
             model=response.model,
-            usage=TokenUsage(
-                input_tokens=response.usage.input_tokens,
-                output_tokens=response.usage.output_tokens,
-            ),
+            usage=self._usage(response.usage),
             cost=self._calculate_cost(response.usage, response.model)
         )
 
         return llm_response
 
+    async def stream(self, request: CompletionsRequest) -> AsyncIterator[LLMStreamChunk]:
+        """
+        发送流式聊天请求到Anthropic
+
+        参数:
+            request: LLM请求
+
+        返回:
+            AsyncIterator[LLMStreamChunk]: 响应片段，最后一个片段携带完整响应
+        """
+        async with self.client.messages.stream(**self._message_params(request)) as stream:
+            async for text in stream.text_stream:
+                yield LLMStreamChunk(id=request.id, content=text)
+
+            final = await stream.get_final_message()
+
+        yield LLMStreamChunk(
+            id=request.id,
+            finish_reason=final.stop_reason,
+            response=LLMResponse(
+                id=request.id,
+                content="".join(block.text for block in final.content if block.type == "text"),
+                provider=request.provider,
+                model=final.model,
+                usage=self._usage(final.usage),
+                cost=self._calculate_cost(final.usage, final.model),
+                finish_reason=final.stop_reason
+            )
+        )
+
+    async def submit_batch(self, requests: Mapping[str, CompletionsRequest]) -> str:
+        """
+        提交Message Batches任务
+
+        参数:
+            requests: custom_id 到请求的映射
+
+        返回:
+            str: Anthropic批处理任务ID
+        """
+        batch = await self.client.messages.batches.create(
+            requests=[
+                {"custom_id": custom_id, "params": self._message_params(request)}
+                for custom_id, request in requests.items()
+            ]
+        )
+        return batch.id
+
+    async def batch_status(self, batch_id: str) -> BatchStatus:
+        """查询批处理任务状态（ended 表示全部请求已有结果，单个请求的失败在结果中体现）"""
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status == "ended":
+            return BatchStatus.COMPLETED
+        if batch.processing_status == "canceling":
+            return BatchStatus.CANCELLED
+        return BatchStatus.IN_PROGRESS
+
+    async def batch_results(self, batch_id: str) -> dict[str, LLMResponse]:
+        """
+        获取批处理结果
+
+        返回:
+            dict[str, LLMResponse]: custom_id 到响应的映射，仅包含成功的请求
+        """
+        results: dict[str, LLMResponse] = {}
+        async for entry in await self.client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                continue
+            message = entry.result.message
+            results[entry.custom_id] = LLMResponse(
+                id=None,
+                content="".join(block.text for block in message.content if block.type == "text"),
+                provider=self.provider.id,
+                model=message.model,
+                usage=self._usage(message.usage),
+                cost=self._calculate_cost(message.usage, message.model) * BATCH_COST_FACTOR,
+                finish_reason=message.stop_reason
+            )
+        return results
+
+    def _message_params(self, request: CompletionsRequest) -> dict[str, Any]:
+        """
+        构建Messages API请求参数
+
+        无系统提示词时不传system字段（批处理参数需可JSON序列化，不能包含NOT_GIVEN）。
+        """
+        system, messages = self._build_messages(request)
+        params: dict[str, Any] = {
+            "model": request.model or "claude-3-5-sonnet-20241022",
+            "messages": messages,
+            "max_tokens": request.max_tokens or 4000,
+            "temperature": request.temperature
+        }
+        if not isinstance(system, NotGiven):
+            params["system"] = system
+        return params
+
+    def _build_messages(self, request: CompletionsRequest) -> tuple[str | list[TextBlockParam] | NotGiven, list[MessageParam]]:
+        """
+        构建Anthropic消息列表
+
+        Anthropic的系统提示词通过独立参数传入，不能出现在messages中。
+        启用提示词缓存时，系统提示词以文本块列表传入，并在稳定前缀的
+        最后一块上标记 cache_control。
+
+        参数:
+            request: LLM请求
+
+        返回:
+            tuple: (系统提示词, 消息列表)
+        """
+        breakpoint_index = self._cache_breakpoint(request)
+        system_blocks: list[TextBlockParam] = []
+        messages: list[MessageParam] = []
+        for index, message in enumerate(request.messages):
+            if message.role == "system":
+                block: TextBlockParam = {"type": "text", "text": str(message.content)}
+                if index == breakpoint_index:
+                    block["cache_control"] = {"type": "ephemeral"}
+                system_blocks.append(block)
+                continue
+            messages.append({
+                "role": message.role,
+                "content": self._format_message_content(message.content) if message.content else ""
+            })
+
+        if not system_blocks:
+            return NOT_GIVEN, messages
+        if breakpoint_index is None:
+            return "\n\n".join(block["text"] for block in system_blocks), messages
+        return system_blocks, messages
+
+    def _usage(self, usage) -> TokenUsage:
+        """
+        转换令牌用量
+
+        Anthropic的input_tokens不含缓存读写部分，这里统一折算为输入总数。
+        """
+        cached = getattr(usage, "cache_read_input_tokens", None) or 0
+        written = getattr(usage, "cache_creation_input_tokens", None) or 0
+        return TokenUsage(
+            input_tokens=usage.input_tokens + cached + written,
+            output_tokens=usage.output_tokens,
+            cached_tokens=cached,
+            cache_write_tokens=written,
+        )
+
     def _calculate_cost(self, usage, model: str) -> float:
         """
         计算Anthropic请求成本
@@ -110,5 +257,8 @@ class AnthropicProvider(BaseProvider):
             "claude-3-5-haiku-20241022": {"input": 0.00025, "output": 0.00125},
         }
         model_cost = costs.get(model, costs["claude-3-5-sonnet-20241022"])
-        return (usage.input_tokens * model_cost["input"] / 1000 +
+        # 缓存读取按输入价格的10%计费，缓存写入按125%计费
+        cached = getattr(usage, "cache_read_input_tokens", None) or 0
+        written = getattr(usage, "cache_creation_input_tokens", None) or 0
+        return ((usage.input_tokens + cached * 0.1 + written * 1.25) * model_cost["input"] / 1000 +
                 usage.output_tokens * model_cost["output"] / 1000)
@@ -6,13 +6,24 @@ LLM供应商基类
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Mapping
 
-from infra.runtimes.entities import CompletionsRequest, LLMResponse, Provider
+from config import mas_config
+from infra.runtimes.entities import BatchStatus, CompletionsRequest, LLMResponse, LLMStreamChunk, Provider
 from libs.types import InputContentParams
 
+# 批处理接口按同步价格的50%计费
+BATCH_COST_FACTOR = 0.5
+
+
 class BaseProvider(ABC):
     """LLM供应商抽象基类"""
 
+    # 供应商能力，路由时用于筛选可替代的供应商
+    supports_tools: bool = False
+    supports_structured: bool = False
+    supports_batch: bool = False
+
     def __init__(self, provider: Provider):
         """
         初始化供应商
@@ -35,6 +46,46 @@ class BaseProvider(ABC):
         """
         pass
 
+    async def stream(self, request: CompletionsRequest) -> AsyncIterator[LLMStreamChunk]:
+        """
+        发送流式聊天请求
+
+        默认不支持，供应商按需覆盖。最后一个片段须携带聚合后的完整响应。
+
+        参数:
+            request: LLM请求
+
+        返回:
+            AsyncIterator[LLMStreamChunk]: 响应片段
+        """
+        raise NotImplementedError(f"供应商 {self.provider.id} 不支持流式输出")
+        yield
+
+    async def submit_batch(self, requests: Mapping[str, CompletionsRequest]) -> str:
+        """
+        提交离线批处理任务
+
+        参数:
+            requests: custom_id 到请求的映射（同一模型，不含工具与结构化输出）
+
+        返回:
+            str: 供应商侧批处理任务ID
+        """
+        raise NotImplementedError(f"供应商 {self.provider.id} 不支持批处理")
+
+    async def batch_status(self, batch_id: str) -> BatchStatus:
+        """查询批处理任务状态"""
+        raise NotImplementedError(f"供应商 {self.provider.id} 不支持批处理")
+
+    async def batch_results(self, batch_id: str) -> dict[str, LLMResponse]:
+        """
+        获取批处理结果
+
+        返回:
+            dict[str, LLMResponse]: custom_id 到响应的映射，仅包含成功的请求
+        """
+        raise NotImplementedError(f"供应商 {self.provider.id} 不支持批处理")
+
     @abstractmethod
     def _format_message_content(self, content: InputContentParams):
         """
@@ -47,3 +98,23 @@ class BaseProvider(ABC):
             任意类型: 供应商所需的content格式表示
         """
         pass
+
+    def _cache_breakpoint(self, request: CompletionsRequest) -> int | None:
+        """
+        获取提示词缓存断点
+
+        请求的前 prompt_cache_prefix 条消息为稳定前缀，断点落在前缀的最后一条消息上；
+        仅支持system消息作为断点，未启用或前缀不合法时返回None。
+
+        参数:
+            request: LLM请求
+
+        返回:
+            int | None: 断点消息下标
+        """
+        prefix = request.prompt_cache_prefix
+        if not prefix or not mas_config.LLM_PROMPT_CACHE_ENABLED or prefix > len(request.messages):
+            return None
+        if any(message.role != "system" for message in request.messages[:prefix]):
+            return None
+        return prefix - 1
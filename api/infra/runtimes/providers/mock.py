@@ -0,0 +1,271 @@
+"""
+Mock供应商实现
+
+不发起网络请求，按请求返回符合约束的模拟输出，用于离线运行完整工作流、压测与性能分析：
+- 结构化输出：按 output_model 的JSON Schema生成合法实例（意向、情感分析等）
+- 工具调用：按工具参数Schema生成调用，收到工具结果后返回文本
+- 文本回复：按模板生成
+
+同一请求（消息、模型、工具、输出模型相同）的输出在同一种子下固定；
+延迟与错误按配置的分布从供应商级随机序列中抽样，同一种子下序列可复现。
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+import hashlib
+import json
+import math
+import random
+from typing import Any, Optional
+
+from config import mas_config
+from infra.runtimes.entities import (
+    CompletionsRequest,
+    LLMResponse,
+    LLMStreamChunk,
+    Provider,
+    TokenUsage,
+    ToolCallData,
+    ToolCallDelta
+)
+from .base import BaseProvider
+
+# 标准正态分布的95分位数，用于由p50/p95换算对数正态分布参数
+Z_95 = 1.6449
+# 流式输出每个片段的字符数
+STREAM_CHUNK_CHARS = 8
+# 首个片段到达时间占总延迟的比例
+STREAM_TTFT_RATIO = 0.3
+
+
+class MockProviderError(Exception):
+    """模拟的供应商错误（携带status_code，按真实故障参与重试与熔断）"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"模拟供应商错误: HTTP {status_code}")
+        self.status_code = status_code
+
+
+def sample_latency(rng: random.Random, distribution: str, p50: float, p95: float) -> float:
+    """
+    按分布抽样延迟
+
+    参数:
+        rng: 随机数生成器
+        distribution: fixed（固定为p50）/ uniform（0至2倍p50均匀分布）/ lognormal（按p50、p95拟合）
+        p50: 中位延迟（秒）
+        p95: 95分位延迟（秒）
+
+    返回:
+        float: 延迟（秒）
+    """
+    if p50 <= 0:
+        return 0.0
+    if distribution == "fixed":
+        return p50
+    if distribution == "uniform":
+        return rng.uniform(0, 2 * p50)
+    sigma = math.log(max(p95, p50) / p50) / Z_95
+    return rng.lognormvariate(math.log(p50), sigma)
+
+
+def sample_schema(schema: dict[str, Any], rng: random.Random, defs: Optional[dict[str, Any]] = None) -> Any:
+    """
+    按JSON Schema生成示例值
+
+    对象生成全部属性；数值取0-1之间（项目中的分数与置信度均为该范围）；
+    可空字段优先生成非空值。
+    """
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return sample_schema(defs[schema["$ref"].rsplit("/", 1)[-1]], rng, defs)
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    if "const" in schema:
+        return schema["const"]
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return sample_schema(options[0], rng, defs)
+
+    match schema.get("type"):
+        case "object":
+            return {
+                name: sample_schema(prop, rng, defs)
+                for name, prop in schema.get("properties", {}).items()
+            }
+        case "array":
+            return [sample_schema(schema.get("items", {"type": "string"}), rng, defs) for _ in range(rng.randint(0, 2))]
+        case "number":
+            return round(rng.random(), 2)
+        case "integer":
+            return rng.randint(0, 10)
+        case "boolean":
+            return rng.random() < 0.5
+        case "null":
+            return None
+        case _:
+            return "mock"
+
+
+class MockProvider(BaseProvider):
+    """Mock供应商实现类"""
+
+    supports_tools = True
+    supports_structured = True
+
+    def __init__(self, provider: Provider):
+        """
+        初始化Mock供应商
+
+        参数:
+            provider: 供应商配置
+        """
+        super().__init__(provider)
+        self.seed = mas_config.LLM_MOCK_SEED
+        # 延迟与错误的随机序列按供应商独立，同一种子下可复现
+        self._rng = random.Random(f"{self.seed}:{provider.id}")
+
+    def _format_message_content(self, content) -> str:
+        """多模态内容只保留文本部分"""
+        if isinstance(content, str):
+            return content
+        return " ".join(item.content for item in content if item.type == "text")
+
+    def _request_rng(self, request: CompletionsRequest) -> random.Random:
+        """按请求内容派生的随机数生成器，保证相同请求输出一致"""
+        payload = json.dumps({
+            "model": request.model,
+            "messages": [
+                [message.role, self._format_message_content(message.content) if message.content else ""]
+                for message in request.messages
+            ],
+            "tools": [tool["function"]["name"] for tool in request.tools or []],
+            "output_model": request.output_model.__name__ if request.output_model else None,
+        }, ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha256(f"{self.seed}:{payload}".encode()).hexdigest()
+        return random.Random(digest)
+
+    def _last_input(self, request: CompletionsRequest) -> str:
+        """最后一条用户消息的文本"""
+        for message in reversed(request.messages):
+            if message.role == "user" and message.content:
+                return self._format_message_content(message.content)
+        return ""
+
+    async def _simulate(self) -> float:
+        """抽样本次调用的延迟并按错误率注入故障；返回延迟（秒），不在此处等待"""
+        latency = sample_latency(
+            self._rng,
+            mas_config.LLM_MOCK_LATENCY_DISTRIBUTION,
+            mas_config.LLM_MOCK_LATENCY_P50_MS / 1000,
+            mas_config.LLM_MOCK_LATENCY_P95_MS / 1000,
+        )
+        if self._rng.random() < mas_config.LLM_MOCK_ERROR_RATE:
+            # 故障在部分延迟后到达，模拟真实的超时与服务端错误
+            await asyncio.sleep(latency * self._rng.random())
+            raise MockProviderError(self._rng.choice([429, 500, 503]))
+        return latency
+
+    def _generate(self, request: CompletionsRequest) -> tuple[Any, Optional[list[ToolCallData]], str]:
+        """
+        生成模拟输出
+
+        返回:
+            tuple: (内容, 工具调用, 结束原因)
+        """
+        rng = self._request_rng(request)
+
+        if request.output_model:
+            schema = request.output_model.model_json_schema()
+            return request.output_model.model_validate(sample_schema(schema, rng)), None, "stop"
+
+        # 上一条消息为工具结果时直接回复文本，避免无限工具循环
+        awaiting_tool = bool(request.messages) and request.messages[-1].role == "tool"
+        if request.tools and request.tool_choice != "none" and not awaiting_tool:
+            if request.tool_choice == "required" or rng.random() < mas_config.LLM_MOCK_TOOL_CALL_RATE:
+                function = rng.choice(request.tools)["function"]
+                parameters = function.get("parameters") or {}
+                required = set(parameters.get("required", []))
+                arguments = {
+                    name: sample_schema(prop, rng)
+                    for name, prop in parameters.get("properties", {}).items()
+                    if name in required
+                }
+                tool_call = ToolCallData(id=f"call_mock_{rng.getrandbits(32):08x}", name=function["name"], arguments=arguments)
+                return None, [tool_call], "tool_calls"
+
+        content = mas_config.LLM_MOCK_REPLY_TEMPLATE.format(input=self._last_input(request)[:50])
+        return content, None, "stop"
+
+    def _response(self, request: CompletionsRequest, content: Any, tool_calls, finish_reason: str) -> LLMResponse:
+        prompt = "".join(
+            self._format_message_content(message.content) for message in request.messages if message.content
+        )
+        output = content.model_dump_json() if hasattr(content, "model_dump_json") else (content or "")
+        return LLMResponse(
+            id=request.id,
+            content=content,
+            provider=request.provider,
+            model=request.model,
+            usage=TokenUsage(input_tokens=len(prompt) // 4 + 1, output_tokens=len(output) // 4 + 1),
+            tool_calls=tool_calls,
+            finish_reason=finish_reason
+        )
+
+    async def completions(self, request: CompletionsRequest) -> LLMResponse:
+        """
+        返回模拟的聊天响应
+
+        参数:
+            request: LLM请求
+
+        返回:
+            LLMResponse: 模拟响应
+        """
+        latency = await self._simulate()
+        content, tool_calls, finish_reason = self._generate(request)
+        await asyncio.sleep(latency)
+        return self._response(request, content, tool_calls, finish_reason)
+
+    async def completions_structured(self, request: CompletionsRequest) -> LLMResponse:
+        """返回符合 output_model 的模拟结构化响应"""
+        return await self.completions(request)
+
+    async def stream(self, request: CompletionsRequest) -> AsyncIterator[LLMStreamChunk]:
+        """
+        返回模拟的流式响应
+
+        首个片段在总延迟的30%时到达，其余片段均匀分布在剩余时间内。
+
+        参数:
+            request: LLM请求
+
+        返回:
+            AsyncIterator[LLMStreamChunk]: 响应片段，最后一个片段携带完整响应
+        """
+        latency = await self._simulate()
+        content, tool_calls, finish_reason = self._generate(request)
+
+        await asyncio.sleep(latency * STREAM_TTFT_RATIO)
+        if tool_calls:
+            for index, tool_call in enumerate(tool_calls):
+                yield LLMStreamChunk(id=request.id, tool_calls=[ToolCallDelta(
+                    index=index,
+                    id=tool_call.id,
+                    name=tool_call.name,
+                    arguments=json.dumps(tool_call.arguments, ensure_ascii=False)
+                )])
+        else:
+            parts = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+            interval = latency * (1 - STREAM_TTFT_RATIO) / max(len(parts), 1)
+            for index, part in enumerate(parts):
+                if index:
+                    await asyncio.sleep(interval)
+                yield LLMStreamChunk(id=request.id, content=part)
+
+        yield LLMStreamChunk(
+            id=request.id,
+            finish_reason=finish_reason,
+            response=self._response(request, content, tool_calls, finish_reason)
+        )
@@ -4,42 +4,65 @@ OpenAI供应商实现
 提供OpenAI GPT系列模型的调用功能，支持函数调用（Function Calling）。
 """
 
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Mapping, Sequence
 import json
 
+import httpx
 import openai
-from openai.types.chat import ChatCompletionMessageParam, ChatCompletionContentPartParam
+from openai.types.chat import ChatCompletion, ChatCompletionMessageParam, ChatCompletionContentPartParam
 from pydantic import ValidationError
 
-from utils import get_component_logger
+from utils import extract_json_object, get_component_logger
 from ..entities import (
+    BatchStatus,
     LLMResponse,
+    LLMStreamChunk,
     Provider,
     CompletionsRequest,
     ResponseMessageRequest,
     ToolCallData,
+    ToolCallDelta,
     TokenUsage
 )
-from .base import BaseProvider
+from .base import BATCH_COST_FACTOR, BaseProvider
 
 logger = get_component_logger(__name__, "OpenAIProvider")
 
+# 仅OpenAI官方接口提供Batch API，OpenRouter等兼容接口没有
+BATCH_API_HOST = "api.openai.com"
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+_BATCH_STATUS = {
+    "completed": BatchStatus.COMPLETED,
+    "failed": BatchStatus.FAILED,
+    "expired": BatchStatus.EXPIRED,
+    "cancelling": BatchStatus.CANCELLED,
+    "cancelled": BatchStatus.CANCELLED,
+}
+
 
 class OpenAIProvider(BaseProvider):
     """OpenAI供应商实现类"""
 
-    def __init__(self, provider: Provider):
+    supports_tools = True
+    supports_structured = True
+
+    def __init__(self, provider: Provider, http_client: httpx.AsyncClient | None = None):
         """
         初始化OpenAI供应商
 
         参数:
             provider: OpenAI配置
+            http_client: 共享的HTTP连接池，为空时由SDK自行创建
         """
         super().__init__(provider)
         self.client = openai.AsyncOpenAI(
             api_key=provider.api_key,
-            base_url=provider.base_url
+            base_url=provider.base_url,
+            http_client=http_client,
+            max_retries=0  # 重试由LLMClient按截止时间统一控制
         )
+        self.supports_batch = BATCH_API_HOST in (provider.base_url or "")
 
     def _format_message_content(self, content) -> Sequence:
         """
@@ -66,6 +89,49 @@ class OpenAIProvider(BaseProvider):
                 })
         return formatted
 
+    def _build_messages(self, request: CompletionsRequest) -> list[ChatCompletionMessageParam]:
+        """
+        构建包含历史记录的对话上下文并处理多模态内容
+
+        参数:
+            request: LLM请求
+
+        返回:
+            list[ChatCompletionMessageParam]: OpenAI消息列表
+        """
+        # OpenAI按最长公共前缀自动缓存，无需标记；经OpenRouter调用Claude时需显式标记断点
+        breakpoint_index = None
+        if request.model.startswith("anthropic/"):
+            breakpoint_index = self._cache_breakpoint(request)
+
+        messages: list[ChatCompletionMessageParam] = []
+        for index, m in enumerate(request.messages):
+            if m.role in ("user", "assistant"):
+                msg = {
+                    "role": m.role,
+                    "content": self._format_message_content(m.content) if m.content else None
+                }
+                if getattr(m, "tool_calls", None):
+                    msg["tool_calls"] = m.tool_calls
+                messages.append(msg)
+            elif index == breakpoint_index:
+                messages.append({
+                    "role": m.role,
+                    "content": [{"type": "text", "text": str(m.content), "cache_control": {"type": "ephemeral"}}]
+                })
+            else:
+                messages.append(m.model_dump())
+        return messages
+
+    def _usage(self, usage) -> TokenUsage:
+        """转换Chat Completions令牌用量（prompt_tokens已包含缓存命中部分）"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        return TokenUsage(
+            input_tokens=usage.prompt_tokens,
+            output_tokens=usage.completion_tokens,
+            cached_tokens=(getattr(details, "cached_tokens", None) or 0) if details else 0,
+        )
+
     def _parse_tool_calls(self, message) -> list[ToolCallData] | None:
         """
         解析 OpenAI 响应中的工具调用
@@ -106,18 +172,7 @@ class OpenAIProvider(BaseProvider):
             LLMResponse: OpenAI响应
         """
         # 构建包含历史记录的对话上下文并处理多模态内容
-        messages: list[ChatCompletionMessageParam] = []
-        for m in request.messages:
-            if m.role in ("user", "assistant"):
-                msg = {
-                    "role": m.role,
-                    "content": self._format_message_content(m.content) if m.content else None
-                }
-                if getattr(m, "tool_calls", None):
-                    msg["tool_calls"] = m.tool_calls
-                messages.append(msg)
-            else:
-                messages.append(m.model_dump())
+        messages = self._build_messages(request)
 
         response = await self.client.chat.completions.create(
             model=request.model or "gpt-4o-mini",
@@ -136,10 +191,7 @@ class OpenAIProvider(BaseProvider):
             content=message.content,
             provider=request.provider,
             model=response.model,
-            usage=TokenUsage(
-                input_tokens=response.usage.prompt_tokens,
-                output_tokens=response.usage.completion_tokens,
-            ),
+            usage=self._usage(response.usage),
             cost=self._calculate_cost(response.usage, response.model),
             tool_calls=tool_calls,
             finish_reason=response.choices[0].finish_reason
@@ -147,6 +199,103 @@ class OpenAIProvider(BaseProvider):
 
         return llm_response
 
+    async def stream(self, request: CompletionsRequest) -> AsyncIterator[LLMStreamChunk]:
+        """
+        发送流式聊天请求到OpenAI
+
+        文本与工具调用参数按增量返回，最后一个片段携带聚合后的完整响应。
+
+        参数:
+            request: LLM请求
+
+        返回:
+            AsyncIterator[LLMStreamChunk]: 响应片段
+        """
+        messages = self._build_messages(request)
+
+        stream = await self.client.chat.completions.create(
+            model=request.model or "gpt-4o-mini",
+            messages=messages,
+            temperature=request.temperature,
+            max_completion_tokens=request.max_tokens,
+            tools=request.tools,
+            tool_choice=request.tool_choice,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        content_parts: list[str] = []
+        tool_call_parts: dict[int, ToolCallDelta] = {}
+        finish_reason = None
+        model = request.model
+        usage = None
+
+        # 调用方提前关闭（如客户端断开）时关闭上游响应，连接归还连接池
+        async with stream:
+            async for chunk in stream:
+                model = chunk.model or model
+                if chunk.usage:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+
+                choice = chunk.choices[0]
+                delta = choice.delta
+                finish_reason = choice.finish_reason or finish_reason
+
+                tool_deltas = None
+                if delta.tool_calls:
+                    tool_deltas = []
+                    for tc in delta.tool_calls:
+                        tool_delta = ToolCallDelta(
+                            index=tc.index,
+                            id=tc.id,
+                            name=tc.function.name if tc.function else None,
+                            arguments=(tc.function.arguments or "") if tc.function else ""
+                        )
+                        tool_deltas.append(tool_delta)
+
+                        # 按index聚合同一工具调用的参数片段
+                        merged = tool_call_parts.setdefault(tc.index, ToolCallDelta(index=tc.index))
+                        merged.id = merged.id or tool_delta.id
+                        merged.name = merged.name or tool_delta.name
+                        merged.arguments += tool_delta.arguments
+
+                if delta.content:
+                    content_parts.append(delta.content)
+
+                if delta.content or tool_deltas:
+                    yield LLMStreamChunk(
+                        id=request.id,
+                        content=delta.content or "",
+                        tool_calls=tool_deltas,
+                        finish_reason=choice.finish_reason
+                    )
+
+        tool_calls = []
+        for merged in sorted(tool_call_parts.values(), key=lambda t: t.index):
+            try:
+                arguments = json.loads(merged.arguments) if merged.arguments else {}
+            except json.JSONDecodeError:
+                logger.warning(f"工具调用参数解析失败: {merged.arguments}")
+                arguments = {}
+            tool_calls.append(ToolCallData(id=merged.id, name=merged.name, arguments=arguments))
+
+        yield LLMStreamChunk(
+            id=request.id,
+            finish_reason=finish_reason,
+            response=LLMResponse(
+                id=request.id,
+                content="".join(content_parts) or None,
+                provider=request.provider,
+                model=model,
+                usage=self._usage(usage) if usage else TokenUsage(input_tokens=0, output_tokens=0),
+                cost=self._calculate_cost(usage, model) if usage else 0.0,
+                tool_calls=tool_calls or None,
+                finish_reason=finish_reason
+            )
+        )
+
     async def completions_structured(self, request: CompletionsRequest) -> LLMResponse:
         """
         发送结构化聊天请求到OpenAI或OpenRouter
@@ -158,18 +307,7 @@ class OpenAIProvider(BaseProvider):
             LLMResponse: OpenAI响应
         """
         # 构建包含历史记录的对话上下文并处理多模态内容
-        messages: list[ChatCompletionMessageParam] = []
-        for m in request.messages:
-            if m.role in ("user", "assistant"):
-                msg = {
-                    "role": m.role,
-                    "content": self._format_message_content(m.content) if m.content else None
-                }
-                if getattr(m, "tool_calls", None):
-                    msg["tool_calls"] = m.tool_calls
-                messages.append(msg)
-            else:
-                messages.append(m.model_dump())
+        messages = self._build_messages(request)
 
         # 为OpenRouter使用JSON schema格式，为原生OpenAI使用.parse()
         if request.provider == "openrouter" and not request.model.startswith("openai/"):
@@ -179,7 +317,12 @@ class OpenAIProvider(BaseProvider):
 
             # 在最后一条用户消息后添加JSON格式指令
             if messages and messages[-1]["role"] == "user":
-                messages[-1]["content"] += f"\n\n请严格按照以下JSON schema格式返回结果，只返回JSON对象，不要包含任何其他文字、解释或markdown格式：\n\n{json_schema_str}\n\n只返回符合schema的纯JSON对象。"
+                instruction = f"\n\n请严格按照以下JSON schema格式返回结果，只返回JSON对象，不要包含任何其他文字、解释或markdown格式：\n\n{json_schema_str}\n\n只返回符合schema的纯JSON对象。"
+                if isinstance(messages[-1]["content"], str):
+                    messages[-1]["content"] += instruction
+                else:
+                    # 多模态消息追加一个文本片段
+                    messages[-1]["content"] = [*messages[-1]["content"], {"type": "text", "text": instruction.strip()}]
 
             response = await self.client.chat.completions.create(
                 extra_body={"provider": {'require_parameters': True}},
@@ -193,20 +336,20 @@ class OpenAIProvider(BaseProvider):
                 }
             )
 
-            # 解析JSON响应
-            content_str = response.choices[0].message.content.strip()
+            # 解析JSON响应（容忍代码块包裹或前后说明文字）
+            content_str = (response.choices[0].message.content or "").strip()
+            parsed_data = extract_json_object(content_str)
+            if parsed_data is None:
+                logger.error(f"JSON解析失败。内容长度: {len(content_str)}, 前200字符: {content_str[:200]}")
+                raise ValueError(f"LLM返回的不是有效的JSON. 内容: {content_str[:200]}")
 
+            # json_object 模式不保证字段齐全：校验失败时返回原始字典，由调用方补齐默认值
             try:
-                # 解析JSON并验证
-                parsed_data = json.loads(content_str)
                 parsed_content = request.output_model.model_validate(parsed_data)
                 logger.info(f"成功解析OpenRouter响应为 {request.output_model.__name__}")
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON解析失败。内容长度: {len(content_str)}, 前200字符: {content_str[:200]}")
-                raise ValueError(f"LLM返回的不是有效的JSON: {e}. 内容: {content_str[:200]}")
             except ValidationError as e:
-                logger.error(f"Pydantic验证失败。解析后的数据: {parsed_data}")
-                raise ValueError(f"LLM返回的JSON不符合预期格式: {e}")
+                logger.warning(f"响应不完全符合 {request.output_model.__name__}，返回原始JSON: {e.error_count()} 处校验错误")
+                parsed_content = parsed_data
         else:
             # 原生OpenAI方式：使用.parse()
             response = await self.client.chat.completions.parse(
@@ -225,10 +368,7 @@ class OpenAIProvider(BaseProvider):
             content=parsed_content,
             provider=request.provider,
             model=response.model,
-            usage=TokenUsage(
-                input_tokens=response.usage.prompt_tokens,
-                output_tokens=response.usage.completion_tokens
-            ),
+            usage=self._usage(response.usage),
             cost=self._calculate_cost(response.usage, response.model)
         )
 
@@ -255,6 +395,7 @@ class OpenAIProvider(BaseProvider):
             usage=TokenUsage(
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
+                cached_tokens=response.usage.input_tokens_details.cached_tokens,
             ),
             # cost=self._calculate_cost(response.usage, response.model)
         )
@@ -294,6 +435,7 @@ class OpenAIProvider(BaseProvider):
             usage=TokenUsage(
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
+                cached_tokens=response.usage.input_tokens_details.cached_tokens,
             ),
             # cost=self._calculate_cost(response.usage, response.model)
         )
@@ -301,6 +443,84 @@ class OpenAIProvider(BaseProvider):
         return llm_response
 
 
+    async def submit_batch(self, requests: Mapping[str, CompletionsRequest]) -> str:
+        """
+        提交Batch API任务
+
+        请求以JSONL文件上传后创建批处理，24小时内完成。
+
+        参数:
+            requests: custom_id 到请求的映射
+
+        返回:
+            str: OpenAI批处理任务ID
+        """
+        lines = []
+        for custom_id, request in requests.items():
+            body = {
+                "model": request.model or "gpt-4o-mini",
+                "messages": self._build_messages(request),
+                "temperature": request.temperature,
+            }
+            if request.max_tokens:
+                body["max_completion_tokens"] = request.max_tokens
+            lines.append(json.dumps(
+                {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+                ensure_ascii=False,
+                default=lambda value: value.model_dump()  # 历史消息中的工具调用为pydantic模型
+            ))
+
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        return batch.id
+
+    async def batch_status(self, batch_id: str) -> BatchStatus:
+        """查询批处理任务状态（validating / in_progress / finalizing 均视为处理中）"""
+        batch = await self.client.batches.retrieve(batch_id)
+        return _BATCH_STATUS.get(batch.status, BatchStatus.IN_PROGRESS)
+
+    async def batch_results(self, batch_id: str) -> dict[str, LLMResponse]:
+        """
+        获取批处理结果
+
+        过期的任务也会输出已完成部分的结果。
+
+        返回:
+            dict[str, LLMResponse]: custom_id 到响应的映射，仅包含成功的请求
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+
+        output = await self.client.files.content(batch.output_file_id)
+        results: dict[str, LLMResponse] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+
+            completion = ChatCompletion.model_validate(response["body"])
+            results[entry["custom_id"]] = LLMResponse(
+                id=None,
+                content=completion.choices[0].message.content,
+                provider=self.provider.id,
+                model=completion.model,
+                usage=self._usage(completion.usage),
+                cost=self._calculate_cost(completion.usage, completion.model) * BATCH_COST_FACTOR,
+                finish_reason=completion.choices[0].finish_reason
+            )
+        return results
+
     def _calculate_cost(self, usage, model: str) -> float:
         """
         计算OpenAI请求成本
@@ -318,5 +538,7 @@ class OpenAIProvider(BaseProvider):
             "gpt-4o-mini": {"input": 0.00015, "output": 0.0006},
         }
         model_cost = costs.get(model, costs["gpt-4o-mini"])
-        return (usage.prompt_tokens * model_cost["input"] / 1000 +
+        # 命中提示词缓存的输入按半价计费
+        cached = self._usage(usage).cached_tokens
+        return ((usage.prompt_tokens - cached * 0.5) * model_cost["input"] / 1000 +
                 usage.completion_tokens * model_cost["output"] / 1000)
@@ -0,0 +1,133 @@
+"""
+LLM供应商注册表
+
+进程内唯一的供应商实例集合。同一接口地址（base URL）的供应商共享一个 httpx 连接池
+（keep-alive，可用时启用 HTTP/2），所有 LLMClient 实例复用这些连接，
+避免重复的 TLS 握手和空闲连接堆积。
+"""
+
+import asyncio
+from importlib.util import find_spec
+from typing import Optional
+
+import httpx
+
+from config import mas_config
+from utils import get_component_logger
+from .entities import Provider, ProviderType
+from .providers import AnthropicProvider, BaseProvider, MockProvider, OpenAIProvider
+
+logger = get_component_logger(__name__, "ProviderRegistry")
+
+
+class ProviderRegistry:
+    """进程级LLM供应商注册表"""
+
+    def __init__(self):
+        self._providers: dict[str, BaseProvider] = {}
+        self._http_clients: dict[str, httpx.AsyncClient] = {}  # 接口地址 -> 共享连接池
+
+    def get_providers(self, providers: list[Provider]) -> dict[str, BaseProvider]:
+        """
+        获取已启用的供应商实例，首次调用时创建
+
+        参数:
+            providers: 供应商配置列表
+
+        返回:
+            dict[str, BaseProvider]: 供应商ID到实例的映射（所有调用方共享）
+        """
+        for provider in providers:
+            if provider.enabled and provider.id not in self._providers:
+                instance = self._create_provider(provider)
+                if instance is not None:
+                    self._providers[provider.id] = instance
+        return self._providers
+
+    def _create_provider(self, provider: Provider) -> Optional[BaseProvider]:
+        """根据供应商类型创建实例"""
+        if provider.type == ProviderType.OPENAI:
+            return OpenAIProvider(provider, http_client=self._get_http_client(provider))
+        elif provider.type == ProviderType.ANTHROPIC:
+            return AnthropicProvider(provider, http_client=self._get_http_client(provider))
+        elif provider.type == ProviderType.GEMINI:
+            return None
+        elif provider.type == ProviderType.MOCK:
+            return MockProvider(provider)
+        else:
+            raise Exception(f"不支持的供应商类型: {provider.type}")
+
+    @staticmethod
+    def _client_key(provider: Provider) -> str:
+        """连接池键：接口地址，未配置时为供应商类型的SDK默认地址"""
+        if provider.base_url:
+            return provider.base_url.rstrip("/")
+        return f"{provider.type}:default"
+
+    def _get_http_client(self, provider: Provider) -> httpx.AsyncClient:
+        """
+        获取供应商接口地址的共享连接池
+
+        同一地址的多个供应商配置（如不同密钥或模型分组）共用连接，
+        连接数上限取首个创建该连接池的供应商配置。
+        """
+        key = self._client_key(provider)
+        if key not in self._http_clients:
+            http2 = mas_config.LLM_HTTP2_ENABLED and find_spec("h2") is not None
+            max_connections = provider.max_connections or mas_config.LLM_MAX_CONNECTIONS
+
+            self._http_clients[key] = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=min(mas_config.LLM_MAX_KEEPALIVE_CONNECTIONS, max_connections),
+                    keepalive_expiry=mas_config.LLM_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(
+                    mas_config.LLM_REQUEST_TIMEOUT,
+                    connect=mas_config.LLM_CONNECT_TIMEOUT,
+                ),
+                follow_redirects=True,
+            )
+            logger.info(
+                f"连接池已创建: {key} (供应商 {provider.id}), http2={http2}, max_connections={max_connections}"
+            )
+        return self._http_clients[key]
+
+    async def warmup(self, providers: list[Provider]):
+        """
+        预先与各供应商建立连接
+
+        连接建立后进入keep-alive池，首个真实请求无需再承担DNS与TLS握手。
+        预热失败不影响服务，仅记录日志。
+        """
+        self.get_providers(providers)
+
+        async def _open(base_url: str):
+            try:
+                await self._http_clients[base_url].head(base_url)
+            except httpx.HTTPError as e:
+                logger.debug(f"{base_url} 连接预热失败: {e}")
+
+        base_urls = {
+            self._client_key(provider)
+            for provider in providers
+            if provider.base_url and self._client_key(provider) in self._http_clients
+        }
+        await asyncio.gather(*[_open(base_url) for base_url in base_urls])
+        logger.info(f"LLM供应商连接预热完成: {sorted(base_urls)}")
+
+    async def aclose(self):
+        """关闭所有共享连接池（每个连接池一次）"""
+        for key, client in self._http_clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"连接池 {key} 关闭失败: {e}")
+        self._http_clients.clear()
+        self._providers.clear()
+        logger.info("LLM供应商连接池已关闭")
+
+
+# 全局注册表实例
+provider_registry = ProviderRegistry()
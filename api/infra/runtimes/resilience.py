@@ -0,0 +1,284 @@
+"""
+LLM调用容错
+
+- 截止时间：工作流通过 deadline_scope 声明本轮对话的时间预算，
+  其中的所有LLM调用（含重试）共享同一截止时间
+- 熔断器：按供应商统计连续失败，熔断期间请求立即失败并切换等价路由，
+  冷却后放行单个探测请求，成功即恢复
+- 重试：仅对超时、连接错误、429与5xx重试，退避时间带随机抖动，
+  剩余时间不足以完成下一次尝试时直接失败，交由调用方走兜底逻辑
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import random
+import time
+from typing import Any, Optional, TypeVar
+
+from libs.exceptions import (
+    LLMCapacityExceededException,
+    LLMCircuitOpenException,
+    LLMDeadlineExceededException,
+)
+from utils import get_component_logger
+from utils.metrics import metrics
+
+logger = get_component_logger(__name__, "LLMResilience")
+
+T = TypeVar("T")
+
+# 可重试的HTTP状态码（其余4xx为请求本身的问题，重试无意义）
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+# openai / anthropic SDK 中表示网络层故障的异常类名
+RETRYABLE_ERROR_NAMES = frozenset({"APIConnectionError", "APITimeoutError"})
+
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    为当前上下文内的LLM调用设置截止时间
+
+    嵌套使用时取更早的截止时间；seconds为None时不改变当前截止时间。
+
+    使用方式:
+        with deadline_scope(30):
+            await graph.ainvoke(state)
+    """
+    if seconds is None:
+        yield
+        return
+
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def resolve_deadline(timeout: Optional[float] = None) -> Optional[float]:
+    """
+    计算单次请求的截止时间（time.monotonic 时间）
+
+    参数:
+        timeout: 请求自身的时间预算（秒），与上下文截止时间取较早者
+
+    返回:
+        Optional[float]: 截止时间，均未设置时为None
+    """
+    deadline = _deadline.get()
+    if timeout is not None:
+        own = time.monotonic() + timeout
+        deadline = own if deadline is None else min(deadline, own)
+    return deadline
+
+
+def remaining_time(deadline: Optional[float]) -> Optional[float]:
+    """距截止时间的剩余秒数，未设置截止时间时为None"""
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """判断异常是否为可重试的瞬时故障"""
+    if isinstance(error, (LLMCapacityExceededException, LLMCircuitOpenException, LLMDeadlineExceededException)):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS or status_code >= 500
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """判断异常是否应计入供应商熔断统计（本地限流、熔断与截止时间不计入）"""
+    if isinstance(error, (LLMCapacityExceededException, LLMCircuitOpenException, LLMDeadlineExceededException)):
+        return False
+    return is_retryable(error)
+
+
+class CircuitBreaker:
+    """
+    单个供应商的熔断器
+
+    状态:
+        closed: 正常放行，连续失败达到阈值后转为 open
+        open: 拒绝请求，reset_seconds 后转为 half_open
+        half_open: 仅放行一个探测请求，成功转为 closed，失败重新 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """当前是否放行请求；half_open 状态下放行的请求即为探测请求"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"供应商 {self.name} 探测成功，熔断恢复")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"供应商 {self.name} 连续失败 {self.failures} 次，熔断 {self.reset_seconds:.0f}s")
+                metrics.incr("llm_breaker_opened", provider=self.name)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """请求被取消（如对冲落败）时归还探测名额，不影响状态"""
+        self._probing = False
+
+
+class CircuitBreakers:
+    """按供应商维护的熔断器集合"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0, enabled: bool = True):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.enabled = enabled
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(provider, self.failure_threshold, self.reset_seconds)
+        return self._breakers[provider]
+
+    async def call(self, provider: str, model: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        经熔断器调用供应商
+
+        异常:
+            LLMCircuitOpenException: 供应商处于熔断状态
+        """
+        if not self.enabled:
+            return await call()
+
+        breaker = self.get(provider)
+        if not breaker.allow():
+            metrics.incr("llm_breaker_rejections", provider=provider)
+            raise LLMCircuitOpenException(provider, model)
+
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if is_provider_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.release()
+            raise
+        breaker.record_success()
+        return result
+
+    def snapshot(self) -> dict[str, Any]:
+        """导出各供应商熔断状态"""
+        return {
+            provider: {"state": breaker.state, "failures": breaker.failures}
+            for provider, breaker in self._breakers.items()
+        }
+
+
+class RetryPolicy:
+    """带抖动退避、受截止时间约束的重试策略"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0):
+        """
+        初始化重试策略
+
+        参数:
+            max_attempts: 最大尝试次数（含首次）
+            base_delay: 退避基数（秒），第n次重试前最多等待 base_delay * 2^n
+            max_delay: 单次退避上限（秒）
+        """
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次重试前的等待时间（full jitter）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(self, call: Callable[[], Awaitable[T]], deadline: Optional[float] = None, label: str = "") -> T:
+        """
+        在截止时间内执行调用，瞬时故障时重试
+
+        参数:
+            call: 发起一次尝试的协程函数
+            deadline: 截止时间（time.monotonic 时间），None表示不限
+            label: 日志与指标中使用的调用标识
+
+        返回:
+            调用结果
+
+        异常:
+            LLMDeadlineExceededException: 截止时间已到
+            其他异常: 不可重试或重试次数用尽时的最后一个异常
+        """
+        attempt = 0
+        while True:
+            remaining = remaining_time(deadline)
+            if remaining is not None and remaining <= 0:
+                metrics.incr("llm_deadline_exceeded", route=label)
+                raise LLMDeadlineExceededException(label)
+
+            try:
+                async with asyncio.timeout(remaining):
+                    return await call()
+            except TimeoutError as e:
+                if remaining is not None and remaining_time(deadline) <= 0:
+                    metrics.incr("llm_deadline_exceeded", route=label)
+                    raise LLMDeadlineExceededException(label) from e
+                error = e
+            except Exception as e:
+                error = e
+
+            if not is_retryable(error) or attempt + 1 >= self.max_attempts:
+                raise error
+
+            delay = self.backoff(attempt)
+            remaining = remaining_time(deadline)
+            if remaining is not None and delay >= remaining:
+                # 剩余时间不足以完成下一次尝试，立即失败让调用方兜底
+                raise error
+
+            metrics.incr("llm_retries", route=label)
+            logger.info(f"{label} 第{attempt + 1}次调用失败，{delay * 1000:.0f}ms 后重试: {error}")
+            await asyncio.sleep(delay)
+            attempt += 1
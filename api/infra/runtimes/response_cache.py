@@ -0,0 +1,179 @@
+"""
+LLM响应缓存
+
+对低温度的分类/分析类调用按规范化请求哈希缓存完整响应。
+键由供应商、模型、消息、工具与采样参数构成，请求ID等运行时字段不参与。
+缓存为按调用显式启用（request.cache_ttl），并支持单次绕过（request.cache_bypass）。
+"""
+
+from dataclasses import asdict
+import hashlib
+import json
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from config import mas_config
+from infra.cache import get_redis_client
+from utils import get_component_logger
+from utils.metrics import metrics
+from .entities import CompletionsRequest, LLMResponse, TokenUsage, ToolCallData
+
+logger = get_component_logger(__name__, "ResponseCache")
+
+KEY_PREFIX = "llm:resp"
+
+
+def _canonical(value: Any) -> Any:
+    """将消息、模型等转换为可稳定序列化的结构"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def canonical_request(request: CompletionsRequest) -> dict[str, Any]:
+    """
+    请求的规范化表示（请求ID、优先级等运行时字段不参与）
+
+    参数:
+        request: LLM请求
+
+    返回:
+        dict: 可稳定序列化的请求内容
+    """
+    return {
+        "provider": request.provider.lower(),
+        "model": request.model,
+        "messages": _canonical(list(request.messages)),
+        "tools": _canonical(request.tools),
+        "tool_choice": request.tool_choice,
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+        "output_model": (
+            {
+                "name": request.output_model.__name__,
+                "schema": request.output_model.model_json_schema(),
+            }
+            if request.output_model else None
+        ),
+    }
+
+
+def request_hash(payload: dict[str, Any]) -> str:
+    """规范化请求的SHA-256摘要"""
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode()
+    ).hexdigest()
+
+
+def request_cache_key(request: CompletionsRequest) -> str:
+    """
+    计算请求的规范化哈希键
+
+    参数:
+        request: LLM请求
+
+    返回:
+        str: 缓存键
+    """
+    return f"{KEY_PREFIX}:{request_hash(canonical_request(request))}"
+
+
+class ResponseCache:
+    """基于Redis的LLM响应缓存"""
+
+    def __init__(self):
+        self._redis = None
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await get_redis_client()
+        return self._redis
+
+    @staticmethod
+    def enabled_for(request: CompletionsRequest) -> bool:
+        """请求是否启用了缓存"""
+        return bool(mas_config.LLM_RESPONSE_CACHE_ENABLED and request.cache_ttl)
+
+    async def get(self, request: CompletionsRequest) -> Optional[LLMResponse]:
+        """
+        读取缓存的响应
+
+        命中时返回的响应 cache_hit=True，用量与成本为0（未产生上游调用）。
+        """
+        if request.cache_bypass:
+            metrics.incr("llm_cache_requests", model=request.model, result="bypass")
+            return None
+
+        try:
+            redis_client = await self._client()
+            data = await redis_client.get(request_cache_key(request))
+        except Exception as e:
+            logger.warning(f"响应缓存读取失败: {e}")
+            return None
+
+        if not data:
+            metrics.incr("llm_cache_requests", model=request.model, result="miss")
+            return None
+
+        try:
+            cached = json.loads(data)
+            content = cached["content"]
+            if request.output_model and content is not None:
+                content = request.output_model.model_validate(content)
+            response = LLMResponse(
+                id=request.id,
+                content=content,
+                provider=cached["provider"],
+                model=cached["model"],
+                usage=TokenUsage(input_tokens=0, output_tokens=0),
+                cost=0.0,
+                tool_calls=[ToolCallData(**tc) for tc in cached["tool_calls"]] if cached.get("tool_calls") else None,
+                finish_reason=cached.get("finish_reason"),
+                cache_hit=True,
+            )
+        except Exception as e:
+            logger.warning(f"响应缓存数据无效，忽略: {e}")
+            metrics.incr("llm_cache_requests", model=request.model, result="miss")
+            return None
+
+        metrics.incr("llm_cache_requests", model=request.model, result="hit")
+        metrics.incr("llm_cache_saved_tokens", cached.get("input_tokens", 0) + cached.get("output_tokens", 0), model=request.model)
+        return response
+
+    async def set(self, request: CompletionsRequest, response: LLMResponse):
+        """写入响应，截断的回复与未通过结构化校验的原始JSON不缓存"""
+        if response.finish_reason == "length":
+            return
+        if request.output_model and not isinstance(response.content, request.output_model):
+            return
+
+        content = response.content
+        if isinstance(content, BaseModel):
+            content = content.model_dump(mode="json")
+
+        data = {
+            "content": content,
+            "provider": response.provider,
+            "model": response.model,
+            "tool_calls": [asdict(tc) for tc in response.tool_calls] if response.tool_calls else None,
+            "finish_reason": response.finish_reason,
+            "input_tokens": response.usage.input_tokens,
+            "output_tokens": response.usage.output_tokens,
+        }
+        try:
+            redis_client = await self._client()
+            await redis_client.setex(
+                request_cache_key(request),
+                request.cache_ttl,
+                json.dumps(data, ensure_ascii=False, default=str)
+            )
+        except Exception as e:
+            logger.warning(f"响应缓存写入失败: {e}")
+
+
+response_cache = ResponseCache()
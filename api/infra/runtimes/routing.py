@@ -1,81 +1,249 @@
 """
-简单路由器
+延迟感知路由器
 
-提供基本的LLM请求路由功能，支持中文内容检测、视觉内容路由等。
+为等价模型（如经 openrouter 或 anthropic 直连的同一 Claude 模型）维护
+滚动的延迟与错误率统计，选择最快的健康路由；可选地在主请求超过当前p95
+仍未返回时向次优路由发送对冲请求，先返回者胜出，另一方被取消。
 """
 
-from typing import List, Dict, Any
-from infra.runtimes.entities import ProviderType, LLMRequest
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Container
+from dataclasses import dataclass
+import math
+import time
+from typing import Any, Optional, TypeVar
 
-class SimpleRouter:
-    """简单路由器"""
+from libs.exceptions import LLMCapacityExceededException, LLMCircuitOpenException
+from utils import get_component_logger
+from utils.metrics import metrics
 
-    def __init__(self, config: Dict[str, Any] = None):
+logger = get_component_logger(__name__, "LatencyRouter")
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Route:
+    """一条可调用路由：供应商 + 该供应商下的模型ID"""
+    provider: str
+    model: str
+
+
+class RouteStats:
+    """单条路由的滚动统计"""
+
+    def __init__(self, window: int):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.cooldown_until: float = 0.0
+
+    def record(self, latency_ms: float, ok: bool):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency_ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """成功请求延迟的百分位数（毫秒），无样本时为None"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+class LatencyRouter:
+    """
+    延迟感知路由器
+
+    - candidates: 按健康状态与p50延迟对等价路由排序
+    - execute: 依次尝试候选路由（失败即切换），可选在p95后发送对冲请求
+    """
+
+    def __init__(
+        self,
+        route_groups: Optional[list[list[Route]]] = None,
+        window: int = 200,
+        error_threshold: float = 0.5,
+        cooldown_seconds: float = 30.0,
+        min_samples: int = 20,
+        hedge_min_delay_ms: float = 300.0,
+    ):
         """
         初始化路由器
-        
+
         参数:
-            config: 路由配置字典
+            route_groups: 等价路由组列表
+            window: 每条路由保留的最近请求数
+            error_threshold: 错误率超过该值时路由进入冷却
+            cooldown_seconds: 冷却时长（秒）
+            min_samples: 计算对冲延迟所需的最少样本数
+            hedge_min_delay_ms: 对冲延迟下限（毫秒）
         """
-        self.config = config or {}
-        self.stats: Dict[ProviderType, Dict[str, Any]] = {}
+        self.window = window
+        self.error_threshold = error_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.min_samples = min_samples
+        self.hedge_min_delay_ms = hedge_min_delay_ms
 
-    def route(self, request: LLMRequest, available_providers: List[ProviderType]) -> ProviderType:
+        self._groups: dict[Route, list[Route]] = {}
+        for group in route_groups or []:
+            for route in group:
+                self._groups[route] = group
+        self._stats: dict[Route, RouteStats] = {}
+
+    def _get_stats(self, route: Route) -> RouteStats:
+        if route not in self._stats:
+            self._stats[route] = RouteStats(self.window)
+        return self._stats[route]
+
+    def candidates(self, provider: str, model: str, available: Container[str]) -> list[Route]:
         """
-        简单路由逻辑
-        
+        获取请求的候选路由，最优在前
+
+        排序规则：未冷却优先；有延迟样本的路由按p50升序；
+        请求原本指定的路由在无样本时也排在前面，未经采样的等价路由垫底。
+
         参数:
-            request: LLM请求
-            available_providers: 可用供应商列表
-            
+            provider: 请求指定的供应商
+            model: 请求指定的模型
+            available: 当前可用的供应商ID集合
+
         返回:
-            ProviderType: 选择的供应商类型
+            list[Route]: 候选路由
         """
+        requested = Route(provider, model)
+        group = self._groups.get(requested, [requested])
+        routes = [route for route in group if route.provider in available]
+        if requested not in routes and requested.provider in available:
+            routes.insert(0, requested)
 
-        # 规则0: 基于模型的路由 (最高优先级)
-        if request.model:
-            if "claude" in request.model.lower() and ProviderType.ANTHROPIC in available_providers:
-                return ProviderType.ANTHROPIC
-            elif "gpt" in request.model.lower() and ProviderType.OPENAI in available_providers:
-                return ProviderType.OPENAI
+        now = time.monotonic()
 
-        # 规则1: 中文内容 -> 偏好DeepSeek/OpenAI
-        if self._is_chinese_content(request):
-            return ProviderType.OPENAI
+        def sort_key(route: Route):
+            stats = self._stats.get(route)
+            cooling = stats is not None and stats.cooldown_until > now
+            p50 = stats.percentile(50) if stats else None
+            unexplored = p50 is None and route != requested
+            return cooling, unexplored, p50 if p50 is not None else math.inf, route != requested
 
-        # 规则2: 视觉内容 -> OpenAI/Anthropic
-        if self._has_vision_content(request):
-            return ProviderType.ANTHROPIC
+        return sorted(routes, key=sort_key)
 
-        # 规则3: 默认使用第一个可用供应商
-        return available_providers[0] if available_providers else ProviderType.OPENAI
+    def record(self, route: Route, latency_ms: float, ok: bool):
+        """记录一次请求结果，错误率过高时使路由进入冷却"""
+        stats = self._get_stats(route)
+        stats.record(latency_ms, ok)
+        metrics.incr("llm_requests", provider=route.provider, model=route.model, result="ok" if ok else "error")
+        if ok:
+            metrics.observe("llm_latency_ms", latency_ms, provider=route.provider, model=route.model)
+        elif len(stats.outcomes) >= 5 and stats.error_rate > self.error_threshold:
+            stats.cooldown_until = time.monotonic() + self.cooldown_seconds
+            logger.warning(
+                f"路由 {route.provider}/{route.model} 错误率 {stats.error_rate:.0%}，"
+                f"冷却 {self.cooldown_seconds:.0f}s"
+            )
 
-    def _is_chinese_content(self, request: LLMRequest) -> bool:
-        """
-        简单中文检测
-        
-        参数:
-            request: LLM请求
-            
-        返回:
-            bool: 是否包含中文内容
-        """
-        text = " ".join([msg.get("content", "") for msg in request.messages])
-        return any('\u4e00' <= char <= '\u9fff' for char in text)
+    def hedge_delay(self, route: Route) -> Optional[float]:
+        """对冲等待时间（秒）：主路由当前p95，样本不足时不对冲"""
+        stats = self._stats.get(route)
+        if stats is None or len(stats.latencies) < self.min_samples:
+            return None
+        return max(stats.percentile(95), self.hedge_min_delay_ms) / 1000
 
-    def _has_vision_content(self, request: LLMRequest) -> bool:
+    async def execute(
+        self,
+        routes: list[Route],
+        call: Callable[[Route], Awaitable[T]],
+        hedge: bool = False,
+    ) -> T:
         """
-        检查是否包含图像内容
-        
+        在候选路由上执行请求
+
+        主路由失败时立即切换到下一条路由；启用对冲且主路由超过p95未返回时，
+        向下一条路由发送一次对冲请求，先成功者胜出，其余请求被取消。
+
         参数:
-            request: LLM请求
-            
+            routes: 候选路由（最优在前）
+            call: 针对单条路由发起请求的协程函数
+            hedge: 是否允许对冲
+
         返回:
-            bool: 是否包含图像内容
+            首个成功路由的结果
+
+        异常:
+            所有路由均失败时抛出最后一个异常
         """
-        for msg in request.messages:
-            if isinstance(msg.get("content"), list):
-                return True
-        return False
+        if not routes:
+            raise Exception("没有可用的路由")
+
+        queue = list(routes)
+        pending: dict[asyncio.Task, tuple[Route, float]] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> Route:
+            route = queue.pop(0)
+            task = asyncio.create_task(call(route))
+            pending[task] = (route, time.perf_counter())
+            return route
+
+        primary = launch()
+        delay = self.hedge_delay(primary) if hedge else None
+
+        try:
+            while pending:
+                timeout = delay if delay is not None and queue else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # 主路由超过p95仍未返回，发送对冲请求（每次调用最多一次）
+                    hedged = launch()
+                    delay = None
+                    metrics.incr("llm_hedges", provider=hedged.provider, model=hedged.model)
+                    logger.info(f"路由 {primary.provider}/{primary.model} 超过p95，对冲至 {hedged.provider}/{hedged.model}")
+                    continue
+
+                for task in done:
+                    route, started = pending.pop(task)
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    error = task.exception()
+                    if error is None:
+                        self.record(route, latency_ms, ok=True)
+                        if route != primary:
+                            metrics.incr("llm_route_fallbacks", provider=route.provider, model=route.model)
+                        return task.result()
+
+                    # 本地限流与熔断拒绝不代表该路由故障，不计入路由错误率
+                    if not isinstance(error, (LLMCapacityExceededException, LLMCircuitOpenException)):
+                        self.record(route, latency_ms, ok=False)
+                    last_error = error
+                    logger.warning(f"路由 {route.provider}/{route.model} 调用失败: {error}")
+
+                # 全部在途请求失败，切换到下一条路由
+                if not pending and queue:
+                    delay = None
+                    launch()
 
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
 
+    def snapshot(self) -> dict[str, Any]:
+        """导出各路由统计"""
+        now = time.monotonic()
+        return {
+            f"{route.provider}/{route.model}": {
+                "samples": len(stats.outcomes),
+                "p50_ms": stats.percentile(50),
+                "p95_ms": stats.percentile(95),
+                "error_rate": round(stats.error_rate, 3),
+                "cooling": stats.cooldown_until > now,
+            }
+            for route, stats in self._stats.items()
+        }
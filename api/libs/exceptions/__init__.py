@@ -93,6 +93,9 @@ from .audio import (
 # 基础设施异常
 from .infrastructure import (
     DatabaseConnectionException,
+    LLMCapacityExceededException,
+    LLMCircuitOpenException,
+    LLMDeadlineExceededException,
 )
 
 __all__ = [
@@ -146,6 +149,9 @@ __all__ = [
 
     # 基础设施
     "DatabaseConnectionException",
+    "LLMCapacityExceededException",
+    "LLMCircuitOpenException",
+    "LLMDeadlineExceededException",
 
     # 记忆插入
     "MemoryInsertionException",
@@ -17,4 +17,44 @@ class DatabaseConnectionException(BaseHTTPException):
         detail = "数据库连接不可用"
         if operation:
             detail += f" (操作: {operation})"
-        super().__init__(detail=detail)
\ No newline at end of file
+        super().__init__(detail=detail)
+
+
+class LLMCapacityExceededException(BaseHTTPException):
+    """LLM调用超出限流容量（排队已满或等待超时）"""
+    code = 100002
+    message = "LLM_CAPACITY_EXCEEDED"
+    http_status_code = 503
+
+    def __init__(self, provider: str, model: str, reason: str = ""):
+        self.provider = provider
+        self.model = model
+        detail = f"LLM调用容量不足: {provider}/{model}"
+        if reason:
+            detail += f" ({reason})"
+        super().__init__(detail=detail, headers={"Retry-After": "1"})
+
+
+class LLMCircuitOpenException(BaseHTTPException):
+    """LLM供应商处于熔断状态，请求被立即拒绝"""
+    code = 100003
+    message = "LLM_CIRCUIT_OPEN"
+    http_status_code = 503
+
+    def __init__(self, provider: str, model: str = ""):
+        self.provider = provider
+        self.model = model
+        super().__init__(detail=f"LLM供应商暂不可用（熔断中）: {provider}", headers={"Retry-After": "5"})
+
+
+class LLMDeadlineExceededException(BaseHTTPException):
+    """LLM调用超出截止时间"""
+    code = 100004
+    message = "LLM_DEADLINE_EXCEEDED"
+    http_status_code = 504
+
+    def __init__(self, target: str = ""):
+        detail = "LLM调用超出截止时间"
+        if target:
+            detail += f": {target}"
+        super().__init__(detail=detail)
@@ -13,6 +13,7 @@ class AgentNodeType(StrEnum):
     COMPLIANCE = "compliance_review"
     SENTIMENT = "sentiment_analysis"
     INTENT = "intent_analysis"
+    ANALYSIS = "fused_analysis"
     SALES = "sales_agent"
 
     # 触发事件节点
@@ -27,15 +27,18 @@ class InputContent(BaseModel):
     """通用输入内容模型（支持文本和多模态URL）"""
 
     type: InputType = Field(description="内容类型")
-    content: str = Field(description="文本内容或URL（根据type字段）")
+    content: str = Field(description="文本内容或URL（根据type字段），图片可为 data URL")
 
     @field_validator('content')
     @classmethod
     def validate_url_if_not_text(cls, v: str, info) -> str:
-        """验证非文本类型必须是有效URL"""
+        """验证非文本类型必须是有效URL（图片允许 data:image/ 形式）"""
         content_type = info.data.get('type')
         if content_type and content_type != InputType.TEXT:
-            if not v.startswith(('http://', 'https://')):
+            prefixes = ('http://', 'https://')
+            if content_type == InputType.IMAGE:
+                prefixes += ('data:image/',)
+            if not v.startswith(prefixes):
                 raise ValueError(f"无效的URL格式: {v}")
         return v
 
@@ -12,6 +12,7 @@ FastAPI主应用入口
 - API文档配置
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
@@ -22,14 +23,51 @@ import uvicorn
 from config import mas_config
 from controllers import app_router, __version__
 from controllers.middleware import JWTMiddleware
+from controllers.workspace.app.background_process import BackgroundWorkflowProcessor
+from core.app import Orchestrator, pending_runs
+from infra.runtimes import llm_config, provider_registry, usage_meter
 from libs.factory import infra_registry
 from libs.exceptions import BaseHTTPException
 from utils import get_component_logger, configure_logging, get_current_timestamp
+from utils.image_preprocessor import close_http_session
 
 # 配置日志
 logger = get_component_logger(__name__)
 
 
+async def resume_background_runs(app: FastAPI, resumed: set[asyncio.Task]):
+    """认领租约已过期的后台运行，在独立任务中从检查点恢复（登记到 resumed）"""
+    try:
+        workflows = await pending_runs.claim_orphaned()
+        if not workflows:
+            return
+        logger.info(f"发现 {len(workflows)} 个未完成的后台运行，开始恢复")
+        orchestrator = getattr(app.state, "orchestrator", None) or Orchestrator()
+        app.state.orchestrator = orchestrator
+        task = asyncio.create_task(BackgroundWorkflowProcessor().resume_runs(orchestrator, workflows))
+        resumed.add(task)
+        task.add_done_callback(resumed.discard)
+    except Exception as e:
+        logger.error(f"恢复后台运行失败: {e}", exc_info=True)
+
+
+async def sweep_orphaned_runs(app: FastAPI):
+    """
+    周期性恢复未完成的后台运行
+
+    启动时立即扫描一次，之后每个租约周期扫描一次，接管运行期间退出的其他工作进程遗留的运行。
+    任务取消（关闭）时一并取消已恢复、仍在执行的运行，租约过期后由其他进程接管。
+    """
+    resumed: set[asyncio.Task] = set()
+    try:
+        while True:
+            await resume_background_runs(app, resumed)
+            await asyncio.sleep(mas_config.WORKFLOW_RUN_LEASE_SECONDS)
+    finally:
+        for task in resumed:
+            task.cancel()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
@@ -37,9 +75,30 @@ async def lifespan(app: FastAPI):
     configure_logging()
     await infra_registry.create_clients()
     await infra_registry.test_clients()
+
+    # 后台预热LLM供应商连接，不阻塞启动
+    warmup_task = None
+    if mas_config.LLM_HTTP_WARMUP:
+        warmup_task = asyncio.create_task(provider_registry.warmup(llm_config.providers))
+
+    # 后台批量刷写LLM用量
+    usage_meter.start()
+
+    # 后台周期性恢复未完成的后台运行
+    sweep_task = None
+    if mas_config.WORKFLOW_CHECKPOINT_ENABLED:
+        sweep_task = asyncio.create_task(sweep_orphaned_runs(app))
     
     yield
     # 关闭时执行
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    if sweep_task and not sweep_task.done():
+        sweep_task.cancel()
+        await asyncio.gather(sweep_task, return_exceptions=True)
+    await usage_meter.aclose()
+    await provider_registry.aclose()
+    await close_http_session()
     await infra_registry.shutdown_clients()
 
 
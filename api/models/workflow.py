@@ -34,6 +34,7 @@ class WorkflowRun(BaseModel):
     type: Literal['chat', 'trigger'] = Field(description="工作流类型")
     input: MessageParams | None = Field(None, description="用户输入：消息列表")
     trigger_metadata: Mapping | None = Field(None, description="工作流元数据")
+    sla_seconds: float | None = Field(None, description="本轮延迟预算（秒），未设置时使用 LLM_TURN_DEADLINE_SECONDS")
     created_at: datetime = Field(default_factory=get_current_datetime, description="创建时间")
     finished_at: datetime = Field(default_factory=get_current_datetime, description="完成时间")
 
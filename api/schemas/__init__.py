@@ -10,7 +10,12 @@ from .conversation_schema import (
     WorkflowData
 )
 from .responses import BaseResponse
-from .tenant_schema import TenantSyncRequest, TenantUpdateRequest
+from .tenant_schema import (
+    TenantSyncRequest,
+    TenantUpdateRequest,
+    TenantUsageRecord,
+    TenantUsageResponse
+)
 from .marketing_schema import (
     MarketingPlanRequest,
     MarketingPlanResponse,
@@ -32,6 +37,8 @@ __all__ = [
     "CallbackPayload",
     "TenantSyncRequest",
     "TenantUpdateRequest",
+    "TenantUsageRecord",
+    "TenantUsageResponse",
     "ThreadPayload",
     "ThreadCreateResponse",
     "MarketingPlanRequest",
@@ -65,6 +65,7 @@ class MessageCreateRequest(BaseModel):
     tenant_id: str = Field(description="租户标识符")
     assistant_id: UUID = Field(description="助手标识符")
     input: MessageParams = Field(description="消息列表，每个消息包含role和content")
+    sla_seconds: Optional[float] = Field(None, gt=0, le=120, description="本轮延迟预算（秒），超出预算的分析节点以默认结果继续")
 
     @field_validator('input')
     @classmethod
@@ -1,8 +1,10 @@
+from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel, Field
 
 from libs.types import AccountStatus
+from .responses import BaseResponse
 
 
 class TenantSyncRequest(BaseModel):
@@ -15,3 +17,23 @@ class TenantSyncRequest(BaseModel):
 
 class TenantUpdateRequest(BaseModel):
     status: Optional[AccountStatus] = Field(None, description="租户状态")
+
+
+class TenantUsageRecord(BaseModel):
+    period: Optional[str] = Field(None, description="统计周期起点（UTC，ISO格式），total粒度时为空")
+    assistant_id: Optional[str] = Field(None, description="助理ID")
+    node: Optional[str] = Field(None, description="工作流节点或任务")
+    model: Optional[str] = Field(None, description="模型")
+    requests: int = Field(description="调用次数")
+    input_tokens: int = Field(description="输入令牌数")
+    output_tokens: int = Field(description="输出令牌数")
+    cached_tokens: int = Field(description="命中提示词缓存的输入令牌数")
+    cost: float = Field(description="成本（美元）")
+
+
+class TenantUsageResponse(BaseResponse):
+    tenant_id: str = Field(description="租户ID")
+    start: datetime = Field(description="查询窗口起点")
+    end: datetime = Field(description="查询窗口终点")
+    granularity: str = Field(description="时间粒度")
+    items: list[TenantUsageRecord] = Field(description="用量明细")
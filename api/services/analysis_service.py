@@ -14,8 +14,9 @@ import re
 from typing import Any
 from uuid import UUID
 
+from config import mas_config
 from core.memory import StorageManager
-from infra.runtimes import LLMClient, CompletionsRequest
+from infra.runtimes import LLMClient, CompletionsRequest, RequestPriority, usage_scope
 from libs.types import Message
 from utils import get_component_logger, load_yaml_file
 
@@ -120,10 +121,13 @@ async def generate_analysis(
             model=model,
             messages=llm_messages,
             thread_id=thread_id,
-            temperature=temperature
+            temperature=temperature,
+            cache_ttl=mas_config.LLM_RESPONSE_CACHE_TTL,
+            priority=RequestPriority.BACKGROUND
         )
 
-        response = await llm_client.completions(request)
+        with usage_scope(tenant_id=tenant_id, node=f"analysis:{analysis_type}"):
+            response = await llm_client.completions(request)
 
         match = re.search(r'```(?:json)?\s*(.*?)\s*```', response.content, re.DOTALL)
         if match:
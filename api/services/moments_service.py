@@ -15,7 +15,7 @@ from pydantic import BaseModel
 from config import mas_config
 from core.memory import StorageManager
 from infra.cache import get_redis_client
-from infra.runtimes import LLMClient, CompletionsRequest, LLMResponse
+from infra.runtimes import LLMClient, CompletionsRequest, LLMResponse, usage_scope
 from libs.types import MethodType, Message, InputContent, InputType, MemoryType
 from schemas.social_media_schema import (
     MomentsAnalysisRequest,
@@ -23,6 +23,7 @@ from schemas.social_media_schema import (
     SocialMediaActionType,
 )
 from utils import get_component_logger, load_yaml_file
+from utils.image_preprocessor import image_preprocessor
 
 
 logger = get_component_logger(__name__, "MomentsService")
@@ -50,13 +51,14 @@ class MomentsAnalysisService:
         image_urls: list[str],
         output_model: Type[BaseModel]
     ) -> LLMResponse:
-        """调用多模态LLM客户端，支持图片和文本混合分析"""
+        """调用多模态LLM客户端，支持图片和文本混合分析（图片经本地缩放压缩与去重）"""
         run_id = uuid4()
 
         # 构建多模态内容
+        images = await image_preprocessor.prepare_many(image_urls)
         content = [InputContent(type=InputType.TEXT, content=text_content)]
-        for url in image_urls:
-            content.append(InputContent(type=InputType.IMAGE, content=url))
+        for image in images:
+            content.append(InputContent(type=InputType.IMAGE, content=image.url))
 
         messages = [
             Message(role="system", content=system_prompt),
@@ -70,7 +72,8 @@ class MomentsAnalysisService:
             temperature=0.3,  # 较低温度确保稳定输出
             max_tokens=4000,
             messages=messages,
-            output_model=output_model
+            output_model=output_model,
+            prompt_cache_prefix=1
         )
         response = await self.client.completions(request)
         return response
@@ -94,7 +97,8 @@ class MomentsAnalysisService:
             temperature=1,
             max_tokens=1000,  # 朋友圈分析通常不需要很长的回复
             messages=messages,
-            output_model=output_model
+            output_model=output_model,
+            prompt_cache_prefix=1
         )
         response = await self.client.completions(request)
         return response
@@ -187,21 +191,22 @@ class MomentsAnalysisService:
                     all_image_urls.extend(moment.url_list)
 
             # 选择调用方式：有图片使用多模态，无图片使用文本模型
-            if all_image_urls:
-                logger.info(f"检测到 {len(all_image_urls)} 张图片，使用多模态LLM进行视觉分析")
-                llm_response = await self.invoke_llm_multimodal(
-                    system_prompt=system_prompt,
-                    text_content=user_prompt,
-                    image_urls=all_image_urls,
-                    output_model=MomentsAnalysisResponse
-                )
-            else:
-                logger.info("纯文本内容，使用标准文本LLM分析")
-                llm_response = await self.invoke_llm_text(
-                    system_prompt=system_prompt,
-                    user_prompt=user_prompt,
-                    output_model=MomentsAnalysisResponse
-                )
+            with usage_scope(tenant_id=tenant_id, node="moments"):
+                if all_image_urls:
+                    logger.info(f"检测到 {len(all_image_urls)} 张图片，使用多模态LLM进行视觉分析")
+                    llm_response = await self.invoke_llm_multimodal(
+                        system_prompt=system_prompt,
+                        text_content=user_prompt,
+                        image_urls=all_image_urls,
+                        output_model=MomentsAnalysisResponse
+                    )
+                else:
+                    logger.info("纯文本内容，使用标准文本LLM分析")
+                    llm_response = await self.invoke_llm_text(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        output_model=MomentsAnalysisResponse
+                    )
 
             # 从 LLMResponse 中提取结果和token信息
             result = llm_response.content
@@ -5,7 +5,7 @@
 """
 
 from pathlib import Path
-from typing import Type
+from typing import Optional, Type
 from time import time
 from uuid import uuid4
 
@@ -13,7 +13,7 @@ from pydantic import BaseModel
 
 from config import mas_config
 from infra.cache import get_redis_client
-from infra.runtimes import LLMClient, CompletionsRequest, LLMResponse
+from infra.runtimes import LLMClient, CompletionsRequest, LLMResponse, usage_scope
 from libs.types import MethodType, Message, TextBeautifyActionType
 from schemas.social_media_schema import (
     CommentGenerationRequest,
@@ -47,9 +47,10 @@ class SocialMediaPublicTrafficService:
         self,
         system_prompt: str,
         user_prompt: str,
-        output_model: Type[BaseModel]
+        output_model: Type[BaseModel],
+        tenant_id: Optional[str] = None
     ) -> LLMResponse:
-        """调用统一LLM客户端"""
+        """调用统一LLM客户端，用量按租户（若已知）与 social_media 节点计量"""
         run_id = uuid4()
         messages = [
             Message(role="system", content=system_prompt),
@@ -62,9 +63,11 @@ class SocialMediaPublicTrafficService:
             temperature=0.5,
             max_tokens=4000,
             messages=messages,
-            output_model=output_model
+            output_model=output_model,
+            prompt_cache_prefix=1
         )
-        response = await self.client.completions(request)
+        with usage_scope(tenant_id=tenant_id, node="social_media"):
+            response = await self.client.completions(request)
         return response
 
     async def load_prompt(self, method: MethodType) -> str:
@@ -192,7 +195,7 @@ class SocialMediaPublicTrafficService:
             f"每个版本都要保持原意的同时提升表达效果。"
         )
 
-    async def text_beautify(self, request: TextBeautifyRequest) -> TextBeautifyResponse:
+    async def text_beautify(self, request: TextBeautifyRequest, tenant_id: Optional[str] = None) -> TextBeautifyResponse:
         """执行文本美化处理"""
         start_time = time()
         run_id = str(uuid4())
@@ -220,9 +223,11 @@ class SocialMediaPublicTrafficService:
                 temperature=0.5,
                 max_tokens=4000,
                 messages=messages,
-                output_model=None
+                output_model=None,
+                prompt_cache_prefix=1
             )
-            response = await self.client.completions(request=llm_request)
+            with usage_scope(tenant_id=tenant_id, node="text_beautify"):
+                response = await self.client.completions(request=llm_request)
 
             # 获取原始响应文本
             llm_result = response.content if hasattr(response, 'content') else str(response)
@@ -14,6 +14,7 @@ from temporalio.worker import Worker
 from config import mas_config
 from core.tasks.activities import get_all_activities
 from core.tasks.workflows import get_all_workflows
+from infra.runtimes import provider_registry, usage_meter
 from libs.factory import infra_registry
 from utils import configure_logging, get_component_logger
 
@@ -40,9 +41,14 @@ async def main():
 
     logger.info(f"Temporal工作器已启动，任务队列: {mas_config.TASK_QUEUE}")
 
+    # 后台批量刷写LLM用量
+    usage_meter.start()
+
     try:
         await worker.run()
     finally:
+        await usage_meter.aclose()
+        await provider_registry.aclose()
         await infra_registry.shutdown_clients()
 
 
@@ -0,0 +1,104 @@
+"""
+流式运行端点测试
+
+验证 /stream 完成时线程标记为 ACTIVE，运行失败或客户端中途断开时
+线程标记为 FAILED，不会停留在 BUSY。
+"""
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from controllers.workspace.app import workflow as workflow_module
+from libs.types import Message, ThreadStatus
+from schemas.conversation_schema import MessageCreateRequest
+
+
+class FakeOrchestrator:
+    """产出一个 token 事件后按需等待、失败或完成"""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+
+    async def dispatch_stream(self, workflow):
+        yield {"event": "token", "data": {"content": "您好"}}
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        yield {"event": "completed", "data": SimpleNamespace(
+            thread_id=workflow.thread_id,
+            output="您好",
+            input_tokens=10,
+            output_tokens=2,
+            multimodal_outputs=None,
+            business_outputs=None,
+        )}
+
+
+@pytest.fixture
+def statuses(monkeypatch):
+    recorded = []
+    thread = SimpleNamespace(thread_id=uuid4(), tenant_id="t1")
+
+    async def verify_workflow_permissions(**kwargs):
+        return thread
+
+    async def normalize_input(content, thread_id):
+        return content, None
+
+    async def update_thread_status(thread_id, status):
+        recorded.append(status)
+        return True
+
+    monkeypatch.setattr(workflow_module.WorkflowService, "verify_workflow_permissions", verify_workflow_permissions)
+    monkeypatch.setattr(workflow_module.AudioService, "normalize_input", normalize_input)
+    monkeypatch.setattr(workflow_module.ThreadService, "update_thread_status", update_thread_status)
+    return recorded
+
+
+async def open_stream(orchestrator: FakeOrchestrator):
+    request = MessageCreateRequest(tenant_id="t1", assistant_id=uuid4(), input=[Message(role="user", content="你好")])
+    response = await workflow_module.create_stream_run(
+        uuid4(), request, SimpleNamespace(tenant_id="t1"), orchestrator
+    )
+    return response.body_iterator
+
+
+class TestStreamEndpoint:
+    """测试流式端点的线程状态"""
+
+    @pytest.mark.asyncio
+    async def test_completed(self, statuses):
+        events = [event async for event in await open_stream(FakeOrchestrator())]
+        assert [event.split("\n")[0] for event in events] == ["event: run_started", "event: token", "event: completed"]
+        assert statuses == [ThreadStatus.ACTIVE]
+
+    @pytest.mark.asyncio
+    async def test_failed(self, statuses):
+        events = [event async for event in await open_stream(FakeOrchestrator(error=RuntimeError("boom")))]
+        assert events[-1].startswith("event: error")
+        assert statuses == [ThreadStatus.FAILED]
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect(self, statuses):
+        stream = await open_stream(FakeOrchestrator(delay=10))
+        assert (await anext(stream)).startswith("event: run_started")
+        assert (await anext(stream)).startswith("event: token")
+        await stream.aclose()
+        assert statuses == [ThreadStatus.FAILED]
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancelled(self, statuses):
+        stream = await open_stream(FakeOrchestrator(delay=10))
+
+        async def consume():
+            async for _ in stream:
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert statuses == [ThreadStatus.FAILED]
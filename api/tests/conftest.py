@@ -0,0 +1,175 @@
+"""
+测试共享夹具
+
+提供内存版 Redis 与 LLM 请求/响应的构造函数，供各测试模块复用。
+"""
+from fnmatch import fnmatchcase
+from typing import Any, Optional
+from uuid import uuid4
+
+import pytest
+
+from infra.runtimes.entities import CompletionsRequest, LLMResponse, TokenUsage
+from libs.types import Message
+
+
+def _bytes(value: Any) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakePipeline:
+    """按顺序缓存命令，execute 时依次执行并返回各命令结果"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.commands.clear()
+        return False
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> list:
+        if self.redis.fail:
+            raise ConnectionError("redis down")
+        commands, self.commands = self.commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+class FakeRedis:
+    """
+    内存版 Redis
+
+    与生产客户端一致（decode_responses=False），字段与值以 bytes 保存和返回；
+    过期时间不生效。fail 为 True 时管道执行抛出连接错误。
+    """
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.zsets: dict[str, set[bytes]] = {}
+        self.fail = False
+
+    async def get(self, key) -> Optional[bytes]:
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None, nx: bool = False) -> Optional[bool]:
+        if nx and key in self.store:
+            return None
+        self.store[key] = _bytes(value)
+        return True
+
+    async def setex(self, key, ttl, value) -> bool:
+        return await self.set(key, value)
+
+    async def delete(self, *keys) -> int:
+        deleted = 0
+        for key in keys:
+            for data in (self.store, self.hashes, self.zsets):
+                if data.pop(key, None) is not None:
+                    deleted += 1
+        return deleted
+
+    async def expire(self, key, seconds) -> bool:
+        return True
+
+    async def scan_iter(self, match: str, count: Optional[int] = None):
+        for key in [*self.store, *self.hashes, *self.zsets]:
+            if fnmatchcase(key, match):
+                yield key
+
+    async def hset(self, key, field=None, value=None, mapping=None) -> int:
+        items = mapping or {field: value}
+        self.hashes.setdefault(key, {}).update({_bytes(k): _bytes(v) for k, v in items.items()})
+        return len(items)
+
+    async def hsetnx(self, key, field, value) -> bool:
+        fields = self.hashes.setdefault(key, {})
+        if _bytes(field) in fields:
+            return False
+        fields[_bytes(field)] = _bytes(value)
+        return True
+
+    async def hgetall(self, key) -> dict[bytes, bytes]:
+        return dict(self.hashes.get(key, {}))
+
+    async def hdel(self, key, *fields) -> int:
+        data = self.hashes.get(key, {})
+        return sum(data.pop(_bytes(field), None) is not None for field in fields)
+
+    async def hincrby(self, key, field, amount: int = 1) -> int:
+        fields = self.hashes.setdefault(key, {})
+        value = int(fields.get(_bytes(field), b"0")) + amount
+        fields[_bytes(field)] = _bytes(value)
+        return value
+
+    async def hincrbyfloat(self, key, field, amount: float = 1.0) -> float:
+        fields = self.hashes.setdefault(key, {})
+        value = float(fields.get(_bytes(field), b"0")) + amount
+        fields[_bytes(field)] = _bytes(value)
+        return value
+
+    async def zadd(self, key, mapping) -> int:
+        members = self.zsets.setdefault(key, set())
+        added = {_bytes(member) for member in mapping} - members
+        members.update(added)
+        return len(added)
+
+    async def zrange(self, key, start: int, end: int) -> list[bytes]:
+        members = sorted(self.zsets.get(key, set()))
+        return members[start:] if end == -1 else members[start:end + 1]
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
+
+
+def make_request(
+    content: str = "你好",
+    provider: str = "openrouter",
+    model: str = "anthropic/claude-haiku-4.5",
+    **kwargs
+) -> CompletionsRequest:
+    """单条用户消息的LLM请求，其余字段由 kwargs 覆盖"""
+    return CompletionsRequest(
+        id=uuid4(),
+        provider=provider,
+        model=model,
+        messages=[Message(role="user", content=content)],
+        **kwargs
+    )
+
+
+def make_response(
+    content: Any = "ok",
+    provider: str = "openrouter",
+    model: str = "anthropic/claude-haiku-4.5",
+    input_tokens: int = 100,
+    output_tokens: int = 20,
+    cost: float = 0.001,
+    finish_reason: Optional[str] = "stop",
+) -> LLMResponse:
+    """LLM响应，默认用量 100/20 令牌、成本 0.001"""
+    return LLMResponse(
+        id=uuid4(),
+        content=content,
+        provider=provider,
+        model=model,
+        usage=TokenUsage(input_tokens=input_tokens, output_tokens=output_tokens),
+        cost=cost,
+        finish_reason=finish_reason,
+    )
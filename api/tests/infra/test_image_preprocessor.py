@@ -0,0 +1,218 @@
+"""
+图片预处理测试
+
+验证大图缩放并以 data URL 输出、拉取失败时回退原始URL、按规范化URL缓存、多图按感知哈希去重，
+以及拉取仅允许公网 http/https 地址（重定向逐跳校验）、共享连接池与 data URL 大小限制。
+"""
+import base64
+import io
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from PIL import Image, ImageDraw
+import pytest
+import pytest_asyncio
+
+from config import mas_config
+from infra.runtimes.providers.anthropic import AnthropicProvider
+from libs.types import InputContent, InputType
+from utils import image_preprocessor as preprocessor_module
+from utils.image_preprocessor import ImagePreprocessor, close_http_session, decode_data_url, http_fetch
+
+
+def make_image(size=(3000, 2000), color="red", fmt="PNG", shape=True) -> bytes:
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    if shape:
+        draw.rectangle((size[0] // 4, size[1] // 4, size[0] // 2, size[1] // 2), fill=color)
+    else:
+        draw.ellipse((size[0] // 2, 0, size[0], size[1] // 2), fill=color)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class FakeFetcher:
+    def __init__(self, images: dict[str, bytes]):
+        self.images = images
+        self.calls = []
+
+    async def __call__(self, url: str) -> bytes:
+        self.calls.append(url)
+        if url not in self.images:
+            raise ValueError(f"无法拉取: {url}")
+        return self.images[url]
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch):
+    monkeypatch.setattr(mas_config, "IMAGE_PREPROCESS_ENABLED", True)
+    monkeypatch.setattr(mas_config, "IMAGE_PREPROCESS_MAX_EDGE", 512)
+    monkeypatch.setattr(mas_config, "IMAGE_PREPROCESS_CACHE_SIZE", 8)
+    monkeypatch.setattr(mas_config, "IMAGE_DEDUP_MAX_DISTANCE", 4)
+
+
+class TestPrepare:
+    """测试单张图片预处理"""
+
+    @pytest.mark.asyncio
+    async def test_downscale_to_data_url(self):
+        original = make_image()
+        preprocessor = ImagePreprocessor(FakeFetcher({"https://cdn.example.com/a.png": original}))
+
+        image = await preprocessor.prepare("https://cdn.example.com/a.png")
+
+        assert image.url.startswith("data:image/jpeg;base64,")
+        assert Image.open(io.BytesIO(decode_data_url(image.url))).size == (512, 341)
+        assert image.prepared_bytes < image.original_bytes
+        InputContent(type=InputType.IMAGE, content=image.url)
+
+    @pytest.mark.asyncio
+    async def test_failure_falls_back_to_url(self):
+        preprocessor = ImagePreprocessor(FakeFetcher({"https://cdn.example.com/bad.png": b"not an image"}))
+
+        for url in ("https://cdn.example.com/missing.png", "https://cdn.example.com/bad.png"):
+            image = await preprocessor.prepare(url)
+            assert image.url == url and not image.processed
+
+    @pytest.mark.asyncio
+    async def test_cached_by_normalized_url(self):
+        fetcher = FakeFetcher({"https://cdn.example.com/a.png?Signature=1": make_image()})
+        preprocessor = ImagePreprocessor(fetcher)
+
+        first = await preprocessor.prepare("https://cdn.example.com/a.png?Signature=1")
+        second = await preprocessor.prepare("https://CDN.example.com/a.png?Signature=2")
+
+        assert second.url == first.url
+        assert second.source == "https://CDN.example.com/a.png?Signature=2"
+        assert len(fetcher.calls) == 1
+
+
+class TestPrepareMany:
+    """测试多图去重"""
+
+    @pytest.mark.asyncio
+    async def test_perceptual_duplicates_removed(self):
+        fetcher = FakeFetcher({
+            "https://cdn.example.com/a.png": make_image(),
+            "https://cdn.example.com/a_small.jpg": make_image(size=(1500, 1000), fmt="JPEG"),
+            "https://cdn.example.com/b.png": make_image(color="blue", shape=False),
+        })
+        preprocessor = ImagePreprocessor(fetcher)
+
+        images = await preprocessor.prepare_many([
+            "https://cdn.example.com/a.png",
+            "https://cdn.example.com/a_small.jpg",
+            "https://cdn.example.com/b.png",
+            "https://cdn.example.com/missing.png",
+        ])
+
+        assert [image.source for image in images] == [
+            "https://cdn.example.com/a.png",
+            "https://cdn.example.com/b.png",
+            "https://cdn.example.com/missing.png",
+        ]
+
+
+class TestProviderFormat:
+    """测试 data URL 转为服务商格式"""
+
+    def test_anthropic_base64_source(self):
+        payload = base64.b64encode(make_image(size=(8, 8), fmt="JPEG")).decode()
+        source = AnthropicProvider._image_source(f"data:image/jpeg;base64,{payload}")
+        assert source == {"type": "base64", "media_type": "image/jpeg", "data": payload}
+        assert AnthropicProvider._image_source("https://cdn.example.com/a.png")["type"] == "url"
+
+
+class TestFetchGuard:
+    """测试拉取地址校验"""
+
+    @pytest.mark.parametrize("url", [
+        "file:///etc/passwd",
+        "ftp://cdn.example.com/a.png",
+        "http://127.0.0.1/a.png",
+        "http://10.0.0.8/a.png",
+        "http://169.254.169.254/latest/meta-data",
+        "http://[::1]/a.png",
+        "http://[::ffff:192.168.1.1]/a.png",
+    ])
+    def test_rejected(self, url):
+        with pytest.raises(ValueError):
+            preprocessor_module._check_fetch_url(url)
+
+    def test_public_allowed(self):
+        preprocessor_module._check_fetch_url("https://cdn.example.com/a.png")
+        preprocessor_module._check_fetch_url("http://8.8.8.8/a.png")
+
+    @pytest.mark.asyncio
+    async def test_resolver_rejects_private_answer(self, monkeypatch):
+        async def resolve(self, host, port=0, family=0):
+            return [{"hostname": host, "host": "192.168.0.10", "port": port}]
+
+        monkeypatch.setattr(preprocessor_module.aiohttp.ThreadedResolver, "resolve", resolve)
+        with pytest.raises(OSError):
+            await preprocessor_module._PublicResolver().resolve("internal.example.com", 80)
+
+    @pytest.mark.asyncio
+    async def test_prepare_private_url_not_fetched(self):
+        image = await ImagePreprocessor().prepare("http://127.0.0.1:1/a.png")
+        assert image.url == "http://127.0.0.1:1/a.png" and not image.processed
+
+
+@pytest_asyncio.fixture
+async def image_server(monkeypatch):
+    """本地图片服务（仅放行回环地址本身，重定向目标仍按公网规则校验）"""
+    is_public = preprocessor_module._is_public_address
+    monkeypatch.setattr(
+        preprocessor_module, "_is_public_address", lambda host: host == "127.0.0.1" or is_public(host)
+    )
+
+    async def image(request):
+        return web.Response(body=make_image(size=(64, 64)), content_type="image/png")
+
+    async def redirect(request):
+        raise web.HTTPFound(request.query["to"])
+
+    app = web.Application()
+    app.router.add_get("/a.png", image)
+    app.router.add_get("/redirect", redirect)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    yield server
+    await server.close()
+    await close_http_session()
+
+
+class TestHttpFetch:
+    """测试默认拉取函数"""
+
+    @pytest.mark.asyncio
+    async def test_redirect_followed_and_session_reused(self, image_server):
+        target = str(image_server.make_url("/a.png"))
+        first = await http_fetch(str(image_server.make_url("/redirect").with_query(to=target)))
+        session = preprocessor_module._session
+        second = await http_fetch(target)
+
+        assert first == second and Image.open(io.BytesIO(first)).size == (64, 64)
+        assert preprocessor_module._session is session
+
+    @pytest.mark.asyncio
+    async def test_redirect_to_private_rejected(self, image_server):
+        url = image_server.make_url("/redirect").with_query(to="http://169.254.169.254/latest/meta-data")
+        with pytest.raises(ValueError):
+            await http_fetch(str(url))
+
+
+class TestDataUrlLimit:
+    """测试 data URL 大小限制"""
+
+    @pytest.mark.asyncio
+    async def test_oversized_rejected(self, monkeypatch):
+        payload = base64.b64encode(make_image(size=(256, 256))).decode()
+        url = f"data:image/png;base64,{payload}"
+        monkeypatch.setattr(mas_config, "IMAGE_PREPROCESS_MAX_BYTES", 64)
+
+        with pytest.raises(ValueError):
+            decode_data_url(url)
+        image = await ImagePreprocessor().prepare(url)
+        assert image.url == url and not image.processed
@@ -0,0 +1,32 @@
+"""
+LLM输出JSON容错解析测试
+
+验证代码块、前后说明文字与多个JSON对象等情况下只提取第一个完整对象。
+"""
+from utils.json_utils import extract_json_object
+
+
+class TestExtractJsonObject:
+    """测试JSON对象提取"""
+
+    def test_plain_json(self):
+        assert extract_json_object('{"sentiment": "positive", "score": 0.8}') == {"sentiment": "positive", "score": 0.8}
+
+    def test_code_fence(self):
+        text = '分析如下：\n```json\n{"detected": true}\n```\n以上。'
+        assert extract_json_object(text) == {"detected": True}
+
+    def test_surrounding_prose(self):
+        assert extract_json_object('结果是 {"a": {"b": 1}} 请参考') == {"a": {"b": 1}}
+
+    def test_first_object_only(self):
+        # 贪婪正则会把两个对象连同中间文字一起截取导致解析失败
+        assert extract_json_object('{"a": 1} 另外 {"b": 2}') == {"a": 1}
+
+    def test_skips_invalid_braces(self):
+        assert extract_json_object('集合{1,2} 结果 {"ok": true}') == {"ok": True}
+
+    def test_no_json(self):
+        assert extract_json_object("无法判断") is None
+        assert extract_json_object("") is None
+        assert extract_json_object("[1, 2]") is None
@@ -0,0 +1,88 @@
+"""
+延迟感知路由器测试
+
+验证等价路由按延迟排序、失败切换、p95对冲与冷却行为。
+"""
+import asyncio
+
+import pytest
+
+from infra.runtimes.routing import LatencyRouter, Route
+
+
+OPENROUTER = Route("openrouter", "anthropic/claude-haiku-4.5")
+ANTHROPIC = Route("anthropic", "claude-haiku-4-5")
+AVAILABLE = {"openrouter", "anthropic"}
+
+
+def make_router(**kwargs) -> LatencyRouter:
+    return LatencyRouter([[OPENROUTER, ANTHROPIC]], min_samples=3, hedge_min_delay_ms=10, **kwargs)
+
+
+class TestLatencyRouter:
+    """测试延迟感知路由"""
+
+    def test_requested_route_first_without_samples(self):
+        router = make_router()
+        assert router.candidates(OPENROUTER.provider, OPENROUTER.model, AVAILABLE) == [OPENROUTER, ANTHROPIC]
+
+    def test_faster_route_preferred(self):
+        router = make_router()
+        for _ in range(3):
+            router.record(OPENROUTER, 900, ok=True)
+            router.record(ANTHROPIC, 300, ok=True)
+
+        assert router.candidates(OPENROUTER.provider, OPENROUTER.model, AVAILABLE)[0] == ANTHROPIC
+
+    def test_unavailable_provider_excluded(self):
+        router = make_router()
+        assert router.candidates(OPENROUTER.provider, OPENROUTER.model, {"openrouter"}) == [OPENROUTER]
+
+    def test_failing_route_cools_down(self):
+        router = make_router(cooldown_seconds=60)
+        for _ in range(5):
+            router.record(OPENROUTER, 100, ok=False)
+
+        assert router.candidates(OPENROUTER.provider, OPENROUTER.model, AVAILABLE)[-1] == OPENROUTER
+
+    @pytest.mark.asyncio
+    async def test_failover_to_next_route(self):
+        router = make_router()
+
+        async def call(route: Route):
+            if route == OPENROUTER:
+                raise RuntimeError("upstream 502")
+            return route.provider
+
+        assert await router.execute([OPENROUTER, ANTHROPIC], call) == "anthropic"
+
+    @pytest.mark.asyncio
+    async def test_hedge_after_p95_and_cancel_loser(self):
+        router = make_router()
+        for _ in range(3):
+            router.record(OPENROUTER, 20, ok=True)
+        cancelled = []
+
+        async def call(route: Route):
+            try:
+                await asyncio.sleep(1.0 if route == OPENROUTER else 0.01)
+                return route.provider
+            except asyncio.CancelledError:
+                cancelled.append(route)
+                raise
+
+        result = await router.execute([OPENROUTER, ANTHROPIC], call, hedge=True)
+        await asyncio.sleep(0)
+
+        assert result == "anthropic"
+        assert cancelled == [OPENROUTER]
+
+    @pytest.mark.asyncio
+    async def test_all_routes_fail_raises_last_error(self):
+        router = make_router()
+
+        async def call(route: Route):
+            raise RuntimeError(route.provider)
+
+        with pytest.raises(RuntimeError, match="anthropic"):
+            await router.execute([OPENROUTER, ANTHROPIC], call)
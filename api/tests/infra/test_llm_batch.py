@@ -0,0 +1,215 @@
+"""
+LLM离线批处理测试
+
+验证任务与结果的存储、供应商批处理的提交与回收，以及无批处理路由时的同步执行。
+"""
+import pytest
+
+from config import mas_config
+from infra.runtimes import client as client_module
+from infra.runtimes.batch import BatchStore
+from infra.runtimes.client import LLMClient
+from infra.runtimes.entities import (
+    BatchJob,
+    BatchMode,
+    BatchStatus,
+    RequestPriority,
+)
+from infra.runtimes.metering import current_usage_tags, usage_scope
+from infra.runtimes.resilience import RetryPolicy
+from tests.conftest import make_request, make_response
+
+
+class FakeBatchProvider:
+    supports_batch = True
+
+    def __init__(self):
+        self.submitted = {}
+        self.status = BatchStatus.IN_PROGRESS
+
+    async def submit_batch(self, requests):
+        self.submitted = dict(requests)
+        return "msgbatch_1"
+
+    async def batch_status(self, batch_id):
+        return self.status
+
+    async def batch_results(self, batch_id):
+        return {custom_id: make_response(f"回复-{custom_id}") for custom_id in list(self.submitted)[:-1]}
+
+
+class FakeSyncProvider:
+    supports_batch = False
+
+
+@pytest.fixture
+def store(monkeypatch, fake_redis):
+    batch_store = BatchStore()
+    batch_store._redis = fake_redis
+    monkeypatch.setattr(client_module, "batch_store", batch_store)
+    monkeypatch.setattr(mas_config, "LLM_ROUTING_ENABLED", False)
+    monkeypatch.setattr(mas_config, "LLM_BATCH_ENABLED", True)
+    monkeypatch.setattr(mas_config, "LLM_USAGE_METERING_ENABLED", False)
+    return batch_store
+
+
+def make_client(providers: dict) -> LLMClient:
+    llm_client = LLMClient.__new__(LLMClient)
+    llm_client.active_providers = providers
+    llm_client.retry_policy = RetryPolicy(max_attempts=1)
+    return llm_client
+
+
+class TestBatchStore:
+    """测试任务与结果存储"""
+
+    @pytest.mark.asyncio
+    async def test_job_round_trip(self, store):
+        job = BatchJob(id="job1", provider="openrouter", model="m", mode=BatchMode.PROVIDER, custom_ids=["a", "b"])
+        await store.save(job)
+
+        loaded = await store.get("job1")
+        assert loaded == job
+        assert loaded.status is BatchStatus.IN_PROGRESS
+        assert await store.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_results_round_trip(self, store):
+        await store.save_results("job1", {"a": make_response("你好")})
+
+        results = await store.get_results("job1")
+        assert results["a"].content == "你好"
+        assert results["a"].usage.output_tokens == 20
+
+
+class TestProviderBatch:
+    """测试供应商批处理"""
+
+    @pytest.mark.asyncio
+    async def test_submit_poll_and_collect(self, store):
+        provider = FakeBatchProvider()
+        llm_client = make_client({"openrouter": provider})
+
+        job = await llm_client.submit_batch({"t1": make_request(), "t2": make_request("在吗")})
+        assert job.mode == BatchMode.PROVIDER
+        assert job.provider_batch_id == "msgbatch_1"
+        assert set(provider.submitted) == {"t1", "t2"}
+
+        # 处理中时不回收结果
+        assert (await llm_client.poll_batch(job.id)).status == BatchStatus.IN_PROGRESS
+        assert await llm_client.batch_results(job.id) == {}
+
+        provider.status = BatchStatus.COMPLETED
+        finished = await llm_client.poll_batch(job.id)
+        assert finished.status == BatchStatus.COMPLETED
+        assert list(finished.errors) == ["t2"]
+
+        results = await llm_client.batch_results(job.id)
+        assert results["t1"].content == "回复-t1"
+        assert "t2" not in results
+
+    @pytest.mark.asyncio
+    async def test_mixed_models_rejected(self, store):
+        llm_client = make_client({"openrouter": FakeBatchProvider()})
+        with pytest.raises(ValueError):
+            await llm_client.submit_batch({"a": make_request(), "b": make_request(model="claude-sonnet-4-5")})
+
+
+class TestSyncFallback:
+    """测试无批处理路由时的同步执行"""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_background_priority(self, store):
+        llm_client = make_client({"openrouter": FakeSyncProvider()})
+        priorities = []
+
+        async def completions(request):
+            priorities.append(request.priority)
+            if request.messages[0].content == "失败":
+                raise ConnectionError("boom")
+            return make_response(f"回复-{request.messages[0].content}", provider="openrouter")
+
+        llm_client.completions = completions
+        job = await llm_client.submit_batch({
+            "a": make_request("你好", provider="openrouter", model="qwen/qwen3"),
+            "b": make_request("失败", provider="openrouter", model="qwen/qwen3"),
+        })
+
+        assert job.mode == BatchMode.SYNC
+        assert job.status == BatchStatus.COMPLETED
+        assert list(job.errors) == ["b"]
+        assert set(priorities) == {RequestPriority.BACKGROUND}
+
+        # 同步任务已完成，轮询不再访问供应商
+        assert (await llm_client.poll_batch(job.id)).status == BatchStatus.COMPLETED
+        assert (await llm_client.batch_results(job.id))["a"].content == "回复-你好"
+
+    @pytest.mark.asyncio
+    async def test_batch_disabled(self, store, monkeypatch):
+        monkeypatch.setattr(mas_config, "LLM_BATCH_ENABLED", False)
+        llm_client = make_client({"openrouter": FakeBatchProvider()})
+
+        async def completions(request):
+            return make_response("同步")
+
+        llm_client.completions = completions
+        job = await llm_client.submit_batch({"a": make_request()})
+        assert job.mode == BatchMode.SYNC
+
+
+class RecordingMeter:
+    def __init__(self):
+        self.records = []
+
+    def record(self, response, tags=None):
+        self.records.append((response.content, tags if tags is not None else current_usage_tags()))
+
+
+class TestItemTags:
+    """测试请求级计量标签"""
+
+    @pytest.fixture
+    def meter(self, store, monkeypatch):
+        recording = RecordingMeter()
+        monkeypatch.setattr(client_module, "usage_meter", recording)
+        monkeypatch.setattr(mas_config, "LLM_USAGE_METERING_ENABLED", True)
+        return recording
+
+    @pytest.mark.asyncio
+    async def test_sync_batch_scopes_each_request(self, meter):
+        llm_client = make_client({"openrouter": FakeSyncProvider()})
+
+        async def completions(request):
+            response = make_response(request.messages[0].content, provider="openrouter")
+            meter.record(response)
+            return response
+
+        llm_client.completions = completions
+        with usage_scope(node="task"):
+            await llm_client.submit_batch(
+                {
+                    "a": make_request("a", provider="openrouter", model="qwen/qwen3"),
+                    "b": make_request("b", provider="openrouter", model="qwen/qwen3"),
+                },
+                tags={"a": {"tenant_id": "t1", "assistant_id": "as1"}, "b": {"tenant_id": "t2", "assistant_id": None}},
+            )
+
+        records = dict(meter.records)
+        assert records["a"] == {"node": "task", "tenant_id": "t1", "assistant_id": "as1"}
+        assert records["b"] == {"node": "task", "tenant_id": "t2"}
+
+    @pytest.mark.asyncio
+    async def test_provider_batch_merges_item_tags(self, meter):
+        provider = FakeBatchProvider()
+        llm_client = make_client({"openrouter": provider})
+
+        with usage_scope(node="task"):
+            job = await llm_client.submit_batch(
+                {"t1": make_request(), "t2": make_request()},
+                tags={"t1": {"tenant_id": "tenant-a", "assistant_id": "as1"}},
+            )
+        assert (await client_module.batch_store.get(job.id)).item_tags == {"t1": {"tenant_id": "tenant-a", "assistant_id": "as1"}}
+
+        provider.status = BatchStatus.COMPLETED
+        await llm_client.poll_batch(job.id)
+        assert meter.records == [("回复-t1", {"node": "task", "tenant_id": "tenant-a", "assistant_id": "as1"})]
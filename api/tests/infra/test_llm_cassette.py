@@ -0,0 +1,152 @@
+"""
+LLM流量录制与回放测试
+
+验证脱敏、按请求哈希回放、字段缺失的结构化回复、耗时缩放、流式回放与未命中处理。
+"""
+from dataclasses import replace
+import gzip
+import time
+from uuid import uuid4
+
+import pytest
+from pydantic import BaseModel
+
+from infra.runtimes.cassette import Cassette, CassetteMissError, scrub_pii
+from infra.runtimes.entities import CompletionsRequest, LLMResponse, LLMStreamChunk, TokenUsage, ToolCallData
+from libs.types import Message
+
+
+class Reply(BaseModel):
+    sentiment: str
+    confidence: float
+
+
+def make_request(content: str = "我的手机号是13812345678，想约明天") -> CompletionsRequest:
+    return CompletionsRequest(
+        id=uuid4(),
+        provider="openrouter",
+        model="anthropic/claude-haiku-4.5",
+        messages=[Message(role="system", content="你是销售"), Message(role="user", content=content)],
+    )
+
+
+def make_response(content="好的，已为您预约", tool_calls=None) -> LLMResponse:
+    return LLMResponse(
+        id=uuid4(),
+        content=content,
+        provider="openrouter",
+        model="anthropic/claude-haiku-4.5",
+        usage=TokenUsage(input_tokens=30, output_tokens=8),
+        cost=0.0002,
+        tool_calls=tool_calls,
+        finish_reason="stop",
+    )
+
+
+def make_cassette(tmp_path, mode: str, **kwargs) -> Cassette:
+    return Cassette(tmp_path / "llm.jsonl.gz", mode=mode, **kwargs)
+
+
+class TestScrub:
+    """测试默认脱敏"""
+
+    def test_scrub_pii(self):
+        text = "电话13812345678，邮箱a.b@example.com，身份证11010519491231002X"
+        assert scrub_pii(text) == "电话<PHONE>，邮箱<EMAIL>，身份证<ID_CARD>"
+
+
+class TestRecordReplay:
+    """测试录制与回放"""
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self, tmp_path):
+        recorder = make_cassette(tmp_path, Cassette.RECORD)
+
+        async def call():
+            return make_response("好的，13812345678 已登记", [ToolCallData(id="c1", name="book", arguments={"day": "明天"})])
+
+        await recorder.completions(make_request(), call)
+        with gzip.open(tmp_path / "llm.jsonl.gz", "rt", encoding="utf-8") as f:
+            assert "13812345678" not in f.read()
+
+        player = make_cassette(tmp_path, Cassette.REPLAY, latency_scale=0)
+
+        async def unexpected():
+            raise AssertionError("回放不应发起真实调用")
+
+        request = make_request()
+        response = await player.completions(request, unexpected)
+        assert response.id == request.id
+        assert response.content == "好的，<PHONE> 已登记"
+        assert response.tool_calls[0].arguments == {"day": "明天"}
+
+    @pytest.mark.asyncio
+    async def test_scrubbed_requests_share_hash(self, tmp_path):
+        cassette = make_cassette(tmp_path, Cassette.REPLAY)
+        # 不同手机号脱敏后为同一请求
+        assert cassette.request_key(make_request())[0] == cassette.request_key(make_request("我的手机号是13900000000，想约明天"))[0]
+        assert cassette.request_key(make_request())[0] != cassette.request_key(make_request("想约后天"))[0]
+
+    @pytest.mark.asyncio
+    async def test_repeated_requests_replay_in_order(self, tmp_path):
+        recorder = make_cassette(tmp_path, Cassette.RECORD)
+        for content in ("第一次", "第二次"):
+            async def call(content=content):
+                return make_response(content)
+            await recorder.completions(make_request(), call)
+
+        player = make_cassette(tmp_path, Cassette.REPLAY, latency_scale=0)
+        contents = [(await player.completions(make_request(), None)).content for _ in range(3)]
+        assert contents == ["第一次", "第二次", "第一次"]
+
+    @pytest.mark.asyncio
+    async def test_partial_structured_reply_replayed_raw(self, tmp_path):
+        recorder = make_cassette(tmp_path, Cassette.RECORD)
+        request = replace(make_request(), output_model=Reply)
+        recorder.record(request, make_response({"sentiment": "negative"}), latency=0)
+        recorder.record(request, make_response(Reply(sentiment="positive", confidence=0.9)), latency=0)
+
+        player = make_cassette(tmp_path, Cassette.REPLAY, latency_scale=0)
+        partial = await player.completions(replace(make_request(), output_model=Reply), None)
+        assert partial.content == {"sentiment": "negative"}
+        complete = await player.completions(replace(make_request(), output_model=Reply), None)
+        assert complete.content == Reply(sentiment="positive", confidence=0.9)
+
+    @pytest.mark.asyncio
+    async def test_latency_scaled(self, tmp_path):
+        recorder = make_cassette(tmp_path, Cassette.RECORD)
+        recorder.record(make_request(), make_response(), latency=0.2)
+
+        player = make_cassette(tmp_path, Cassette.REPLAY, latency_scale=0.5)
+        start = time.monotonic()
+        await player.completions(make_request(), None)
+        assert 0.09 <= time.monotonic() - start < 0.2
+
+    @pytest.mark.asyncio
+    async def test_miss(self, tmp_path):
+        player = make_cassette(tmp_path, Cassette.REPLAY)
+        with pytest.raises(CassetteMissError):
+            await player.completions(make_request(), None)
+
+        passthrough = make_cassette(tmp_path, Cassette.REPLAY, on_miss="passthrough")
+
+        async def call():
+            return make_response("实时")
+        assert (await passthrough.completions(make_request(), call)).content == "实时"
+
+    @pytest.mark.asyncio
+    async def test_stream_round_trip(self, tmp_path):
+        recorder = make_cassette(tmp_path, Cassette.RECORD)
+
+        async def call():
+            yield LLMStreamChunk(id=None, content="好的，")
+            yield LLMStreamChunk(id=None, content="已为您预约")
+            yield LLMStreamChunk(id=None, finish_reason="stop", response=make_response())
+
+        recorded = [chunk async for chunk in recorder.stream(make_request(), call)]
+        assert len(recorded) == 3
+
+        player = make_cassette(tmp_path, Cassette.REPLAY, latency_scale=0)
+        chunks = [chunk async for chunk in player.stream(make_request(), None)]
+        assert "".join(chunk.content for chunk in chunks) == "好的，已为您预约"
+        assert chunks[-1].response.usage.output_tokens == 8
@@ -0,0 +1,129 @@
+"""
+LLM限流器测试
+
+验证并发上限、优先级放行顺序、RPM令牌桶与背压拒绝。
+"""
+import asyncio
+
+import pytest
+
+from infra.runtimes.entities import Model, ModelType, Provider, ProviderType, RequestPriority
+from infra.runtimes.governor import Governor, TokenBucket
+from infra.runtimes.routing import Route
+from libs.exceptions import LLMCapacityExceededException
+
+
+ROUTE = Route("openrouter", "anthropic/claude-haiku-4.5")
+OTHER = Route("openrouter", "openai/gpt-5-mini")
+
+
+def make_governor(provider_limits: dict | None = None, model_limits: dict | None = None, **kwargs) -> Governor:
+    provider = Provider(
+        id="openrouter",
+        type=ProviderType.OPENAI,
+        name="OpenRouter",
+        api_key="test",
+        models=[
+            Model(id=ROUTE.model, provider="openrouter", name="Claude", type=ModelType.TEXT, **(model_limits or {})),
+            Model(id=OTHER.model, provider="openrouter", name="GPT", type=ModelType.TEXT),
+        ],
+        **(provider_limits or {}),
+    )
+    return Governor([provider], **kwargs)
+
+
+class TestTokenBucket:
+    """测试令牌桶"""
+
+    def test_wait_time_after_drain(self):
+        bucket = TokenBucket(60)
+        now = bucket.updated
+        assert bucket.wait_time(60, now) == 0
+        bucket.take(60)
+        assert bucket.wait_time(1, now) == pytest.approx(1.0)
+
+    def test_oversized_request_admitted_when_full(self):
+        bucket = TokenBucket(60)
+        assert bucket.wait_time(1000, bucket.updated) == 0
+
+
+class TestGovernor:
+    """测试限流放行"""
+
+    @pytest.mark.asyncio
+    async def test_unconfigured_route_not_limited(self):
+        governor = make_governor()
+        async with governor.acquire(ROUTE, 100) as permit:
+            assert permit.limiters == []
+
+    @pytest.mark.asyncio
+    async def test_interactive_granted_before_background(self):
+        governor = make_governor(provider_limits={"max_concurrency": 1})
+        order = []
+
+        async def call(priority: RequestPriority, name: str):
+            async with governor.acquire(ROUTE, 10, priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        async with governor.acquire(ROUTE, 10):
+            background = asyncio.create_task(call(RequestPriority.BACKGROUND, "background"))
+            await asyncio.sleep(0)
+            interactive = asyncio.create_task(call(RequestPriority.INTERACTIVE, "interactive"))
+            await asyncio.sleep(0)
+            assert governor.queue_depth("openrouter") == 2
+
+        await asyncio.gather(background, interactive)
+        assert order == ["interactive", "background"]
+
+    @pytest.mark.asyncio
+    async def test_model_limit_does_not_block_other_models(self):
+        governor = make_governor(model_limits={"max_concurrency": 1})
+
+        async with governor.acquire(ROUTE, 10):
+            async with governor.acquire(OTHER, 10) as permit:
+                assert permit.limiters == []
+
+    @pytest.mark.asyncio
+    async def test_rpm_budget_delays_request(self):
+        governor = make_governor(model_limits={"rpm": 600})
+        for _ in range(600):
+            async with governor.acquire(ROUTE, 1):
+                pass
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with governor.acquire(ROUTE, 1):
+            pass
+        assert loop.time() - started >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_queue_full_rejected(self):
+        governor = make_governor(provider_limits={"max_concurrency": 1}, max_queue=1)
+
+        async with governor.acquire(ROUTE, 10):
+            waiting = asyncio.create_task(governor._acquire(ROUTE, 10, RequestPriority.NORMAL))
+            await asyncio.sleep(0)
+            with pytest.raises(LLMCapacityExceededException):
+                async with governor.acquire(ROUTE, 10):
+                    pass
+            waiting.cancel()
+
+    @pytest.mark.asyncio
+    async def test_wait_timeout_rejected(self):
+        governor = make_governor(provider_limits={"max_concurrency": 1}, max_wait_seconds=0.02)
+
+        async with governor.acquire(ROUTE, 10):
+            with pytest.raises(LLMCapacityExceededException):
+                async with governor.acquire(ROUTE, 10):
+                    pass
+        assert governor.queue_depth("openrouter") == 0
+
+    @pytest.mark.asyncio
+    async def test_settle_corrects_token_budget(self):
+        governor = make_governor(model_limits={"tpm": 1000})
+        async with governor.acquire(ROUTE, 500) as permit:
+            permit.settle(100)
+
+        bucket = governor._limiters[("openrouter", ROUTE.model)].tokens
+        assert bucket.tokens == pytest.approx(900, abs=1)
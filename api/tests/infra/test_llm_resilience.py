@@ -0,0 +1,160 @@
+"""
+LLM调用容错测试
+
+验证熔断器状态转换、可重试错误判断，以及重试受截止时间约束。
+"""
+import asyncio
+
+import pytest
+
+from infra.runtimes.resilience import (
+    CircuitBreaker,
+    CircuitBreakers,
+    RetryPolicy,
+    deadline_scope,
+    is_retryable,
+    resolve_deadline,
+)
+from libs.exceptions import LLMCapacityExceededException, LLMCircuitOpenException, LLMDeadlineExceededException
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class TestRetryable:
+    """测试可重试错误判断"""
+
+    def test_transient_errors(self):
+        assert is_retryable(StatusError(503))
+        assert is_retryable(StatusError(429))
+        assert is_retryable(APIConnectionError())
+        assert is_retryable(TimeoutError())
+
+    def test_permanent_errors(self):
+        assert not is_retryable(StatusError(400))
+        assert not is_retryable(ValueError("bad json"))
+        assert not is_retryable(LLMCapacityExceededException("openrouter", "m"))
+
+
+class TestCircuitBreaker:
+    """测试熔断器状态转换"""
+
+    def test_opens_after_threshold_and_probes_after_reset(self):
+        breaker = CircuitBreaker("openrouter", failure_threshold=2, reset_seconds=0)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        # 冷却结束后只放行一个探测请求
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+    def test_open_breaker_rejects(self):
+        breaker = CircuitBreaker("openrouter", failure_threshold=1, reset_seconds=60)
+        breaker.record_failure()
+        assert not breaker.allow()
+
+    @pytest.mark.asyncio
+    async def test_call_fails_fast_when_open(self):
+        breakers = CircuitBreakers(failure_threshold=1, reset_seconds=60)
+
+        async def failing():
+            raise StatusError(502)
+
+        with pytest.raises(StatusError):
+            await breakers.call("openrouter", "m", failing)
+        with pytest.raises(LLMCircuitOpenException):
+            await breakers.call("openrouter", "m", failing)
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_trip(self):
+        breakers = CircuitBreakers(failure_threshold=1, reset_seconds=60)
+
+        async def bad_request():
+            raise StatusError(400)
+
+        with pytest.raises(StatusError):
+            await breakers.call("openrouter", "m", bad_request)
+        assert breakers.get("openrouter").state == CircuitBreaker.CLOSED
+
+
+class TestRetryPolicy:
+    """测试重试策略"""
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_failure(self):
+        policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001)
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise StatusError(503)
+            return "ok"
+
+        assert await policy.run(flaky) == "ok"
+        assert len(attempts) == 3
+
+    @pytest.mark.asyncio
+    async def test_permanent_failure_not_retried(self):
+        policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+        attempts = []
+
+        async def bad_request():
+            attempts.append(1)
+            raise StatusError(400)
+
+        with pytest.raises(StatusError):
+            await policy.run(bad_request)
+        assert len(attempts) == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_call_cut_at_deadline(self):
+        policy = RetryPolicy(max_attempts=3)
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        with deadline_scope(0.05):
+            with pytest.raises(LLMDeadlineExceededException):
+                await policy.run(slow, resolve_deadline())
+
+    @pytest.mark.asyncio
+    async def test_no_retry_when_backoff_exceeds_deadline(self):
+        policy = RetryPolicy(max_attempts=5, base_delay=10, max_delay=10)
+        policy.backoff = lambda attempt: 10
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            raise StatusError(503)
+
+        with pytest.raises(StatusError):
+            await policy.run(failing, resolve_deadline(1.0))
+        assert len(attempts) == 1
+
+
+class TestDeadlineScope:
+    """测试截止时间上下文"""
+
+    def test_nested_scope_keeps_earlier_deadline(self):
+        assert resolve_deadline() is None
+        with deadline_scope(1):
+            outer = resolve_deadline()
+            with deadline_scope(100):
+                assert resolve_deadline() == outer
+            assert resolve_deadline(0.01) < outer
+        assert resolve_deadline() is None
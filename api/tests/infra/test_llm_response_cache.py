@@ -0,0 +1,87 @@
+"""
+LLM响应缓存测试
+
+验证规范化请求键、命中/绕过行为、结构化输出的还原，以及未通过校验的回复不缓存。
+"""
+import pytest
+from pydantic import BaseModel
+
+from infra.runtimes.entities import CompletionsRequest
+from infra.runtimes.response_cache import ResponseCache, request_cache_key
+from tests.conftest import make_request, make_response
+from utils.metrics import metrics
+
+
+class IntentResult(BaseModel):
+    intent: str
+    confidence: float
+
+
+def make_cached_request(content: str = "你好", **kwargs) -> CompletionsRequest:
+    return make_request(content, temperature=0.1, cache_ttl=60, **kwargs)
+
+
+@pytest.fixture
+def cache(fake_redis):
+    metrics.reset()
+    response_cache = ResponseCache()
+    response_cache._redis = fake_redis
+    return response_cache
+
+
+class TestRequestCacheKey:
+    """测试缓存键"""
+
+    def test_ignores_request_id(self):
+        assert request_cache_key(make_cached_request()) == request_cache_key(make_cached_request())
+
+    def test_depends_on_messages_and_sampling(self):
+        base = request_cache_key(make_cached_request())
+        assert request_cache_key(make_cached_request("再见")) != base
+        assert request_cache_key(make_cached_request(max_tokens=10)) != base
+        assert request_cache_key(make_cached_request(output_model=IntentResult)) != base
+
+
+class TestResponseCache:
+    """测试缓存读写"""
+
+    @pytest.mark.asyncio
+    async def test_hit_after_set(self, cache):
+        request = make_cached_request()
+        assert await cache.get(request) is None
+
+        await cache.set(request, make_response("回复"))
+        cached = await cache.get(make_cached_request())
+
+        assert cached.content == "回复"
+        assert cached.cache_hit
+        assert cached.usage.input_tokens == 0
+        assert metrics.hit_ratio("llm_cache_requests", model=request.model) == 0.5
+
+    @pytest.mark.asyncio
+    async def test_bypass_skips_read(self, cache):
+        request = make_cached_request()
+        await cache.set(request, make_response("回复"))
+        assert await cache.get(make_cached_request(cache_bypass=True)) is None
+
+    @pytest.mark.asyncio
+    async def test_structured_output_restored(self, cache):
+        request = make_cached_request(output_model=IntentResult)
+        await cache.set(request, make_response(IntentResult(intent="buy", confidence=0.9)))
+
+        cached = await cache.get(make_cached_request(output_model=IntentResult))
+        assert cached.content == IntentResult(intent="buy", confidence=0.9)
+
+    @pytest.mark.asyncio
+    async def test_truncated_response_not_cached(self, cache):
+        request = make_cached_request()
+        response = make_response("截断")
+        response.finish_reason = "length"
+        await cache.set(request, response)
+        assert await cache.get(request) is None
+
+    @pytest.mark.asyncio
+    async def test_partial_structured_reply_not_cached(self, cache):
+        request = make_cached_request(output_model=IntentResult)
+        await cache.set(request, make_response({"intent": "buy"}))
+        assert await cache.get(make_cached_request(output_model=IntentResult)) is None
@@ -0,0 +1,164 @@
+"""
+LLM流式调用测试
+
+验证供应商流式片段的文本与工具调用参数聚合、客户端对最终响应的用量计量，
+以及调用方提前关闭流时上游流被关闭、熔断器不记失败且不计量。
+"""
+from uuid import uuid4
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+
+from config import mas_config
+from infra.runtimes import client as client_module
+from infra.runtimes.client import LLMClient
+from infra.runtimes.entities import CompletionsRequest, Provider, ProviderType
+from infra.runtimes.governor import Governor
+from infra.runtimes.metering import current_usage_tags, usage_scope
+from infra.runtimes.providers.openai import OpenAIProvider
+from infra.runtimes.resilience import CircuitBreakers, RetryPolicy
+from libs.types import Message
+
+
+def make_chunk(content=None, tool_calls=None, finish_reason=None, usage=None) -> ChatCompletionChunk:
+    choices = []
+    if content is not None or tool_calls or finish_reason:
+        delta = {"role": "assistant"}
+        if content is not None:
+            delta["content"] = content
+        if tool_calls:
+            delta["tool_calls"] = tool_calls
+        choices.append({"index": 0, "delta": delta, "finish_reason": finish_reason})
+    return ChatCompletionChunk.model_validate({
+        "id": "c1",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "anthropic/claude-haiku-4.5",
+        "choices": choices,
+        "usage": usage,
+    })
+
+
+CHUNKS = [
+    make_chunk("好的，"),
+    make_chunk("为您预约"),
+    make_chunk(tool_calls=[{"index": 0, "id": "call_1", "type": "function", "function": {"name": "book", "arguments": '{"day": '}}]),
+    make_chunk(tool_calls=[{"index": 0, "function": {"arguments": '"明天"}'}}]),
+    make_chunk(finish_reason="tool_calls"),
+    make_chunk(usage={"prompt_tokens": 40, "completion_tokens": 12, "total_tokens": 52}),
+]
+
+
+class FakeChunkStream:
+    """与 SDK 的 AsyncStream 一致：可迭代片段，退出上下文时关闭响应"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+
+def make_provider(chunks=CHUNKS) -> OpenAIProvider:
+    provider = OpenAIProvider(Provider(id="openrouter", type=ProviderType.OPENAI, name="OpenRouter", api_key="k"))
+    provider.upstream = FakeChunkStream(chunks)
+
+    async def create(**kwargs):
+        return provider.upstream
+
+    provider.client.chat.completions.create = create
+    return provider
+
+
+def make_request() -> CompletionsRequest:
+    return CompletionsRequest(
+        id=uuid4(),
+        provider="openrouter",
+        model="anthropic/claude-haiku-4.5",
+        messages=[Message(role="user", content="帮我约明天")],
+    )
+
+
+class RecordingMeter:
+    def __init__(self):
+        self.records = []
+
+    def record(self, response, tags=None):
+        self.records.append((response, tags if tags is not None else current_usage_tags()))
+
+
+@pytest.fixture
+def meter(monkeypatch):
+    recording = RecordingMeter()
+    monkeypatch.setattr(client_module, "usage_meter", recording)
+    monkeypatch.setattr(mas_config, "LLM_USAGE_METERING_ENABLED", True)
+    monkeypatch.setattr(mas_config, "LLM_ROUTING_ENABLED", False)
+    monkeypatch.setattr(client_module.cassette, "mode", "off")
+    return recording
+
+
+def make_client(provider: OpenAIProvider) -> LLMClient:
+    llm_client = LLMClient.__new__(LLMClient)
+    llm_client.active_providers = {"openrouter": provider}
+    llm_client.governor = Governor([])
+    llm_client.breakers = CircuitBreakers()
+    llm_client.retry_policy = RetryPolicy(max_attempts=1)
+    return llm_client
+
+
+class TestProviderStream:
+    """测试供应商流式聚合"""
+
+    @pytest.mark.asyncio
+    async def test_aggregates_text_tool_calls_and_usage(self):
+        chunks = [chunk async for chunk in make_provider().stream(make_request())]
+
+        assert "".join(chunk.content for chunk in chunks[:-1]) == "好的，为您预约"
+        assert [delta.arguments for chunk in chunks[:-1] if chunk.tool_calls for delta in chunk.tool_calls] == ['{"day": ', '"明天"}']
+
+        response = chunks[-1].response
+        assert response.content == "好的，为您预约"
+        assert response.tool_calls[0].id == "call_1"
+        assert response.tool_calls[0].arguments == {"day": "明天"}
+        assert response.finish_reason == "tool_calls"
+        assert (response.usage.input_tokens, response.usage.output_tokens) == (40, 12)
+
+
+class TestClientStream:
+    """测试客户端流式调用"""
+
+    @pytest.mark.asyncio
+    async def test_usage_recorded_once_with_scope(self, meter):
+        llm_client = make_client(make_provider())
+
+        with usage_scope(tenant_id="t1", node="sales"):
+            chunks = [chunk async for chunk in llm_client.stream(make_request())]
+
+        assert len(meter.records) == 1
+        response, tags = meter.records[0]
+        assert response is chunks[-1].response
+        assert response.usage.output_tokens == 12
+        assert tags == {"tenant_id": "t1", "node": "sales"}
+        assert llm_client.breakers.get("openrouter").state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_consumer_close_releases_upstream(self, meter):
+        provider = make_provider()
+        llm_client = make_client(provider)
+
+        stream = llm_client.stream(make_request())
+        assert (await anext(stream)).content == "好的，"
+        await stream.aclose()
+
+        assert provider.upstream.closed
+        assert meter.records == []
+        breaker = llm_client.breakers.get("openrouter")
+        assert breaker.failures == 0 and breaker.allow()
@@ -0,0 +1,78 @@
+"""
+Milvus搜索合并器测试
+
+验证并发查询被合并为一次多向量搜索，且结果按顺序分发回调用方。
+"""
+import asyncio
+
+import pytest
+
+from infra.ops.milvus_coalescer import MilvusSearchCoalescer
+
+
+class FakeMilvusClient:
+    """记录search调用的假客户端，每个向量返回以其首元素为id的命中"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def search(self, collection_name, data, limit, filter, output_fields):
+        self.calls.append((collection_name, len(data)))
+        if self.fail:
+            raise RuntimeError("milvus down")
+        return [[{"id": vec[0], "distance": 1.0, "entity": {}}] for vec in data]
+
+
+class TestMilvusSearchCoalescer:
+    """测试搜索合并"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_search(self):
+        client = FakeMilvusClient()
+        coalescer = MilvusSearchCoalescer(client, max_batch_size=16, max_wait_ms=5)
+
+        results = await asyncio.gather(*[
+            coalescer.search("memories_t1", [float(i)], limit=3)
+            for i in range(5)
+        ])
+
+        assert client.calls == [("memories_t1", 5)]
+        assert [hits[0]["id"] for hits in results] == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert coalescer.stats.avg_batch_size == 5
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_immediately(self):
+        client = FakeMilvusClient()
+        coalescer = MilvusSearchCoalescer(client, max_batch_size=2, max_wait_ms=1000)
+
+        await asyncio.wait_for(
+            asyncio.gather(*[coalescer.search("c", [float(i)], limit=1) for i in range(4)]),
+            timeout=0.5
+        )
+
+        assert client.calls == [("c", 2), ("c", 2)]
+
+    @pytest.mark.asyncio
+    async def test_different_collections_are_not_merged(self):
+        client = FakeMilvusClient()
+        coalescer = MilvusSearchCoalescer(client, max_wait_ms=1)
+
+        await asyncio.gather(
+            coalescer.search("a", [0.0], limit=1),
+            coalescer.search("b", [1.0], limit=1),
+        )
+
+        assert sorted(client.calls) == [("a", 1), ("b", 1)]
+
+    @pytest.mark.asyncio
+    async def test_failure_propagates_to_every_caller(self):
+        coalescer = MilvusSearchCoalescer(FakeMilvusClient(fail=True), max_wait_ms=1)
+
+        results = await asyncio.gather(
+            coalescer.search("c", [0.0], limit=1),
+            coalescer.search("c", [1.0], limit=1),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,126 @@
+"""
+Mock供应商测试
+
+验证延迟分布抽样、按Schema生成结构化输出与工具调用、输出可复现以及错误注入。
+"""
+import random
+from typing import Literal, Optional
+from uuid import uuid4
+
+import pytest
+from pydantic import BaseModel
+
+from config import mas_config
+from infra.runtimes.entities import CompletionsRequest, Provider, ProviderType
+from infra.runtimes.providers.mock import MockProvider, MockProviderError, sample_latency, sample_schema
+from libs.types import Message, ToolMessage
+
+
+class Indicators(BaseModel):
+    enthusiasm: float
+    concern: float
+
+
+class Analysis(BaseModel):
+    sentiment: Literal["positive", "negative", "neutral"]
+    score: float
+    name: Optional[str]
+    signals: list[str]
+    indicators: Indicators
+
+
+TOOLS = [{
+    "type": "function",
+    "function": {
+        "name": "search_products",
+        "description": "搜索商品",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "keyword": {"type": "string"},
+                "limit": {"type": "integer"},
+            },
+            "required": ["keyword"],
+        },
+    },
+}]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(mas_config, "LLM_MOCK_LATENCY_DISTRIBUTION", "fixed")
+    monkeypatch.setattr(mas_config, "LLM_MOCK_LATENCY_P50_MS", 0)
+    monkeypatch.setattr(mas_config, "LLM_MOCK_ERROR_RATE", 0.0)
+    monkeypatch.setattr(mas_config, "LLM_MOCK_TOOL_CALL_RATE", 1.0)
+    return MockProvider(Provider(id="openrouter", type=ProviderType.MOCK, name="Mock", api_key="mock"))
+
+
+def make_request(content: str = "这个多少钱", **kwargs) -> CompletionsRequest:
+    return CompletionsRequest(
+        id=uuid4(),
+        provider="openrouter",
+        model="anthropic/claude-haiku-4.5",
+        messages=[Message(role="system", content="你是销售"), Message(role="user", content=content)],
+        **kwargs
+    )
+
+
+class TestSampling:
+    """测试延迟与Schema抽样"""
+
+    def test_latency_distributions(self):
+        rng = random.Random(0)
+        assert sample_latency(rng, "fixed", 0.4, 1.2) == 0.4
+        assert all(0 <= sample_latency(rng, "uniform", 0.4, 1.2) <= 0.8 for _ in range(100))
+
+        samples = sorted(sample_latency(rng, "lognormal", 0.4, 1.2) for _ in range(2000))
+        assert 0.35 < samples[1000] < 0.45
+        assert 1.0 < samples[1900] < 1.45
+
+    def test_schema_sample_validates(self):
+        data = sample_schema(Analysis.model_json_schema(), random.Random(1))
+        result = Analysis.model_validate(data)
+        assert result.name is not None
+        assert 0 <= result.indicators.concern <= 1
+
+
+class TestMockProvider:
+    """测试模拟输出"""
+
+    @pytest.mark.asyncio
+    async def test_structured_output(self, provider):
+        response = await provider.completions_structured(make_request(output_model=Analysis))
+        assert isinstance(response.content, Analysis)
+        assert response.finish_reason == "stop"
+
+    @pytest.mark.asyncio
+    async def test_output_is_deterministic(self, provider):
+        first = await provider.completions(make_request(output_model=Analysis))
+        second = await provider.completions(make_request(output_model=Analysis))
+        assert first.content == second.content
+
+    @pytest.mark.asyncio
+    async def test_tool_call_then_text(self, provider):
+        request = make_request(tools=TOOLS, tool_choice="auto")
+        response = await provider.completions(request)
+        assert response.finish_reason == "tool_calls"
+        assert response.tool_calls[0].name == "search_products"
+        assert set(response.tool_calls[0].arguments) == {"keyword"}
+
+        request.messages.append(ToolMessage(role="tool", content="[]", tool_call_id=response.tool_calls[0].id))
+        final = await provider.completions(request)
+        assert final.tool_calls is None
+        assert "这个多少钱" in final.content
+
+    @pytest.mark.asyncio
+    async def test_stream_matches_completion(self, provider):
+        chunks = [chunk async for chunk in provider.stream(make_request())]
+        assert "".join(chunk.content for chunk in chunks) == chunks[-1].response.content
+        assert chunks[-1].response.usage.output_tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_error_injection(self, provider, monkeypatch):
+        monkeypatch.setattr(mas_config, "LLM_MOCK_ERROR_RATE", 1.0)
+        with pytest.raises(MockProviderError) as error:
+            await provider.completions(make_request())
+        assert error.value.status_code in (429, 500, 503)
@@ -0,0 +1,83 @@
+"""
+个性化推荐画像分段测试
+
+验证仅在大小写、空白或同义词上不同的画像共享同一缓存键，
+且查询文本与过滤条件使用与缓存键相同的规范化取值，过滤时按规范形式比较。
+"""
+import pytest
+
+from core.rag import ProductRecommender, ProductSearch, RecommendationRequest, RecommendationType, SearchResponse
+from core.rag.query_normalizer import QueryNormalizer
+from core.rag.vector_db import SearchResult
+from tests.conftest import FakeRedis
+
+
+SYNONYMS = {"default": {"油皮": "oily"}}
+
+
+class RecordingSearch(ProductSearch):
+    """记录查询，并对固定候选集应用过滤条件"""
+
+    def __init__(self, products):
+        self.normalizer = QueryNormalizer(SYNONYMS)
+        self.products = products
+        self.queries = []
+
+    async def search(self, query):
+        self.queries.append(query)
+        results = [SearchResult(product_id=p["id"], score=0.9, product_data=p) for p in self.products]
+        return SearchResponse(results=self._apply_filters(results, query.filters, query.tenant_id), query_embedding=[])
+
+
+def make_recommender(products) -> ProductRecommender:
+    recommender = ProductRecommender.__new__(ProductRecommender)
+    recommender.search = RecordingSearch(products)
+    recommender.redis_client = FakeRedis()
+    recommender.segment_cache_ttl = 60
+    recommender.strategy_weights = {RecommendationType.PERSONALIZED: 1.0}
+    return recommender
+
+
+def make_profile_request(**profile) -> RecommendationRequest:
+    return RecommendationRequest(
+        tenant_id="t1",
+        customer_id="c1",
+        rec_type=RecommendationType.PERSONALIZED,
+        context={"customer_profile": profile},
+    )
+
+
+class TestProfileSegment:
+    """测试画像分段的规范化一致性"""
+
+    @pytest.mark.asyncio
+    async def test_equivalent_profiles_share_key_and_filter(self):
+        recommender = make_recommender([
+            {"id": "p1", "skin_type_suitability": "Oily"},
+            {"id": "p2", "skin_type_suitability": "dry"},
+        ])
+
+        first = await recommender.recommend(make_profile_request(skin_type="Oily", skin_concerns=["Acne"]))
+        assert [r.product_id for r in first] == ["p1"]
+        query = recommender.search.queries[0]
+        assert query.filters == {"skin_type_suitability": "oily"}
+        assert query.text == "suitable for oily skin acne"
+
+        # 等价画像命中分段缓存，不再发起检索
+        second = await recommender.recommend(make_profile_request(skin_type=" oily ", skin_concerns="acne"))
+        assert [r.product_id for r in second] == ["p1"]
+        assert len(recommender.search.queries) == 1
+
+        third = await recommender.recommend(make_profile_request(skin_type="油皮", skin_concerns=["ACNE"]))
+        assert [r.product_id for r in third] == ["p1"]
+        assert len(recommender.search.queries) == 1
+
+    def test_segment_key_matches_filters(self):
+        recommender = make_recommender([])
+        request = make_profile_request()
+        keys, filters = set(), set()
+        for skin_type in ("Oily", "oily", "OILY", "油皮"):
+            segment = recommender._profile_segment({"skin_type": skin_type}, "t1")
+            keys.add(recommender._segment_cache_key(request, segment, 0))
+            filters.add(recommender._build_profile_filters(segment)["skin_type_suitability"])
+        assert len(keys) == len(filters) == 1
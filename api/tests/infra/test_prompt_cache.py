@@ -0,0 +1,51 @@
+"""
+提示词缓存断点测试
+
+验证稳定前缀的断点只落在前导system消息上。
+"""
+from uuid import uuid4
+
+from infra.runtimes.entities import CompletionsRequest, Provider, ProviderType
+from infra.runtimes.providers import BaseProvider
+from libs.types import Message
+
+
+class DummyProvider(BaseProvider):
+    async def completions(self, request):
+        pass
+
+    def _format_message_content(self, content):
+        return content
+
+
+def make_request(messages, prefix: int) -> CompletionsRequest:
+    return CompletionsRequest(
+        id=uuid4(),
+        provider="anthropic",
+        model="claude-haiku-4-5",
+        messages=messages,
+        prompt_cache_prefix=prefix,
+    )
+
+
+PERSONA = Message(role="system", content="人设")
+STRATEGY = Message(role="system", content="当轮策略")
+USER = Message(role="user", content="你好")
+
+
+class TestCacheBreakpoint:
+    """测试缓存断点计算"""
+
+    def setup_method(self):
+        self.provider = DummyProvider(Provider(id="anthropic", type=ProviderType.ANTHROPIC, name="Anthropic", api_key="test"))
+
+    def test_disabled_without_prefix(self):
+        assert self.provider._cache_breakpoint(make_request([PERSONA, USER], 0)) is None
+
+    def test_breakpoint_on_last_prefix_message(self):
+        assert self.provider._cache_breakpoint(make_request([PERSONA, STRATEGY, USER], 1)) == 0
+        assert self.provider._cache_breakpoint(make_request([PERSONA, STRATEGY, USER], 2)) == 1
+
+    def test_prefix_must_be_system_messages(self):
+        assert self.provider._cache_breakpoint(make_request([PERSONA, USER], 2)) is None
+        assert self.provider._cache_breakpoint(make_request([USER], 5)) is None
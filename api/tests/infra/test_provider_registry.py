@@ -0,0 +1,63 @@
+"""
+LLM供应商注册表测试
+
+验证同一接口地址的供应商共享连接池、不同地址各自独立，
+以及关闭时每个连接池只关闭一次。
+"""
+import httpx
+import pytest
+
+from infra.runtimes.entities import Provider, ProviderType
+from infra.runtimes.registry import ProviderRegistry
+
+
+def make_provider(provider_id: str, base_url=None, provider_type=ProviderType.OPENAI) -> Provider:
+    return Provider(id=provider_id, type=provider_type, name=provider_id, api_key="k", base_url=base_url)
+
+
+PROVIDERS = [
+    make_provider("openrouter", "https://openrouter.ai/api/v1"),
+    make_provider("openrouter-batch", "https://openrouter.ai/api/v1/"),
+    make_provider("openai", "https://api.openai.com/v1"),
+    make_provider("openai-default"),
+]
+
+
+class TestSharedClients:
+    """测试连接池共享"""
+
+    def test_one_client_per_base_url(self):
+        registry = ProviderRegistry()
+        providers = registry.get_providers(PROVIDERS)
+
+        clients = {provider_id: provider.client._client for provider_id, provider in providers.items()}
+        assert clients["openrouter"] is clients["openrouter-batch"]
+        assert clients["openrouter"] is not clients["openai"]
+        assert clients["openai-default"] is not clients["openai"]
+        assert len(registry._http_clients) == 3
+
+        # 再次获取不新建连接池
+        registry.get_providers(PROVIDERS)
+        assert len(registry._http_clients) == 3
+
+    def test_default_url_keyed_by_type(self):
+        openai_key = ProviderRegistry._client_key(make_provider("a"))
+        anthropic_key = ProviderRegistry._client_key(make_provider("b", provider_type=ProviderType.ANTHROPIC))
+        assert openai_key != anthropic_key
+
+    @pytest.mark.asyncio
+    async def test_aclose_closes_each_client_once(self, monkeypatch):
+        registry = ProviderRegistry()
+        registry.get_providers(PROVIDERS)
+        closed = []
+
+        async def aclose(self):
+            closed.append(self)
+
+        monkeypatch.setattr(httpx.AsyncClient, "aclose", aclose)
+        clients = list(registry._http_clients.values())
+        await registry.aclose()
+
+        assert len(closed) == len(clients) == 3
+        assert {id(client) for client in closed} == {id(client) for client in clients}
+        assert registry._http_clients == {} and registry._providers == {}
@@ -0,0 +1,125 @@
+"""
+查询规范化测试
+
+验证仅在空白、全角、标点、大小写或同义词上不同的查询得到相同的规范形式，
+以及规范化结果再次规范化保持不变（规范词包含别名时不被重复改写）。
+规范形式只用于缓存键，embedding 输入保持原文。
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from core.rag.embedding import EmbeddingGenerator
+from core.rag.query_normalizer import SYNONYMS_PATH, QueryNormalizer
+from utils import load_yaml_file
+
+
+SYNONYMS = {
+    "default": {"玻尿酸": "透明质酸", "HA": "透明质酸", "sunscreen": "防晒"},
+    "tenant_a": {"水光针": "透明质酸"},
+}
+
+
+class TestQueryNormalizer:
+    """测试查询规范化"""
+
+    def test_whitespace_case_and_punctuation_fold(self):
+        normalizer = QueryNormalizer()
+        assert normalizer.normalize("  Hello，World！ ") == normalizer.normalize("hello world")
+
+    def test_full_width_characters_fold(self):
+        normalizer = QueryNormalizer()
+        assert normalizer.normalize("ＳＰＦ５０") == "spf50"
+
+    def test_default_synonyms_apply(self):
+        normalizer = QueryNormalizer(SYNONYMS)
+        assert normalizer.normalize("玻尿酸精华") == normalizer.normalize("HA 精华") == "透明质酸精华"
+
+    def test_cjk_latin_spacing_deterministic(self):
+        normalizer = QueryNormalizer()
+        assert normalizer.normalize("SPF50 防晒 推荐") == normalizer.normalize("spf50防晒推荐") == "spf50防晒推荐"
+        assert normalizer.normalize("vitamin  c") == "vitamin c"
+
+    def test_latin_synonyms_match_whole_words_only(self):
+        normalizer = QueryNormalizer(SYNONYMS)
+        assert normalizer.normalize("hand cream") == "hand cream"
+        assert normalizer.normalize("Sunscreen!") == "防晒"
+
+    def test_tenant_synonyms_extend_default(self):
+        normalizer = QueryNormalizer(SYNONYMS)
+        assert normalizer.normalize("水光针", tenant_id="tenant_a") == "透明质酸"
+        assert normalizer.normalize("玻尿酸", tenant_id="tenant_a") == "透明质酸"
+        assert normalizer.normalize("水光针", tenant_id="tenant_b") == "水光针"
+
+
+QUERIES = [
+    "敏感肌肤用什么面霜",
+    "敏感肌用什么面霜",
+    "保湿面霜推荐",
+    "保湿霜推荐",
+    "油性肌肤 防晒乳",
+    "Sunscreen 乳",
+    "Vitamin C serum 和烟酰胺能一起用吗",
+    "维生素c精华",
+    "a醇 retinol 晚上用",
+    "HA 玻尿酸 洁面乳",
+]
+
+
+@pytest.fixture(scope="module")
+def normalizer():
+    return QueryNormalizer(load_yaml_file(SYNONYMS_PATH))
+
+
+class TestIdempotence:
+    """测试默认同义词表下的幂等性"""
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_normalize_twice(self, normalizer, query):
+        once = normalizer.normalize(query)
+        assert normalizer.normalize(once) == once
+
+    def test_canonical_containing_alias_kept(self, normalizer):
+        assert normalizer.normalize("敏感肌肤") == "敏感肌肤"
+        assert normalizer.normalize("敏感肌") == "敏感肌肤"
+        assert normalizer.normalize("保湿霜") == "保湿霜"
+        assert normalizer.normalize("保湿面霜") == "保湿霜"
+        assert normalizer.normalize("油性肌肤") == normalizer.normalize("油皮") == "油性肌肤"
+
+    @pytest.mark.parametrize("query, expected", [
+        ("环保面霜推荐", "环保保湿霜推荐"),
+        ("确保面霜", "确保保湿霜"),
+        ("控油油皮", "控油油性肌肤"),
+        ("不干干皮", "不干干性肌肤"),
+    ])
+    def test_preceding_text_not_absorbed(self, normalizer, query, expected):
+        assert normalizer.normalize(query) == expected
+        assert normalizer.normalize(expected) == expected
+
+
+class TestEmbeddingInput:
+    """测试 embedding 输入与缓存键"""
+
+    @pytest.mark.asyncio
+    async def test_raw_text_embedded_canonical_cached(self):
+        inputs, store = [], {}
+
+        async def create(input, model):
+            inputs.append(input)
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[0.1, 0.2])])
+
+        async def get(key):
+            return store.get(key)
+
+        async def setex(key, ttl, value):
+            store[key] = value
+
+        generator = EmbeddingGenerator()
+        generator.normalizer = QueryNormalizer(SYNONYMS)
+        generator.llm_client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+        generator.redis_client = SimpleNamespace(get=get, setex=setex)
+
+        first = await generator.generate("玻尿酸 精华")
+        second = await generator.generate("HA精华")
+        assert inputs == ["玻尿酸 精华"]
+        assert not first.cache_hit and second.cache_hit
@@ -0,0 +1,90 @@
+"""
+OpenRouter结构化输出容错测试
+
+验证 json_object 模式下字段缺失的回复不抛错，而是返回原始JSON，
+由情感/意向分析的规范化逻辑补齐默认值。
+"""
+import json
+from uuid import uuid4
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from core.agents.intent.agent import IntentAgent
+from core.agents.intent.schemas import IntentAnalysisOutput
+from core.agents.sentiment.schemas import SentimentAnalysisOutput
+from core.agents.sentiment.sentiment_analyzer import LLMSentimentAnalyzer
+from infra.runtimes.entities import CompletionsRequest, Provider, ProviderType
+from infra.runtimes.providers.openai import OpenAIProvider
+from libs.types import Message
+
+
+def make_provider(reply: dict) -> OpenAIProvider:
+    provider = OpenAIProvider(Provider(id="openrouter", type=ProviderType.OPENAI, name="OpenRouter", api_key="k"))
+
+    async def create(**kwargs):
+        return ChatCompletion.model_validate({
+            "id": "c1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": kwargs["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": f"```json\n{json.dumps(reply, ensure_ascii=False)}\n```"},
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+
+    provider.client.chat.completions.create = create
+    return provider
+
+
+def make_request(output_model) -> CompletionsRequest:
+    return CompletionsRequest(
+        id=uuid4(),
+        provider="openrouter",
+        model="anthropic/claude-haiku-4.5",
+        messages=[Message(role="user", content="这个面霜太贵了")],
+        output_model=output_model,
+    )
+
+
+class TestPartialReply:
+    """测试字段缺失的结构化回复"""
+
+    @pytest.mark.asyncio
+    async def test_complete_reply_validated(self):
+        reply = {
+            "sentiment": "negative",
+            "score": 0.6,
+            "urgency": "low",
+            "confidence": 0.8,
+            "emotional_indicators": {"enthusiasm": 0.1, "concern": 0.7, "satisfaction": 0.2},
+        }
+        response = await make_provider(reply).completions_structured(make_request(SentimentAnalysisOutput))
+        assert isinstance(response.content, SentimentAnalysisOutput)
+
+    @pytest.mark.asyncio
+    async def test_sentiment_missing_field(self):
+        reply = {"sentiment": "negative", "score": 0.6, "urgency": "low"}
+        response = await make_provider(reply).completions_structured(make_request(SentimentAnalysisOutput))
+        assert response.content == reply
+
+        analyzer = LLMSentimentAnalyzer("openrouter", "anthropic/claude-haiku-4.5", None, structured_output=True)
+        result = analyzer._validate_and_normalize(analyzer._parse_llm_response(response.content))
+        assert result["sentiment"] == "negative" and result["score"] == 0.6
+        assert result["confidence"] == 0.5 and result["emotional_indicators"] == {}
+
+    @pytest.mark.asyncio
+    async def test_intent_missing_section(self):
+        reply = {"assets_intent": {"detected": True, "urgency_level": "high", "confidence": 0.9}}
+        response = await make_provider(reply).completions_structured(make_request(IntentAnalysisOutput))
+        assert response.content == reply
+
+        agent = IntentAgent.__new__(IntentAgent)
+        agent.agent_name = "intent_analysis"
+        result = agent._parse_llm_response(response)
+        assert result["assets_intent"]["detected"] and result["assets_intent"]["urgency_level"] == "high"
+        assert result["appointment_intent"]["detected"] is False
+        assert result["audio_output_intent"]["trigger_reason"] == "none"
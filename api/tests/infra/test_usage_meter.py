@@ -0,0 +1,83 @@
+"""
+LLM用量计量测试
+
+验证上下文标签、进程内聚合、批量刷写与时间窗口查询。
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from infra.runtimes.metering import UsageMeter, current_usage_tags, usage_scope
+from tests.conftest import FakeRedis, make_response
+
+
+def make_meter() -> tuple[UsageMeter, FakeRedis]:
+    meter = UsageMeter()
+    redis_client = FakeRedis()
+    meter._redis = redis_client
+    return meter, redis_client
+
+
+def window() -> tuple[datetime, datetime]:
+    now = datetime.now(timezone.utc)
+    return now - timedelta(hours=1), now + timedelta(minutes=1)
+
+
+class TestUsageScope:
+    """测试计量标签上下文"""
+
+    def test_nested_scopes_merge(self):
+        with usage_scope(tenant_id="t1", node="sales"):
+            with usage_scope(node="intent", assistant_id=None):
+                assert current_usage_tags() == {"tenant_id": "t1", "node": "intent"}
+            assert current_usage_tags()["node"] == "sales"
+        assert current_usage_tags() == {}
+
+
+class TestUsageMeter:
+    """测试用量聚合与查询"""
+
+    @pytest.mark.asyncio
+    async def test_flush_and_query(self):
+        meter, _ = make_meter()
+        with usage_scope(tenant_id="t1", assistant_id="a1", node="sales"):
+            meter.record(make_response())
+            meter.record(make_response())
+        meter.record(make_response(), tags={"tenant_id": "t1", "assistant_id": "a1", "node": "intent"})
+
+        assert await meter.flush() == 2
+        rows = await meter.query("t1", *window(), group_by=["node"], granularity="total")
+
+        by_node = {row["node"]: row for row in rows}
+        assert by_node["sales"]["requests"] == 2
+        assert by_node["sales"]["input_tokens"] == 200
+        assert by_node["intent"]["output_tokens"] == 20
+        assert by_node["sales"]["cost"] == pytest.approx(0.002)
+
+    @pytest.mark.asyncio
+    async def test_query_includes_unflushed_usage(self):
+        meter, _ = make_meter()
+        meter.record(make_response(), tags={"tenant_id": "t1", "node": "sales"})
+        await meter.flush()
+        meter.record(make_response(), tags={"tenant_id": "t1", "node": "sales"})
+        meter.record(make_response(), tags={"tenant_id": "t2", "node": "sales"})
+
+        rows = await meter.query("t1", *window(), group_by=[], granularity="total")
+        assert len(rows) == 1
+        assert rows[0]["requests"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_pending(self):
+        meter, redis_client = make_meter()
+        meter.record(make_response(), tags={"tenant_id": "t1"})
+        redis_client.fail = True
+
+        assert await meter.flush() == 0
+        redis_client.fail = False
+        assert await meter.flush() == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_dimension_rejected(self):
+        meter, _ = make_meter()
+        with pytest.raises(ValueError):
+            await meter.query("t1", *window(), group_by=["tenant_id"])
@@ -0,0 +1,424 @@
+"""
+RAG基准测试工具
+
+生成可配置规模的合成化妆品目录，通过 `ProductIndexer` 写入本地向量后端，
+再将查询集回放到 `ProductSearch` 与 `ProductRecommender`，输出
+p50/p95延迟、吞吐量、缓存命中率与 recall@k。
+
+所有外部依赖均以进程内实现替代：
+- LocalVectorClient: 与MilvusClient接口一致的暴力检索向量库
+- FakeEmbedder: 确定性的哈希词袋嵌入
+- InMemoryRedis: 支持get/setex/incr的内存缓存
+
+本地向量库为暴力检索，绝对延迟反映的是RAG流水线自身的开销，而非Milvus。
+
+使用方式:
+    python -m tests.perf.rag_benchmark --products 2000 --queries 200 --repeat 3
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from core.rag import (
+    ProductIndexer,
+    ProductRecommender,
+    ProductSearch,
+    RecommendationRequest,
+    RecommendationType,
+    SearchQuery,
+)
+from core.rag.vector_db import MilvusDB
+from utils.metrics import metrics
+
+BRANDS = ["lumiere", "aqualis", "verdant", "rosane", "kiyora", "solenne", "mirabel", "havena"]
+CATEGORIES = ["cleanser", "toner", "serum", "moisturizer", "sunscreen", "mask", "essence", "eyecream"]
+SKIN_TYPES = ["oily", "dry", "combination", "sensitive", "normal"]
+CONCERNS = ["acne", "wrinkles", "dullness", "redness", "pores", "dehydration", "pigmentation", "firmness"]
+INGREDIENTS = ["niacinamide", "retinol", "ceramide", "squalane", "peptide", "centella", "salicylic", "panthenol"]
+
+
+# ==================== 本地后端 ====================
+
+# 拉丁词按单词切分；中文无词边界（规范化后的同义词为中文），按单字切分
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+
+class FakeEmbedder:
+    """
+    确定性哈希词袋嵌入
+
+    真实嵌入空间是各向异性的（所有文本共享一个公共方向），因此额外加入
+    一个恒定分量，使相关文本的相似度落在生产阈值（min_score=0.7）附近。
+    中文按单字计入词袋。
+    """
+
+    def __init__(self, dim: int = 128, common_weight: float = 3.0):
+        self.dim = dim
+        self.common_weight = common_weight
+        self.calls = 0
+
+    def embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+        vector[0] = self.common_weight
+        for token in set(_TOKEN_RE.findall(text.lower())):
+            bucket = int(hashlib.md5(token.encode()).hexdigest(), 16) % (self.dim - 1) + 1
+            vector[bucket] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector]
+
+    @property
+    def embeddings(self):
+        """兼容 `llm_client.embeddings.create(input=..., model=...)` 调用"""
+        return self
+
+    async def create(self, input: str, model: str):
+        self.calls += 1
+        return _EmbeddingResponse(data=[_EmbeddingData(embedding=self.embed(input))])
+
+
+@dataclass
+class _EmbeddingData:
+    embedding: list[float]
+
+
+@dataclass
+class _EmbeddingResponse:
+    data: list[_EmbeddingData]
+
+
+class LocalVectorClient:
+    """与MilvusClient调用方式一致的内存向量库（内积检索）"""
+
+    def __init__(self):
+        self._collections: dict[str, dict[str, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.search_calls = 0
+
+    def has_collection(self, collection_name: str) -> bool:
+        return collection_name in self._collections
+
+    def create_collection(self, collection_name: str, **kwargs):
+        with self._lock:
+            self._collections.setdefault(collection_name, {})
+
+    def upsert(self, collection_name: str, data: list[dict[str, Any]]):
+        with self._lock:
+            collection = self._collections.setdefault(collection_name, {})
+            for row in data:
+                collection[row["id"]] = row
+
+    def delete(self, collection_name: str, ids: list[str]):
+        with self._lock:
+            for row_id in ids:
+                self._collections.get(collection_name, {}).pop(row_id, None)
+
+    def get_collection_stats(self, collection_name: str) -> dict[str, Any]:
+        return {"row_count": len(self._collections.get(collection_name, {}))}
+
+    def search(
+        self,
+        collection_name: str,
+        data: list[list[float]],
+        limit: int,
+        filter: str = "",
+        output_fields: Optional[list[str]] = None,
+    ) -> list[list[dict[str, Any]]]:
+        self.search_calls += 1
+        with self._lock:
+            rows = list(self._collections.get(collection_name, {}).values())
+
+        results = []
+        for query in data:
+            scored = [
+                (sum(q * v for q, v in zip(query, row["vector"])), row)
+                for row in rows
+            ]
+            scored.sort(key=lambda item: item[0], reverse=True)
+            results.append([
+                {"id": row["id"], "distance": score, "entity": {"product_data": row["product_data"]}}
+                for score, row in scored[:limit]
+            ])
+        return results
+
+
+class InMemoryRedis:
+    """基准测试用内存缓存"""
+
+    def __init__(self):
+        self._data: dict[str, Any] = {}
+
+    async def get(self, key: str):
+        return self._data.get(key)
+
+    async def setex(self, key: str, ttl: int, value: Any):
+        self._data[key] = value
+
+    async def incr(self, key: str) -> int:
+        self._data[key] = str(int(self._data.get(key) or 0) + 1)
+        return int(self._data[key])
+
+
+# ==================== 合成数据 ====================
+
+def generate_catalog(size: int, seed: int = 42) -> list[dict[str, Any]]:
+    """生成合成化妆品目录"""
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(size):
+        brand = rng.choice(BRANDS)
+        category = rng.choice(CATEGORIES)
+        catalog.append({
+            "id": f"p{i:06d}",
+            "name": f"{brand} {category}",
+            "brand": brand,
+            "category": category,
+            "benefits": rng.sample(CONCERNS, 2),
+            "key_ingredients": rng.sample(INGREDIENTS, 2),
+            "skin_type_suitability": rng.choice(SKIN_TYPES),
+            "price": rng.randint(80, 1200),
+        })
+    return catalog
+
+
+@dataclass
+class LabeledQuery:
+    """带标注相关集合的查询"""
+    text: str
+    relevant: set[str]
+    profile: Optional[dict[str, Any]] = None
+
+
+def build_search_queries(catalog: list[dict[str, Any]], count: int, seed: int = 7) -> list[LabeledQuery]:
+    """“功效+品类”查询，相关集合为同时满足两者的商品"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        concern, category = rng.choice(CONCERNS), rng.choice(CATEGORIES)
+        relevant = {
+            p["id"] for p in catalog
+            if p["category"] == category and concern in p["benefits"]
+        }
+        if relevant:
+            queries.append(LabeledQuery(text=f"{concern} {category}", relevant=relevant))
+    return queries
+
+
+def build_profile_queries(catalog: list[dict[str, Any]], count: int, seed: int = 11) -> list[LabeledQuery]:
+    """客户画像查询，相关集合为肤质匹配且覆盖其肌肤问题的商品"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        skin_type, concern = rng.choice(SKIN_TYPES), rng.choice(CONCERNS)
+        relevant = {
+            p["id"] for p in catalog
+            if p["skin_type_suitability"] == skin_type and concern in p["benefits"]
+        }
+        if relevant:
+            queries.append(LabeledQuery(
+                text=f"{skin_type} {concern}",
+                relevant=relevant,
+                profile={"skin_type": skin_type, "skin_concerns": [concern]},
+            ))
+    return queries
+
+
+# ==================== 基准执行 ====================
+
+@dataclass
+class BenchmarkReport:
+    """单个场景的基准结果"""
+    scenario: str
+    queries: int
+    p50_ms: float
+    p95_ms: float
+    throughput_qps: float
+    recall_at_k: float
+    top_k: int
+    cache_hit_ratio: dict[str, float] = field(default_factory=dict)
+
+    def format(self) -> str:
+        ratios = ", ".join(f"{k}={v:.1%}" for k, v in self.cache_hit_ratio.items()) or "-"
+        return (
+            f"{self.scenario:<14} n={self.queries:<6} "
+            f"p50={self.p50_ms:7.2f}ms p95={self.p95_ms:7.2f}ms "
+            f"qps={self.throughput_qps:8.1f} recall@{self.top_k}={self.recall_at_k:.3f} "
+            f"cache[{ratios}]"
+        )
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def recall_at_k(retrieved: list[str], relevant: set[str], k: int) -> float:
+    """top-k中命中的相关商品数 / min(k, 相关集合大小)"""
+    if not relevant:
+        return 0.0
+    hits = len(set(retrieved[:k]) & relevant)
+    return hits / min(k, len(relevant))
+
+
+class RagBenchmark:
+    """在本地后端上组装RAG组件并回放查询"""
+
+    def __init__(self, tenant_id: str = "bench", top_k: int = 10, concurrency: int = 8):
+        self.tenant_id = tenant_id
+        self.top_k = top_k
+        self.concurrency = concurrency
+
+        self.embedder = FakeEmbedder()
+        self.vector_client = LocalVectorClient()
+        self.redis = InMemoryRedis()
+
+        self.indexer = ProductIndexer()
+        self.search = ProductSearch()
+        self.recommender = ProductRecommender(tenant_id=tenant_id)
+        self.recommender.search = self.search
+
+        for component in (self.indexer, self.search):
+            component.embedding_gen.llm_client = self.embedder
+            component.embedding_gen.redis_client = self.redis
+            component.vector_db = MilvusDB(client=self.vector_client)
+        self.indexer.redis_client = self.redis
+        self.search.redis_client = self.redis
+        self.recommender.redis_client = self.redis
+
+    async def index(self, catalog: list[dict[str, Any]]):
+        stats = await self.indexer.index_products(self.tenant_id, catalog)
+        if stats.success != len(catalog):
+            raise RuntimeError(f"索引失败: {stats}")
+        return stats
+
+    async def _replay(self, scenario: str, queries: list[LabeledQuery], run_one) -> BenchmarkReport:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies: list[float] = []
+        recalls: list[float] = []
+
+        async def timed(query: LabeledQuery):
+            async with semaphore:
+                start = time.perf_counter()
+                retrieved = await run_one(query)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(recall_at_k(retrieved, query.relevant, self.top_k))
+
+        start = time.perf_counter()
+        await asyncio.gather(*[timed(q) for q in queries])
+        elapsed = time.perf_counter() - start
+
+        return BenchmarkReport(
+            scenario=scenario,
+            queries=len(queries),
+            p50_ms=percentile(latencies, 50),
+            p95_ms=percentile(latencies, 95),
+            throughput_qps=len(queries) / elapsed if elapsed else 0.0,
+            recall_at_k=sum(recalls) / len(recalls) if recalls else 0.0,
+            top_k=self.top_k,
+            cache_hit_ratio={
+                cache: metrics.hit_ratio("rag_cache_requests", cache=cache)
+                for cache in ("embedding", "search", "segment")
+                if metrics.get("rag_cache_requests", cache=cache, result="hit")
+                or metrics.get("rag_cache_requests", cache=cache, result="miss")
+            },
+        )
+
+    async def run_search(self, queries: list[LabeledQuery]) -> BenchmarkReport:
+        metrics.reset()
+
+        async def run_one(query: LabeledQuery) -> list[str]:
+            response = await self.search.search(SearchQuery(
+                text=query.text, tenant_id=self.tenant_id, top_k=self.top_k
+            ))
+            return [r.product_id for r in response.results]
+
+        return await self._replay("search", queries, run_one)
+
+    async def run_personalized(self, queries: list[LabeledQuery]) -> BenchmarkReport:
+        metrics.reset()
+
+        async def run_one(query: LabeledQuery) -> list[str]:
+            recommendations = await self.recommender.recommend(RecommendationRequest(
+                customer_id="bench-customer",
+                tenant_id=self.tenant_id,
+                rec_type=RecommendationType.PERSONALIZED,
+                context={"customer_profile": query.profile},
+                max_results=self.top_k,
+            ))
+            return [r.product_id for r in recommendations]
+
+        return await self._replay("personalized", queries, run_one)
+
+
+async def run_benchmark(
+    products: int = 1000,
+    queries: int = 100,
+    repeat: int = 3,
+    top_k: int = 10,
+    concurrency: int = 8,
+    seed: int = 42,
+) -> list[BenchmarkReport]:
+    """
+    执行完整基准
+
+    Args:
+        products: 合成目录规模
+        queries: 每个场景的去重查询数
+        repeat: 查询集回放轮数（首轮冷缓存，其后热缓存）
+        top_k: recall@k 中的k
+        concurrency: 并发查询数
+        seed: 随机种子
+
+    Returns:
+        list[BenchmarkReport]: 各场景结果
+    """
+    catalog = generate_catalog(products, seed)
+    bench = RagBenchmark(top_k=top_k, concurrency=concurrency)
+    await bench.index(catalog)
+
+    rng = random.Random(seed)
+    search_queries = build_search_queries(catalog, queries, seed) * repeat
+    profile_queries = build_profile_queries(catalog, queries, seed) * repeat
+    rng.shuffle(search_queries)
+    rng.shuffle(profile_queries)
+
+    return [
+        await bench.run_search(search_queries),
+        await bench.run_personalized(profile_queries),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG基准测试")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    reports = asyncio.run(run_benchmark(
+        products=args.products,
+        queries=args.queries,
+        repeat=args.repeat,
+        top_k=args.top_k,
+        concurrency=args.concurrency,
+        seed=args.seed,
+    ))
+    for report in reports:
+        print(report.format())
+
+
+if __name__ == "__main__":
+    main()
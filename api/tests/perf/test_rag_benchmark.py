@@ -0,0 +1,80 @@
+"""
+RAG基准回归测试
+
+在小规模合成目录上运行基准，检索质量或缓存命中率回退时失败。
+"""
+
+import pytest
+import pytest_asyncio
+
+from core.rag import RecommendationRequest, RecommendationType
+from tests.perf.rag_benchmark import (
+    RagBenchmark,
+    build_profile_queries,
+    build_search_queries,
+    generate_catalog,
+    recall_at_k,
+)
+from utils import get_component_logger
+from utils.metrics import metrics
+
+logger = get_component_logger(__name__)
+
+
+class TestRagBenchmark:
+    """RAG基准回归测试类"""
+
+    @pytest_asyncio.fixture
+    async def bench(self):
+        catalog = generate_catalog(300)
+        bench = RagBenchmark(top_k=10, concurrency=4)
+        await bench.index(catalog)
+        bench.catalog = catalog
+        return bench
+
+    def test_recall_at_k(self):
+        assert recall_at_k(["a", "b", "c"], {"a", "c", "x"}, k=2) == 0.5
+        assert recall_at_k(["a", "b"], {"a"}, k=10) == 1.0
+        assert recall_at_k(["a"], set(), k=10) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_search_quality_and_cache(self, bench):
+        queries = build_search_queries(bench.catalog, 30) * 2
+
+        report = await bench.run_search(queries)
+
+        # 固定种子下基线为 0.64，阈值留少量余量
+        assert report.recall_at_k >= 0.6, f"检索召回回退: {report.format()}"
+        assert report.cache_hit_ratio["search"] > 0
+        assert report.queries == len(queries) and 0 < report.p50_ms <= report.p95_ms
+        logger.info(report.format())
+
+    @pytest.mark.asyncio
+    async def test_personalized_segments_are_cached(self, bench):
+        queries = build_profile_queries(bench.catalog, 30) * 2
+
+        report = await bench.run_personalized(queries)
+
+        # 固定种子下基线为 0.38，阈值留少量余量
+        assert report.recall_at_k >= 0.35, f"画像推荐召回回退: {report.format()}"
+        assert report.cache_hit_ratio["segment"] >= 0.5
+        assert report.queries == len(queries) and 0 < report.p50_ms <= report.p95_ms
+        logger.info(report.format())
+
+    @pytest.mark.asyncio
+    async def test_reindex_invalidates_segment_cache(self, bench):
+        request = RecommendationRequest(
+            customer_id="c1",
+            tenant_id=bench.tenant_id,
+            rec_type=RecommendationType.PERSONALIZED,
+            context={"customer_profile": {"skin_type": "oily", "skin_concerns": ["acne"]}},
+        )
+        metrics.reset()
+
+        await bench.recommender.recommend(request)
+        await bench.recommender.recommend(request)
+        assert metrics.get("rag_cache_requests", cache="segment", result="hit") == 1
+
+        await bench.indexer.index_single_product(bench.tenant_id, bench.catalog[0])
+        await bench.recommender.recommend(request)
+        assert metrics.get("rag_cache_requests", cache="segment", result="miss") == 2
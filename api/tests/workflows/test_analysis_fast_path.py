@@ -0,0 +1,99 @@
+"""
+分析快速路径测试
+
+验证平凡输入识别、助手提问后的应答交给LLM、多模态输入不处理，以及影子采样。
+"""
+import pytest
+
+from config import mas_config
+from core.agents.analysis.fast_path import (
+    TrivialMatch,
+    analyze_with_fast_path,
+    fast_path_enabled,
+    trivial_classifier,
+)
+from libs.types import InputContent, InputType, Message
+
+
+def user(content) -> Message:
+    return Message(role="user", content=content)
+
+
+class TestClassify:
+    """测试平凡输入识别"""
+
+    @pytest.mark.parametrize("text, rule, sentiment", [
+        ("嗯嗯", "acknowledgement", "neutral"),
+        ("好的！", "acknowledgement", "neutral"),
+        ("OK", "acknowledgement", "neutral"),
+        ("谢谢您~", "thanks", "positive"),
+        ("哈哈哈", "laughter", "positive"),
+        ("在吗？", "greeting", "neutral"),
+        ("👍🏻", "emoji_acknowledgement", "positive"),
+        ("😊😊", "emoji_positive", "positive"),
+        ("😭", "emoji_negative", "negative"),
+    ])
+    def test_trivial(self, text, rule, sentiment):
+        match = trivial_classifier.classify([user(text)])
+        assert (match.rule, match.sentiment) == (rule, sentiment)
+
+    @pytest.mark.parametrize("text", ["好的，周六来", "多少钱", "😊😡", "  "])
+    def test_not_trivial(self, text):
+        assert trivial_classifier.classify([user(text)]) is None
+
+    def test_acknowledgement_after_question(self):
+        history = [Message(role="assistant", content="周六下午方便来店里吗？"), user("好的")]
+        assert trivial_classifier.classify([user("好的")], history) is None
+        assert trivial_classifier.classify([user("👍")], history) is None
+        assert trivial_classifier.classify([user("谢谢")], history).rule == "thanks"
+
+    def test_multimodal_skipped(self):
+        content = [
+            InputContent(type=InputType.TEXT, content="嗯"),
+            InputContent(type=InputType.AUDIO, content="https://example.com/a.mp3"),
+        ]
+        assert trivial_classifier.classify([user(content)]) is None
+
+    def test_result_schema(self):
+        match = trivial_classifier.classify([user("嗯")])
+        intent = match.intent_result()
+        assert intent["appointment_intent"]["recommendation"] == "no_appointment"
+        assert TrivialMatch.agrees_intent(intent)
+        assert match.sentiment_result()["total_tokens"] == 0
+
+
+class TestFastPath:
+    """测试快速路径与影子采样"""
+
+    def test_tenant_switch(self, monkeypatch):
+        monkeypatch.setattr(mas_config, "ANALYSIS_FAST_PATH_TENANTS", "t1")
+        assert fast_path_enabled("t1")
+        assert not fast_path_enabled("t2")
+
+    @pytest.mark.asyncio
+    async def test_hit_skips_llm(self, monkeypatch):
+        monkeypatch.setattr(mas_config, "ANALYSIS_FAST_PATH_SHADOW_RATE", 0.0)
+
+        async def analyze():
+            raise AssertionError("命中时不应调用LLM")
+
+        match = trivial_classifier.classify([user("嗯")])
+        result = await analyze_with_fast_path(
+            "sentiment_analysis", match, TrivialMatch.sentiment_result, analyze,
+            lambda result, match: match.agrees_sentiment(result)
+        )
+        assert result["analyzer"] == "TrivialInputClassifier"
+
+    @pytest.mark.asyncio
+    async def test_shadow_uses_llm_result(self, monkeypatch):
+        monkeypatch.setattr(mas_config, "ANALYSIS_FAST_PATH_SHADOW_RATE", 1.0)
+
+        async def analyze():
+            return {"sentiment": "positive", "score": 0.7}
+
+        match = trivial_classifier.classify([user("嗯")])
+        result = await analyze_with_fast_path(
+            "sentiment_analysis", match, TrivialMatch.sentiment_result, analyze,
+            lambda result, match: match.agrees_sentiment(result)
+        )
+        assert result == {"sentiment": "positive", "score": 0.7}
@@ -0,0 +1,198 @@
+"""
+融合分析测试
+
+验证按租户选择分析节点，融合结果拆分后与 sentiment/intent 两个节点的输出格式一致，
+有效的旅程阶段提示被采用，以及节点超出时间预算被取消时本轮输入仍写入记忆。
+"""
+import asyncio
+import logging
+from uuid import uuid4
+
+import pytest
+
+from config import mas_config
+from core.agents import FusedAnalysisAgent, IntentAgent, fused_analysis_enabled
+from core.agents.analysis.agent import FUSED_MODEL, FUSED_PROVIDER
+from core.agents.analysis.schemas import FusedAnalysisOutput
+from core.agents.sentiment.sentiment_analyzer import LLMSentimentAnalyzer
+from core.entities import WorkflowExecutionModel
+from core.graphs.chat_workflow import ChatWorkflow
+from infra.runtimes import LLMResponse, TokenUsage
+from libs.types import AgentNodeType, Message
+
+FUSED_RESULT = {
+    "sentiment": "positive",
+    "score": 0.8,
+    "urgency": "high",
+    "confidence": 0.9,
+    "emotional_indicators": {"enthusiasm": 0.9, "concern": 0.1, "satisfaction": 0.7},
+    "journey_hint": "decision",
+    "assets_intent": {
+        "detected": False,
+        "urgency_level": "medium",
+        "asset_types": [],
+        "priority_score": 0.2,
+        "confidence": 0.8,
+        "specific_requests": [],
+        "recommendation": "no_material",
+        "summary": "",
+    },
+    "appointment_intent": {
+        "detected": True,
+        "intent_strength": 0.9,
+        "time_window": "this_week",
+        "confidence": 0.9,
+        "signals": ["想这周来店里"],
+        "recommendation": "suggest_appointment",
+        "extracted_entities": {
+            "service": "补水护理",
+            "name": None,
+            "phone": None,
+            "time_expression": "周六",
+            "entity_confidence": {"service": 0.9, "name": None, "phone": None, "time_expression": 0.8},
+        },
+        "summary": "本周到店意向明确",
+    },
+    "audio_output_intent": {"detected": False, "confidence": 0.9, "trigger_reason": "none", "summary": ""},
+}
+
+
+@pytest.fixture
+def agent():
+    # 仅测试结果拆分，不初始化LLM客户端与记忆组件
+    intent_agent = IntentAgent.__new__(IntentAgent)
+    intent_agent.agent_name = "intent_analysis"
+
+    fused = FusedAnalysisAgent.__new__(FusedAnalysisAgent)
+    fused.agent_name = "fused_analysis"
+    fused.logger = logging.getLogger(__name__)
+    fused.intent_agent = intent_agent
+    fused.sentiment_parser = LLMSentimentAnalyzer(FUSED_PROVIDER, FUSED_MODEL, invoke_llm_fn=None)
+    return fused
+
+
+def make_response(content) -> LLMResponse:
+    return LLMResponse(
+        id=uuid4(),
+        content=content,
+        provider=FUSED_PROVIDER,
+        model=FUSED_MODEL,
+        usage=TokenUsage(input_tokens=900, output_tokens=300),
+    )
+
+
+def make_state(tenant_id: str) -> WorkflowExecutionModel:
+    return WorkflowExecutionModel(
+        workflow_id=uuid4(),
+        thread_id=uuid4(),
+        assistant_id=uuid4(),
+        tenant_id=tenant_id,
+        input=None,
+    )
+
+
+class TestTenantSelection:
+    """测试按租户选择融合分析"""
+
+    def test_enabled_tenants(self, monkeypatch):
+        monkeypatch.setattr(mas_config, "FUSED_ANALYSIS_TENANTS", "t1, t2")
+        assert fused_analysis_enabled("t1")
+        assert not fused_analysis_enabled("t3")
+
+        monkeypatch.setattr(mas_config, "FUSED_ANALYSIS_TENANTS", "*")
+        assert fused_analysis_enabled("t3")
+
+        monkeypatch.setattr(mas_config, "FUSED_ANALYSIS_TENANTS", "")
+        assert not fused_analysis_enabled("t1")
+
+    def test_route(self, monkeypatch):
+        monkeypatch.setattr(mas_config, "FUSED_ANALYSIS_TENANTS", "t1")
+        workflow = ChatWorkflow.__new__(ChatWorkflow)
+        workflow.enable_parallel = True
+
+        assert workflow._route_analysis(make_state("t1")) == [AgentNodeType.ANALYSIS]
+        assert workflow._route_analysis(make_state("t2")) == [AgentNodeType.SENTIMENT, AgentNodeType.INTENT]
+
+        workflow.enable_parallel = False
+        assert workflow._route_analysis(make_state("t2")) == [AgentNodeType.SENTIMENT]
+
+
+class TestSplitResponse:
+    """测试融合结果拆分"""
+
+    def test_structured(self, agent):
+        sentiment, intent = agent._split_response(make_response(FusedAnalysisOutput.model_validate(FUSED_RESULT)))
+
+        assert sentiment["sentiment"] == "positive"
+        assert sentiment["journey_hint"] == "decision"
+        assert sentiment["total_tokens"] == 1200
+        assert set(intent) >= {"assets_intent", "appointment_intent", "audio_output_intent"}
+        assert intent["appointment_intent"]["extracted_entities"]["time_expression"] == "周六"
+        assert "sentiment" not in intent
+
+    def test_text_is_normalized(self, agent):
+        content = '分析结果：{"sentiment": "happy", "score": 3, "assets_intent": {"detected": true}}'
+        sentiment, intent = agent._split_response(make_response(content))
+
+        assert sentiment["sentiment"] == "neutral"
+        assert sentiment["score"] == 1.0
+        assert intent["assets_intent"]["recommendation"] == "wait_for_confirmation"
+        assert intent["appointment_intent"]["detected"] is False
+
+    def test_unparseable_falls_back(self, agent):
+        sentiment, intent = agent._split_response(make_response("无法分析"))
+
+        assert sentiment["confidence"] == 0.3
+        assert intent["appointment_intent"]["recommendation"] == "no_appointment"
+        assert intent["error"] == "JSON解析失败"
+
+
+class TestJourneyStage:
+    """测试旅程阶段提示的采用"""
+
+    HISTORY = [Message(role="user", content="你好")]
+
+    @pytest.mark.parametrize("hint", ["decision", " Consideration "])
+    def test_valid_hint_used(self, agent, hint):
+        assert agent._journey_stage(hint, self.HISTORY) == hint.strip().lower()
+
+    @pytest.mark.parametrize("hint", [None, "", "purchase", 1])
+    def test_invalid_hint_falls_back_to_rounds(self, agent, hint):
+        assert agent._journey_stage(hint, self.HISTORY) == "awareness"
+        assert agent._journey_stage(hint, self.HISTORY * 6) == "decision"
+
+
+class SlowMemory:
+    """写入耗时的记忆管理器，记录写入的消息"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.stored = []
+
+    async def store_messages(self, tenant_id, thread_id, messages):
+        await asyncio.sleep(self.delay)
+        self.stored.append(messages)
+
+
+class TestInputStored:
+    """测试超时降级时的输入写入"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("store_delay", [0.0, 0.05])
+    async def test_input_stored_when_node_times_out(self, agent, store_delay):
+        agent.memory_manager = SlowMemory(store_delay)
+        agent._input_writes = set()
+
+        async def slow_process_input(customer_input, tenant_id):
+            await asyncio.sleep(10)
+
+        agent._process_input = slow_process_input
+        state = make_state("t1")
+        state.input = [Message(role="user", content="这周六能约补水护理吗")]
+
+        # 与节点执行一致：超出预算时取消分析，由 fallback_state 继续
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(agent.process_conversation(state), 0.01)
+        await asyncio.sleep(store_delay + 0.05)
+
+        assert agent.memory_manager.stored == [state.input]
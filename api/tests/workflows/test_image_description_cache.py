@@ -0,0 +1,124 @@
+"""
+图片描述缓存测试
+
+验证URL规范化与内容哈希、按租户的缓存时长、重复图片只调用一次LLM，以及多张图片并发描述且保持顺序。
+"""
+import asyncio
+import base64
+
+import pytest
+
+from config import mas_config
+from core.agents.sentiment.image_description_cache import (
+    ImageDescriptionCache,
+    image_cache_ttl,
+    image_digest,
+    normalize_image_url,
+)
+from core.agents.sentiment.multimodal_input_processor import MultimodalInputProcessor
+from libs.types import InputContent, InputType
+
+
+@pytest.fixture
+def cache(monkeypatch, fake_redis):
+    monkeypatch.setattr(mas_config, "IMAGE_DESCRIPTION_CACHE_TTL_HOURS", 24)
+    monkeypatch.setattr(mas_config, "IMAGE_DESCRIPTION_CACHE_TENANT_TTL_HOURS", "t_off:0,t_short:0.5")
+    cache = ImageDescriptionCache()
+    cache._redis = fake_redis
+    return cache
+
+
+def counting_describe(calls: list, result: str = "一瓶精华液"):
+    async def describe():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return result
+    return describe
+
+
+class TestDigest:
+    """测试缓存键"""
+
+    def test_signed_urls_share_digest(self):
+        a = "https://CDN.example.com/p/1.jpg?Expires=1&OSSAccessKeyId=k&Signature=s&w=200"
+        b = "https://cdn.example.com/p/1.jpg?w=200&Expires=2&Signature=t#top"
+        assert normalize_image_url(a) == "https://cdn.example.com/p/1.jpg?w=200"
+        assert image_digest(a) == image_digest(b)
+        assert image_digest(a) != image_digest("https://cdn.example.com/p/2.jpg?w=200")
+
+    def test_data_url_content_hash(self):
+        payload = base64.b64encode(b"\x89PNG...").decode()
+        assert image_digest(f"data:image/png;base64,{payload}") == image_digest(f"data:image/jpeg;base64,{payload}")
+
+    def test_tenant_ttl(self, cache):
+        assert image_cache_ttl("t1") == 24 * 3600
+        assert image_cache_ttl("t_short") == 1800
+        assert image_cache_ttl("t_off") == 0
+
+
+class TestDescribe:
+    """测试缓存命中与并发共享"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_image_one_call(self, cache):
+        calls = []
+        url = "https://cdn.example.com/p/1.jpg?Signature=a"
+        results = await asyncio.gather(
+            cache.describe("t1", url, counting_describe(calls)),
+            cache.describe("t1", url, counting_describe(calls)),
+        )
+        again = await cache.describe("t1", "https://cdn.example.com/p/1.jpg?Signature=b", counting_describe(calls))
+
+        assert results == ["一瓶精华液", "一瓶精华液"] and again == "一瓶精华液"
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_tenant_disabled_and_failure_not_cached(self, cache):
+        calls = []
+        url = "https://cdn.example.com/p/1.jpg"
+        await cache.describe("t_off", url, counting_describe(calls))
+        await cache.describe("t_off", url, counting_describe(calls))
+        assert len(calls) == 2
+
+        async def fail():
+            raise ValueError("图片描述为空")
+
+        with pytest.raises(ValueError):
+            await cache.describe("t1", url, fail)
+        assert not cache._redis.store
+
+
+class TestProcessor:
+    """测试多张图片并发描述"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_in_order(self, cache, monkeypatch):
+        monkeypatch.setattr(mas_config, "MULTIMODAL_IMAGE_CONCURRENCY", 4)
+        processor = MultimodalInputProcessor.__new__(MultimodalInputProcessor)
+        processor.tenant_id = None
+        calls = []
+
+        async def describe(url):
+            calls.append(url)
+            await asyncio.sleep(0.1)
+            return f"描述{url[-5]}"
+
+        processor._llm_describe_image = describe
+        monkeypatch.setattr(
+            "core.agents.sentiment.multimodal_input_processor.image_description_cache", cache
+        )
+        content = [
+            InputContent(type=InputType.TEXT, content="看看这两个"),
+            InputContent(type=InputType.IMAGE, content="https://cdn.example.com/1.jpg"),
+            InputContent(type=InputType.IMAGE, content="https://cdn.example.com/2.jpg"),
+            InputContent(type=InputType.IMAGE, content="https://cdn.example.com/1.jpg"),
+        ]
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        text, context = await processor._extract_text_from_multimodal(content, "t1")
+
+        assert loop.time() - start < 0.18
+        assert text == "看看这两个 [图片: 描述1] [图片: 描述2] [图片: 描述1]"
+        assert len(calls) == 2
+        assert context["processing_method"] == "llm_extraction"
@@ -0,0 +1,92 @@
+"""
+节点时间预算测试
+
+验证节点预算由本轮截止时间推导、超出预算的节点以默认结果继续，以及分析节点默认结果使用兜底提示词。
+"""
+import asyncio
+import logging
+import time
+from uuid import uuid4
+
+import pytest
+
+from config import mas_config
+from core.agents import BaseAgent, FusedAnalysisAgent, IntentAgent
+from core.agents.sentiment.prompt_matcher import PromptMatcher
+from core.agents.sentiment.sentiment_analyzer import SentimentAnalyzer
+from core.entities import WorkflowExecutionModel
+from core.graphs.chat_workflow import ChatWorkflow
+from infra.runtimes import deadline_scope
+from libs.types import AgentNodeType
+
+
+class SlowAgent(BaseAgent):
+    async def process_conversation(self, state):
+        await asyncio.sleep(10)
+        return {"output": "不应返回"}
+
+    def fallback_state(self, state):
+        return {"output": "默认结果", "input_tokens": 0, "output_tokens": 0}
+
+
+def make_workflow(agent: BaseAgent, node: AgentNodeType) -> ChatWorkflow:
+    workflow = ChatWorkflow.__new__(ChatWorkflow)
+    workflow.agents = {node: agent}
+    return workflow
+
+
+def make_state() -> WorkflowExecutionModel:
+    return WorkflowExecutionModel(
+        workflow_id=uuid4(),
+        thread_id=uuid4(),
+        assistant_id=uuid4(),
+        tenant_id="t1",
+        input=None,
+    )
+
+
+class TestNodeBudget:
+    """测试节点预算"""
+
+    def test_derived_from_deadline(self, monkeypatch):
+        monkeypatch.setattr(mas_config, "WORKFLOW_ANALYSIS_BUDGET_RATIO", 0.5)
+        assert ChatWorkflow._node_budget(AgentNodeType.SENTIMENT) is None
+
+        with deadline_scope(10):
+            assert 4.5 < ChatWorkflow._node_budget(AgentNodeType.SENTIMENT) <= 5
+            assert 9.5 < ChatWorkflow._node_budget(AgentNodeType.SALES) <= 10
+
+    @pytest.mark.asyncio
+    async def test_timeout_uses_fallback(self):
+        workflow = make_workflow(SlowAgent.__new__(SlowAgent), AgentNodeType.SALES)
+
+        start = time.monotonic()
+        with deadline_scope(0.1):
+            result = await workflow._process_agent_node(make_state(), AgentNodeType.SALES)
+
+        assert result["output"] == "默认结果"
+        assert time.monotonic() - start < 1
+
+
+class TestFallbackState:
+    """测试分析节点默认结果"""
+
+    def test_fused_fallback(self):
+        intent_agent = IntentAgent.__new__(IntentAgent)
+        intent_agent.agent_name = "intent_analysis"
+
+        agent = FusedAnalysisAgent.__new__(FusedAnalysisAgent)
+        agent.agent_name = "fused_analysis"
+        agent.logger = logging.getLogger(__name__)
+        agent.intent_agent = intent_agent
+        agent.prompt_matcher = PromptMatcher()
+        agent.sentiment_analyzer = SentimentAnalyzer("openrouter", "openai/gpt-5-mini", invoke_llm_fn=None)
+
+        update = agent.fallback_state(make_state())
+
+        assert update["matched_prompt"]["matched_key"] == "fallback"
+        assert update["matched_prompt"]["system_prompt"]
+        assert update["sentiment_analysis"]["sentiment"] == "neutral"
+        assert not update["intent_analysis"]["appointment_intent"]["detected"]
+        assert update["actions"] == []
+        assert set(update["values"]["agent_responses"]) == {"fused_analysis", "intent_analysis"}
@@ -0,0 +1,102 @@
+"""
+流式编排测试
+
+验证工作流在生产者任务中执行：截止时间作用域不泄漏到消费方，
+超出硬性上限时返回错误状态，消费方提前关闭时取消仍在执行的工作流。
+"""
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from config import mas_config
+from core.app.orchestrator import Orchestrator
+from core.app.state_manager import StateManager
+from core.entities import WorkflowExecutionModel
+from infra.runtimes import resolve_deadline
+
+
+class FakeGraph:
+    """按 (mode, chunk) 产出流式事件，可在产出前等待"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.deadlines = []
+        self.cancelled = False
+
+    async def astream(self, state, config=None, stream_mode=None):
+        try:
+            self.deadlines.append(resolve_deadline())
+            yield "custom", {"event": "token", "data": {"content": "您好"}}
+            await asyncio.sleep(self.delay)
+            yield "updates", {"sales_agent": {}}
+            yield "values", {"final_response": "您好"}
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def make_orchestrator(graph: FakeGraph) -> Orchestrator:
+    orchestrator = Orchestrator.__new__(Orchestrator)
+    orchestrator.state_manager = StateManager()
+    orchestrator.graph = graph
+
+    async def finalize(workflow, result, start_time):
+        return result
+
+    orchestrator._finalize = finalize
+    return orchestrator
+
+
+def make_workflow(sla_seconds=None) -> SimpleNamespace:
+    return SimpleNamespace(workflow_id=uuid4(), tenant_id="t1", assistant_id=uuid4(), sla_seconds=sla_seconds)
+
+
+@pytest.fixture
+def initial_state(monkeypatch):
+    state = WorkflowExecutionModel(
+        workflow_id=uuid4(),
+        thread_id=uuid4(),
+        assistant_id=uuid4(),
+        tenant_id="t1",
+        input=None,
+    )
+    monkeypatch.setattr(StateManager, "create_initial_state", lambda self, workflow: state)
+    monkeypatch.setattr(mas_config, "WORKFLOW_DEADLINE_GRACE_SECONDS", 0.0)
+    return state
+
+
+class TestDispatchStream:
+    """测试流式编排"""
+
+    @pytest.mark.asyncio
+    async def test_events_and_result(self, initial_state):
+        graph = FakeGraph()
+        events = []
+        async for event in make_orchestrator(graph).dispatch_stream(make_workflow(sla_seconds=5)):
+            # 截止时间只在生产者任务内生效
+            assert resolve_deadline() is None
+            events.append(event)
+
+        assert [e["event"] for e in events] == ["token", "node_completed", "completed"]
+        assert events[-1]["data"] == {"final_response": "您好"}
+        assert graph.deadlines[0] is not None
+
+    @pytest.mark.asyncio
+    async def test_deadline_exceeded(self, initial_state):
+        events = [
+            event async for event in make_orchestrator(FakeGraph(delay=10)).dispatch_stream(make_workflow(sla_seconds=0.05))
+        ]
+
+        assert [e["event"] for e in events] == ["token", "completed"]
+        assert events[-1]["data"]["exception_count"] > 0
+
+    @pytest.mark.asyncio
+    async def test_consumer_close_cancels_producer(self, initial_state):
+        graph = FakeGraph(delay=10)
+        stream = make_orchestrator(graph).dispatch_stream(make_workflow(sla_seconds=30))
+
+        assert (await anext(stream))["event"] == "token"
+        await stream.aclose()
+        assert graph.cancelled
@@ -0,0 +1,89 @@
+"""
+未完成后台运行的周期扫描测试
+
+验证进程运行期间按租约周期持续认领过期运行、恢复不阻塞后续扫描，
+以及关闭时取消扫描与仍在执行的恢复任务。
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from config import mas_config
+
+
+class FakePendingRuns:
+    """依次返回预设的认领结果，之后返回空"""
+
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.claims = 0
+
+    async def claim_orphaned(self):
+        self.claims += 1
+        return self.batches.pop(0) if self.batches else []
+
+
+class FakeProcessor:
+    def __init__(self):
+        self.resumed = []
+        self.cancelled = []
+
+    async def resume_runs(self, orchestrator, workflows):
+        self.resumed.extend(workflows)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled.extend(workflows)
+            raise
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    fake = FakeProcessor()
+    monkeypatch.setattr(main, "BackgroundWorkflowProcessor", lambda: fake)
+    monkeypatch.setattr(mas_config, "WORKFLOW_RUN_LEASE_SECONDS", 0.01)
+    return fake
+
+
+def make_app():
+    return SimpleNamespace(state=SimpleNamespace(orchestrator=object()))
+
+
+class TestOrphanSweep:
+    """测试周期扫描"""
+
+    @pytest.mark.asyncio
+    async def test_claims_periodically_and_cancels_on_shutdown(self, processor, monkeypatch):
+        pending = FakePendingRuns([], ["run-1"], [], ["run-2"])
+        monkeypatch.setattr(main, "pending_runs", pending)
+
+        sweep = asyncio.create_task(main.sweep_orphaned_runs(make_app()))
+        await asyncio.sleep(0.1)
+
+        # 启动后出现的过期运行也被认领，且第一个恢复未结束时扫描仍在继续
+        assert pending.claims > 4
+        assert processor.resumed == ["run-1", "run-2"]
+
+        sweep.cancel()
+        await asyncio.gather(sweep, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert sorted(processor.cancelled) == ["run-1", "run-2"]
+
+    @pytest.mark.asyncio
+    async def test_claim_failure_does_not_stop_sweep(self, processor, monkeypatch):
+        pending = FakePendingRuns()
+
+        async def claim_orphaned():
+            pending.claims += 1
+            if pending.claims == 1:
+                raise ConnectionError("redis down")
+            return []
+
+        monkeypatch.setattr(main, "pending_runs", SimpleNamespace(claim_orphaned=claim_orphaned))
+        sweep = asyncio.create_task(main.sweep_orphaned_runs(make_app()))
+        await asyncio.sleep(0.05)
+        sweep.cancel()
+        await asyncio.gather(sweep, return_exceptions=True)
+        assert pending.claims > 1
@@ -0,0 +1,104 @@
+"""
+提示词匹配器测试
+
+验证二分查找的情感维度映射与原区间扫描一致、扁平表查表结果，以及配置文件修改后热重载、
+无效配置不替换当前配置。
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from config import mas_config
+from core.agents.sentiment.prompt_matcher import PromptMatcher
+
+DEFAULT_CONFIG = Path(__file__).parents[2] / "core" / "agents" / "sentiment" / "prompt_config.json"
+
+
+def scan_level(config: dict, score: float) -> str:
+    """原实现：逐个区间扫描"""
+    for level, dimension in config["dimensions"]["sentiment"].items():
+        min_score, max_score = dimension["range"]
+        if min_score <= score < max_score:
+            return level
+    return "high" if score == 1.0 else "medium"
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(mas_config, "PROMPT_CONFIG_RELOAD_INTERVAL_SECONDS", 0.01)
+    path = tmp_path / "prompt_config.json"
+    path.write_text(DEFAULT_CONFIG.read_text(encoding="utf-8"), encoding="utf-8")
+    return path
+
+
+def rewrite(path: Path, update) -> None:
+    config = json.loads(path.read_text(encoding="utf-8"))
+    update(config)
+    path.write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def expire_check(matcher: PromptMatcher) -> None:
+    matcher._next_check = 0
+
+
+class TestLookup:
+    """测试查表"""
+
+    @pytest.mark.parametrize("score", [-0.1, 0.0, 0.2, 0.35, 0.5, 0.6999, 0.7, 0.99, 1.0, 1.2])
+    def test_level_matches_scan(self, score):
+        matcher = PromptMatcher()
+        result = matcher.get_prompt(score, "consideration")
+
+        assert result["sentiment_level"] == scan_level(matcher.config, score)
+        assert result["matched_key"] == f"{result['sentiment_level']}_consideration"
+        assert result["system_prompt"] == matcher.config["prompt_matrix"][result["matched_key"]]["system_prompt"]
+
+    def test_unknown_stage_uses_fallback(self):
+        matcher = PromptMatcher()
+        result = matcher.get_prompt(0.5, "unknown")
+        assert result["system_prompt"] == matcher.config["fallback_prompt"]["system_prompt"]
+
+
+class TestHotReload:
+    """测试配置热重载"""
+
+    def test_reload_on_change(self, config_file):
+        matcher = PromptMatcher(str(config_file))
+
+        def update(config):
+            config["dimensions"]["sentiment"]["low"]["range"] = [0.0, 0.6]
+            config["dimensions"]["sentiment"]["medium"]["range"] = [0.6, 0.7]
+            config["prompt_matrix"]["low_decision"]["system_prompt"] = "新提示词"
+
+        assert matcher.get_prompt(0.5, "decision")["sentiment_level"] == "medium"
+        rewrite(config_file, update)
+        expire_check(matcher)
+
+        result = matcher.get_prompt(0.5, "decision")
+        assert result["sentiment_level"] == "low"
+        assert result["system_prompt"] == "新提示词"
+
+    def test_invalid_config_keeps_current(self, config_file):
+        matcher = PromptMatcher(str(config_file))
+        before = matcher.get_prompt(0.8, "awareness")
+
+        config_file.write_text("{invalid", encoding="utf-8")
+        expire_check(matcher)
+        assert matcher.get_prompt(0.8, "awareness") == before
+
+        config_file.write_text(DEFAULT_CONFIG.read_text(encoding="utf-8"), encoding="utf-8")
+        rewrite(config_file, lambda config: config.pop("prompt_matrix"))
+        expire_check(matcher)
+        assert matcher.get_prompt(0.8, "awareness") == before
+
+    def test_disabled(self, config_file, monkeypatch):
+        monkeypatch.setattr(mas_config, "PROMPT_CONFIG_RELOAD_INTERVAL_SECONDS", 0)
+        matcher = PromptMatcher(str(config_file))
+
+        rewrite(config_file, lambda config: config["fallback_prompt"].update(system_prompt="新兜底"))
+        expire_check(matcher)
+        assert matcher.get_fallback_prompt()["system_prompt"] != "新兜底"
@@ -0,0 +1,191 @@
+"""
+销售回复投机生成测试
+
+验证提示词分支键、流式片段缓冲，销售节点对投机结果的命中、未命中与冷启动处理，
+投机期间写入类工具推迟到命中后执行，以及提示词中本轮输入不重复、不缺失。
+"""
+import asyncio
+from collections import OrderedDict
+from uuid import uuid4
+
+import pytest
+
+from core.agents import SalesAgent
+from core.agents.sales.agent import _deferred_writes
+from core.agents.sales.speculation import Speculation, SpeculativeStream, speculation_key
+from core.entities import WorkflowExecutionModel
+from core.tools import tool_registry
+from infra.runtimes import LLMStreamChunk, ToolCallData
+from libs.types import Message
+from utils import get_component_logger
+
+PROMPT = {"matched_key": "high_consideration", "system_prompt": "积极推荐"}
+INTENT = {
+    "appointment_intent": {"detected": True, "recommendation": "suggest_appointment", "signals": ["想来店里"]},
+    "audio_output_intent": {"detected": False},
+}
+
+
+def make_state(matched_prompt=PROMPT, intent_analysis=INTENT) -> WorkflowExecutionModel:
+    return WorkflowExecutionModel(
+        workflow_id=uuid4(),
+        thread_id=uuid4(),
+        assistant_id=uuid4(),
+        tenant_id="t1",
+        input=None,
+        matched_prompt=matched_prompt,
+        intent_analysis=intent_analysis,
+    )
+
+
+def make_agent() -> SalesAgent:
+    agent = SalesAgent.__new__(SalesAgent)
+    agent._speculations = {}
+    agent._tool_results = OrderedDict()
+    agent.logger = get_component_logger(__name__)
+    return agent
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    calls = []
+
+    async def store(tenant_id, thread_id, content, **kwargs):
+        calls.append(content)
+        return {"success": True, "doc_id": "d1"}
+
+    monkeypatch.setitem(tool_registry.TOOL_HANDLERS, "store_episodic_memory", store)
+    return calls
+
+
+async def speculate_write(agent: SalesAgent, speculation: Speculation, content: str):
+    """在投机任务上下文中发起一次写入类工具调用"""
+    async def run():
+        _deferred_writes.set(speculation.deferred_writes)
+        tool_call = ToolCallData(id="call_1", name="store_episodic_memory", arguments={"content": content})
+        return await agent._call_tool(tool_call, "t1", uuid4())
+
+    return await asyncio.create_task(run())
+
+
+async def register(agent: SalesAgent, state: WorkflowExecutionModel, snapshot, result, delay: float = 0.0) -> Speculation:
+    async def run():
+        await asyncio.sleep(delay)
+        return result
+
+    speculation = Speculation(snapshot=snapshot, task=asyncio.create_task(run()))
+    speculation.loaded.set()
+    agent._speculations[state.workflow_id] = speculation
+    return speculation
+
+
+class TestSpeculationKey:
+    """测试提示词分支键"""
+
+    def test_details_ignored(self):
+        intent = {**INTENT, "appointment_intent": {**INTENT["appointment_intent"], "signals": ["问地址"]}}
+        assert speculation_key(PROMPT, INTENT) == speculation_key({**PROMPT, "system_prompt": "另一版本"}, intent)
+
+    def test_flags_compared(self):
+        assert speculation_key(PROMPT, INTENT) != speculation_key({"matched_key": "low_awareness"}, INTENT)
+        audio = {**INTENT, "audio_output_intent": {"detected": True}}
+        assert speculation_key(PROMPT, INTENT) != speculation_key(PROMPT, audio)
+
+
+class TestSpeculativeStream:
+    """测试流式片段缓冲"""
+
+    @pytest.mark.asyncio
+    async def test_buffer_then_passthrough(self):
+        received = []
+
+        async def on_delta(chunk):
+            received.append(chunk.content)
+
+        stream = SpeculativeStream(on_delta)
+        await stream(LLMStreamChunk(id=None, content="您好"))
+        assert received == []
+
+        await stream.release()
+        await stream(LLMStreamChunk(id=None, content="，欢迎"))
+        assert received == ["您好", "，欢迎"]
+
+
+class TestResolve:
+    """测试投机结果确认"""
+
+    @pytest.mark.asyncio
+    async def test_hit(self):
+        agent, state = make_agent(), make_state()
+        await register(agent, state, {"matched_prompt": PROMPT, "intent_analysis": INTENT}, ("投机回复", {"total_tokens": 10}))
+
+        assert await agent._resolve_speculation(state) == ("投机回复", {"total_tokens": 10})
+        assert state.workflow_id not in agent._speculations
+
+    @pytest.mark.asyncio
+    async def test_miss_cancels(self):
+        agent, state = make_agent(), make_state(matched_prompt={"matched_key": "low_awareness"})
+        speculation = await register(
+            agent, state, {"matched_prompt": PROMPT, "intent_analysis": INTENT}, ("投机回复", {}), delay=10
+        )
+
+        assert await agent._resolve_speculation(state) is None
+        await asyncio.sleep(0)
+        assert speculation.task.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_cold_and_absent(self):
+        agent, state = make_agent(), make_state()
+        assert await agent._resolve_speculation(state) is None
+
+        await register(agent, state, None, None)
+        assert await agent._resolve_speculation(state) is None
+
+
+class TestDeferredWrites:
+    """测试投机期间写入类工具推迟执行"""
+
+    @pytest.mark.asyncio
+    async def test_executed_on_hit(self, stored):
+        agent, state = make_agent(), make_state()
+        speculation = await register(
+            agent, state, {"matched_prompt": PROMPT, "intent_analysis": INTENT}, ("投机回复", {}), delay=0.05
+        )
+
+        result, ok = await speculate_write(agent, speculation, "喜欢玫瑰香型")
+        assert result["success"] and not ok
+        assert stored == []
+
+        assert await agent._resolve_speculation(state) == ("投机回复", {})
+        assert stored == ["喜欢玫瑰香型"]
+
+    @pytest.mark.asyncio
+    async def test_dropped_on_miss(self, stored):
+        agent, state = make_agent(), make_state(matched_prompt={"matched_key": "low_awareness"})
+        speculation = await register(
+            agent, state, {"matched_prompt": PROMPT, "intent_analysis": INTENT}, ("投机回复", {}), delay=10
+        )
+
+        await speculate_write(agent, speculation, "喜欢玫瑰香型")
+        assert await agent._resolve_speculation(state) is None
+        assert stored == []
+
+    @pytest.mark.asyncio
+    async def test_not_deferred_outside_speculation(self, stored):
+        agent = make_agent()
+        tool_call = ToolCallData(id="call_1", name="store_episodic_memory", arguments={"content": "生日在五月"})
+
+        _, ok = await agent._call_tool(tool_call, "t1", uuid4())
+        assert ok and stored == ["生日在五月"]
+
+
+class TestCurrentInput:
+    """测试提示词中的本轮输入"""
+
+    def test_appended_only_when_missing(self):
+        history = [Message(role="user", content="你好"), Message(role="assistant", content="您好")]
+        current = [Message(role="user", content="有优惠吗")]
+
+        assert SalesAgent._with_current_input(history, current) == [*history, *current]
+        assert SalesAgent._with_current_input([*history, *current], current) == [*history, *current]
+        assert SalesAgent._with_current_input(history, None) == history
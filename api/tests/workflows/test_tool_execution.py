@@ -0,0 +1,87 @@
+"""
+工具调用执行测试
+
+验证同批工具调用并发执行且结果保序、同一次运行内相同调用复用结果，以及超时转换为错误结果且不缓存。
+"""
+import asyncio
+from collections import OrderedDict
+import time
+from uuid import uuid4
+
+import pytest
+
+from config import mas_config
+from core.agents.base.agent import BaseAgent
+from core.tools import tool_registry
+from infra.runtimes import ToolCallData
+from utils import get_component_logger
+
+
+class DummyAgent(BaseAgent):
+    async def process_conversation(self, state):
+        return {}
+
+
+def make_agent() -> DummyAgent:
+    agent = DummyAgent.__new__(DummyAgent)
+    agent._tool_results = OrderedDict()
+    agent.logger = get_component_logger(__name__)
+    return agent
+
+
+def call(query: str, name: str = "long_term_memory_retrieve") -> ToolCallData:
+    return ToolCallData(id=f"call_{query}", name=name, arguments={"query": query})
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    calls = []
+
+    async def search(tenant_id, thread_id, query, delay: float = 0.1):
+        calls.append(query)
+        await asyncio.sleep(delay)
+        return {"success": True, "query": query}
+
+    monkeypatch.setitem(tool_registry.TOOL_HANDLERS, "long_term_memory_retrieve", search)
+    return calls
+
+
+class TestExecuteTools:
+    """测试工具调用执行"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_and_ordered(self, handler, monkeypatch):
+        monkeypatch.setattr(mas_config, "LLM_TOOL_CONCURRENCY", 4)
+        agent = make_agent()
+
+        start = time.monotonic()
+        results = await agent._execute_tools([call("a"), call("b"), call("c")], uuid4(), "t1", uuid4())
+
+        assert time.monotonic() - start < 0.25
+        assert [result["query"] for result in results] == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_memoized_within_run(self, handler):
+        agent, run_id = make_agent(), uuid4()
+
+        results = await agent._execute_tools([call("a"), call("a")], run_id, "t1", uuid4())
+        await agent._execute_tools([call("a")], run_id, "t1", uuid4())
+        assert results[0] == results[1]
+        assert handler == ["a"]
+
+        await agent._execute_tools([call("a")], uuid4(), "t1", uuid4())
+        assert handler == ["a", "a"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_not_cached(self, handler, monkeypatch):
+        monkeypatch.setitem(tool_registry.TOOL_TIMEOUTS, "long_term_memory_retrieve", 0.01)
+        agent, run_id = make_agent(), uuid4()
+
+        results = await agent._execute_tools([call("a")], run_id, "t1", uuid4())
+        assert results[0]["success"] is False
+        assert not agent._tool_results
+
+    @pytest.mark.asyncio
+    async def test_unknown_tool(self, handler):
+        results = await make_agent()._execute_tools([call("a", name="unknown")], uuid4(), "t1", uuid4())
+        assert "未知工具" in results[0]["error"]
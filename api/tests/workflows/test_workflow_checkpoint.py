@@ -0,0 +1,92 @@
+"""
+工作流检查点测试
+
+验证Redis检查点存储下失败的运行从最后一个检查点恢复（已完成节点不再执行）、
+并行节点中已完成节点的写入被保留，以及运行结束后检查点被删除。
+"""
+import operator
+from typing import Annotated, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+import pytest
+
+from core.app.checkpointer import RedisCheckpointSaver
+
+
+class State(TypedDict):
+    steps: Annotated[list, operator.add]
+
+
+@pytest.fixture
+def saver(fake_redis):
+    saver = RedisCheckpointSaver()
+    saver._redis = fake_redis
+    return saver
+
+
+def build(saver, calls: list, fail: set, parallel: bool = False):
+    def node(name):
+        async def run(state: State) -> dict:
+            calls.append(name)
+            if name in fail:
+                fail.discard(name)
+                raise RuntimeError(f"{name} 失败")
+            return {"steps": [name]}
+        return run
+
+    graph = StateGraph(State)
+    for name in ("a", "b", "c"):
+        graph.add_node(name, node(name))
+    if parallel:
+        graph.add_edge(START, "a")
+        graph.add_edge(START, "b")
+        graph.add_edge(["a", "b"], "c")
+    else:
+        graph.add_edge(START, "a")
+        graph.add_edge("a", "b")
+        graph.add_edge("b", "c")
+    graph.add_edge("c", END)
+    return graph.compile(checkpointer=saver)
+
+
+class TestResume:
+    """测试从检查点恢复"""
+
+    @pytest.mark.asyncio
+    async def test_resume_sequential(self, saver):
+        calls = []
+        graph = build(saver, calls, fail={"b"})
+        config = {"configurable": {"thread_id": "run-1"}}
+
+        with pytest.raises(RuntimeError):
+            await graph.ainvoke({"steps": []}, config)
+        assert (await graph.aget_state(config)).next == ("b",)
+
+        result = await graph.ainvoke(None, config)
+        assert result["steps"] == ["a", "b", "c"]
+        assert calls == ["a", "b", "b", "c"]
+        assert not (await graph.aget_state(config)).next
+
+    @pytest.mark.asyncio
+    async def test_resume_keeps_parallel_writes(self, saver):
+        calls = []
+        graph = build(saver, calls, fail={"b"}, parallel=True)
+        config = {"configurable": {"thread_id": "run-2"}}
+
+        with pytest.raises(RuntimeError):
+            await graph.ainvoke({"steps": []}, config)
+
+        result = await graph.ainvoke(None, config)
+        assert sorted(result["steps"][:2]) == ["a", "b"]
+        assert calls.count("a") == 1
+
+    @pytest.mark.asyncio
+    async def test_delete_thread(self, saver):
+        graph = build(saver, [], fail=set())
+        config = {"configurable": {"thread_id": "run-3"}}
+        await graph.ainvoke({"steps": []}, config)
+        assert [c async for c in saver.alist(config)]
+
+        await saver.adelete_thread("run-3")
+        assert await saver.aget_tuple(config) is None
+        assert not saver._redis.hashes
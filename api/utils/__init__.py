@@ -9,6 +9,7 @@
 - logger_utils: 日志工具
 - external_client: 外部HTTP请求工具
 - yaml_loader: YAML工具
+- json_utils: JSON容错解析工具
 """
 
 from .time_utils import (
@@ -27,6 +28,7 @@ from .logger_utils import get_component_logger, configure_logging
 from .tracer_client import flush_traces
 from .external_client import ExternalClient
 from .yaml_loader import load_yaml_file
+from .json_utils import extract_json_object
 
 __all__ = [
     # 时间工具
@@ -51,6 +53,9 @@ __all__ = [
     # YAML工具
     "load_yaml_file",
 
+    # JSON工具
+    "extract_json_object",
+
     # Langfuse 追踪工具
     "flush_traces",
 ] 
\ No newline at end of file
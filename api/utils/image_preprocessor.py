@@ -0,0 +1,326 @@
+"""
+图片预处理工具
+
+客户图片、朋友圈图片原样以URL交给视觉模型时按原始分辨率计费，且由模型服务商回源拉取。
+预处理在本地完成拉取、缩放与重新编码，以紧凑的 data URL 交给模型：
+- 通过可替换的拉取函数获取图片（默认 aiohttp 共享连接池，限制超时与大小，仅允许公网 http/https 地址）
+- 长边缩放到 IMAGE_PREPROCESS_MAX_EDGE，统一重新编码为 JPEG
+- 按感知哈希（dHash）去除重复或近似重复的图片
+- 处理结果按规范化URL在进程内缓存，重复图片不再拉取
+
+拉取或解码失败时返回原始URL，由模型服务商自行拉取。
+
+使用方式:
+    from utils.image_preprocessor import image_preprocessor
+
+    image = await image_preprocessor.prepare(url)
+    images = await image_preprocessor.prepare_many(urls)
+"""
+
+import asyncio
+import base64
+import binascii
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import io
+import ipaddress
+import socket
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+from PIL import Image, ImageOps
+from yarl import URL
+
+from config import mas_config
+from .logger_utils import get_component_logger
+from .metrics import metrics
+
+logger = get_component_logger(__name__, "ImagePreprocessor")
+
+ImageFetcher = Callable[[str], Awaitable[bytes]]
+
+# 对象存储签名URL中随请求变化、与图片内容无关的查询参数
+_SIGNING_PARAMS = frozenset({"expires", "signature", "ossaccesskeyid", "security-token", "sign", "auth_key"})
+_SIGNING_PREFIXES = ("x-oss-", "x-amz-", "x-cos-", "q-sign", "q-ak", "q-key", "q-header", "q-url")
+
+# 拉取图片时跟随的最大重定向次数（每一跳重新校验）
+_MAX_REDIRECTS = 3
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+
+def normalize_image_url(url: str) -> str:
+    """
+    规范化图片URL：协议与主机小写，去除片段与签名类查询参数，其余参数排序
+
+    参数:
+        url: 图片URL
+
+    返回:
+        str: 规范化后的URL
+    """
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in _SIGNING_PARAMS and not key.lower().startswith(_SIGNING_PREFIXES)
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+def decode_data_url(url: str) -> bytes:
+    """解码 data URL 的内容，超过 IMAGE_PREPROCESS_MAX_BYTES 时抛出 ValueError"""
+    max_bytes = mas_config.IMAGE_PREPROCESS_MAX_BYTES
+    header, _, payload = url.partition(",")
+    if header.endswith(";base64"):
+        # 先按编码长度估算，避免解码超大内容
+        if len(payload) * 3 // 4 > max_bytes + 2:
+            raise ValueError(f"data URL 过大: 约 {len(payload) * 3 // 4} 字节")
+        data = base64.b64decode(payload, validate=False)
+    else:
+        data = payload.encode()
+    if len(data) > max_bytes:
+        raise ValueError(f"data URL 过大: {len(data)} 字节")
+    return data
+
+
+def _is_public_address(host: str) -> bool:
+    """是否为公网地址（排除内网、回环、链路本地、保留与组播地址）"""
+    address = ipaddress.ip_address(host.partition("%")[0])
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+def _check_fetch_url(url: str):
+    """
+    校验待拉取的图片URL：仅允许 http/https；主机为IP字面量时须为公网地址
+
+    主机名在建立连接时由 _PublicResolver 校验解析结果。
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"不支持的图片URL: {url[:100]}")
+    try:
+        is_public = _is_public_address(parts.hostname)
+    except ValueError:
+        return
+    if not is_public:
+        raise ValueError(f"拒绝拉取非公网地址: {parts.hostname}")
+
+
+class _PublicResolver(aiohttp.ThreadedResolver):
+    """
+    只接受公网地址的DNS解析器
+
+    每次建立连接（含重定向后的连接）时校验实际连接的地址，避免校验与连接之间的DNS重绑定。
+    """
+
+    async def resolve(self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET):
+        addresses = await super().resolve(host, port, family)
+        if not all(_is_public_address(address["host"]) for address in addresses):
+            raise OSError(f"图片地址解析到非公网地址: {host}")
+        return addresses
+
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """进程内共享的拉取连接池，首次使用时创建（事件循环变化时重建）"""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session_loop = loop
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(resolver=_PublicResolver()),
+            timeout=aiohttp.ClientTimeout(total=mas_config.IMAGE_PREPROCESS_FETCH_TIMEOUT_SECONDS)
+        )
+    return _session
+
+
+async def close_http_session():
+    """关闭共享的拉取连接池（应用关闭时调用）"""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = _session_loop = None
+
+
+async def http_fetch(url: str) -> bytes:
+    """
+    默认拉取函数：通过共享连接池下载图片
+
+    仅允许公网 http/https 地址，重定向逐跳校验（最多 _MAX_REDIRECTS 次）；
+    超时与大小受 IMAGE_PREPROCESS_FETCH_TIMEOUT_SECONDS / IMAGE_PREPROCESS_MAX_BYTES 限制。
+    """
+    max_bytes = mas_config.IMAGE_PREPROCESS_MAX_BYTES
+    session = _get_session()
+    for _ in range(_MAX_REDIRECTS + 1):
+        _check_fetch_url(url)
+        async with session.get(url, allow_redirects=False) as response:
+            if response.status in _REDIRECT_STATUSES and (location := response.headers.get("Location")):
+                url = str(response.url.join(URL(location)))
+                continue
+            response.raise_for_status()
+            if (response.content_length or 0) > max_bytes:
+                raise ValueError(f"图片过大: {response.content_length} 字节")
+            data = await response.content.read(max_bytes + 1)
+            if len(data) > max_bytes:
+                raise ValueError("图片过大")
+            return data
+    raise ValueError(f"图片重定向次数超过 {_MAX_REDIRECTS} 次")
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """
+    计算图片的差值哈希（dHash，64位）
+
+    缩放到 9x8 灰度图，逐行比较相邻像素亮度；缩放、重新压缩后的同一图片哈希相同或仅差少数位。
+    """
+    pixels = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """预处理后的图片"""
+    source: str  # 原始URL
+    url: str  # 交给模型的URL（data URL，失败时为原始URL）
+    phash: Optional[int] = None  # 感知哈希，失败时为空
+    original_bytes: int = 0
+    prepared_bytes: int = 0
+
+    @property
+    def processed(self) -> bool:
+        return self.phash is not None
+
+
+class ImagePreprocessor:
+    """视觉模型调用前的图片预处理"""
+
+    def __init__(self, fetcher: Optional[ImageFetcher] = None):
+        self.fetcher = fetcher or http_fetch
+        # 规范化URL -> 处理结果（进程内LRU）
+        self._cache: OrderedDict[str, PreparedImage] = OrderedDict()
+
+    async def prepare(self, url: str) -> PreparedImage:
+        """
+        预处理单张图片
+
+        参数:
+            url: 图片URL或data URL
+
+        返回:
+            PreparedImage: 处理结果，失败时 url 为原始URL
+        """
+        if not mas_config.IMAGE_PREPROCESS_ENABLED:
+            return PreparedImage(source=url, url=url)
+
+        is_data_url = url.startswith("data:")
+        cache_key = None if is_data_url else normalize_image_url(url)
+        cached = self._cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            metrics.incr("image_preprocess", result="hit")
+            return PreparedImage(
+                source=url,
+                url=cached.url,
+                phash=cached.phash,
+                original_bytes=cached.original_bytes,
+                prepared_bytes=cached.prepared_bytes
+            )
+
+        try:
+            data = decode_data_url(url) if is_data_url else await self.fetcher(url)
+            encoded, phash = await asyncio.to_thread(self._encode, data)
+        except (
+            aiohttp.ClientError, asyncio.TimeoutError, binascii.Error, OSError, ValueError, Image.DecompressionBombError
+        ) as e:
+            logger.warning(f"图片预处理失败，使用原始URL: {e}")
+            metrics.incr("image_preprocess", result="failed")
+            return PreparedImage(source=url, url=url)
+
+        prepared = PreparedImage(
+            source=url,
+            url="data:image/jpeg;base64," + base64.b64encode(encoded).decode(),
+            phash=phash,
+            original_bytes=len(data),
+            prepared_bytes=len(encoded)
+        )
+        metrics.incr("image_preprocess", result="miss")
+        metrics.observe("image_preprocess_bytes_saved", max(len(data) - len(encoded), 0))
+
+        if cache_key and mas_config.IMAGE_PREPROCESS_CACHE_SIZE > 0:
+            self._cache[cache_key] = prepared
+            while len(self._cache) > mas_config.IMAGE_PREPROCESS_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return prepared
+
+    async def prepare_many(self, urls: list[str]) -> list[PreparedImage]:
+        """
+        并发预处理多张图片，并按感知哈希去除重复图片（保留首次出现的图片，顺序不变）
+
+        参数:
+            urls: 图片URL列表
+
+        返回:
+            list[PreparedImage]: 去重后的处理结果
+        """
+        semaphore = asyncio.Semaphore(mas_config.MULTIMODAL_IMAGE_CONCURRENCY)
+
+        async def prepare(url: str) -> PreparedImage:
+            async with semaphore:
+                return await self.prepare(url)
+
+        unique_urls = list(dict.fromkeys(urls))
+        images = await asyncio.gather(*(prepare(url) for url in unique_urls))
+
+        kept: list[PreparedImage] = []
+        for image in images:
+            if image.processed and any(
+                other.processed and self._distance(image.phash, other.phash) <= mas_config.IMAGE_DEDUP_MAX_DISTANCE
+                for other in kept
+            ):
+                metrics.incr("image_preprocess", result="duplicate")
+                continue
+            kept.append(image)
+
+        if len(kept) < len(urls):
+            logger.info(f"图片去重: {len(urls)} -> {len(kept)}")
+        return kept
+
+    @staticmethod
+    def _distance(a: int, b: int) -> int:
+        return (a ^ b).bit_count()
+
+    @staticmethod
+    def _encode(data: bytes) -> tuple[bytes, int]:
+        """缩放并重新编码为JPEG，返回 (编码结果, 感知哈希)"""
+        with Image.open(io.BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+
+            max_edge = mas_config.IMAGE_PREPROCESS_MAX_EDGE
+            if max(image.size) > max_edge:
+                image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=mas_config.IMAGE_PREPROCESS_JPEG_QUALITY, optimize=True)
+            return buffer.getvalue(), perceptual_hash(image)
+
+
+# 全局预处理器
+image_preprocessor = ImagePreprocessor()
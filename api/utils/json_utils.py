@@ -0,0 +1,67 @@
+"""
+JSON工具函数
+
+提供从LLM文本输出中容错提取JSON对象的功能，
+用于不支持结构化输出的供应商或结构化调用失败后的兜底解析。
+"""
+
+import json
+from typing import Any, Optional
+
+_decoder = json.JSONDecoder()
+
+# 最多尝试的候选起始位置数，避免在长文本中逐个 "{" 反复解码
+MAX_CANDIDATES = 8
+
+
+def _strip_code_fence(text: str) -> str:
+    """去除markdown代码块包裹（```json ... ```），无代码块时原样返回"""
+    start = text.find("```")
+    if start == -1:
+        return text
+    body_start = text.find("\n", start)
+    if body_start == -1:
+        return text
+    end = text.find("```", body_start)
+    return text[body_start + 1:end if end != -1 else len(text)]
+
+
+def extract_json_object(text: str) -> Optional[dict[str, Any]]:
+    """
+    从LLM输出中提取第一个完整的JSON对象
+
+    依次尝试：整体解析 → 去除代码块后解析 → 从每个 "{" 起增量解码。
+    增量解码在首个完整对象结束处停止，不会像贪婪正则那样跨越多个对象或扫描到文本末尾。
+
+    参数:
+        text: LLM输出文本
+
+    返回:
+        Optional[dict]: 解析出的JSON对象，未找到时为None
+    """
+    if not text:
+        return None
+
+    text = text.strip()
+    if text.startswith("{"):
+        try:
+            result = json.loads(text)
+            if isinstance(result, dict):
+                return result
+        except json.JSONDecodeError:
+            pass
+
+    text = _strip_code_fence(text)
+    position = text.find("{")
+    for _ in range(MAX_CANDIDATES):
+        if position == -1:
+            break
+        try:
+            result, _ = _decoder.raw_decode(text, position)
+            if isinstance(result, dict):
+                return result
+        except json.JSONDecodeError:
+            pass
+        position = text.find("{", position + 1)
+
+    return None
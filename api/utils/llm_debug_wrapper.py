@@ -11,7 +11,7 @@ class LLMDebugWrapper:
     """
     LLMClient的调试包装器
     
-    拦截 completions 和 responses 方法调用，
+    拦截 completions、stream 和 responses 方法调用，
     记录完整的 prompt input (system, role-level) 和 output。
     """
     def __init__(self, client: Any, node_name: str, logger: Any):
@@ -29,6 +29,13 @@ class LLMDebugWrapper:
         self._log_response(response, "Completions")
         return response
 
+    async def stream(self, request: Any) -> Any:
+        self._log_request(request, "Stream")
+        async for chunk in self.client.stream(request):
+            if chunk.response is not None:
+                self._log_response(chunk.response, "Stream")
+            yield chunk
+
     async def responses(self, request: Any) -> Any:
         self._log_request(request, "Responses")
         response = await self.client.responses(request)
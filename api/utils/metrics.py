@@ -0,0 +1,104 @@
+"""
+进程内指标工具
+
+提供轻量级的计数器与耗时汇总，用于缓存命中率、超时次数等运行指标。
+指标只保存在当前进程内，通过健康检查端点读取。
+
+使用方式:
+    from utils.metrics import metrics
+
+    metrics.incr("cache_requests", cache="embedding", result="hit")
+    metrics.observe("node_latency_ms", 123.4, node="sentiment")
+    metrics.hit_ratio("cache_requests", cache="embedding")
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+import threading
+from typing import Any
+
+LabelSet = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class Summary:
+    """耗时/数值汇总"""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class MetricsRegistry:
+    """线程安全的进程内指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[LabelSet, float]] = defaultdict(lambda: defaultdict(float))
+        self._summaries: dict[str, dict[LabelSet, Summary]] = defaultdict(lambda: defaultdict(Summary))
+
+    @staticmethod
+    def _labels(labels: dict[str, Any]) -> LabelSet:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """计数器累加"""
+        with self._lock:
+            self._counters[name][self._labels(labels)] += value
+
+    def observe(self, name: str, value: float, **labels):
+        """记录一次数值观测（如耗时）"""
+        with self._lock:
+            summary = self._summaries[name][self._labels(labels)]
+            summary.count += 1
+            summary.total += value
+            summary.max = max(summary.max, value)
+
+    def get(self, name: str, **labels) -> float:
+        """读取计数器当前值"""
+        with self._lock:
+            return self._counters.get(name, {}).get(self._labels(labels), 0.0)
+
+    def hit_ratio(self, name: str, **labels) -> float:
+        """
+        计算命中率
+
+        约定命中/未命中以 `result="hit"` / `result="miss"` 标签区分。
+        """
+        hits = self.get(name, result="hit", **labels)
+        misses = self.get(name, result="miss", **labels)
+        total = hits + misses
+        return hits / total if total else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        """导出全部指标"""
+        def fmt(label_set: LabelSet) -> str:
+            return ",".join(f"{k}={v}" for k, v in label_set) or "_"
+
+        with self._lock:
+            return {
+                "counters": {
+                    name: {fmt(k): v for k, v in series.items()}
+                    for name, series in self._counters.items()
+                },
+                "summaries": {
+                    name: {
+                        fmt(k): {"count": s.count, "avg": round(s.avg, 3), "max": round(s.max, 3)}
+                        for k, s in series.items()
+                    }
+                    for name, series in self._summaries.items()
+                },
+            }
+
+    def reset(self):
+        """清空全部指标（测试用）"""
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+# 全局指标实例
+metrics = MetricsRegistry()